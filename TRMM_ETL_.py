@@ -16,8 +16,6 @@
 # Files that are extracted for TRMM are in an expected filename format
 # 'TRMM-3B42RT-V7-Rain_2014-05-03T03Z.tif.gz' as an example
 
-import arcpy
-from arcpy import env
 import datetime
 import time
 import os
@@ -31,20 +29,39 @@ import json
 import ftplib
 import re 
 import pickle
-# SD's files: "arcpy_utils.py" and "etl_utls"
-from arcpy_utils import FileGeoDatabase, RasterCatalog, AGServiceManager
-from etl_utils import FTPDownloadManager
-
-# SD's file for creating static maps.
-from arcpy_trmm_custom_raster import TRMMCustomRasterRequest, TRMMCustomRasterCreator
+import threading
 from copy import deepcopy
 
+# ArcGIS items.  These are optional so the script can also run with the 'local' geoprocessing backend (see ks_GeoprocessingBackend)
+try:
+    import arcpy
+    from arcpy import env
+    # SD's files: "arcpy_utils.py" and "etl_utls"
+    from arcpy_utils import FileGeoDatabase, RasterCatalog, AGServiceManager
+    from etl_utils import FTPDownloadManager
+    # SD's file for creating static maps.
+    from arcpy_trmm_custom_raster import TRMMCustomRasterRequest, TRMMCustomRasterCreator
+except ImportError:
+    arcpy = None
+
 # External Libs in support of ETL processes
 import boto     # For Amazon S3 Interfacing
 
 # ETL Support Items (Used in ALL ETLs)
 import ks_ConfigLoader      # Handles loading the xml config file
 import ks_AdpatedLogger     # Handles logging items in a standardized way
+import ks_FTPDownloadPool   # Pooled, rate limited FTP downloads
+import ks_ExtractManifest   # Remembers which granules were already extracted/transformed/loaded
+import ks_StreamingDownload # Chunked downloads with streaming gzip decompression
+import ks_S3Extract         # Date pruned S3 listing
+import ks_Pipeline          # Bounded queue pipeline for the streaming ETL mode
+import ks_GeoprocessingBackend  # Geoprocessing operations behind a small interface
+import ks_MosaicLoad        # Batched mosaic dataset load
+import ks_RollingAccumulator    # Rolling 1/3/7/30 day accumulations
+import ks_Metrics           # Timed spans and counters written next to the log
+import ks_DateIndex         # Dates parsed from file names (compiled pattern, shared cache)
+import ks_TransformPool     # Per granule Transform, run in worker processes
+import ks_MappedRaster      # Memory mapped 3 hour rasters, open handles in an LRU cache
 
 #--------------------------------------------------------------------------
 # Global Variables
@@ -52,15 +69,110 @@ import ks_AdpatedLogger     # Handles logging items in a standardized way
 #--------------------------------------------------------------------------
 
 # The only hard coded item in this whole script.  This is the location of the config file of which the contents are then used in script execution.
+#   The TRMM_ETL_CONFIG environment variable overrides it (used by benchmarks/bench_EndToEnd.py).
 #g_PathToConfigFile = r"C:\kris\!!Work\ETL_TRMM\config\config_TRMM.xml"
-g_PathToConfigFile = r"D:\SERVIR\Scripts\TRMM\config_TRMM.xml"
-
-# Load the Config XML File into a settings dictionary
-g_ConfigSettings = ks_ConfigLoader.ks_ConfigLoader(g_PathToConfigFile)
+g_PathToConfigFile = os.environ.get("TRMM_ETL_CONFIG", r"D:\SERVIR\Scripts\TRMM\config_TRMM.xml")
+
+# Every setting in the config file, with its type and the value used when it is missing (see ks_ConfigLoader.Setting).
+#   The file is checked against this list when the script starts, a setting which is not here (a typo), a missing
+#   required setting or a value of the wrong type stops the script before anything is downloaded.
+#   A setting the script reads has to be added here (reading one which is not raises AttributeError).
+Setting = ks_ConfigLoader.Setting
+g_VariableDictionary_Fields = {
+    'variable_name': None, 'file_prefix': None, 'file_suffix': None, 'data_type': None, 'mosaic_name': None, 'primary_date_field': None,
+    'service_dict_list': ('folder_name', 'service_name', 'service_type')
+}
+g_ConfigSchema = [
+    # Generic Settings
+    Setting('Name', isRequired=True),
+    Setting('ScratchFolder', "path", isRequired=True),
+    Setting('Extract_Manifest_FileName', default="ETL_Manifest.sqlite"),
+    Setting('MaxFilesPerSession', "int", default=99999),
+    Setting('RegEx_DateFilterString', isRequired=True),
+    Setting('Python_DateFormat', isRequired=True),
+    Setting('Query_DateFormat', isRequired=True),
+    Setting('GeoDB_Location', "path", isRequired=True),
+    Setting('GeoDB_FileName', isRequired=True),
+    Setting('Geoprocessing_Backend', default="arcpy", choices=("arcpy", "local")),
+    Setting('Raster_Final_Output_Location', "path", isRequired=True),
+    Setting('Download_File_Extension', isRequired=True),
+    # Pipeline Options
+    Setting('ETL_Pipeline_Mode', "bool", default=False),
+    Setting('ETL_Pipeline_MaxQueueSize', "int", default=8),
+    Setting('Transform_Workers', "int", default=1),
+    Setting('Transform_Single_Pass_Write', "bool", default=True),
+    Setting('Load_Batch_Mode', "bool", default=True),
+    # Logging Options
+    Setting('DetailedLogging', "bool", default=False),
+    Setting('Logger_Output_Location', "path", isRequired=True),
+    Setting('Logger_Prefix_Variable', isRequired=True),
+    Setting('Logger_Num_Of_Days_To_Keep_Log', "int", isRequired=True),
+    Setting('Logger_Date_Partitioned', "bool", default=False),
+    Setting('Logger_Max_Total_MB', "int", default=0),
+    Setting('Logger_Background_Sweep', "bool", default=False),
+    Setting('Logger_Async', "bool", default=False),
+    Setting('Logger_Console_Echo', "bool", default=True),
+    Setting('Logger_Structured_Records', "bool", default=False),
+    Setting('Metrics_Enabled', "bool", default=True),
+    Setting('Metrics_Prometheus_FilePath', "path", default=None),
+    # FTP Config
+    Setting('Extract_Source', default="ftp", choices=("ftp", "s3")),
+    Setting('FTP_Host', default="trmmopen.gsfc.nasa.gov"),
+    Setting('FTP_Port', "int", default=21),
+    Setting('Extract_StartDate_Fallback_Hours', "int", default=24),
+    Setting('FTP_User', default="anonymous"),
+    Setting('FTP_Pass', default="anonymous"),
+    Setting('FTP_SubFolderPath', default=None),
+    Setting('FTP_GIS_SubFolderPath', default="pub/gis"),
+    Setting('FTP_Download_Workers', "int", default=4),
+    Setting('FTP_MaxRequestsPerSecond', "float", default=2.0),
+    # Amazon S3 Config
+    Setting('s3_UseLocal_IAM_Role', "bool", isRequired=True),
+    Setting('s3_BucketName', isRequired=True),
+    Setting('s3_BucketRootPath', isRequired=True),
+    Setting('s3_UserName', default=None),
+    Setting('s3_AccessKeyID', isRequired=True),
+    Setting('s3_SecretAccessKey', isRequired=True),
+    Setting('s3_PathTo_TRMM_Files', isRequired=True),
+    Setting('s3_Is_Date_Ordered_Prefix', "bool", default=True),
+    Setting('s3_Download_Workers', "int", default=4),
+    Setting('s3_Download_MaxRetries', "int", default=4),
+    Setting('s3_PathTo_Output_Thumb_Files', default=None),
+    # Raster Business Logic 'variable dictionary' Settings (a list of dicts, 'service_dict_list' a list of dicts in each)
+    Setting('VariableDictionaryList', "item_list", isRequired=True, fields=g_VariableDictionary_Fields),
+    # Specialized Settings For TRMM ETL
+    Setting('TRMM_ColorMapFile_3_Hour', "path", isRequired=True),
+    Setting('TRMM_SpatialProjection', default=None),
+    Setting('TRMM_RasterTransform_CoordSystem', isRequired=True),
+    Setting('TRMM_RasterArchiveDays', "interval", default=datetime.timedelta(days=90)),
+    Setting('TRMM_Is_Create_New_RasterCatalog', "bool", default=False),
+    Setting('trmm1Day_RasterCatalogName', isRequired=True),
+    Setting('trmm3Day_RasterCatalogName', default="TRMM3Day"),
+    Setting('trmm7Day_RasterCatalogName', isRequired=True),
+    Setting('trmm30Day_RasterCatalogName', isRequired=True),
+    Setting('trmm1Day_ColorMapLocation', "path", isRequired=True),
+    Setting('trmm3Day_ColorMapLocation', "path", default=None),
+    Setting('trmm7Day_ColorMapLocation', "path", isRequired=True),
+    Setting('trmm30Day_ColorMapLocation', "path", isRequired=True),
+    Setting('trmm3Hour_ColorMapLocation', "path", isRequired=True),
+    Setting('TRMM30Day_Use_Rolling_Accumulator', "bool", default=True),
+    Setting('Composite_State_FolderName', default="Composite_State"),
+    Setting('Composite_Max_Incremental_Updates', "int", default=240),
+    Setting('Composite_Max_Memory_MB', "int", default=512),
+    Setting('Raster_Cache_Max_Handles', "int", default=ks_MappedRaster.DEFAULT_MAX_HANDLES),
+    Setting('Raster_Cache_Max_MB', "int", default=256),
+    Setting('TRMM_Short_Composites_Source', default="ftp", choices=("ftp", "local"))
+]
+
+# Load the Config XML File into a read only settings object (converted values are cached next to the file, see ks_ConfigLoader.load_Typed_Settings)
+g_ConfigSettings = ks_ConfigLoader.load_Typed_Settings(g_PathToConfigFile, g_ConfigSchema)
 
 # Detailed Logging Setting, Default to False
 g_DetailedLogging_Setting = False
 
+# Geoprocessing backend (created on first use from the 'Geoprocessing_Backend' setting, see get_Geoprocessing_Backend)
+g_Geoprocessing_Backend = None
+
 #--------------------------------------------------------------------------
 # Settings and Logger
 #   Code that initializes and supports getting settings
@@ -69,24 +181,42 @@ g_DetailedLogging_Setting = False
 
 # Loads the Settings object.
 def get_Settings_Obj():
-    Current_Config_Object = g_ConfigSettings.xmldict['ConfigObjectCollection']['ConfigObject']
-    return Current_Config_Object
+    return g_ConfigSettings
 
 # Needed to prevent errors (while the 'printMsg' function is global...)
 settingsObj = get_Settings_Obj()
 # Logger Settings Vars
-theLoggerOutputBasePath = settingsObj['Logger_Output_Location'] # Folder where logger output is stored.
-theLoggerPrefixVar = settingsObj['Logger_Prefix_Variable'] # String that gets prepended to the name of the log file.
-theLoggerNumOfDaysToStore = settingsObj['Logger_Num_Of_Days_To_Keep_Log'] # Number of days to keep log
+theLoggerOutputBasePath = settingsObj.Logger_Output_Location # Folder where logger output is stored.
+theLoggerPrefixVar = settingsObj.Logger_Prefix_Variable # String that gets prepended to the name of the log file.
+theLoggerNumOfDaysToStore = settingsObj.Logger_Num_Of_Days_To_Keep_Log # Number of days to keep log
+# Id of this run, on every structured log record and metrics record
+g_Run_ID = datetime.datetime.now().strftime('%Y%m%dT%H%M%S')
 # KS Mod, 2014-01   Adding a Script Logger 3        START
 g_theLogger = ks_AdpatedLogger.ETLDebugLogger(theLoggerOutputBasePath, theLoggerPrefixVar+"_log", {
 
-        "debug_log_archive_days":theLoggerNumOfDaysToStore
+        "debug_log_archive_days":theLoggerNumOfDaysToStore,
+        "is_async":settingsObj.Logger_Async,
+        "is_console_echo":settingsObj.Logger_Console_Echo,
+        "is_structured":settingsObj.Logger_Structured_Records,
+        "run_id":g_Run_ID,
+        "is_date_partitioned":settingsObj.Logger_Date_Partitioned,
+        "max_total_log_bytes":settingsObj.Logger_Max_Total_MB * 1024 * 1024,
+        "is_background_sweep":settingsObj.Logger_Background_Sweep
+    })
+
+# Run metrics (JSON lines file next to the log, in the same day folder so it is removed with it), Metrics_Enabled defaults to on
+g_Metrics = ks_Metrics.ETLMetrics(g_theLogger.partition_dir, theLoggerPrefixVar+"_metrics", {
+
+        "is_enabled":settingsObj.Metrics_Enabled,
+        "run_id":g_Run_ID
     })
 
 
 # Add to the log
-def addToLog(theMsg, detailedLoggingItem = False):
+#   theMsg can be a format string with its values in msgArgs (theMsg % msgArgs), or a function returning the message.
+#   Either way the message is only built when it is going to be logged, so detailed items in loops cost next to
+#   nothing when detailed logging is off.  A plain string with no msgArgs is logged as it is.
+def addToLog(theMsg, detailedLoggingItem = False, *msgArgs):
 
     global g_theLogger, g_DetailedLogging_Setting
     if detailedLoggingItem == True:
@@ -99,12 +229,45 @@ def addToLog(theMsg, detailedLoggingItem = False):
 
     # These lines wrap each log entry onto a new line prefixed by the date/time of code execution
 
+    if callable(theMsg):
+        theMsg = theMsg()
+    elif msgArgs:
+        theMsg = theMsg % msgArgs
+
     currText = ""
     currText += theMsg
 
 
     g_theLogger.updateDebugLog(currText)
 
+# Correlation id of a granule in this run.  The extract and transform items carry it ('Correlation_ID'), so the
+#   records of every stage for one granule can be put together (see ks_LogSummary).
+def get_Correlation_ID(dateString):
+    return g_Run_ID + "-" + str(dateString)
+
+# Add a structured record for one granule in one stage to the log records file (only if Logger_Structured_Records is on)
+#   seconds and numOfBytes are None when they do not apply, extraFields are added to the record as they are.
+def addGranuleRecord(stage, functionName, dateString, correlationID, seconds, numOfBytes, outcome, extraFields = None):
+
+    global g_theLogger
+    if not g_theLogger.is_structured:
+        return
+    if correlationID == None:
+        correlationID = get_Correlation_ID(dateString)
+    theRecord = {
+        'type': "granule",
+        'stage': stage,
+        'function': functionName,
+        'granule': dateString,
+        'cid': correlationID,
+        'seconds': round(seconds, 6) if seconds != None else None,
+        'bytes': numOfBytes,
+        'outcome': outcome
+    }
+    if extraFields != None:
+        theRecord.update(extraFields)
+    g_theLogger.updateDebugRecord(theRecord)
+
 # Calculate and return time elapsed since input time
 def timeElapsed(timeS):
     seconds = time.time() - timeS
@@ -127,39 +290,19 @@ def get_NewStart_Time():
 def get_Elapsed_Time_As_String(timeInput):
     return timeElapsed(timeInput)
 
+# Get the number of seconds elapsed from the input time (for the metrics).
+def get_Elapsed_Seconds(timeInput):
+    return time.time() - timeInput
 
-# Parse "0" or "1" from settings into a bool.
-def get_BoolSetting(theSetting):
-    try:
-        if theSetting == "1":
-            return True
-        else:
-            return False
-    except:
-        addToLog("get_BoolSetting: SCRIPT ERROR!! ERROR PARSING BOOL SETTING FOR (theSetting), " + str(theSetting) + ", Returning False")
-        return False
-
-
-# Release Candidate Function for implementation
-# Force item to be in a list
-def convert_Obj_To_List(item_Object):
-    retList = list()
-
-    # Quick test to see if the item is already a list
-    testList = []
-    isAlreadyList = False
-    try:
-        testList + item_Object
-        isAlreadyList = True
-    except:
-        isAlreadyList = False
 
-    # if the item is already a list, return it, if not, add it to an empty one.
-    if isAlreadyList == True:
-        return item_Object
-    else:
-        retList.append(item_Object)
-        return retList
+# Returns the geoprocessing backend chosen by the 'Geoprocessing_Backend' setting, "arcpy" (default) or "local".
+def get_Geoprocessing_Backend():
+    global g_Geoprocessing_Backend
+    if g_Geoprocessing_Backend == None:
+        # Every geoprocessing call is timed in the run metrics
+        g_Geoprocessing_Backend = ks_Metrics.InstrumentedBackend(ks_GeoprocessingBackend.get_Backend(get_Settings_Obj().Geoprocessing_Backend), g_Metrics)
+        addToLog("get_Geoprocessing_Backend: Using the '" + str(g_Geoprocessing_Backend.name) + "' geoprocessing backend", True)
+    return g_Geoprocessing_Backend
 
 
 # Makes a directory on the filesystem if it does not already exist.
@@ -178,22 +321,9 @@ def make_And_Validate_Folder(thePath):
         return False
 
 
-# returns todays date minus the interval ("90 days") for example
-def Unsorted_GetOldestDate(intervalString):
-    try:
-        intervalValue = int(intervalString.split(" ")[0])
-        intervalType = intervalString.split(" ")[1]
-
-        deltaArgs = {intervalType:intervalValue}
-
-        # Get the oldest date before now based on the interval and date format
-        oldestDate = datetime.datetime.utcnow() - datetime.timedelta(**deltaArgs)
-    except:
-        e = sys.exc_info()[0]
-        print("    Error getting oldest date: System Error message: "+ str(e))
-        return None
-
-    return oldestDate
+# returns todays date minus the interval (a datetime.timedelta, the "90 days" of an interval setting for example)
+def Unsorted_GetOldestDate(theInterval):
+    return datetime.datetime.utcnow() - theInterval
 
 
 # Remove old raster(s) from the mosaic dataset(s) and remove the files from
@@ -216,19 +346,15 @@ def Unsorted_removeRastersMosaicDataset(varList,mdWS,oldDate,qryDateFmt):
 
             try:
                 # Remove the rasters from the mosaic dataset based on the query
-                startCount = int(arcpy.GetCount_management(mosaicDS).getOutput(0))
-                arcpy.RemoveRastersFromMosaicDataset_management(mosaicDS, str(query), "NO_BOUNDARY", "NO_MARK_OVERVIEW_ITEMS", \
-                                                                "NO_DELETE_OVERVIEW_IMAGES", "NO_DELETE_ITEM_CACHE", \
-                                                                "REMOVE_MOSAICDATASET_ITEMS", "NO_CELL_SIZES")
-                endCount = int(arcpy.GetCount_management(mosaicDS).getOutput(0))
+                numRemovedFromMosaic = get_Geoprocessing_Backend().remove_Mosaic_Rasters_Before(mosaicDS, dateField, oldDate, qryDateFmt)
 
-                addToLog("Unsorted_removeRastersMosaicDataset: Removed "+str(startCount-endCount)+" rasters ("+str(query)+") from "+str(mosaicDSName))
-                numRemoved = numRemoved + (startCount-endCount)
+                addToLog("Unsorted_removeRastersMosaicDataset: Removed "+str(numRemovedFromMosaic)+" rasters ("+str(query)+") from "+str(mosaicDSName))
+                numRemoved = numRemoved + numRemovedFromMosaic
 
             # Handle errors for removing rasters
             except:
 
-                addToLog("Unsorted_removeRastersMosaicDataset: Error removing rasters from "+mosaicDSName+", ArcPy message"+str(arcpy.GetMessages()))
+                addToLog("Unsorted_removeRastersMosaicDataset: Error removing rasters from "+mosaicDSName+", ArcPy message"+str(get_Geoprocessing_Backend().get_Messages()))
                 pass
 
     return numRemoved
@@ -238,35 +364,29 @@ def Unsorted_removeRastersMosaicDataset(varList,mdWS,oldDate,qryDateFmt):
 def Unsorted_dataCleanup(rasterOutputLocation,oldDate, regExp_Pattern, rastDateFormat): #,dateFmt):
     numDeleted = 0
 
-    arcpy.env.workspace = rasterOutputLocation
+    theBackend = get_Geoprocessing_Backend()
     dateFmt = "%Y%m%d%H"
     oldDateStr = oldDate.strftime(dateFmt)
     oldDateInt = int(oldDateStr)
     addToLog("dataCleanup: Deleting rasters older than, "+str(oldDateInt))
 
     try:
-        for raster in arcpy.ListRasters("*", "All"):
-            rasterDatesFoundList = re.findall(regExp_Pattern,str(raster))
-            rastDateStr = rasterDatesFoundList[0]
-			
-            # Convert to a date format that 'int()' can understand.
-            tempDateTime = datetime.datetime.strptime(rastDateStr, rastDateFormat)
-            tempDateTimeStr = tempDateTime.strftime(dateFmt)
-            rastDateInt = int(tempDateTimeStr)
+        # Sorted by date once, everything before the cutoff hour is one binary search away (rasters without a date are left alone)
+        theListing = Extract_Support_Get_DateSortedListing([str(raster) for raster in theBackend.list_Rasters(rasterOutputLocation)], regExp_Pattern, rastDateFormat)
+        for raster in theListing.iter_Before(datetime.datetime.strptime(oldDateStr, dateFmt)):
 
             # KS Refactor..  if a delete operation fails, the code keeps on going and tries the next one....
             try:
-                if(oldDateInt > rastDateInt):
-                    arcpy.Delete_management(raster)
-                    addToLog ("dataCleanup: Deleted "+raster, True)
+                theBackend.delete(os.path.join(rasterOutputLocation, raster))
+                addToLog ("dataCleanup: Deleted "+raster, True)
                 numDeleted = numDeleted + 1
             except:
-                addToLog("dataCleanup: Error Deleting "+raster+" ArcPy Message: "+str(arcpy.GetMessages()))
+                addToLog("dataCleanup: Error Deleting "+raster+" ArcPy Message: "+str(theBackend.get_Messages()))
 
 
     # Handle errors for deleting old raster files
     except:
-        addToLog("dataCleanup: Error cleaning up old raster files from "+rasterOutputLocation+" ArcPy Message: "+str(arcpy.GetMessages()))
+        addToLog("dataCleanup: Error cleaning up old raster files from "+rasterOutputLocation+" ArcPy Message: "+str(theBackend.get_Messages()))
 
     return numDeleted
 
@@ -278,36 +398,14 @@ def Unsorted_dataCleanup(rasterOutputLocation,oldDate, regExp_Pattern, rastDateF
 #   be downloaded.
 #--------------------------------------------------------------------------
 
-# Converts XML read var dictionary settings into a standard "VarDictionary" object
-#  Sometimes "ListItem" and "service_dict_list" only contain one element.  When that happens, their types need to be converted to lists.
-#  This method handles that conversion.
-def PreETL_Support_Get_Standard_VarDictionary_From_RawVarSettings(RawVarSettings):
-    # Force the entire item to be a list
-    varSettings_1 = convert_Obj_To_List(RawVarSettings)
-
-    # The root level entry, called, "ListItem" also needs to be forced into a list
-    listItem_List = convert_Obj_To_List(varSettings_1[0]['ListItem'])
-
-    # For each list item, we need to make sure that the child element, 'service_dict_list' is ALSO a list.
-    rebuilt_ListItem_List = list()
-    for currListItem in listItem_List:
-        currListItem['service_dict_list'] = convert_Obj_To_List(currListItem['service_dict_list'])
-        rebuilt_ListItem_List.append(currListItem)
-
-    # Now rebuild the Return object
-    retVarDict = rebuilt_ListItem_List
-
-    # Return the result
-    return retVarDict
-
 # Validate Config, Create Workspaces
 def PreETL_Support_CreateWorkspaceFolders(theScratchWorkspace_BasePath):
     # Assemble the input folder paths to create.
-    workSpacePath_PreETL = theScratchWorkspace_BasePath + "\\PreETL"
-    workSpacePath_Extract = theScratchWorkspace_BasePath + "\\Extract"
-    workSpacePath_Transform = theScratchWorkspace_BasePath + "\\Transform"
-    workSpacePath_Load = theScratchWorkspace_BasePath + "\\Load"
-    workSpacePath_PostETL = theScratchWorkspace_BasePath + "\\PostETL"
+    workSpacePath_PreETL = os.path.join(theScratchWorkspace_BasePath, "PreETL")
+    workSpacePath_Extract = os.path.join(theScratchWorkspace_BasePath, "Extract")
+    workSpacePath_Transform = os.path.join(theScratchWorkspace_BasePath, "Transform")
+    workSpacePath_Load = os.path.join(theScratchWorkspace_BasePath, "Load")
+    workSpacePath_PostETL = os.path.join(theScratchWorkspace_BasePath, "PostETL")
 
     # Create the folders and set the flag if any fail.
     foldersExist = True
@@ -335,14 +433,14 @@ def PreETL_Support_CreateWorkspaceFolders(theScratchWorkspace_BasePath):
 # Returns True if the workspace path and type are valid, Returns False if not valid or on error.
 def PreETL_Support_Validate_Dataset_Workspace(theWorkspacePath):
     try:
-        if not arcpy.Exists(theWorkspacePath):
+        if not get_Geoprocessing_Backend().exists(theWorkspacePath):
             addToLog("PreETL_Support_Validate_Dataset_Workspace: Error: Workspace path, "+str(theWorkspacePath)+", does not exist")
             return False
         else:
-            addToLog("PreETL_Support_Validate_Dataset_Workspace: about to arcpy.Describe the workspace path, "+str(theWorkspacePath), True)
-            descWS = arcpy.Describe(theWorkspacePath)
-            if not descWS.dataType == "Workspace":
-                addToLog("PreETL_Support_Validate_Dataset_Workspace: Error: The Workspace must be of datatype 'Workspace'.  The current datatype is: "+str(descWS.dataType))
+            addToLog("PreETL_Support_Validate_Dataset_Workspace: about to Describe the workspace path, "+str(theWorkspacePath), True)
+            wsDataType = get_Geoprocessing_Backend().describe_DataType(theWorkspacePath)
+            if not wsDataType == "Workspace":
+                addToLog("PreETL_Support_Validate_Dataset_Workspace: Error: The Workspace must be of datatype 'Workspace'.  The current datatype is: "+str(wsDataType))
                 return False
             else:
                 return True
@@ -357,27 +455,44 @@ def PreETL_Support_Create_RasterOutput_Location(theRasterOutputPath):
     return make_And_Validate_Folder(theRasterOutputPath)
 
 
+# Opens (or creates) the extract manifest in the root of the scratch folder.
+#   Only the sub folders of the scratch folder are removed by PostETL_Support_RemoveScratchFolders, so the manifest survives between runs.
+#   Returns None on error, in which case every granule in the date range is processed as before.
+def PreETL_Support_Open_Extract_Manifest(theScratchWorkspace_BasePath, theManifestFileName):
+    pathToManifest = os.path.join(theScratchWorkspace_BasePath, theManifestFileName)
+    try:
+        make_And_Validate_Folder(theScratchWorkspace_BasePath)
+        return ks_ExtractManifest.ExtractManifest(pathToManifest)
+    except:
+        e = sys.exc_info()[0]
+        addToLog("PreETL_Support_Open_Extract_Manifest: ERROR, Could not open the extract manifest at " + str(pathToManifest) + ", all granules will be processed.  ERROR MESSAGE: "+ str(e))
+        return None
+
 # This function would be called by the main controller and would either just execute some simple process, or call on the support method(s) immediately above to execute a slightly more complex process.
 def PreETL_Controller_Method(ETL_TransportObject):
 
     # Any other PreETL procedures could go here...
 
-    # Make the Variable Dictionary Object
-    addToLog("PreETL_Controller_Method: Validating Variable_Dictionary_List", True)
-    Variable_Dictionary_List = PreETL_Support_Get_Standard_VarDictionary_From_RawVarSettings(ETL_TransportObject['SettingsObj']['VariableDictionaryList'])
+    # Make the Variable Dictionary Object (the settings already hold it as a list of dicts, each with a list of service dicts, it is copied so the settings stay as they were loaded)
+    addToLog("PreETL_Controller_Method: Copying Variable_Dictionary_List", True)
+    Variable_Dictionary_List = deepcopy(ETL_TransportObject['SettingsObj'].VariableDictionaryList)
 
     # Validate Config - Create Workspace folders
     addToLog("PreETL_Controller_Method: Validating Scratch_WorkSpace_Locations", True)
-    Scratch_WorkSpace_Locations = PreETL_Support_CreateWorkspaceFolders(ETL_TransportObject['SettingsObj']['ScratchFolder'])
+    Scratch_WorkSpace_Locations = PreETL_Support_CreateWorkspaceFolders(ETL_TransportObject['SettingsObj'].ScratchFolder)
+
+    # Open the extract manifest (kept between runs)
+    addToLog("PreETL_Controller_Method: Opening Extract_Manifest", True)
+    Extract_Manifest = PreETL_Support_Open_Extract_Manifest(ETL_TransportObject['SettingsObj'].ScratchFolder, ETL_TransportObject['SettingsObj'].Extract_Manifest_FileName)
 
     # Validate Config - Make sure the data set work space exists (Path to GeoDB or SDE connection)
     addToLog("PreETL_Controller_Method: Joining Folders to create GeoDB_Dataset_Workspace", True)
-    GeoDB_Dataset_Workspace = os.path.join(ETL_TransportObject['SettingsObj']['GeoDB_Location'], ETL_TransportObject['SettingsObj']['GeoDB_FileName'])
+    GeoDB_Dataset_Workspace = os.path.join(ETL_TransportObject['SettingsObj'].GeoDB_Location, ETL_TransportObject['SettingsObj'].GeoDB_FileName)
     addToLog("PreETL_Controller_Method: Validating GeoDB_Dataset_Workspace", True)
     is_Dataset_Workspace_Valid = PreETL_Support_Validate_Dataset_Workspace(GeoDB_Dataset_Workspace)
 
     # Validate Config - Make sure the output Raster Directory exists.
-    RasterOutput_Location = ETL_TransportObject['SettingsObj']['Raster_Final_Output_Location']
+    RasterOutput_Location = ETL_TransportObject['SettingsObj'].Raster_Final_Output_Location
     is_RasterOutLocation_Valid = PreETL_Support_Create_RasterOutput_Location(RasterOutput_Location)
 
     # Any other PreETL procedures could also go here...
@@ -409,6 +524,7 @@ def PreETL_Controller_Method(ETL_TransportObject):
         'Scratch_WorkSpace_Locations': Scratch_WorkSpace_Locations,
         'GeoDB_Dataset_Workspace':GeoDB_Dataset_Workspace,
         'RasterOutput_Location':RasterOutput_Location,
+        'Extract_Manifest':Extract_Manifest,
 
         'IsError': IsError,
         'ErrorMessage':ErrorMessage
@@ -431,39 +547,75 @@ def PreETL_Controller_Method(ETL_TransportObject):
 #--------------------------------------------------------------------------
 
 
-#def Extract_Support_GetStartDate(mosaicName, primaryDateField, mosaicDS):
-def Extract_Support_GetStartDate(primaryDateField, mosaicDS):
-    startDate = None
+# Moves the manifest's loaded granules newer than maxDate (all of them when maxDate is None) back to the Transform state
+def Extract_Support_Demote_Loaded_After(theManifest, mosaicDS, maxDate, dateFormat):
+    if theManifest == None:
+        return
     try:
-        sortedDates = sorted([row[0] for row in arcpy.da.SearchCursor(mosaicDS,primaryDateField)])
+        maxDateString = None
+        if maxDate != None:
+            maxDateString = maxDate.strftime(dateFormat)
+        numDemoted = theManifest.demote_Loaded_After(maxDateString)
+        if numDemoted > 0:
+            addToLog("Extract_Support_Demote_Loaded_After: " + str(numDemoted) + " granules the manifest has as loaded are not in " + str(mosaicDS) + " (newest raster " + str(maxDate) + "), they will be extracted again")
     except:
         e = sys.exc_info()[0]
-    try:
-        maxDate = sortedDates[-1]
-        if (not startDate) or (maxDate < startDate):
-            startDate = maxDate
-
-    except: 
-        startDate = datetime.datetime.now() + datetime.timedelta(-90)# datetime.timedelta(-30) #maxDate
+        addToLog("Extract_Support_Demote_Loaded_After: ERROR, Could not update the manifest for " + str(mosaicDS) + ", Error Message: " + str(e))
+
+# The start date is the newest date in the mosaic dataset (a single row query, newest first, so this does not
+# grow with the mosaic), checked against the high water mark the Load step keeps in the manifest.
+#   Empty mosaic dataset: initial fill, starts 'initialFillInterval' (a datetime.timedelta, like the "90 days" of TRMM_RasterArchiveDays) back.
+#   Query failed: starts at the high water mark, or (no high water mark either) only 'fallbackHours' back.
+def Extract_Support_GetStartDate(primaryDateField, mosaicDS, theManifest=None, dateFormat="%Y%m%d%H", initialFillInterval=datetime.timedelta(days=90), fallbackHours=24):
+    highWaterMark = None
+    if theManifest != None:
+        try:
+            highWaterMark_String = theManifest.get_High_Water_Mark(mosaicDS)
+            if highWaterMark_String != None:
+                highWaterMark = datetime.datetime.strptime(highWaterMark_String, dateFormat)
+        except:
+            e = sys.exc_info()[0]
+            addToLog("Extract_Support_GetStartDate: ERROR, Could not read the high water mark for " + str(mosaicDS) + ", Error Message: " + str(e))
 
-    if startDate == None:
-        startDate = datetime.datetime.now() + datetime.timedelta(-90)
-    return startDate
+    try:
+        maxDate = get_Geoprocessing_Backend().get_Max_Field_Value(mosaicDS, primaryDateField)
+    except:
+        e = sys.exc_info()[0]
+        if highWaterMark != None:
+            addToLog("Extract_Support_GetStartDate: ERROR, Could not get the newest " + str(primaryDateField) + " from " + str(mosaicDS) + ", starting at the high water mark " + str(highWaterMark) + ".  Error Message: " + str(e))
+            return highWaterMark
+        startDate = datetime.datetime.utcnow() - datetime.timedelta(hours=fallbackHours)
+        addToLog("Extract_Support_GetStartDate: ERROR, Could not get the newest " + str(primaryDateField) + " from " + str(mosaicDS) + " and there is no high water mark, only the last " + str(fallbackHours) + " hours are extracted (starting at " + str(startDate) + ").  Error Message: " + str(e))
+        return startDate
+
+    # Granules the manifest has as loaded but which are not in the mosaic dataset (it was emptied or rebuilt, or a raster
+    #   did not make it in) are extracted again, everything after the newest raster is missing from it by definition.
+    Extract_Support_Demote_Loaded_After(theManifest, mosaicDS, maxDate, dateFormat)
+
+    if maxDate == None:
+        startDate = Unsorted_GetOldestDate(initialFillInterval)
+        addToLog("Extract_Support_GetStartDate: " + str(mosaicDS) + " has no rasters, initial fill starting at " + str(startDate))
+        return startDate
+
+    if highWaterMark != None and highWaterMark != maxDate:
+        addToLog("Extract_Support_GetStartDate: High water mark " + str(highWaterMark) + " does not match the newest raster in the mosaic dataset (" + str(maxDate) + "), using the mosaic dataset")
+    if theManifest != None:
+        try:
+            # The mosaic dataset wins (rasters may have been removed or loaded outside the ETL)
+            theManifest.record_High_Water_Mark(mosaicDS, maxDate.strftime(dateFormat), True)
+        except:
+            e = sys.exc_info()[0]
+            addToLog("Extract_Support_GetStartDate: ERROR, Could not update the high water mark for " + str(mosaicDS) + ", Error Message: " + str(e))
+    return maxDate
 
 def Extract_Support_GetEndDate():
     return datetime.datetime.utcnow()
 
 # Simillar to the function Extract_Support_Get_PyDateTime_From_String, but returns only the string component.
+#   Both go through the shared date index (see ks_DateIndex), the pattern is compiled once and each name is only parsed once.
 def Extract_Support_Get_DateString_From_String(theString, regExp_Pattern):
     try:
-        # Search the string for the datetime format
-        reItemsList = re.findall(regExp_Pattern,theString)
-        if len(reItemsList) == 0:
-            # No items found using the Regular expression search
-            # If needed, this is where to insert a log entry or other notification that no date was found.
-            return None
-        else:
-            return reItemsList[0]
+        return ks_DateIndex.get_Shared_Index(regExp_Pattern).get_DateString(theString)
     except:
         return None
 
@@ -472,50 +624,33 @@ def Extract_Support_Get_DateString_From_String(theString, regExp_Pattern):
 # Return None if any step fails.
 def Extract_Support_Get_PyDateTime_From_String(theString, regExp_Pattern, date_Format):
     try:
-        # Search the string for the datetime format
-        reItemsList = re.findall(regExp_Pattern,theString)
-        if len(reItemsList) == 0:
-            # No items found using the Regular expression search
-            # If needed, this is where to insert a log entry or other notification that no date was found.
-            return None
-        else:
-            retDateTime = datetime.datetime.strptime(reItemsList[0], date_Format)
-            return retDateTime
+        return ks_DateIndex.get_Shared_Index(regExp_Pattern, date_Format).get_DateTime(theString)
     except:
         return None
 
 
 
-# Support Method which returns a list of files that fall within the passed in date range.
+# Support Method which returns the files that fall within the passed in date range (an iterator, names are yielded as they are used).
+#   the_ListOf_AllFiles is either a list of names or a listing from Extract_Support_Get_DateSortedListing.  A source queried
+#   for more than one date range should be sorted once (Extract_Support_Get_DateSortedListing) and that listing passed in each time.
 def Extract_Support_GetList_Within_DateRange(the_ListOf_AllFiles, the_FileExtn, the_Start_DateTime, the_End_DateTime, regExp_Pattern, date_Format):
-    retList = []
+    # the_FileExtn is not used to filter the list (the old extension filtered pass was never used either)
+    # Files come back in date order, names without a date are left out.
+    theListing = the_ListOf_AllFiles
+    if not isinstance(theListing, ks_DateIndex.DateSortedListing):
+        theListing = Extract_Support_Get_DateSortedListing(the_ListOf_AllFiles, regExp_Pattern, date_Format)
+    return theListing.iter_Within(the_Start_DateTime, the_End_DateTime)
 
-    # Sort of a validation step.. I think.. looks like we just split file names.. not sure why the original author wrote this code but it works
-    # FUTURE: Optimize, check to see if we actually need this step..
-    #   (I think this is in case there is a mix of files in the folder and we only want a subset of them.... or maybe folder names get placed in the list sometimes which have no extension.. these all sound like good reasons to keep this here)
-    list_Of_FileNames = []
-    if the_FileExtn:
-        list_Of_FileNames = [f.split(" ")[-1] for f in the_ListOf_AllFiles if f.endswith(the_FileExtn)]
-    else:
-        list_Of_FileNames = [f.split(" ")[-1] for f in the_ListOf_AllFiles]
+# Sorts a listing (FTP folder, S3 prefix, raster folder) by the date in each name, build it once and query it as often as needed
+#   (see ks_DateIndex.DateSortedListing)
+def Extract_Support_Get_DateSortedListing(the_ListOf_AllFiles, regExp_Pattern, date_Format):
+    return ks_DateIndex.DateSortedListing(the_ListOf_AllFiles, ks_DateIndex.get_Shared_Index(regExp_Pattern, date_Format))
 
-    # Now iterate through the list and only add the ones that match the critera
-    for currFileName in the_ListOf_AllFiles:
-        currFileNameDateTime = Extract_Support_Get_PyDateTime_From_String(currFileName, regExp_Pattern, date_Format)
-        try:
-            if ((currFileNameDateTime > the_Start_DateTime) and (currFileNameDateTime <= the_End_DateTime)):
-                retList.append(currFileName)
-        except:
-            # String probably was "None" type, try the next one!
-            pass
 
-    return retList
 
-
-
-# Gets and returns a list of files contained in the bucket and path.
+# Connects to S3 and returns the bucket object.
 #   Access Keys are required and are used for making a connection object.
-def Extract_Support_s3_GetFileListForPath(s3_AccessKey,s3_SecretKey,s3_BucketName, s3_PathToFiles, s3_Is_Use_Local_IAMRole):
+def Extract_Support_s3_Get_Bucket(s3_AccessKey,s3_SecretKey,s3_BucketName, s3_Is_Use_Local_IAMRole):
 
     # Refactor for IAM Role
     # s3_Connection = boto.connect_s3(s3_AccessKey, s3_SecretKey)
@@ -529,6 +664,12 @@ def Extract_Support_s3_GetFileListForPath(s3_AccessKey,s3_SecretKey,s3_BucketNam
         s3_Connection = boto.connect_s3(s3_AccessKey, s3_SecretKey,is_secure=False)
 
     s3_Bucket = s3_Connection.get_bucket(s3_BucketName,True,None)
+    return s3_Bucket
+
+# Gets and returns a list of files contained in the bucket and path.
+#   Access Keys are required and are used for making a connection object.
+def Extract_Support_s3_GetFileListForPath(s3_AccessKey,s3_SecretKey,s3_BucketName, s3_PathToFiles, s3_Is_Use_Local_IAMRole):
+    s3_Bucket = Extract_Support_s3_Get_Bucket(s3_AccessKey,s3_SecretKey,s3_BucketName, s3_Is_Use_Local_IAMRole)
     s3_ItemsList = list(s3_Bucket.list(s3_PathToFiles))
     retList = []
     for current_s3_Item in s3_ItemsList:
@@ -536,6 +677,14 @@ def Extract_Support_s3_GetFileListForPath(s3_AccessKey,s3_SecretKey,s3_BucketNam
     return retList
 
 
+# Gets and returns the list of files in the bucket and path whose date is in (the_Start_DateTime, the_End_DateTime]
+#   Unlike Extract_Support_s3_GetFileListForPath, this does not list the whole prefix.  Listing starts at the start date and stops after the end date.
+#   (see ks_S3Extract.iter_Keys_Within_DateRange for the assumptions about key names)
+def Extract_Support_s3_GetFileList_Within_DateRange(s3_AccessKey,s3_SecretKey,s3_BucketName, s3_PathToFiles, s3_Is_Use_Local_IAMRole, the_Start_DateTime, the_End_DateTime, regExp_Pattern, date_Format, s3_Is_Date_Ordered_Prefix=True):
+    s3_Bucket = Extract_Support_s3_Get_Bucket(s3_AccessKey,s3_SecretKey,s3_BucketName, s3_Is_Use_Local_IAMRole)
+    return list(ks_S3Extract.iter_Keys_Within_DateRange(s3_Bucket, s3_PathToFiles, the_Start_DateTime, the_End_DateTime, regExp_Pattern, date_Format, s3_Is_Date_Ordered_Prefix))
+
+
 # Takes in a key and converts it to a URL.
 def Extract_Support_s3_Make_URL_From_Key(s3_BucketRootPath, current_s3_Key):
     # Sample URL    3 (yes, 2 slashes, does not work with only 1)
@@ -558,12 +707,10 @@ def Extract_Support_Decompress_GZip_File(inFilePath, outFilePath, inFileExt):
     # make sure the format is correct.
     if "GZ" in inFileExt.upper():
         try:
-            inF = gzip.open(inFilePath, 'rb')
-            outF = open(outFilePath, 'wb')
-            outF.write( inF.read() )
-            inF.close()
-            outF.close()
-            addToLog("Extract_Support_Decompress_GZip_File: Extracted file from, " + str(inFilePath) + " to " + str(outFilePath), True)
+            # Decompresses one buffer at a time (the whole raster is never held in memory)
+            with g_Metrics.span("decompress", {'granule': os.path.basename(inFilePath)}):
+                ks_StreamingDownload.decompress_GZip_File(inFilePath, outFilePath)
+            addToLog("Extract_Support_Decompress_GZip_File: Extracted file from, %s to %s", True, inFilePath, outFilePath)
             return True
         except:
             e = sys.exc_info()[0]
@@ -579,9 +726,13 @@ def Extract_Support_Decompress_GZip_File(inFilePath, outFilePath, inFileExt):
 
 # Get the file names, filter the list, download the files, extract them, wrap them into a list, return a results object
 # Goes into the S3, downloads files, extracts them, returns list of items
-def Extract_Do_Extract_S3(the_FileExtension, s3BucketRootPath, s3AccessKey, s3SecretKey, s3BucketName, s3PathTo_Files, s3_Is_Use_Local_IAM_Role, regEx_String, dateFormat_String, startDateTime_str, endDateTime_str, theExtractWorkspace):
+# Each download is streamed: HTTP chunks go straight through a gzip decoder to the extracted file, the '.gz' is never written to the scratch folder.
+# theManifest (optional): granules which already reached the Load step are skipped, the SHA-256 of each extracted file is recorded.
+# Objects are fetched by 'numOfDownloadWorkers' threads, each failed transfer is retried up to 'maxRetries' times.
+def Extract_Do_Extract_S3(the_FileExtension, s3BucketRootPath, s3AccessKey, s3SecretKey, s3BucketName, s3PathTo_Files, s3_Is_Use_Local_IAM_Role, regEx_String, dateFormat_String, startDateTime_str, endDateTime_str, theExtractWorkspace, theManifest=None, streamBufferSize=ks_StreamingDownload.DEFAULT_BUFFER_SIZE, s3_Is_Date_Ordered_Prefix=True, numOfDownloadWorkers=4, maxRetries=4, onItemExtracted=None):
 
     ExtractList = []
+    fetchResults_List = []
     counter_FilesDownloaded = 0
     counter_FilesExtracted = 0
     debugFileDownloadLimiter = 10000 #10000        # For debugging, set this to a low number
@@ -590,11 +741,8 @@ def Extract_Do_Extract_S3(the_FileExtension, s3BucketRootPath, s3AccessKey, s3Se
     startDateTime = datetime.datetime.strptime(startDateTime_str, dateFormat_String)
     endDateTime = datetime.datetime.strptime(endDateTime_str, dateFormat_String)
 
-     # get a list of ALL files from the bucket and path combo.
-    theListOf_BucketPath_FileNames = Extract_Support_s3_GetFileListForPath(s3AccessKey,s3SecretKey,s3BucketName,s3PathTo_Files, s3_Is_Use_Local_IAM_Role)
-
-    # get a list of all the files within the start and end date
-    filePaths_WithinRange = Extract_Support_GetList_Within_DateRange(theListOf_BucketPath_FileNames, the_FileExtension, startDateTime, endDateTime, regEx_String, dateFormat_String)
+    # get a list of all the files within the start and end date (only the part of the bucket path inside the date range is listed)
+    filePaths_WithinRange = Extract_Support_s3_GetFileList_Within_DateRange(s3AccessKey,s3SecretKey,s3BucketName,s3PathTo_Files, s3_Is_Use_Local_IAM_Role, startDateTime, endDateTime, regEx_String, dateFormat_String, s3_Is_Date_Ordered_Prefix)
 
     numFound = len(filePaths_WithinRange)
     if numFound == 0:
@@ -604,55 +752,67 @@ def Extract_Do_Extract_S3(the_FileExtension, s3BucketRootPath, s3AccessKey, s3Se
             addToLog("Extract_Do_Extract_S3: ERROR: No files found between "+startDateTime_str+" and "+endDateTime_str)
     else:
 
-        # Iterate through each key file path and and perform the extraction.
-        for s3_Key_file_Path_to_download in filePaths_WithinRange:
-            if counter_FilesDownloaded < debugFileDownloadLimiter:
-                file_to_download = Extract_Support_Get_FileNameOnly_From_S3_KeyPath(s3_Key_file_Path_to_download)
-
-                # This is the location where the file will be downloaded.
-                downloadedFile = os.path.join(theExtractWorkspace,file_to_download)   # Actual Code
-
-                # Get final download path (URL to where the file is located on the internets.
-                currentURL_ToDownload = Extract_Support_s3_Make_URL_From_Key(s3BucketRootPath, s3_Key_file_Path_to_download)
-
-                # Do the actual download.
-                try:
-                    theDLodaedURL = urllib.urlopen(currentURL_ToDownload)
-                    open(downloadedFile,"wb").write(theDLodaedURL.read())
-                    theDLodaedURL.close()
-                    addToLog("Extract_Do_Extract_S3: Downloaded file from: " + str(currentURL_ToDownload), True)
-                    addToLog("Extract_Do_Extract_S3: Downloaded file to: " + str(downloadedFile), True)
-                    counter_FilesDownloaded += 1
-
-                    # Extract the zipped file, (NOTE, THIS IS FOR GZIP FILES, files with extension of .gz)
-                    # Also, the expected end of the file name is, ".tif.gz"
-                    # Last Note, this function only unzips a single file
-                    theOutFile = downloadedFile[:-3] # Should be the whole file path except the '.gz' part.
-                    ungzipResult = Extract_Support_Decompress_GZip_File(downloadedFile, theOutFile, the_FileExtension)
-                    if ungzipResult == True:
-                        # Extraction worked, create the return item
-                        extractedFileList = []
-                        extractedFileList.append(theOutFile)
-                        currentDateString = Extract_Support_Get_DateString_From_String(theOutFile, regEx_String)
-                        current_Extracted_Obj = {
-                            'DateString' : currentDateString,
-                            'Downloaded_FilePath' : downloadedFile,
-                            'ExtractedFilesList' : convert_Obj_To_List(extractedFileList),
-                            'downloadURL' : currentURL_ToDownload
-                        }
-                        ExtractList.append(current_Extracted_Obj)
-                        counter_FilesExtracted += 1
-                    else:
-                        # Extraction failed, Add this to the log..
-                        addToLog("Extract_Do_Extract_S3: ERROR, There was a problem decompressing the file, " + str(downloadedFile))
-
-                except:
-                    e = sys.exc_info()[0]
-                    addToLog("Extract_Do_Extract_S3: ERROR: Could not download file: " + str(theDLodaedURL) + ", Error Message: " + str(e))
+        # Build the list of keys to fetch, and where each one is extracted to.
+        isGZip = "GZ" in the_FileExtension.upper()
+        keys_And_OutFiles_To_Download = []
+        for s3_Key_file_Path_to_download in filePaths_WithinRange[:debugFileDownloadLimiter]:
+            file_to_download = Extract_Support_Get_FileNameOnly_From_S3_KeyPath(s3_Key_file_Path_to_download)
+            currentDateString = Extract_Support_Get_DateString_From_String(file_to_download, regEx_String)
+            if theManifest != None and theManifest.is_Loaded(currentDateString):
+                addToLog("Extract_Do_Extract_S3: Manifest says %s is already loaded, skipping", True, currentDateString)
+                addGranuleRecord("Extract", "Extract_Do_Extract_S3", currentDateString, None, None, None, "already_loaded")
+                continue
+
+            # This is the location of the extracted file.
+            # Also, the expected end of the file name is, ".tif.gz", the extracted file is the whole file path except the '.gz' part.
+            theOutFile = os.path.join(theExtractWorkspace,file_to_download)
+            if isGZip:
+                theOutFile = theOutFile[:-3]
+            keys_And_OutFiles_To_Download.append((s3_Key_file_Path_to_download, theOutFile))
+
+        # Do the actual downloads (and decompression, NOTE, THIS IS FOR GZIP FILES, files with extension of .gz)
+        #   Worker threads share keep-alive connections to the bucket, interrupted transfers are resumed with Range requests.
+        theFetchEngine = ks_S3Extract.S3FetchEngine(s3BucketRootPath, numOfDownloadWorkers, maxRetries, 1.0, 60, streamBufferSize, addToLog)
+        for currFetchResult in theFetchEngine.imap_Objects(keys_And_OutFiles_To_Download, isGZip, (theManifest != None)):
+            fetchResults_List.append(currFetchResult)
+            currentURL_ToDownload = Extract_Support_s3_Make_URL_From_Key(s3BucketRootPath, currFetchResult['Key'])
+            g_Metrics.record_Span("download", currFetchResult['Elapsed_Seconds'], {'source': "s3", 'granule': os.path.basename(currFetchResult['OutFilePath'])}, currFetchResult['IsDownloaded'])
+            g_Metrics.increment("bytes_downloaded", currFetchResult['Bytes_Downloaded'], {'source': "s3"})
+            g_Metrics.increment("bytes_written", currFetchResult['Bytes_Written'], {'source': "s3"})
+            currentDateString = Extract_Support_Get_DateString_From_String(os.path.basename(currFetchResult['OutFilePath']), regEx_String)
+            addGranuleRecord("Extract", "Extract_Do_Extract_S3", currentDateString, None, currFetchResult['Elapsed_Seconds'], currFetchResult['Bytes_Downloaded'], "downloaded" if currFetchResult['IsDownloaded'] else "failed", {'attempts': currFetchResult['Attempts']})
+            if currFetchResult['IsDownloaded'] == False:
+                g_Metrics.increment("files_failed", 1, {'stage': "extract"})
+                addToLog("Extract_Do_Extract_S3: ERROR: Could not download or decompress file: " + str(currentURL_ToDownload) + " after " + str(currFetchResult['Attempts']) + " attempts, Error Message: " + str(currFetchResult['ErrorMessage']))
+                continue
+            theOutFile = currFetchResult['OutFilePath']
+            addToLog("Extract_Do_Extract_S3: Downloaded and extracted file from: %s to: %s", True, currentURL_ToDownload, theOutFile)
+            counter_FilesDownloaded += 1
+            g_Metrics.increment("files_downloaded", 1, {'source': "s3"})
+
+            # Extraction worked, create the return item
+            extractedFileList = []
+            extractedFileList.append(theOutFile)
+            current_Extracted_Obj = {
+                'DateString' : currentDateString,
+                'Correlation_ID' : get_Correlation_ID(currentDateString),
+                'Downloaded_FilePath' : theOutFile,
+                'ExtractedFilesList' : extractedFileList,
+                'downloadURL' : currentURL_ToDownload,
+                'Checksum' : currFetchResult['Checksum']
+            }
+            ExtractList.append(current_Extracted_Obj)
+            counter_FilesExtracted += 1
+            if theManifest != None:
+                theManifest.record_Extract(currentDateString, theOutFile, currFetchResult['Checksum'])
+            if onItemExtracted != None:
+                onItemExtracted(current_Extracted_Obj)
+
     ret_ExtractObj = {
         'StartDateTime':startDateTime,
         'EndDateTime': endDateTime,
-        'ExtractList':ExtractList
+        'ExtractList':ExtractList,
+        'DownloadStats':ks_S3Extract.get_Download_Stats(fetchResults_List)
     }
     return ret_ExtractObj
 
@@ -790,18 +950,14 @@ def Extract_Support_Get_Next_3_Hour(currentHour):
     return hourToReturn
 
 
-def Extract_Do_Extract_FTP(dateFormat_String, startDateTime_str, endDateTime_str, theExtractWorkspace):
+# theManifest (ks_ExtractManifest.ExtractManifest or None): granules which already reached the Load step are skipped, and granules
+#   downloaded by an earlier (crashed) run are reused from the extract workspace instead of being downloaded again.
+def Extract_Do_Extract_FTP(dateFormat_String, startDateTime_str, endDateTime_str, theExtractWorkspace, ftpParams, the_FTP_SubFolderPath, numOfDownloadWorkers, ftpMaxRequestsPerSecond, theManifest=None, onItemExtracted=None):
 
     addToLog("Extract_Do_Extract_FTP: Started") # , True)
 
-    # Move these to settings at the earliest opportunity!!
-    the_FTP_Host = "trmmopen.gsfc.nasa.gov" #"198.118.195.58" #trmmopen.gsfc.nasa.gov"  #"ftp://trmmopen.gsfc.nasa.gov"
-    the_FTP_SubFolderPath = "pub/gis"
-    the_FTP_UserName = "anonymous" #
-    the_FTP_UserPass = "anonymous" #
-    root_FTP_Path = "ftp://" + str(the_FTP_Host) + "/" + the_FTP_SubFolderPath
-    addToLog("&&&&&&&&&&"+root_FTP_Path)
-    #addToLog("Extract_Do_Extract_FTP: ALERT A")
+    root_FTP_Path = "ftp://" + str(ftpParams['ftpHost']) + "/" + the_FTP_SubFolderPath
+    addToLog("Extract_Do_Extract_FTP: root_FTP_Path : " + root_FTP_Path, True)
 
     ExtractList = []
     lastBaseRaster = ""
@@ -825,7 +981,7 @@ def Extract_Do_Extract_FTP(dateFormat_String, startDateTime_str, endDateTime_str
 
     # get a list of all the files within the start and end date
     expected_FilePath_Objects_To_Extract_WithinRange = Extract_Support_Get_Expected_FTP_Paths_From_DateRange(standardized_StartDate, standardized_EndDate, root_FTP_Path, the_FTP_SubFolderPath)
-    addToLog("Extract_Do_Extract_FTP: expected_FilePath_Objects_To_Extract_WithinRange (list to process) " + str(expected_FilePath_Objects_To_Extract_WithinRange) , True)
+    addToLog("Extract_Do_Extract_FTP: expected_FilePath_Objects_To_Extract_WithinRange (list to process) %s", True, expected_FilePath_Objects_To_Extract_WithinRange)
 
     numFound = len(expected_FilePath_Objects_To_Extract_WithinRange)
     if numFound == 0:
@@ -836,90 +992,101 @@ def Extract_Do_Extract_FTP(dateFormat_String, startDateTime_str, endDateTime_str
     else:
 
         # Connect to FTP Server
+        # The pool keeps up to 'numOfDownloadWorkers' connections open and reuses them for every granule.
+        # TRMMs ftp acts funny if requests come in too fast, the pool's per host rate limit takes the place of the old time.sleep(1) calls.
+        theDownloadPool = None
         try:
-
-            # QUICK REFACTOR NOTE: Something very strange was happening with the FTP and there isn't time to debug this issue.. going with URL Download instead for now.
-
-            addToLog("Extract_Do_Extract_FTP: Connecting to FTP", True)
-            # ftp_Connection = ftplib.FTP("trmmopen.gsfc.nasa.gov","anonymous","anonymous")
-            ftp_Connection = ftplib.FTP(the_FTP_Host,the_FTP_UserName,the_FTP_UserPass)
-            time.sleep(1)
-
-            addToLog("Extract_Do_Extract_FTP: Downloading TIF and TFW files for each raster", True)
-
-            # Holding information for the last FTP folder we changed to.
-            lastFolder = ""
-
-            # Iterate through each key file path and and perform the extraction.
-            for curr_FilePath_Object in expected_FilePath_Objects_To_Extract_WithinRange:
-
-                if counter_FilesDownloaded < debugFileDownloadLimiter:
-                    addToLog("Extract_Do_Extract_FTP: DEBUG curr_FilePath_Object : " + str(curr_FilePath_Object), True)
-                    # FTP, Change to folder,
-                    currFTPFolder = curr_FilePath_Object['FTPSubFolderPath'] # + "/"      # FTP Change Directory requires slash at the end.
-
-                    # Only change folders if we need to.
-                    if currFTPFolder == lastFolder:
-                        # Do nothing
-
-                        pass
-                    else:
-                        time.sleep(1)
-						
-                        addToLog("Extract_Do_Extract_FTP: FTP, Changing folder to : " + str(currFTPFolder), True)
-                        addToLog("********b4 cwd**********"+currFTPFolder)
-                        ftp_Connection.cwd("/" + currFTPFolder)
-                        addToLog("********a4cwd**********")
-						
-                        time.sleep(1)
-
-                    lastFolder = currFTPFolder
-                    try:
-                        # Attempt to download the TIF and World File (Tfw)
-                        addToLog("********try**********")
-
-                        Tif_file_to_download = curr_FilePath_Object['TIF_3Hr_FileName']
-                        downloadedFile_TIF = os.path.join(theExtractWorkspace,Tif_file_to_download)
-                        addToLog("*********b4**********")
-
-                        with open(downloadedFile_TIF, "wb") as f:
-                            ftp_Connection.retrbinary("RETR %s" % Tif_file_to_download, f.write)
-
-                        time.sleep(1)
-                        addToLog("********atr***********")
-                        Twf_file_to_download = curr_FilePath_Object['TWF_3Hr_FileName']
-                        downloadedFile_TFW = os.path.join(theExtractWorkspace,Twf_file_to_download)
-                        with open(downloadedFile_TFW, "wb") as f:
-                            ftp_Connection.retrbinary("RETR %s" % Twf_file_to_download, f.write)
-
-                        time.sleep(1)
-
-                        # Two files were downloaed (or 'extracted') but we really only need a reference to 1 file (thats what the transform expects).. and Arc actually understands the association between the TIF and TWF files automatically
-                        extractedFileList = []
-                        extractedFileList.append(downloadedFile_TIF)
-                        current_Extracted_Obj = {
-                                'DateString' : curr_FilePath_Object['DateString'],
-                                'Downloaded_FilePath' : downloadedFile_TIF,
-                                'ExtractedFilesList' : convert_Obj_To_List(extractedFileList),
-                                'downloadURL' : curr_FilePath_Object['FTP_PathTo_TIF'], #currentURL_ToDownload
-                                'FTP_DataObj' : curr_FilePath_Object
-                            }
-
-                        ExtractList.append(current_Extracted_Obj)
-                        lastBaseRaster = curr_FilePath_Object['BaseRasterName']
-                        lastFTPFolder = curr_FilePath_Object['FTPSubFolderPath']
-                        counter_FilesDownloaded += 1
-
-                    except:
+            addToLog("Extract_Do_Extract_FTP: Downloading TIF and TFW files for each raster using " + str(numOfDownloadWorkers) + " FTP download workers", True)
+            theDownloadPool = ks_FTPDownloadPool.FTPDownloadPool(ftpParams, numOfDownloadWorkers, ftpMaxRequestsPerSecond, addToLog)
+
+            # List the folders once, granules which are not on the server (not published yet) are never requested.
+            folderListings = Extract_Support_Get_FTP_Folder_Listings(theDownloadPool, expected_FilePath_Objects_To_Extract_WithinRange[:debugFileDownloadLimiter])
+
+            # Check the manifest before downloading anything.
+            filePath_Objects_To_Process = []
+            filePath_Objects_To_Download = []
+            reused_DateStrings = set()
+            remote_TIF_Facts = {}
+            numNotOnServer = 0
+            for curr_FilePath_Object in expected_FilePath_Objects_To_Extract_WithinRange[:debugFileDownloadLimiter]:
+                currDateString = curr_FilePath_Object['DateString']
+                if theManifest != None and theManifest.is_Loaded(currDateString):
+                    addToLog("Extract_Do_Extract_FTP: Manifest says %s is already loaded, skipping", True, currDateString)
+                    addGranuleRecord("Extract", "Extract_Do_Extract_FTP", currDateString, None, None, None, "already_loaded")
+                    continue
+                currListing = folderListings.get(curr_FilePath_Object['FTPSubFolderPath'])
+                if currListing != None:
+                    if not (curr_FilePath_Object['TIF_3Hr_FileName'] in currListing['Files'] and curr_FilePath_Object['TWF_3Hr_FileName'] in currListing['Files']):
+                        addToLog("Extract_Do_Extract_FTP: %s is not on the server yet, skipping", True, curr_FilePath_Object['BaseRasterName'])
+                        numNotOnServer += 1
+                        addGranuleRecord("Extract", "Extract_Do_Extract_FTP", currDateString, None, None, None, "not_on_server")
+                        continue
+                    remote_TIF_Facts[currDateString] = currListing['Files'][curr_FilePath_Object['TIF_3Hr_FileName']]
+                if theManifest != None:
+                    existing_TIF = os.path.join(theExtractWorkspace, curr_FilePath_Object['TIF_3Hr_FileName'])
+                    existing_TFW = os.path.join(theExtractWorkspace, curr_FilePath_Object['TWF_3Hr_FileName'])
+                    currRemoteFacts = remote_TIF_Facts.get(currDateString, {'Size': None, 'Modify': None})
+                    if os.path.isfile(existing_TFW) and theManifest.is_Remote_File_Unchanged(currDateString, existing_TIF, currRemoteFacts['Size'], currRemoteFacts['Modify']):
+                        addToLog("Extract_Do_Extract_FTP: %s has the same size and modify time on the server as the copy downloaded earlier, reusing %s", True, currDateString, existing_TIF)
+                        reused_DateStrings.add(currDateString)
+                    elif os.path.isfile(existing_TFW) and theManifest.is_Extracted_File_Reusable(currDateString, existing_TIF):
+                        addToLog("Extract_Do_Extract_FTP: Manifest says %s was already downloaded, reusing %s", True, currDateString, existing_TIF)
+                        reused_DateStrings.add(currDateString)
+                filePath_Objects_To_Process.append(curr_FilePath_Object)
+                if not currDateString in reused_DateStrings:
+                    filePath_Objects_To_Download.append(curr_FilePath_Object)
+            g_Metrics.increment("files_not_on_server", numNotOnServer, {'source': "ftp"})
+            addToLog("Extract_Do_Extract_FTP: " + str(len(filePath_Objects_To_Download)) + " granules to download, " + str(len(reused_DateStrings)) + " reused from an earlier run, " + str(numNotOnServer) + " not on the server yet")
+
+            # Results come back in the same (date) order as the list to download, which keeps the ExtractList in date order.
+            theDownloadResults = theDownloadPool.imap_Granules(filePath_Objects_To_Download, theExtractWorkspace)
+            for curr_FilePath_Object in filePath_Objects_To_Process:
+                if curr_FilePath_Object['DateString'] in reused_DateStrings:
+                    downloadedFile_TIF = os.path.join(theExtractWorkspace, curr_FilePath_Object['TIF_3Hr_FileName'])
+                    addGranuleRecord("Extract", "Extract_Do_Extract_FTP", curr_FilePath_Object['DateString'], None, None, 0, "reused")
+                else:
+                    currDownloadResult = theDownloadResults.next()
+                    g_Metrics.record_Span("download", currDownloadResult['Elapsed_Seconds'], {'source': "ftp", 'granule': curr_FilePath_Object['BaseRasterName']}, currDownloadResult['IsDownloaded'])
+                    g_Metrics.increment("bytes_downloaded", currDownloadResult['Bytes'], {'source': "ftp"})
+                    addGranuleRecord("Extract", "Extract_Do_Extract_FTP", curr_FilePath_Object['DateString'], None, currDownloadResult['Elapsed_Seconds'], currDownloadResult['Bytes'], "downloaded" if currDownloadResult['IsDownloaded'] else "failed")
+                    if currDownloadResult['IsDownloaded'] == False:
+                        g_Metrics.increment("files_failed", 1, {'stage': "extract"})
                         # If the raster file is missing or an error occurs during transfer..
-                        addToLog("Extract_Do_Extract_FTP: ERROR.  Error downloading current raster " +  str(curr_FilePath_Object['BaseRasterName']))
-
+                        addToLog("Extract_Do_Extract_FTP: ERROR.  Error downloading current raster " +  str(curr_FilePath_Object['BaseRasterName']) + ", " + str(currDownloadResult['ErrorMessage']))
+                        continue
+                    downloadedFile_TIF = currDownloadResult['Downloaded_TIF']
+                    g_Metrics.increment("files_downloaded", 1, {'source': "ftp"})
+                    if theManifest != None:
+                        currRemoteFacts = remote_TIF_Facts.get(curr_FilePath_Object['DateString'], {'Size': None, 'Modify': None})
+                        theManifest.record_Extract(curr_FilePath_Object['DateString'], downloadedFile_TIF, currDownloadResult['TIF_Checksum'], currRemoteFacts['Size'], currRemoteFacts['Modify'])
+
+                # Two files were downloaed (or 'extracted') but we really only need a reference to 1 file (thats what the transform expects).. and Arc actually understands the association between the TIF and TWF files automatically
+                extractedFileList = []
+                extractedFileList.append(downloadedFile_TIF)
+                current_Extracted_Obj = {
+                        'DateString' : curr_FilePath_Object['DateString'],
+                        'Correlation_ID' : get_Correlation_ID(curr_FilePath_Object['DateString']),
+                        'Downloaded_FilePath' : downloadedFile_TIF,
+                        'ExtractedFilesList' : extractedFileList,
+                        'downloadURL' : curr_FilePath_Object['FTP_PathTo_TIF'], #currentURL_ToDownload
+                        'FTP_DataObj' : curr_FilePath_Object
+                    }
+
+                ExtractList.append(current_Extracted_Obj)
+                if onItemExtracted != None:
+                    onItemExtracted(current_Extracted_Obj)
+                lastBaseRaster = curr_FilePath_Object['BaseRasterName']
+                lastFTPFolder = curr_FilePath_Object['FTPSubFolderPath']
+                counter_FilesDownloaded += 1
 
         except:
             e = sys.exc_info()[0]
             errMsg = "Extract_Do_Extract_FTP: ERROR: Could not connect to FTP Server, Error Message: " + str(e)
             addToLog(errMsg)
 
+        if theDownloadPool != None:
+            theDownloadPool.close()
+
     ret_ExtractObj = {
         'StartDateTime':startDateTime,
         'EndDateTime': endDateTime,
@@ -929,7 +1096,26 @@ def Extract_Do_Extract_FTP(dateFormat_String, startDateTime_str, endDateTime_str
     }
     return ret_ExtractObj
 
-def Extract_Controller_Method(ETL_TransportObject):
+# Lists each YYYYMM folder the expected granules are in once (MLSD, or NLST), returns {FTPSubFolderPath: listing or None}
+#   None means the folder could not be listed, every granule in it is requested like before.
+def Extract_Support_Get_FTP_Folder_Listings(theDownloadPool, filePath_Objects):
+    folderListings = {}
+    for curr_FilePath_Object in filePath_Objects:
+        currFolder = curr_FilePath_Object['FTPSubFolderPath']
+        if currFolder in folderListings:
+            continue
+        try:
+            with g_Metrics.span("ftp_list", {'folder': currFolder}):
+                folderListings[currFolder] = theDownloadPool.get_Folder_Listing(currFolder)
+            addToLog("Extract_Support_Get_FTP_Folder_Listings: %s has %d files (%s)", True, currFolder, len(folderListings[currFolder]['Files']), folderListings[currFolder]['Method'])
+        except:
+            e = sys.exc_info()[0]
+            folderListings[currFolder] = None
+            addToLog("Extract_Support_Get_FTP_Folder_Listings: ERROR, Could not list " + currFolder + ", every granule in it will be requested.  Error Message: " + str(e))
+    return folderListings
+
+# onItemExtracted (optional) is called with each extract item as soon as it is ready (see Pipeline_Controller_Method)
+def Extract_Controller_Method(ETL_TransportObject, onItemExtracted=None):
 
     # Check the setup for errors as we go.
     IsError = False
@@ -940,16 +1126,30 @@ def Extract_Controller_Method(ETL_TransportObject):
 
     # Inputs from ETL_TransportObject['SettingsObj']
     try:
-        the_FileExtension = ETL_TransportObject['SettingsObj']['Download_File_Extension'] # TRMM_FileExtension # TRMM_File_Extension
-        s3BucketRootPath = ETL_TransportObject['SettingsObj']['s3_BucketRootPath']
-        s3AccessKey = ETL_TransportObject['SettingsObj']['s3_AccessKeyID']
-        s3SecretKey = ETL_TransportObject['SettingsObj']['s3_SecretAccessKey']
-        s3BucketName = ETL_TransportObject['SettingsObj']['s3_BucketName']
-        s3PathTo_Files = ETL_TransportObject['SettingsObj']['s3_PathTo_TRMM_Files']
-        s3_Is_Use_Local_IAM_Role = get_BoolSetting(ETL_TransportObject['SettingsObj']['s3_UseLocal_IAM_Role'])
-        regEx_String = ETL_TransportObject['SettingsObj']['RegEx_DateFilterString']
-        dateFormat_String = ETL_TransportObject['SettingsObj']['Python_DateFormat']
+        the_FileExtension = ETL_TransportObject['SettingsObj'].Download_File_Extension # TRMM_FileExtension # TRMM_File_Extension
+        s3BucketRootPath = ETL_TransportObject['SettingsObj'].s3_BucketRootPath
+        s3AccessKey = ETL_TransportObject['SettingsObj'].s3_AccessKeyID
+        s3SecretKey = ETL_TransportObject['SettingsObj'].s3_SecretAccessKey
+        s3BucketName = ETL_TransportObject['SettingsObj'].s3_BucketName
+        s3PathTo_Files = ETL_TransportObject['SettingsObj'].s3_PathTo_TRMM_Files
+        s3_Is_Use_Local_IAM_Role = ETL_TransportObject['SettingsObj'].s3_UseLocal_IAM_Role
+        s3_Is_Date_Ordered_Prefix = ETL_TransportObject['SettingsObj'].s3_Is_Date_Ordered_Prefix
+        s3_NumOfDownloadWorkers = ETL_TransportObject['SettingsObj'].s3_Download_Workers
+        s3_MaxRetries = ETL_TransportObject['SettingsObj'].s3_Download_MaxRetries
+        regEx_String = ETL_TransportObject['SettingsObj'].RegEx_DateFilterString
+        dateFormat_String = ETL_TransportObject['SettingsObj'].Python_DateFormat
+        extract_Source = ETL_TransportObject['SettingsObj'].Extract_Source
+        ftpParams = {
+            "ftpHost" : ETL_TransportObject['SettingsObj'].FTP_Host,
+            "ftpPort" : ETL_TransportObject['SettingsObj'].FTP_Port,
+            "ftpUserName" : ETL_TransportObject['SettingsObj'].FTP_User,
+            "ftpUserPass" : ETL_TransportObject['SettingsObj'].FTP_Pass
+        }
+        ftp_GIS_SubFolderPath = ETL_TransportObject['SettingsObj'].FTP_GIS_SubFolderPath
+        numOfDownloadWorkers = ETL_TransportObject['SettingsObj'].FTP_Download_Workers
+        ftpMaxRequestsPerSecond = ETL_TransportObject['SettingsObj'].FTP_MaxRequestsPerSecond
         extractWorkspace = ETL_TransportObject['Pre_ETL_Object']['ResultsObject']['Scratch_WorkSpace_Locations']['Extract']
+        theManifest = ETL_TransportObject['Pre_ETL_Object']['ResultsObject'].get('Extract_Manifest')
     except:
         e = sys.exc_info()[0]
         errMsg = "Extract_Controller_Method: ERROR: Could not get extract inputs, Error Message: " + str(e)
@@ -965,7 +1165,9 @@ def Extract_Controller_Method(ETL_TransportObject):
         mosaicName = varList[0]['mosaic_name'] # ETL_TransportObject['Pre_ETL_Object']['ResultsObject']['Variable_Dictionary_List']
         primaryDateField = varList[0]['primary_date_field']
         mosaicDS = os.path.join(GeoDB_Workspace,mosaicName)
-        startDateTime = Extract_Support_GetStartDate(primaryDateField,mosaicDS)
+        initialFillInterval = ETL_TransportObject['SettingsObj'].TRMM_RasterArchiveDays
+        fallbackHours = ETL_TransportObject['SettingsObj'].Extract_StartDate_Fallback_Hours
+        startDateTime = Extract_Support_GetStartDate(primaryDateField, mosaicDS, theManifest, dateFormat_String, initialFillInterval, fallbackHours)
         endDateTime = Extract_Support_GetEndDate()
         startDateTime_str = startDateTime.strftime(dateFormat_String)
         endDateTime_str = endDateTime.strftime(dateFormat_String)
@@ -979,7 +1181,10 @@ def Extract_Controller_Method(ETL_TransportObject):
     addToLog("Extract_Controller_Method: Using endDateTime_str : endDateTime :  " + str(endDateTime_str) + " : " + str(endDateTime))
 
     # Execute the Extract Process.
-    ExtractResult = Extract_Do_Extract_FTP(dateFormat_String, startDateTime_str, endDateTime_str, extractWorkspace)
+    if extract_Source == "s3":
+        ExtractResult = Extract_Do_Extract_S3(the_FileExtension, s3BucketRootPath, s3AccessKey, s3SecretKey, s3BucketName, s3PathTo_Files, s3_Is_Use_Local_IAM_Role, regEx_String, dateFormat_String, startDateTime_str, endDateTime_str, extractWorkspace, theManifest, ks_StreamingDownload.DEFAULT_BUFFER_SIZE, s3_Is_Date_Ordered_Prefix, s3_NumOfDownloadWorkers, s3_MaxRetries, onItemExtracted)
+    else:
+        ExtractResult = Extract_Do_Extract_FTP(dateFormat_String, startDateTime_str, endDateTime_str, extractWorkspace, ftpParams, ftp_GIS_SubFolderPath, numOfDownloadWorkers, ftpMaxRequestsPerSecond, theManifest, onItemExtracted)
 
 
 
@@ -1015,108 +1220,106 @@ def Transform_ExampleSupportMethod():
     pass
 
 # Copy rasters from their scratch location to their final location.
-# Called for each extracted item
-def Transform_Do_Transform_CopyRaster(coor_system, extractResultObj, varList, dateSTR, extFileList, rasterOutputLocation, colorMapLocation):
-    # Blank output list
-    outputVarFileList = []
-
-    # Execute Transform Raster Copy
-    try:
-        # The way this is set up is if a single zip contains multiple files.. for TRMM, there is only a single file in the zip..
-        # Keeping the code as it is, so it can be flexible to handle other cases in the future.
-        for varDict in varList:
-            varName = varDict["variable_name"]
-            filePrefix = varDict["file_prefix"]
-            fileSuffix = varDict["file_suffix"]
-            mosaicName = varDict["mosaic_name"]
-            primaryDateField = varDict["primary_date_field"]
-
-            # Build the name of the raster file we're looking for based on
-            #   the configuration for the variable and find it in the list
-            #   of files that were extracted
-            raster_base_name = filePrefix + dateSTR + fileSuffix
-            # Find the file in the list of downloaded files associated with
-            #   the current variable
-            raster_file = ""
-            raster_name = ""
-            for aName in extFileList:
-                currBaseName = os.path.basename(aName)
-                if currBaseName == raster_base_name:
-                    raster_file = aName
-                    raster_name = raster_base_name
-
-            # If we don't find the file in the list of downloaded files,
-            #   skip this variable and move on; otherwise, process the file
-            if len(raster_file) == 0:
-                addToLog("Transform_Do_Transform_CopyRaster No file found for expected raster_base_name, " + str(raster_base_name) + "...skipping...", True)
-            else:
-
+# Called for each extracted item (see ks_TransformPool.transform_Granule)
+def Transform_Do_Transform_CopyRaster(coor_system, extractResultObj, varList, dateSTR, extFileList, rasterOutputLocation, colorMapLocation, isSinglePassWrite=False, correlationID=None):
+    timeStart = time.time()
+    theResult = ks_TransformPool.transform_Granule(get_Geoprocessing_Backend(), coor_system, varList, dateSTR, extFileList, rasterOutputLocation, colorMapLocation, isSinglePassWrite)
+    theResult['Elapsed_Seconds'] = time.time() - timeStart
+    Transform_Support_Record_Granule_Result(dateSTR, theResult, correlationID)
+    return theResult['Transformed_File_List']
+
+# Writes the log messages of one transformed granule (they may come from a worker process) and its errors to the log,
+# adds the bytes it wrote to the metrics and adds its structured log record
+def Transform_Support_Record_Granule_Result(dateSTR, theResult, correlationID=None):
+    for theMsg, detailedLoggingItem, msgArgs in theResult['Log_Messages']:
+        addToLog(theMsg, detailedLoggingItem, *msgArgs)
+    if theResult['ErrorMessage'] != "":
+        addToLog("Transform_Do_Transform_CopyRaster: ERROR: Something went wrong during the transform process for " + str(dateSTR) + ", Error Message: " + theResult['ErrorMessage'])
+    addToLog("Transform_Do_Transform_CopyRaster: Wrote %d bytes for %s", True, theResult['Bytes_Written'], dateSTR)
+    g_Metrics.increment("bytes_written", theResult['Bytes_Written'], {'stage': "transform"})
+
+    if len(theResult['Transformed_File_List']) == 0:
+        outcome = "failed" if theResult['ErrorMessage'] != "" else "no_file"
+    else:
+        outcome = "partial" if theResult['ErrorMessage'] != "" else "transformed"
+    extraFields = None
+    if 'Worker' in theResult:
+        extraFields = {'worker': theResult['Worker']}
+    addGranuleRecord("Transform", "Transform_Do_Transform_CopyRaster", dateSTR, correlationID, theResult.get('Elapsed_Seconds'), theResult['Bytes_Written'], outcome, extraFields)
+
+# Gather the inputs the Transform step needs for every item (so they are only looked up once)
+def Transform_Support_Get_Inputs(ETL_TransportObject):
+    transformInputs = {
+        'coor_system' : ETL_TransportObject['SettingsObj'].TRMM_RasterTransform_CoordSystem,
+        'extractResultObj' : ETL_TransportObject['Extract_Object']['ResultsObject'],
+        'varList' : ETL_TransportObject['Pre_ETL_Object']['ResultsObject']['Variable_Dictionary_List'],
+        'rasterOutputLocation' : ETL_TransportObject['SettingsObj'].Raster_Final_Output_Location,
+        'colorMapLocation' : ETL_TransportObject['SettingsObj'].trmm3Hour_ColorMapLocation,
+        'theManifest' : ETL_TransportObject['Pre_ETL_Object']['ResultsObject'].get('Extract_Manifest'),
+        'numOfWorkers' : ETL_TransportObject['SettingsObj'].Transform_Workers,
+        'isSinglePassWrite' : ETL_TransportObject['SettingsObj'].Transform_Single_Pass_Write,
+        'scratchFolder' : ETL_TransportObject['Pre_ETL_Object']['ResultsObject']['Scratch_WorkSpace_Locations']['Transform']
+    }
+    return transformInputs
 
-                # Add the output raster location for the full raster path
-                out_raster = os.path.join(rasterOutputLocation, raster_name)
-                # Perform the actual conversion (If the file already exists, this process breaks.)
-                if not arcpy.Exists(out_raster):
-                    arcpy.CopyRaster_management(raster_file, out_raster)    # This operation DOES overwrite an existing file (so forecast items get overwritten by actual items when this process happens)
-                    addToLog("Transform_Do_Transform_CopyRaster: Copied "+ os.path.basename(raster_file)+" to "+str(out_raster), True)
-                else:
-                    addToLog("Transform_Do_Transform_CopyRaster: Raster, "+ os.path.basename(raster_file)+" already exists at output location of: "+str(out_raster), True)
-
-                # Apply a color map
-                try:
-                    arcpy.AddColormap_management(out_raster, "#", colorMapLocation)
-                    addToLog("Transform_Do_Transform_CopyRaster: Color Map has been applied to "+str(out_raster), True)
-                except:
-                    addToLog("Transform_Do_Transform_CopyRaster: Error Applying color map to raster : " + str(out_raster) + " ArcPy Error Message: " + str(arcpy.GetMessages()))
-
-                # Define the coordinate system
-                sr = arcpy.SpatialReference(coor_system)
-                arcpy.DefineProjection_management(out_raster, sr)
-                addToLog("Transform_Do_Transform_CopyRaster: Defined coordinate system: "+ str(sr.name), True)
-                # Append the output file and it's associated variable to the
-                #   list of files processed
-                currRastObj = {
-                    "out_raster_file_location":out_raster,
-                    "mosaic_ds_name":mosaicName,
-                    "primary_date_field":primaryDateField
-                }
-                outputVarFileList.append(currRastObj)
+# Transform a single extract item, returns the transform item or None if nothing was transformed
+def Transform_Do_Transform_ExtractItem(transformInputs, currentExtractItem):
+    current_dateSTR = currentExtractItem['DateString']
+    current_extFileList = currentExtractItem['ExtractedFilesList']
 
-    except:
-        e = sys.exc_info()[0]
-        addToLog("Transform_Do_Transform_CopyRaster: ERROR: Something went wrong during the transform process, Error Message: " + str(e))
+    current_CorrelationID = currentExtractItem.get('Correlation_ID')
 
-    # Return the output list
-    return outputVarFileList
+    with g_Metrics.span("transform", {'granule': current_dateSTR}):
+        Transformed_File_List = Transform_Do_Transform_CopyRaster(transformInputs['coor_system'], transformInputs['extractResultObj'], transformInputs['varList'], current_dateSTR, current_extFileList, transformInputs['rasterOutputLocation'], transformInputs['colorMapLocation'], transformInputs['isSinglePassWrite'], current_CorrelationID)
+    return Transform_Support_Get_TransformItem(transformInputs, current_dateSTR, Transformed_File_List, current_CorrelationID)
 
-def Transform_Controller_Method(ETL_TransportObject):
-    # Do a "Transform" Process
+# Builds the transform item for a granule (records it in the manifest), returns None if nothing was transformed
+def Transform_Support_Get_TransformItem(transformInputs, current_dateSTR, Transformed_File_List, correlationID=None):
+    if len(Transformed_File_List) == 0:
+        # do nothing, no data returned
+        g_Metrics.increment("files_failed", 1, {'stage': "transform"})
+        return None
+    g_Metrics.increment("files_transformed", len(Transformed_File_List))
 
-    # Gather inputs
-    coor_system = ETL_TransportObject['SettingsObj']['TRMM_RasterTransform_CoordSystem']
-    extractResultObj = ETL_TransportObject['Extract_Object']['ResultsObject']
-    varList = ETL_TransportObject['Pre_ETL_Object']['ResultsObject']['Variable_Dictionary_List']
-    rasterOutputLocation = ETL_TransportObject['SettingsObj']['Raster_Final_Output_Location']
-    colorMapLocation = ETL_TransportObject['SettingsObj']['trmm3Hour_ColorMapLocation']
+    CurrentTransObj = {
+        'Transformed_File_List':Transformed_File_List,
+        'date_string':current_dateSTR,
+        'Correlation_ID':correlationID or get_Correlation_ID(current_dateSTR)
+    }
+    if transformInputs['theManifest'] != None:
+        transformInputs['theManifest'].record_Transform(current_dateSTR)
+    return CurrentTransObj
 
-    # For each item in the extract list.. call this function
+# Transform every extract item with a pool of worker processes (see ks_TransformPool)
+#   Returns (list of transform items in extract list order, list of (DateString, ErrorMessage) for the granules with errors)
+def Transform_Do_Transform_ExtractList_Parallel(transformInputs, current_ExtractList):
     TransformResult_List = []
-    current_ExtractList = ETL_TransportObject['Extract_Object']['ResultsObject']['ExtractResult']['ExtractList']
-    for currentExtractItem in current_ExtractList:
-        current_dateSTR = currentExtractItem['DateString']
-        current_extFileList = currentExtractItem['ExtractedFilesList']
-
-        Transformed_File_List = Transform_Do_Transform_CopyRaster(coor_system, extractResultObj, varList, current_dateSTR, current_extFileList, rasterOutputLocation, colorMapLocation)
-        if len(Transformed_File_List) == 0:
-            # do nothing, no data returned
-            pass
-        else:
-            CurrentTransObj = {
-                'Transformed_File_List':Transformed_File_List,
-                'date_string':current_dateSTR
-            }
-            TransformResult_List.append(CurrentTransObj)
-
+    Granule_Errors = []
+    granuleArgsList = [(transformInputs['coor_system'], transformInputs['varList'], currentExtractItem['DateString'], currentExtractItem['ExtractedFilesList'], transformInputs['rasterOutputLocation'], transformInputs['colorMapLocation'], transformInputs['isSinglePassWrite']) for currentExtractItem in current_ExtractList]
 
+    numOfWorkers = min(transformInputs['numOfWorkers'], len(current_ExtractList))
+    addToLog("Transform_Do_Transform_ExtractList_Parallel: Transforming " + str(len(current_ExtractList)) + " granules with " + str(numOfWorkers) + " worker processes", True)
+    theTransformPool = ks_TransformPool.TransformPool(get_Geoprocessing_Backend().name, numOfWorkers, transformInputs['scratchFolder'])
+    try:
+        itemIndex = 0
+        for currResult in theTransformPool.imap_Granules(granuleArgsList):
+            current_dateSTR = current_ExtractList[itemIndex]['DateString']
+            current_CorrelationID = current_ExtractList[itemIndex].get('Correlation_ID')
+            itemIndex += 1
+            Transform_Support_Record_Granule_Result(current_dateSTR, currResult, current_CorrelationID)
+            g_Metrics.record_Span("transform", currResult['Elapsed_Seconds'], {'granule': current_dateSTR, 'worker': str(currResult['Worker'])}, currResult['ErrorMessage'] == "")
+            if currResult['ErrorMessage'] != "":
+                Granule_Errors.append((current_dateSTR, currResult['ErrorMessage']))
+            CurrentTransObj = Transform_Support_Get_TransformItem(transformInputs, current_dateSTR, currResult['Transformed_File_List'], current_CorrelationID)
+            if CurrentTransObj != None:
+                TransformResult_List.append(CurrentTransObj)
+    finally:
+        theTransformPool.close()
+    return TransformResult_List, Granule_Errors
+
+# Package up the Transform results
+#   Granule_Errors is a list of (DateString, ErrorMessage), one per granule that had errors
+def Transform_Support_Get_ResultsObject(TransformResult_List, Granule_Errors=None):
     # Check the above setup for errors
     IsError = False
     ErrorMessage = ""
@@ -1127,13 +1330,41 @@ def Transform_Controller_Method(ETL_TransportObject):
     # Package up items from the PreETL Step
     returnObj = {
         'TransformResult_List': TransformResult_List,
+        'Granule_Errors': Granule_Errors or [],
         'IsError': IsError,
         'ErrorMessage':ErrorMessage
     }
-
-    # Return the packaged items.
     return returnObj
 
+def Transform_Controller_Method(ETL_TransportObject):
+    # Do a "Transform" Process
+
+    # Gather inputs
+    transformInputs = Transform_Support_Get_Inputs(ETL_TransportObject)
+
+    # For each item in the extract list.. call this function
+    TransformResult_List = []
+    Granule_Errors = []
+    current_ExtractList = ETL_TransportObject['Extract_Object']['ResultsObject']['ExtractResult']['ExtractList']
+    isParallel = transformInputs['numOfWorkers'] > 1 and len(current_ExtractList) > 1
+    if isParallel:
+        try:
+            TransformResult_List, Granule_Errors = Transform_Do_Transform_ExtractList_Parallel(transformInputs, current_ExtractList)
+        except:
+            # The pool itself failed (not a granule), every granule is done again one at a time (rasters already in place are kept)
+            e = sys.exc_info()[0]
+            addToLog("Transform_Controller_Method: ERROR, the transform worker pool failed, transforming one granule at a time.  Error Message: " + str(e))
+            isParallel = False
+            TransformResult_List = []
+            Granule_Errors = []
+    if not isParallel:
+        for currentExtractItem in current_ExtractList:
+            CurrentTransObj = Transform_Do_Transform_ExtractItem(transformInputs, currentExtractItem)
+            if CurrentTransObj != None:
+                TransformResult_List.append(CurrentTransObj)
+
+    # Return the packaged items.
+    return Transform_Support_Get_ResultsObject(TransformResult_List, Granule_Errors)
 
 #--------------------------------------------------------------------------
 # Load
@@ -1154,148 +1385,159 @@ def Load_ExampleSupportMethod():
 
 
 
+# Loads the rasters of one transform item (one add call, attributes and statistics for this item only)
 def Load_Do_Load_TRMM_Dataset(transFileList, geoDB_MosaicDataset_Workspace, regExp_Pattern, date_Format, coor_system):
+    get_DateTime_From_RasterName = lambda rasterName: Extract_Support_Get_PyDateTime_From_String(rasterName, regExp_Pattern, date_Format)
+    return ks_MosaicLoad.load_TransformItems_Batch(get_Geoprocessing_Backend(), [{'Transformed_File_List': transFileList}], get_DateTime_From_RasterName, geoDB_MosaicDataset_Workspace, coor_system, addToLog)[0]
+
+# Gather the inputs the Load step needs for every item (so they are only looked up once)
+def Load_Support_Get_Inputs(ETL_TransportObject):
+    loadInputs = {
+        'GeoDB_Workspace' : ETL_TransportObject['Pre_ETL_Object']['ResultsObject']['GeoDB_Dataset_Workspace'],
+        'theRegEx' : ETL_TransportObject['SettingsObj'].RegEx_DateFilterString,
+        'theDateFormat' : ETL_TransportObject['SettingsObj'].Python_DateFormat,
+        'coor_system' : ETL_TransportObject['SettingsObj'].TRMM_RasterTransform_CoordSystem,
+        'theManifest' : ETL_TransportObject['Pre_ETL_Object']['ResultsObject'].get('Extract_Manifest'),
+        'Is_Batch_Load' : ETL_TransportObject['SettingsObj'].Load_Batch_Mode
+    }
+    # Same mosaic dataset Extract_Support_GetStartDate reads the newest date from
+    loadInputs['High_Water_Mark_Name'] = os.path.join(loadInputs['GeoDB_Workspace'], ETL_TransportObject['Pre_ETL_Object']['ResultsObject']['Variable_Dictionary_List'][0]['mosaic_name'])
+    return loadInputs
 
+# Moves the high water mark forward to the newest granule that was loaded
+def Load_Support_Record_High_Water_Mark(loadInputs, loadedDateStrings):
+    if loadInputs['theManifest'] == None or len(loadedDateStrings) == 0:
+        return
+    try:
+        loadInputs['theManifest'].record_High_Water_Mark(loadInputs['High_Water_Mark_Name'], max(loadedDateStrings))
+    except:
+        e = sys.exc_info()[0]
+        addToLog("Load_Support_Record_High_Water_Mark: ERROR, Could not update the high water mark, Error Message: " + str(e))
 
-    mdWS = geoDB_MosaicDataset_Workspace
-    # Load each raster into its appropriate mosaic dataset
-    numLoaded = 0
-
-    for fileDict in transFileList:
-        rasterFile = fileDict["out_raster_file_location"]       # Filesystem folder that holds raster files.
-        rasterName = os.path.basename(rasterFile).replace(".tif","")     # different filename schema uses this -->  # os.path.basename(rasterFile).split(".")[0]
-        addToLog("Load_Do_Load_TRMM_Dataset: rasterName " + str(rasterName), True)
-        mosaicDSName = fileDict["mosaic_ds_name"]
-        primaryDateField = fileDict["primary_date_field"]
-        mosaicDS = os.path.join(mdWS, mosaicDSName)             # GeoDB/DatasetName
-
-        addError = False
+# Tags the load result object of a transform item with its granule (PostETL reports on the granules it loaded) and adds its structured log record
+def Load_Support_Record_Granule_Result(currentTransformItem, current_LoadResultObj, seconds, extraFields=None):
+    current_LoadResultObj['date_string'] = currentTransformItem['date_string']
+    current_LoadResultObj['Correlation_ID'] = currentTransformItem.get('Correlation_ID')
+    outcome = "loaded" if current_LoadResultObj['NumberLoaded'] > 0 else "failed"
+    addGranuleRecord("Load", "Load_Do_Load_TRMM_Dataset", currentTransformItem['date_string'], currentTransformItem.get('Correlation_ID'), seconds, None, outcome, extraFields)
 
-        # For now, skip the file if the mosaic dataset doesn't exist.  Could
-        #   be updated to create the mosaic dataset if it's missing
-        if not arcpy.Exists(mosaicDS):
-            addToLog("Load_Do_Load_TRMM_Dataset: Mosaic dataset "+str(mosaicDSName)+", located at, " +str(mosaicDS)+" does not exist.  Skipping "+os.path.basename(rasterFile))
-        else:
-            try:
-                # Add raster to mosaic dataset
-                addError = False
-                # Having some issues with the calculate statistics function...
-                # having issues with raster not showing up on arc map or arc catalog.. exploring the settings here
-                # spatialRef param was set to "#" before..  # Changed "EXCLUDE_DUPLICATES" to "OVERWRITE_DUPLICATES", Changed LAST Param from "#" to "FORCE_SPATIAL_REFERENCE"
-                sr = arcpy.SpatialReference(coor_system)
-                arcpy.AddRastersToMosaicDataset_management(mosaicDS, "Raster Dataset", rasterFile,\
-                                                           "UPDATE_CELL_SIZES", "UPDATE_BOUNDARY", "NO_OVERVIEWS",\
-                                                           "2", "#", "#", "#", "#", "NO_SUBFOLDERS",\
-                                                           "EXCLUDE_DUPLICATES", "BUILD_PYRAMIDS", "CALCULATE_STATISTICS",\
-                                                           "NO_THUMBNAILS", "Add Raster Datasets","#")
-                addToLog("Load_Do_Load_TRMM_Dataset: Added " +str(rasterFile)+" to mosaic dataset "+str(mosaicDSName), True)
-                numLoaded += 1
+# Load a single transform item, returns the load result object
+def Load_Do_Load_TransformItem(loadInputs, currentTransformItem):
+    current_TransFileList = currentTransformItem['Transformed_File_List'] # transFileList
 
+    timeStart = time.time()
+    with g_Metrics.span("load", {'granule': currentTransformItem['date_string']}):
+        current_LoadResultObj = Load_Do_Load_TRMM_Dataset(current_TransFileList, loadInputs['GeoDB_Workspace'], loadInputs['theRegEx'], loadInputs['theDateFormat'], loadInputs['coor_system'])
+    g_Metrics.increment("files_loaded", current_LoadResultObj['NumberLoaded'])
+    Load_Support_Record_Granule_Result(currentTransformItem, current_LoadResultObj, time.time() - timeStart)
+    if loadInputs['theManifest'] != None and current_LoadResultObj['NumberLoaded'] > 0:
+        loadInputs['theManifest'].record_Load(currentTransformItem['date_string'])
+        Load_Support_Record_High_Water_Mark(loadInputs, [currentTransformItem['date_string']])
+    return current_LoadResultObj
+
+# Load every transform item in one batch (one add call and one statistics calculation per mosaic dataset)
+# Returns a list with one load result object per transform item
+def Load_Do_Load_TransformItems_Batch(loadInputs, transformItemList):
+    get_DateTime_From_RasterName = lambda rasterName: Extract_Support_Get_PyDateTime_From_String(rasterName, loadInputs['theRegEx'], loadInputs['theDateFormat'])
+    timeStart = time.time()
+    with g_Metrics.span("load_batch", {'granules': str(len(transformItemList))}):
+        LoadResult_List = ks_MosaicLoad.load_TransformItems_Batch(get_Geoprocessing_Backend(), transformItemList, get_DateTime_From_RasterName, loadInputs['GeoDB_Workspace'], loadInputs['coor_system'], addToLog)
+    g_Metrics.increment("files_loaded", sum([currLoadResult['NumberLoaded'] for currLoadResult in LoadResult_List]))
+    # Every granule of the batch shares the time of the batch
+    batchSeconds = time.time() - timeStart
+    for idx in range(len(transformItemList)):
+        Load_Support_Record_Granule_Result(transformItemList[idx], LoadResult_List[idx], batchSeconds, {'batch': len(transformItemList)})
+    if loadInputs['theManifest'] != None:
+        loadedDateStrings = []
+        for idx in range(len(transformItemList)):
+            if LoadResult_List[idx]['NumberLoaded'] > 0:
+                loadInputs['theManifest'].record_Load(transformItemList[idx]['date_string'])
+                loadedDateStrings.append(transformItemList[idx]['date_string'])
+        Load_Support_Record_High_Water_Mark(loadInputs, loadedDateStrings)
+    return LoadResult_List
+
+# Package up the Load results
+def Load_Support_Get_ResultsObject(LoadResult_List):
+    # Check the above setup for errors
+    IsError = False
+    ErrorMessage = ""
 
-            except:
-                e = sys.exc_info()[0]
-                addToLog("Load_Do_Load_TRMM_Dataset: ERROR: Something went wrong when adding the raster to the mosaic dataset. Error Message: " + str(e) + " ArcPy Messages: " + str(arcpy.GetMessages(2)))
-                addError = True
-
-            if not addError:
-                # Calculate statistics on the mosaic dataset
-                try:
-                    arcpy.CalculateStatistics_management(mosaicDS,1,1,"#","SKIP_EXISTING","#")
-                    addToLog("Load_Do_Load_TRMM_Dataset: Calculated statistics on mosaic dataset "+str(mosaicDSName), True)
-                    pass
-
-                # Handle errors for calc statistics
-                except:
-                    e = sys.exc_info()[0]
-                    addToLog("Load_Do_Load_TRMM_Dataset: ERROR: Error calculating statistics on mosaic dataset "+str(mosaicDSName)+"  Error Message: " + str(e) + " ArcPy Messages: " + str(arcpy.GetMessages(2)))
-                    pass
-
-                # Build attribute and value lists
-                attrNameList = []
-                attrExprList = []
-
-                # Build a list of attribute names and expressions to use with
-                #   the ArcPy Data Access Module cursor below
-                HC_AttrName = "timestamp"
-                CurrentDateTime = Extract_Support_Get_PyDateTime_From_String(rasterName, regExp_Pattern, date_Format)
-                attrNameList.append(HC_AttrName)
-                attrExprList.append(CurrentDateTime)
-
-
-                # Quick fix, Adding the extra fields
-                # 'start_datetime' and 'end_datetime'
-                CurrentDateTime_Minus_1hr30min = CurrentDateTime - datetime.timedelta(hours=1.5)
-                attrNameList.append('start_datetime')
-                attrExprList.append(CurrentDateTime_Minus_1hr30min)
-                CurrentDateTime_Plus_1hr30min = CurrentDateTime + datetime.timedelta(hours=1.5)
-                attrNameList.append('end_datetime')
-                attrExprList.append(CurrentDateTime_Plus_1hr30min)
-
-                # Update the attributes with their configured expressions
-                #   (ArcPy Data Access Module UpdateCursor)
-                try:
-                    wClause = arcpy.AddFieldDelimiters(mosaicDS,"name")+" = '"+rasterName+"'"
-                    with arcpy.da.UpdateCursor(mosaicDS, attrNameList, wClause) as cursor:
-                        for row in cursor:
-                            for idx in range(len(attrNameList)):
-                                #row[idx] = eval(attrExprList[idx]) # Not evaling this right now, using an actual value
-                                row[idx] = attrExprList[idx]
-
-                            cursor.updateRow(row)
-
-                    addToLog("Load_Do_Load_TRMM_Dataset: Calculated attributes for raster", True)
-                    del cursor
-
-                # Handle errors for calculating attributes
-                except:
-                    e = sys.exc_info()[0]
-                    addToLog("Load_Do_Load_TRMM_Dataset: ERROR: Error calculating attributes for raster"+str(rasterFile)+"  Error Message: " + str(e))
+    if len(LoadResult_List) == 0:
+        IsError = True
+        ErrorMessage += "|  Load List contains 0 elements.  No items were Loaded."
 
 
-    retObj = {
-        'NumberLoaded': numLoaded
+    # Package up items from the PreETL Step
+    returnObj = {
+        'LoadResult_List': LoadResult_List,
+        'IsError': IsError,
+        'ErrorMessage':ErrorMessage
     }
-
-    return retObj
+    return returnObj
 
 def Load_Controller_Method(ETL_TransportObject):
     # Do a "Load" Process
 
-
-
     # Gather inputs
-    GeoDB_Workspace = ETL_TransportObject['Pre_ETL_Object']['ResultsObject']['GeoDB_Dataset_Workspace'] #['SettingsObj']['Raster_Final_Output_Location']
-    theRegEx = ETL_TransportObject['SettingsObj']['RegEx_DateFilterString']
-    theDateFormat = ETL_TransportObject['SettingsObj']['Python_DateFormat']
-    coor_system = ETL_TransportObject['SettingsObj']['TRMM_RasterTransform_CoordSystem']
+    loadInputs = Load_Support_Get_Inputs(ETL_TransportObject)
 
     # For each item in the Transform list.. call this function
     LoadResult_List = []
     current_TransformList = ETL_TransportObject['Transform_Object']['ResultsObject']['TransformResult_List']
-    for currentTransformItem in current_TransformList:
-        current_TransFileList = currentTransformItem['Transformed_File_List'] # transFileList
+    if loadInputs['Is_Batch_Load']:
+        LoadResult_List = Load_Do_Load_TransformItems_Batch(loadInputs, current_TransformList)
+    else:
+        for currentTransformItem in current_TransformList:
+            LoadResult_List.append(Load_Do_Load_TransformItem(loadInputs, currentTransformItem))
 
-        current_LoadResultObj = Load_Do_Load_TRMM_Dataset(current_TransFileList, GeoDB_Workspace, theRegEx, theDateFormat, coor_system)
-        LoadResult_List.append(current_LoadResultObj)
+    # Return the packaged items.
+    return Load_Support_Get_ResultsObject(LoadResult_List)
 
-    # Check the above setup for errors
-    IsError = False
-    ErrorMessage = ""
 
-    if len(LoadResult_List) == 0:
-        IsError = True
-        ErrorMessage += "|  Load List contains 0 elements.  No items were Loaded."
+#--------------------------------------------------------------------------
+# Pipeline
+#   Optional streaming mode (setting 'ETL_Pipeline_Mode').  Instead of
+#   running the Extract, Transform and Load steps one after the other over
+#   the whole batch, each item is handed to the Transform step as soon as
+#   it is downloaded and to the Load step as soon as it is transformed.
+#   The stages are connected by bounded queues, so a long backfill takes
+#   about as long as the slowest stage instead of the sum of all three.
+#   The Extract, Transform and Load ResultsObjects are filled in the same
+#   way as the sequential mode so the final report does not change.
+#--------------------------------------------------------------------------
 
+# Geoprocessing (arcpy in particular) is not safe to run from two threads at once, so the Transform and Load stages share this lock
+g_Geoprocessing_Lock = threading.Lock()
 
-    # Package up items from the PreETL Step
-    returnObj = {
-        'LoadResult_List': LoadResult_List,
-        'IsError': IsError,
-        'ErrorMessage':ErrorMessage
-    }
+def Pipeline_Controller_Method(ETL_TransportObject):
+
+    maxQueueSize = ETL_TransportObject['SettingsObj'].ETL_Pipeline_MaxQueueSize
+
+    transformInputs = Transform_Support_Get_Inputs(ETL_TransportObject)
+    loadInputs = Load_Support_Get_Inputs(ETL_TransportObject)
+
+    thePipeline = ks_Pipeline.StagePipeline([
+        ("Transform", lambda currentExtractItem: Transform_Do_Transform_ExtractItem(transformInputs, currentExtractItem), g_Geoprocessing_Lock),
+        ("Load", lambda currentTransformItem: Load_Do_Load_TransformItem(loadInputs, currentTransformItem), g_Geoprocessing_Lock)
+    ], maxQueueSize, addToLog)
+    thePipeline.start()
+
+    try:
+        addToLog("========= EXTRACTING (Pipelined) =========")
+        ETL_TransportObject['Extract_Object']['ResultsObject'] = Extract_Controller_Method(ETL_TransportObject, thePipeline.put)
+    except:
+        e = sys.exc_info()[0]
+        addToLog("Pipeline_Controller_Method: EXTRACTING ERROR, something went wrong, ERROR MESSAGE: "+ str(e))
+
+    # Wait for the items already extracted to make it through the Transform and Load stages
+    pipelineResults = thePipeline.finish()
+    for stageName in ["Transform", "Load"]:
+        for stageItem, stageErrMsg in pipelineResults[stageName + "_Errors"]:
+            addToLog("Pipeline_Controller_Method: ERROR in " + stageName + " stage, ERROR MESSAGE: " + stageErrMsg)
+
+    ETL_TransportObject['Transform_Object']['ResultsObject'] = Transform_Support_Get_ResultsObject(pipelineResults["Transform"])
+    ETL_TransportObject['Load_Object']['ResultsObject'] = Load_Support_Get_ResultsObject(pipelineResults["Load"])
 
-    # Return the packaged items.
-    return returnObj
 
 #--------------------------------------------------------------------------
 # Post ETL
@@ -1314,13 +1556,13 @@ def PostETL_RefreshPermissions_For_Accumulations(pathToGeoDB, rasterDatasetList)
     for dataSetName in rasterDatasetList:
         try:
             mds = os.path.join(pathToGeoDB, dataSetName)
-            arcpy.ChangePrivileges_management(mds,"role_servir_editor","GRANT","GRANT")
-            addToLog("PostETL_RefreshPermissions_For_Accumulations: Editor Permissions set for " + str(dataSetName) + ", arcpy Message: " + str(arcpy.GetMessages()))
-            arcpy.ChangePrivileges_management(mds,"role_servir_viewer","GRANT","#")
-            addToLog("PostETL_RefreshPermissions_For_Accumulations: Viewer Permissions set for " + str(dataSetName) + ", arcpy Message: " + str(arcpy.GetMessages()))
+            get_Geoprocessing_Backend().change_Privileges(mds,"role_servir_editor","GRANT","GRANT")
+            addToLog("PostETL_RefreshPermissions_For_Accumulations: Editor Permissions set for " + str(dataSetName) + ", arcpy Message: " + str(get_Geoprocessing_Backend().get_Messages()))
+            get_Geoprocessing_Backend().change_Privileges(mds,"role_servir_viewer","GRANT","#")
+            addToLog("PostETL_RefreshPermissions_For_Accumulations: Viewer Permissions set for " + str(dataSetName) + ", arcpy Message: " + str(get_Geoprocessing_Backend().get_Messages()))
         except:
             e = sys.exc_info()[0]
-            addToLog("PostETL_RefreshPermissions_For_Accumulations: ERROR, Something went wrong when setting permissions.  System Error Message: "+ str(e) + ", ArcPy Message: " + str(arcpy.GetMessages()))
+            addToLog("PostETL_RefreshPermissions_For_Accumulations: ERROR, Something went wrong when setting permissions.  System Error Message: "+ str(e) + ", ArcPy Message: " + str(get_Geoprocessing_Backend().get_Messages()))
 
 # lastRasterName # Expecting something like : "3B42RT.2014062509.7.03hr"
 # whichComposite # Expecting something like : "1day" , "3day", "7day"
@@ -1359,13 +1601,22 @@ def PostETL_Download_And_Load_CustomRaster_From_TRMMOPEN(lastRasterName, whichCo
 
     # Connect to FTP, download the files  # TRMMs ftp acts funny if we don't enter delays.. thats why using time.sleep(1)
     time.sleep(1)
-    ftp_Connection = ftplib.FTP(ftpParams['ftpHost'],ftpParams['ftpUserName'],ftpParams['ftpUserPass'])
+    ftp_Connection = ftplib.FTP()
+    ftp_Connection.connect(ftpParams['ftpHost'], int(ftpParams.get('ftpPort', 21)))
+    ftp_Connection.login(ftpParams['ftpUserName'],ftpParams['ftpUserPass'])
     time.sleep(1)
 
     # Change Folder FTP
     # Extra ftpSubfolder
     ftp_Connection.cwd(ftpSubfolder)
     time.sleep(1)
+
+    # The folder was normally listed during the Extract already, only download the composite if it is there
+    theListing = ks_FTPDownloadPool.get_Folder_Listing(ftp_Connection, ftpParams['ftpHost'], ftpSubfolder)
+    if not (TIF_FileName in theListing['Files'] and TFW_FileName in theListing['Files']):
+        ftp_Connection.close()
+        addToLog("PostETL_Download_And_Load_CustomRaster_From_TRMMOPEN: " + TIF_FileName + " is not on the server, " + str(rasterDataSetName) + " is not updated")
+        return
     # Download the TIF and World Files
     with open(location_ToSave_TIF_File, "wb") as f:
         ftp_Connection.retrbinary("RETR %s" % TIF_FileName, f.write)
@@ -1381,18 +1632,15 @@ def PostETL_Download_And_Load_CustomRaster_From_TRMMOPEN(lastRasterName, whichCo
 
     # Apply Transform (Spatial Projection)
     # Copy Raster
-    if arcpy.Exists(trans_Raster_File):
+    theBackend = get_Geoprocessing_Backend()
+    if theBackend.exists(trans_Raster_File):
         # Do nothing, raster already exists at location
         pass
     else:
-        arcpy.CopyRaster_management(location_ToSave_TIF_File, trans_Raster_File)
+        theBackend.copy_Raster(location_ToSave_TIF_File, trans_Raster_File)
 
     # Apply Spatial Reference
-    sr = arcpy.SpatialReference(coor_system)
-
-    #addToLog("CUSTOM RASTERS SUB:  Alert N  ======== sr : " + str(sr))
-
-    arcpy.DefineProjection_management(trans_Raster_File, sr)
+    theBackend.define_Projection(trans_Raster_File, coor_system)
 
     #addToLog("CUSTOM RASTERS SUB:  Alert O")
 
@@ -1401,13 +1649,14 @@ def PostETL_Download_And_Load_CustomRaster_From_TRMMOPEN(lastRasterName, whichCo
     path_To_RasterDestination = os.path.join(pathToGeoDB, rasterDataSetName)
 
     # Delete the old one if it exists first
-    if arcpy.Exists(path_To_RasterDestination):
+    if theBackend.exists(path_To_RasterDestination):
         addToLog("PostETL_Download_And_Load_CustomRaster_From_TRMMOPEN: Deleting... " + str(path_To_RasterDestination))
-        r = arcpy.Delete_management(path_To_RasterDestination)
-        addToLog("PostETL_Download_And_Load_CustomRaster_From_TRMMOPEN:Delete_management Result " + str(r.status))
-    arcpy.CopyRaster_management(trans_Raster_File, path_To_RasterDestination)
+        theBackend.delete(path_To_RasterDestination)
+        addToLog("PostETL_Download_And_Load_CustomRaster_From_TRMMOPEN:Delete_management Messages " + str(theBackend.get_Messages()))
+    theBackend.copy_Raster(trans_Raster_File, path_To_RasterDestination)
 
-def PostETL_Support_Build_Custom_Rasters(PostETL_CustomRaster_Params, ETL_TransportObject):
+# Builds the 30 day composite with SD's arcpy custom raster factory (ArcGIS only)
+def PostETL_Support_Build_30Day_Custom_Raster_ArcGIS(PostETL_CustomRaster_Params):
 
     # Gather params
     fileFolder_With_TRMM_Rasters = PostETL_CustomRaster_Params['fileFolder_With_TRMM_Rasters'] # r"C:\ksArcPy\trmm\rastout" # Settings, 'Raster_Final_Output_Location'
@@ -1508,21 +1757,136 @@ def PostETL_Support_Build_Custom_Rasters(PostETL_CustomRaster_Params, ETL_Transp
     trmm_custom_raster_factory.addCustomRasterReuests([trmm_30day]) # We only want to create the 30 day one, the 1, and 7 day can be downloaded.
     trmm_custom_raster_factory.createCustomRasters() # start the composite creation process
 
+# Returns {'%Y%m%d%H' DateString: raster path} for the 3 hour rasters (of the variable 'varDict') in the raster output folder
+def PostETL_Support_Get_Granule_Paths(rasterFolder, varDict, regExp_Pattern, date_Format):
+    granulePathsByDateString = {}
+    for rasterName in get_Geoprocessing_Backend().list_Rasters(rasterFolder):
+        if not (rasterName.startswith(varDict['file_prefix']) and rasterName.endswith(varDict['file_suffix'])):
+            continue
+        rasterDateTime = Extract_Support_Get_PyDateTime_From_String(rasterName, regExp_Pattern, date_Format)
+        if rasterDateTime == None:
+            continue
+        granulePathsByDateString[rasterDateTime.strftime(ks_RollingAccumulator.STATE_DATE_FORMAT)] = os.path.join(rasterFolder, rasterName)
+    return granulePathsByDateString
+
+# Replaces a composite raster dataset in the GeoDB with a new composite file.
+#   The new one is copied in next to the old one (with its color map and coordinate system) and then swapped in,
+#   so the services never see a half built composite.  In a geodatabase the swap is two renames (see
+#   GeoprocessingBackend.replace_Raster), the name is missing only for the moment between them.
+#   colorMapLocation can be None (no color map).
+def PostETL_Support_Load_Composite_Raster(compositeFile, pathToGeoDB, rasterDataSetName, colorMapLocation, coor_system):
+    theBackend = get_Geoprocessing_Backend()
+    path_To_RasterDestination = os.path.join(pathToGeoDB, rasterDataSetName)
+    path_To_RasterTemp = os.path.join(pathToGeoDB, rasterDataSetName + "_new")
+    if theBackend.exists(path_To_RasterTemp):
+        theBackend.delete(path_To_RasterTemp)
+    theBackend.copy_Raster(compositeFile, path_To_RasterTemp)
+    if colorMapLocation != None:
+        try:
+            theBackend.add_Colormap(path_To_RasterTemp, colorMapLocation)
+        except:
+            addToLog("PostETL_Support_Load_Composite_Raster: Error Applying color map to raster : " + str(path_To_RasterTemp) + " ArcPy Error Message: " + str(theBackend.get_Messages()))
+    theBackend.define_Projection(path_To_RasterTemp, coor_system)
+    addToLog("PostETL_Support_Load_Composite_Raster: Replacing... " + str(path_To_RasterDestination), True)
+    theBackend.replace_Raster(path_To_RasterTemp, path_To_RasterDestination)
+
+# Builds composites with the rolling accumulator (the running sums are kept in the scratch folder between runs),
+#   compositeList is [{'WindowDays', 'RasterDataSetName', 'ColorMapLocation'}, ...]
+def PostETL_Support_Build_Composites_Rolling(PostETL_CustomRaster_Params, ETL_TransportObject, compositeList):
+    settingsObj = ETL_TransportObject['SettingsObj']
+    varDict = ETL_TransportObject['Pre_ETL_Object']['ResultsObject']['Variable_Dictionary_List'][0]
+    granulePathsByDateString = PostETL_Support_Get_Granule_Paths(PostETL_CustomRaster_Params['fileFolder_With_TRMM_Rasters'], varDict, settingsObj.RegEx_DateFilterString, settingsObj.Python_DateFormat)
+    if len(granulePathsByDateString) == 0:
+        addToLog("PostETL_Support_Build_Composites_Rolling: No 3 hour rasters found in " + str(PostETL_CustomRaster_Params['fileFolder_With_TRMM_Rasters']) + ", composites will not be built.")
+        return
+
+    # The windows end at the newest granule
+    windowEndDateTime = datetime.datetime.strptime(max(granulePathsByDateString.keys()), ks_RollingAccumulator.STATE_DATE_FORMAT)
+    stateFolder = os.path.join(settingsObj.ScratchFolder, settingsObj.Composite_State_FolderName)
+    theRasterCache = ks_MappedRaster.RasterHandleCache(settingsObj.Raster_Cache_Max_Handles, settingsObj.Raster_Cache_Max_MB * 1024 * 1024)
+    maxMemoryMB = settingsObj.Composite_Max_Memory_MB
+    theEngine = ks_RollingAccumulator.AccumulationEngine(stateFolder, [currComposite['WindowDays'] for currComposite in compositeList], settingsObj.Composite_Max_Incremental_Updates, addToLog, theRasterCache, maxMemoryMB * 1024 * 1024 if maxMemoryMB > 0 else None)
+    with g_Metrics.span("composite_update", {'windows': ",".join([str(currComposite['WindowDays']) for currComposite in compositeList])}):
+        engineResults = theEngine.update(granulePathsByDateString, windowEndDateTime)
+    g_Metrics.increment("composite_granule_reads", theEngine.num_Of_Granule_Reads)
+    addToLog("PostETL_Support_Build_Composites_Rolling: Raster handle cache " + str(theRasterCache.get_Stats()), True)
+
+    for currComposite in compositeList:
+        currResult = engineResults.get(currComposite['WindowDays'])
+        if currResult == None:
+            continue
+        try:
+            compositeFile = os.path.join(PostETL_CustomRaster_Params['workSpacePath'], currComposite['RasterDataSetName'] + ".tif")
+            theEngine.write_Composite(compositeFile, currResult)
+            PostETL_Support_Load_Composite_Raster(compositeFile, PostETL_CustomRaster_Params['output_basepath'], currComposite['RasterDataSetName'], currComposite['ColorMapLocation'], settingsObj.TRMM_RasterTransform_CoordSystem)
+            addToLog("PostETL_Support_Build_Composites_Rolling: Built " + str(currComposite['RasterDataSetName']) + " from " + str(currResult['NumOfGranules']) + " granules ending " + str(windowEndDateTime) + " (added " + str(currResult['NumAdded']) + ", removed " + str(currResult['NumRemoved']) + ", full recompute: " + str(currResult['Is_Full_Recompute']) + ")")
+        except:
+            e = sys.exc_info()[0]
+            addToLog("PostETL_Support_Build_Composites_Rolling: ERROR, Something went wrong when building " + str(currComposite['RasterDataSetName']) + ".  System Error Message: "+ str(e))
+
+def PostETL_Support_Build_Custom_Rasters(PostETL_CustomRaster_Params, ETL_TransportObject):
+
+    # 'local' builds the 1, 3, and 7 day composites from the 3 hour rasters already on disk, 'ftp' downloads them from TRMMOPEN
+    is_Short_Composites_Local = (ETL_TransportObject['SettingsObj'].TRMM_Short_Composites_Source == "local")
+    is_30Day_Rolling = ETL_TransportObject['SettingsObj'].TRMM30Day_Use_Rolling_Accumulator
+
+    # All the locally built composites come out of one pass of the rolling accumulator
+    compositeList = []
+    if is_Short_Composites_Local:
+        compositeList.append({
+            'WindowDays' : 1,
+            'RasterDataSetName' : PostETL_CustomRaster_Params['trmm1Day_RasterCatalogName'],
+            'ColorMapLocation' : PostETL_CustomRaster_Params['trmm1Day_ColorMapLocation']
+        })
+        compositeList.append({
+            'WindowDays' : 3,
+            'RasterDataSetName' : PostETL_CustomRaster_Params['trmm3Day_RasterCatalogName'],
+            'ColorMapLocation' : PostETL_CustomRaster_Params['trmm3Day_ColorMapLocation']
+        })
+        compositeList.append({
+            'WindowDays' : 7,
+            'RasterDataSetName' : PostETL_CustomRaster_Params['trmm7Day_RasterCatalogName'],
+            'ColorMapLocation' : PostETL_CustomRaster_Params['trmm7Day_ColorMapLocation']
+        })
+    if is_30Day_Rolling:
+        compositeList.append({
+            'WindowDays' : 30,
+            'RasterDataSetName' : PostETL_CustomRaster_Params['trmm30Day_RasterCatalogName'],
+            'ColorMapLocation' : PostETL_CustomRaster_Params['trmm30Day_ColorMapLocation']
+        })
+    if len(compositeList) > 0:
+        try:
+            PostETL_Support_Build_Composites_Rolling(PostETL_CustomRaster_Params, ETL_TransportObject, compositeList)
+        except:
+            e = sys.exc_info()[0]
+            addToLog("PostETL_Support_Build_Custom_Rasters: ERROR, Something went wrong when building the composites.  System Error Message: "+ str(e))
+
+    # The 30 day composite (when not rolling)
+    if is_30Day_Rolling:
+        pass
+    elif get_Geoprocessing_Backend().name == "arcpy":
+        PostETL_Support_Build_30Day_Custom_Raster_ArcGIS(PostETL_CustomRaster_Params)
+    else:
+        addToLog("PostETL_Support_Build_Custom_Rasters: The 30 day custom raster factory needs ArcGIS, skipping it with the '" + str(get_Geoprocessing_Backend().name) + "' geoprocessing backend")
+
+    if is_Short_Composites_Local:
+        return
 
     # And for the 1, 3, and 7 day.. download them from the source and upload them.
     try:
         addToLog("CUSTOM RASTERS:  ALERT 1 ")
         # FTP Info
         ftpParams = {
-            "ftpHost" : "trmmopen.gsfc.nasa.gov",
-            "ftpUserName" : "anonymous",
-            "ftpUserPass" : "anonymous"
+            "ftpHost" : ETL_TransportObject['SettingsObj'].FTP_Host,
+            "ftpPort" : ETL_TransportObject['SettingsObj'].FTP_Port,
+            "ftpUserName" : ETL_TransportObject['SettingsObj'].FTP_User,
+            "ftpUserPass" : ETL_TransportObject['SettingsObj'].FTP_Pass
         }
 
         lastRasterName = ETL_TransportObject['Extract_Object']['ResultsObject']['ExtractResult']['lastBaseRaster']
         lastFTPSubFolder = "/" + str(ETL_TransportObject['Extract_Object']['ResultsObject']['ExtractResult']['lastFTPFolder'])
         scratchFolder = ETL_TransportObject['Pre_ETL_Object']['ResultsObject']['Scratch_WorkSpace_Locations']['PostETL']
-        coor_system = ETL_TransportObject['SettingsObj']['TRMM_RasterTransform_CoordSystem']
+        coor_system = ETL_TransportObject['SettingsObj'].TRMM_RasterTransform_CoordSystem
         pathToGeoDB = ETL_TransportObject['Pre_ETL_Object']['ResultsObject']['GeoDB_Dataset_Workspace']
 
         try:
@@ -1548,6 +1912,11 @@ def PostETL_Support_Build_Custom_Rasters(PostETL_CustomRaster_Params, ETL_Transp
 # Stops the TRMM services, runs the custom raster generation routine, then restarts the TRMM services
 def PostETL_Do_Update_Service_And_Custom_Rasters(PostETL_CustomRaster_Params, service_Options_List, ETL_TransportObject):
 
+    # There are no map services to stop and start without ArcGIS
+    if get_Geoprocessing_Backend().name != "arcpy":
+        addToLog("PostETL_Do_Update_Service_And_CustomRasters: Not stopping or starting services with the '" + str(get_Geoprocessing_Backend().name) + "' geoprocessing backend")
+        service_Options_List = []
+
     # For each service, Stop them all
     addToLog("PostETL_Do_Update_Service_And_CustomRasters: About to stop all TRMM related services")
     for current_Service in service_Options_List:
@@ -1649,34 +2018,36 @@ def PostETL_Controller_Method(ETL_TransportObject):
     # Do a "PostETL" Process
 
     # Gathering inputs
-    rasterOutputLocation = ETL_TransportObject['SettingsObj']['Raster_Final_Output_Location']
-    intervalString = ETL_TransportObject['SettingsObj']['TRMM_RasterArchiveDays']
-    regExp_Pattern = ETL_TransportObject['SettingsObj']['RegEx_DateFilterString']
-    rastDateFormat = ETL_TransportObject['SettingsObj']['Python_DateFormat']
+    rasterOutputLocation = ETL_TransportObject['SettingsObj'].Raster_Final_Output_Location
+    archiveInterval = ETL_TransportObject['SettingsObj'].TRMM_RasterArchiveDays
+    regExp_Pattern = ETL_TransportObject['SettingsObj'].RegEx_DateFilterString
+    rastDateFormat = ETL_TransportObject['SettingsObj'].Python_DateFormat
     theVarList = ETL_TransportObject['Pre_ETL_Object']['ResultsObject']['Variable_Dictionary_List']
-    oldDate = Unsorted_GetOldestDate(intervalString) 
+    oldDate = Unsorted_GetOldestDate(archiveInterval)
 
     GeoDB_Workspace = ETL_TransportObject['Pre_ETL_Object']['ResultsObject']['GeoDB_Dataset_Workspace']
-    queryDateFormat = ETL_TransportObject['SettingsObj']['Query_DateFormat']
+    queryDateFormat = ETL_TransportObject['SettingsObj'].Query_DateFormat
 
 
     # Inputs for the 3 Custom Raster generations.
     theOutputBasePath = GeoDB_Workspace #'C:\\kris\\!!Work\\ETL_TRMM\\GeoDB\\TRMM.gdb'
     PostETL_CustomRaster_Params = {
-        'fileFolder_With_TRMM_Rasters' : ETL_TransportObject['SettingsObj']['Raster_Final_Output_Location'], # r'C:\ksArcPy\trmm\rastout',
-        'color_map' : ETL_TransportObject['SettingsObj']['TRMM_ColorMapFile_3_Hour'],  # r'C:\kris\!!Work\ETL_TRMM\SupportFiles\trmm_3hour.clr',
+        'fileFolder_With_TRMM_Rasters' : ETL_TransportObject['SettingsObj'].Raster_Final_Output_Location, # r'C:\ksArcPy\trmm\rastout',
+        'color_map' : ETL_TransportObject['SettingsObj'].TRMM_ColorMapFile_3_Hour,  # r'C:\kris\!!Work\ETL_TRMM\SupportFiles\trmm_3hour.clr',
         'output_basepath' : theOutputBasePath,
-        'raster_catalog_fullpath' : theOutputBasePath + '\\' + theVarList[0]['mosaic_name'],  # \\TRMM', # Should be a setting  mosaic_name
+        'raster_catalog_fullpath' : os.path.join(theOutputBasePath, theVarList[0]['mosaic_name']),  # \\TRMM', # Should be a setting  mosaic_name
         'raster_catalog_options_datetime_field' : theVarList[0]['primary_date_field'],  # 'timestamp',
         'raster_catalog_options_datetime_sql_cast' : 'date',
-        'raster_catalog_options_datetime_field_format' : ETL_TransportObject['SettingsObj']['Query_DateFormat'],  # '%Y-%m-%d %H:00:00',
+        'raster_catalog_options_datetime_field_format' : ETL_TransportObject['SettingsObj'].Query_DateFormat,  # '%Y-%m-%d %H:00:00',
         'start_datetime' : datetime.datetime.utcnow(),
-        'trmm1Day_RasterCatalogName' : ETL_TransportObject['SettingsObj']['trmm1Day_RasterCatalogName'],  #  'TRMM1Day',
-        'trmm7Day_RasterCatalogName' : ETL_TransportObject['SettingsObj']['trmm7Day_RasterCatalogName'],  #  'TRMM7Day',
-        'trmm30Day_RasterCatalogName' : ETL_TransportObject['SettingsObj']['trmm30Day_RasterCatalogName'],  #  'TRMM30Day',
-        'trmm1Day_ColorMapLocation' : ETL_TransportObject['SettingsObj']['trmm1Day_ColorMapLocation'],  #  r'C:\kris\!!Work\ETL_TRMM\SupportFiles\trmm_1day.clr',
-        'trmm7Day_ColorMapLocation' : ETL_TransportObject['SettingsObj']['trmm7Day_ColorMapLocation'],  #  r'C:\kris\!!Work\ETL_TRMM\SupportFiles\trmm_7day.clr',
-        'trmm30Day_ColorMapLocation' : ETL_TransportObject['SettingsObj']['trmm30Day_ColorMapLocation'],  #  r'C:\kris\!!Work\ETL_TRMM\SupportFiles\TRMM_30Day.clr',
+        'trmm1Day_RasterCatalogName' : ETL_TransportObject['SettingsObj'].trmm1Day_RasterCatalogName,  #  'TRMM1Day',
+        'trmm3Day_RasterCatalogName' : ETL_TransportObject['SettingsObj'].trmm3Day_RasterCatalogName,  #  'TRMM3Day',
+        'trmm7Day_RasterCatalogName' : ETL_TransportObject['SettingsObj'].trmm7Day_RasterCatalogName,  #  'TRMM7Day',
+        'trmm30Day_RasterCatalogName' : ETL_TransportObject['SettingsObj'].trmm30Day_RasterCatalogName,  #  'TRMM30Day',
+        'trmm1Day_ColorMapLocation' : ETL_TransportObject['SettingsObj'].trmm1Day_ColorMapLocation,  #  r'C:\kris\!!Work\ETL_TRMM\SupportFiles\trmm_1day.clr',
+        'trmm3Day_ColorMapLocation' : ETL_TransportObject['SettingsObj'].trmm3Day_ColorMapLocation or ETL_TransportObject['SettingsObj'].trmm7Day_ColorMapLocation,  #  r'D:\SERVIR\Scripts\TRMM\Templates\trmm_7day.clr' (the 7 day color map when not set)
+        'trmm7Day_ColorMapLocation' : ETL_TransportObject['SettingsObj'].trmm7Day_ColorMapLocation,  #  r'C:\kris\!!Work\ETL_TRMM\SupportFiles\trmm_7day.clr',
+        'trmm30Day_ColorMapLocation' : ETL_TransportObject['SettingsObj'].trmm30Day_ColorMapLocation,  #  r'C:\kris\!!Work\ETL_TRMM\SupportFiles\TRMM_30Day.clr',
         'workSpacePath' : ETL_TransportObject['Pre_ETL_Object']['ResultsObject']['Scratch_WorkSpace_Locations']['PostETL'] # r'C:\kris\!!Work\ETL_TRMM\ScratchWorkspace\custom_RenameLater'
 
     }
@@ -1698,12 +2069,20 @@ def PostETL_Controller_Method(ETL_TransportObject):
     if len(ETL_TransportObject['Load_Object']['ResultsObject']['LoadResult_List']) == 0:
         addToLog("PostETL_Controller_Method: No items were loaded, Service will not be stopped and restarted.  Custom rasters will not be generated.")
     else:
+        timeStart = time.time()
+        outcome = "composited"
         try:
             PostETL_Do_Update_Service_And_Custom_Rasters(PostETL_CustomRaster_Params, TRMM_Service_Options, ETL_TransportObject)
             pass
         except:
             e = sys.exc_info()[0]
             addToLog("PostETL_Controller_Method: ERROR, something went wrong when trying to restart services and create the custom rasters.  System Error Message: "+ str(e))
+            outcome = "failed"
+        # Every granule loaded in this run went into the same service update and composites, and shares their time
+        loadedResults = [currLoadResult for currLoadResult in ETL_TransportObject['Load_Object']['ResultsObject']['LoadResult_List'] if currLoadResult['NumberLoaded'] > 0 and 'date_string' in currLoadResult]
+        postETLSeconds = time.time() - timeStart
+        for currLoadResult in loadedResults:
+            addGranuleRecord("PostETL", "PostETL_Do_Update_Service_And_Custom_Rasters", currLoadResult['date_string'], currLoadResult['Correlation_ID'], postETLSeconds, None, outcome, {'batch': len(loadedResults)})
   
     # Data Clean up
     if oldDate == None:
@@ -1720,6 +2099,16 @@ def PostETL_Controller_Method(ETL_TransportObject):
         if num_Of_Rasters_Removed_FromGeoDB > 0:
             num_Of_Rasters_Deleted_FromFileSystem = Unsorted_dataCleanup(rasterOutputLocation, oldDate,regExp_Pattern,rastDateFormat)
 
+        # Data Clean up - Forget about granules which are past the archive range
+        theManifest = ETL_TransportObject['Pre_ETL_Object']['ResultsObject'].get('Extract_Manifest')
+        if theManifest != None:
+            try:
+                num_Of_Manifest_Rows_Removed = theManifest.remove_Older_Than(oldDate.strftime("%Y%m%d%H"))
+                addToLog("PostETL_Controller_Method: Removed " + str(num_Of_Manifest_Rows_Removed) + " old entries from the extract manifest", True)
+            except:
+                e = sys.exc_info()[0]
+                addToLog("PostETL_Controller_Method: ERROR, Could not remove old entries from the extract manifest.  System Error Message: "+ str(e))
+
 
 
     # Clean Scratch Workspaces
@@ -1783,6 +2172,10 @@ def output_Final_Log_Report(ETL_TransportObject):
     try:
         numExtracted = len(ETL_TransportObject['Extract_Object']['ResultsObject']['ExtractResult']['ExtractList'])
         addToLog(" === REPORT: Extract: " + str(numExtracted) + " Items were extracted.")
+        downloadStats = ETL_TransportObject['Extract_Object']['ResultsObject']['ExtractResult'].get('DownloadStats')
+        if downloadStats != None:
+            addToLog(" === REPORT: Extract: Downloaded " + str(downloadStats['Objects_Downloaded']) + " of " + str(downloadStats['Objects_Requested']) + " objects (" + str(downloadStats['Objects_Retried']) + " needed a retry), " + str(downloadStats['Bytes_Downloaded']) + " bytes")
+            addToLog(" === REPORT: Extract: Per object latency p50/p95 (seconds): " + str(downloadStats['Latency_Seconds_p50']) + " / " + str(downloadStats['Latency_Seconds_p95']) + ", bytes/sec p50: " + str(downloadStats['Bytes_Per_Second_p50']) + ", mean: " + str(downloadStats['Bytes_Per_Second_Per_Object_Mean']))
     except:
         e = sys.exc_info()[0]
         addToLog("output_Final_Log_Report: ERROR: Error outputing Extract report.  System Error Message: " + str(e))
@@ -1831,28 +2224,31 @@ def main(config_Settings):
     # Clear way to show entry in the log file for a script session start
     addToLog("======================= SESSION START =======================")
 
+    # Remove the logs which are past Logger_Num_Of_Days_To_Keep_Log (in the background when Logger_Background_Sweep is on)
+    try:
+        g_theLogger.deleteOutdatedDebugLogs()
+    except:
+        e = sys.exc_info()[0]
+        addToLog("main: ERROR, Could not remove old logs, ERROR MESSAGE: "+ str(e))
+
     # Config Settings
-    # Get a reference to the config settings object, particulary the node in the xml doc that contains nodes the script may be using.
-    settingsObj = config_Settings.xmldict['ConfigObjectCollection']['ConfigObject']
+    # Get a reference to the config settings object (read only, one attribute per setting in g_ConfigSchema, already converted to its type).
+    settingsObj = config_Settings
 
     # Access to the Config settings example
-    current_ScriptSession_Name =  settingsObj['Name']
+    current_ScriptSession_Name =  settingsObj.Name
     addToLog("Script Session Name is: " + current_ScriptSession_Name)
 
     # Set up Detailed Logging
-    current_DetailedLogging_Setting = settingsObj['DetailedLogging']
     global g_DetailedLogging_Setting
-    if current_DetailedLogging_Setting == '1':
-        g_DetailedLogging_Setting = True
-    else:
-        g_DetailedLogging_Setting = False
+    g_DetailedLogging_Setting = settingsObj.DetailedLogging
     addToLog("Main: Detailed logging has been enabled", True)
 
 
     # Prep Objects and Logic
     # Insert code here for configuring the ETL Transport Object's items needed by any processes.
     # This area may be blank if there is no preconfig or setup to perform.
-    VariableDictionaryList = settingsObj['VariableDictionaryList']
+    VariableDictionaryList = settingsObj.VariableDictionaryList
 
     # Create ETL_TransportObject
     # This object can be used to transport various items such as settings, or preconfigured objects to the various functions called by the controller.
@@ -1868,7 +2264,7 @@ def main(config_Settings):
     }
 
     # Detailed log entry showing the current state of the ETL_TransportObject
-    addToLog("main: Current State of ETL_TransportObject (Before PreETL method call): " + str(ETL_TransportObject), True)
+    addToLog("main: Current State of ETL_TransportObject (Before PreETL method call): %s", True, ETL_TransportObject)
 
     # Execute Pre ETL, Log the Time, and load the Results object.
     time_PreETL_Process = get_NewStart_Time()
@@ -1879,44 +2275,62 @@ def main(config_Settings):
         e = sys.exc_info()[0]
         addToLog("main: PreETL ERROR, something went wrong, ERROR MESSAGE: "+ str(e))
     addToLog("TIME PERFORMANCE: time_PreETL_Process : " + get_Elapsed_Time_As_String(time_PreETL_Process))
+    g_Metrics.record_Span("stage.PreETL", get_Elapsed_Seconds(time_PreETL_Process))
     # Detailed log entry showing the current state of the ETL_TransportObject
-    addToLog("main: Current State of ETL_TransportObject (Before Extract method call): " + str(ETL_TransportObject), True)
+    addToLog("main: Current State of ETL_TransportObject (Before Extract method call): %s", True, ETL_TransportObject)
 
-    # Execute Extract, Log the Time, and load the Results object.
-    time_Extract_Process = get_NewStart_Time()
-    try:
-        addToLog("========= EXTRACTING =========")
-        ETL_TransportObject['Extract_Object']['ResultsObject'] = Extract_Controller_Method(ETL_TransportObject)
-    except:
-        e = sys.exc_info()[0]
-        addToLog("main: EXTRACTING ERROR, something went wrong, ERROR MESSAGE: "+ str(e))
-    addToLog("TIME PERFORMANCE: time_Extract_Process : " + get_Elapsed_Time_As_String(time_Extract_Process))
-    # Detailed log entry showing the current state of the ETL_TransportObject
-    addToLog("main: Current State of ETL_TransportObject (Before Transform method call): " + str(ETL_TransportObject), True)
-
-    # Execute Transform, Log the Time, and load the Results object.
-    time_Transform_Process = get_NewStart_Time()
-    try:
-        addToLog("========= TRANSFORMING =========")
-        ETL_TransportObject['Transform_Object']['ResultsObject'] = Transform_Controller_Method(ETL_TransportObject)
-    except:
-        e = sys.exc_info()[0]
-        addToLog("main: TRANSFORMING ERROR, something went wrong, ERROR MESSAGE: "+ str(e))
-    addToLog("TIME PERFORMANCE: time_Transform_Process : " + get_Elapsed_Time_As_String(time_Transform_Process))
-    # Detailed log entry showing the current state of the ETL_TransportObject
-    addToLog("main: Current State of ETL_TransportObject (Before Load method call): " + str(ETL_TransportObject), True)
-
-    # Execute Load, Log the Time, and load the Results object.
-    time_Load_Process = get_NewStart_Time()
-    try:
-        addToLog("========= LOADING =========")
-        ETL_TransportObject['Load_Object']['ResultsObject'] = Load_Controller_Method(ETL_TransportObject)
-    except:
-        e = sys.exc_info()[0]
-        addToLog("main: LOADING ERROR, something went wrong, ERROR MESSAGE: "+ str(e))
-    addToLog("TIME PERFORMANCE: time_Load_Process : " + get_Elapsed_Time_As_String(time_Load_Process))
-    # Detailed log entry showing the current state of the ETL_TransportObject
-    addToLog("main: Current State of ETL_TransportObject (Before PostETL method call): " + str(ETL_TransportObject), True)
+    # Pipelined mode (Extract, Transform and Load overlap) or the default sequential mode
+    if settingsObj.ETL_Pipeline_Mode:
+        # Execute Extract, Transform and Load together, Log the Time, the Results objects are loaded by the pipeline.
+        time_Pipeline_Process = get_NewStart_Time()
+        try:
+            Pipeline_Controller_Method(ETL_TransportObject)
+        except:
+            e = sys.exc_info()[0]
+            addToLog("main: PIPELINE ERROR, something went wrong, ERROR MESSAGE: "+ str(e))
+        addToLog("TIME PERFORMANCE: time_Pipeline_Process : " + get_Elapsed_Time_As_String(time_Pipeline_Process))
+        g_Metrics.record_Span("stage.Pipeline", get_Elapsed_Seconds(time_Pipeline_Process))
+        # Detailed log entry showing the current state of the ETL_TransportObject
+        addToLog("main: Current State of ETL_TransportObject (Before PostETL method call): %s", True, ETL_TransportObject)
+    else:
+        # Execute Extract, Log the Time, and load the Results object.
+        time_Extract_Process = get_NewStart_Time()
+        try:
+            addToLog("========= EXTRACTING =========")
+            ETL_TransportObject['Extract_Object']['ResultsObject'] = Extract_Controller_Method(ETL_TransportObject)
+        except:
+            e = sys.exc_info()[0]
+            addToLog("main: EXTRACTING ERROR, something went wrong, ERROR MESSAGE: "+ str(e))
+        addToLog("TIME PERFORMANCE: time_Extract_Process : " + get_Elapsed_Time_As_String(time_Extract_Process))
+        g_Metrics.record_Span("stage.Extract", get_Elapsed_Seconds(time_Extract_Process))
+        # Detailed log entry showing the current state of the ETL_TransportObject
+        addToLog("main: Current State of ETL_TransportObject (Before Transform method call): %s", True, ETL_TransportObject)
+
+        # Execute Transform, Log the Time, and load the Results object.
+        time_Transform_Process = get_NewStart_Time()
+        try:
+            addToLog("========= TRANSFORMING =========")
+            ETL_TransportObject['Transform_Object']['ResultsObject'] = Transform_Controller_Method(ETL_TransportObject)
+        except:
+            e = sys.exc_info()[0]
+            addToLog("main: TRANSFORMING ERROR, something went wrong, ERROR MESSAGE: "+ str(e))
+        addToLog("TIME PERFORMANCE: time_Transform_Process : " + get_Elapsed_Time_As_String(time_Transform_Process))
+        g_Metrics.record_Span("stage.Transform", get_Elapsed_Seconds(time_Transform_Process))
+        # Detailed log entry showing the current state of the ETL_TransportObject
+        addToLog("main: Current State of ETL_TransportObject (Before Load method call): %s", True, ETL_TransportObject)
+
+        # Execute Load, Log the Time, and load the Results object.
+        time_Load_Process = get_NewStart_Time()
+        try:
+            addToLog("========= LOADING =========")
+            ETL_TransportObject['Load_Object']['ResultsObject'] = Load_Controller_Method(ETL_TransportObject)
+        except:
+            e = sys.exc_info()[0]
+            addToLog("main: LOADING ERROR, something went wrong, ERROR MESSAGE: "+ str(e))
+        addToLog("TIME PERFORMANCE: time_Load_Process : " + get_Elapsed_Time_As_String(time_Load_Process))
+        g_Metrics.record_Span("stage.Load", get_Elapsed_Seconds(time_Load_Process))
+        # Detailed log entry showing the current state of the ETL_TransportObject
+        addToLog("main: Current State of ETL_TransportObject (Before PostETL method call): %s", True, ETL_TransportObject)
 
     # Execute Post ETL, Log the Time, and load the Results object.
     time_PostETL_Process = get_NewStart_Time()
@@ -1927,8 +2341,9 @@ def main(config_Settings):
         e = sys.exc_info()[0]
         addToLog("main: Post ETL ERROR, something went wrong, ERROR MESSAGE: "+ str(e))
     addToLog("TIME PERFORMANCE: time_PostETL_Process : " + get_Elapsed_Time_As_String(time_PostETL_Process))
+    g_Metrics.record_Span("stage.PostETL", get_Elapsed_Seconds(time_PostETL_Process))
     # Detailed log entry showing the current state of the ETL_TransportObject
-    addToLog("main: Current State of ETL_TransportObject (After PostETL method call): " + str(ETL_TransportObject), True)
+    addToLog("main: Current State of ETL_TransportObject (After PostETL method call): %s", True, ETL_TransportObject)
 
     # Echo Errors to the log
     try:
@@ -1940,14 +2355,29 @@ def main(config_Settings):
     # Add a log entry showing the amount of time the script ran.
     # Note: It may be good practice to use a common phrase such as "TIME PERFORMANCE" to make it easier to search log files for the performance details since the log files can end up generating a lot of text.
     addToLog("TIME PERFORMANCE: time_TotalScriptRun_Process : " + get_Elapsed_Time_As_String(time_TotalScriptRun_Process))
+    g_Metrics.record_Span("stage.TotalScriptRun", get_Elapsed_Seconds(time_TotalScriptRun_Process))
+
+    # Write the run totals to the metrics file (and the Prometheus text file when one is set)
+    try:
+        metrics_Prometheus_FilePath = settingsObj.Metrics_Prometheus_FilePath
+        if metrics_Prometheus_FilePath != None:
+            g_Metrics.write_Prometheus(metrics_Prometheus_FilePath)
+        g_Metrics.close()
+        addToLog("main: Run metrics written to " + str(g_Metrics.metrics_file_path), True)
+    except:
+        e = sys.exc_info()[0]
+        addToLog("main: Error writing the run metrics, ERROR MESSAGE: "+ str(e))
 
     # Clear way to show entry in the log file for a script session end
     addToLog("======================= SESSION END =======================")
+    # The log file is complete when main returns (async logging)
+    g_theLogger.flush()
     # END
 
 
 #--------------------------------------------------------------------------
 # Entry Point
 #--------------------------------------------------------------------------
-main(g_ConfigSettings)
+if __name__ == '__main__':
+    main(g_ConfigSettings)
 # END
\ No newline at end of file
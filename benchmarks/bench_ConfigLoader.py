@@ -0,0 +1,127 @@
+#-------------------------------------------------------------------------------
+# Name:        bench_ConfigLoader.py
+# Purpose:     Benchmark for loading config_TRMM.xml at the start of a run.
+#               The XmlDictConfig load as it was (plus the list fix up of the
+#               variable dictionary it needed) is compared with the typed
+#               settings of ks_ConfigLoader.load_Typed_Settings, parsed and
+#               checked against the TRMM_ETL_ schema (first start after the
+#               file changed), and read from the compiled cache (every other
+#               start).  The typed values are checked against the old strings,
+#               and a config with a misspelled setting is checked to stop the
+#               load with the name it probably should have been.
+#
+# Author:      SERVIR ETL
+#
+# Created:     10/18/2026 (mm/dd/yyyy)
+# Copyright:   (c) SERVIR 2026
+# Licence:     <your licence>
+#
+# Usage:       python bench_ConfigLoader.py [--repeats 200]
+#-------------------------------------------------------------------------------
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from xml.etree import ElementTree
+
+REPO_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_FOLDER)
+import ks_ConfigLoader
+
+
+# The load as it was, the variable dictionary forced into lists afterwards (a single ListItem or service_dict_list came back as a dict)
+def old_Load_Settings(pathToConfigFile):
+    settingsObj = ks_ConfigLoader.ks_ConfigLoader(pathToConfigFile).xmldict['ConfigObjectCollection']['ConfigObject']
+    toList = lambda item: item if isinstance(item, list) else [item]
+    theListItems = toList(toList(settingsObj['VariableDictionaryList'])[0]['ListItem'])
+    for currListItem in theListItems:
+        currListItem['service_dict_list'] = toList(currListItem['service_dict_list'])
+    return settingsObj, theListItems
+
+
+def time_Loads(loadFunction, numOfRepeats):
+    t0 = time.time()
+    for i in range(numOfRepeats):
+        loadFunction()
+    return (time.time() - t0) / numOfRepeats
+
+
+# Config for TRMM_ETL_ (it loads it on import) with the log in 'logFolder', not echoed
+def write_Config(outPath, logFolder, newValues=None):
+    theTree = ElementTree.parse(os.path.join(REPO_FOLDER, "config_TRMM.xml"))
+    theConfigObject = theTree.getroot().find("ConfigObjectCollection").find("ConfigObject")
+    theValues = {'Logger_Output_Location' : logFolder, 'Logger_Async' : "0", 'Logger_Console_Echo' : "0", 'Metrics_Enabled' : "0"}
+    theValues.update(newValues or {})
+    for theName, theValue in theValues.items():
+        theElement = theConfigObject.find(theName)
+        if theElement == None:
+            theElement = ElementTree.SubElement(theConfigObject, theName)
+        theElement.text = theValue
+    theTree.write(outPath)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    workFolder = tempfile.mkdtemp(prefix="bench_config_loader_")
+    try:
+        configPath = os.path.join(workFolder, "config_TRMM.xml")
+        write_Config(configPath, workFolder)
+        os.environ['TRMM_ETL_CONFIG'] = configPath
+        import TRMM_ETL_
+        TRMM_ETL_.g_theLogger.close()
+        theSchema = TRMM_ETL_.g_ConfigSchema
+        cacheFilePath = ks_ConfigLoader.get_Compiled_Cache_Path(configPath)
+
+        def load_Parsed():
+            ks_ConfigLoader.g_CompiledSettings.clear()
+            return ks_ConfigLoader.load_Typed_Settings(configPath, theSchema, False)
+
+        def load_Cached():
+            ks_ConfigLoader.g_CompiledSettings.clear()
+            return ks_ConfigLoader.load_Typed_Settings(configPath, theSchema)
+
+        print("settings: %d, repeats: %d" % (len(theSchema), args.repeats))
+        oldSeconds = time_Loads(lambda: old_Load_Settings(configPath), args.repeats)
+        parsedSeconds = time_Loads(load_Parsed, args.repeats)
+        load_Cached()
+        cachedSeconds = time_Loads(load_Cached, args.repeats)
+        inProcessSeconds = time_Loads(lambda: ks_ConfigLoader.load_Typed_Settings(configPath, theSchema), args.repeats)
+        print("old XmlDictConfig load         : %8.3f ms (values still strings, converted where they are read)" % (oldSeconds * 1000))
+        print("typed, parsed and checked      : %8.3f ms" % (parsedSeconds * 1000))
+        print("typed, from %-20s: %8.3f ms" % (os.path.basename(cacheFilePath), cachedSeconds * 1000))
+        print("typed, loaded again in process : %8.3f ms" % (inProcessSeconds * 1000))
+
+        # Same settings as the old strings, converted
+        oldSettings, oldListItems = old_Load_Settings(configPath)
+        theSettings = load_Cached()
+        isSame = (theSettings.VariableDictionaryList == oldListItems and theSettings.FTP_Port == int(oldSettings['FTP_Port'])
+            and theSettings.Logger_Async == (oldSettings['Logger_Async'] == "1") and theSettings.ScratchFolder == oldSettings['ScratchFolder']
+            and theSettings.TRMM_RasterArchiveDays == TRMM_ETL_.datetime.timedelta(days=int(oldSettings['TRMM_RasterArchiveDays'].split(" ")[0])))
+        print("same settings as the old load: %s" % isSame)
+
+        # A changed file is parsed again
+        time.sleep(1.1)
+        write_Config(configPath, workFolder, {'FTP_Port' : "2121"})
+        print("changed file parsed again: %s" % (load_Cached().FTP_Port == 2121))
+
+        # A misspelled setting and a bad value stop the load
+        typoConfigPath = os.path.join(workFolder, "config_typo.xml")
+        write_Config(typoConfigPath, workFolder, {'FTP_Hots' : "127.0.0.1", 'Logger_Async' : "yes"})
+        try:
+            ks_ConfigLoader.load_Typed_Settings(typoConfigPath, theSchema)
+            print("misspelled setting: loaded (NOT caught)")
+        except ks_ConfigLoader.ConfigSchemaError:
+            e = sys.exc_info()[1]
+            print("misspelled setting: ConfigSchemaError, %s" % "; ".join(e.errors))
+    finally:
+        shutil.rmtree(workFolder, True)
+
+
+if __name__ == '__main__':
+    main()
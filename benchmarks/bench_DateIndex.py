@@ -0,0 +1,82 @@
+#-------------------------------------------------------------------------------
+# Name:        bench_DateIndex.py
+# Purpose:     Benchmark for the file name date index (ks_DateIndex) against
+#               re.findall + strptime on every name, over an S3 style listing
+#               that is parsed once (Extract) and then again (Load, cleanup),
+#               plus range queries on a date sorted listing.
+#
+# Author:      SERVIR ETL
+#
+# Created:     10/18/2026 (mm/dd/yyyy)
+# Copyright:   (c) SERVIR 2026
+# Licence:     <your licence>
+#
+# Usage:       python bench_DateIndex.py [--keys 500000] [--repeat_keys 2000]
+#-------------------------------------------------------------------------------
+
+import argparse
+import datetime
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ks_DateIndex
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_S3Listing import make_Keys
+
+
+# The pre-change parse
+def legacy_Parse(theName, regExp_Pattern, date_Format):
+    found = re.findall(regExp_Pattern, theName)
+    if len(found) == 0:
+        return None
+    return datetime.datetime.strptime(found[0], date_Format)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=500000)
+    parser.add_argument("--repeat_keys", type=int, default=2000, help="names parsed again by the later stages")
+    args = parser.parse_args()
+
+    regExp_Pattern = r"\d{4}[01]\d[0-3]\d[0-2]\d"
+    date_Format = "%Y%m%d%H"
+    keys = make_Keys("/global/data/eodata/trmm/", args.keys, datetime.datetime(2015, 4, 15, 0))
+    repeatKeys = keys[-args.repeat_keys:]
+    print("keys: %d, parsed again: %d" % (len(keys), len(repeatKeys)))
+
+    t0 = time.time()
+    legacyResult = [legacy_Parse(k, regExp_Pattern, date_Format) for k in keys]
+    t1 = time.time()
+    for i in range(3):
+        legacyRepeat = [legacy_Parse(k, regExp_Pattern, date_Format) for k in repeatKeys]
+    t2 = time.time()
+    print("findall + strptime : listing %8.3f s, repeats %8.3f s" % (t1 - t0, t2 - t1))
+
+    theIndex = ks_DateIndex.FilenameDateIndex(regExp_Pattern, date_Format)
+    t0 = time.time()
+    indexResult = [theIndex.parse_DateTime(k) for k in keys]
+    t1 = time.time()
+    for i in range(3):
+        indexRepeat = [theIndex.get_DateTime(k) for k in repeatKeys]
+    t2 = time.time()
+    print("date index         : listing %8.3f s, repeats %8.3f s, %s" % (t1 - t0, t2 - t1, theIndex.get_Stats()))
+    print("same result: %s" % (indexResult == legacyResult and indexRepeat == legacyRepeat))
+
+    # Window and cleanup queries against one sorted listing (2 day window, 90 day archive cutoff)
+    endDateTime = datetime.datetime(2015, 4, 15, 0)
+    t0 = time.time()
+    theListing = ks_DateIndex.DateSortedListing(keys, theIndex, False)
+    t1 = time.time()
+    windowResult = list(theListing.iter_Within(endDateTime - datetime.timedelta(days=2), endDateTime))
+    cutoffResult = list(theListing.iter_Before(endDateTime - datetime.timedelta(days=90)))
+    t2 = time.time()
+    legacyWindow = [k for k, d in zip(keys, legacyResult) if d != None and d > endDateTime - datetime.timedelta(days=2) and d <= endDateTime]
+    print("sorted listing     : build %8.3f s, window + cutoff queries %8.6f s, %d in window, %d before cutoff, same window: %s" % (t1 - t0, t2 - t1, len(windowResult), len(cutoffResult), windowResult == legacyWindow))
+
+
+if __name__ == '__main__':
+    main()
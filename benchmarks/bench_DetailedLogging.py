@@ -0,0 +1,186 @@
+#-------------------------------------------------------------------------------
+# Name:        bench_DetailedLogging.py
+# Purpose:     Benchmark for the detailed log items of a 1 year backfill
+#               (2920 granules) with detailed logging turned off.  The per
+#               granule detailed addToLog calls of Extract, Transform and Load
+#               and the ETL_TransportObject dumps of main() are replayed
+#               against TRMM_ETL_.addToLog, once built the old way (the
+#               message concatenated before the call) and once the lazy way
+#               (format string plus values, only formatted when logged).
+#               The message text the old calls build is reported as what they
+#               allocate for nothing, and the lazy calls are checked to write
+#               the same log lines when detailed logging is on.
+#
+# Author:      SERVIR ETL
+#
+# Created:     10/18/2026 (mm/dd/yyyy)
+# Copyright:   (c) SERVIR 2026
+# Licence:     <your licence>
+#
+# Usage:       python bench_DetailedLogging.py [--granules 2920] [--repeats 5]
+#-------------------------------------------------------------------------------
+
+import argparse
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import time
+from xml.etree import ElementTree
+
+REPO_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_FOLDER)
+
+RASTER_FOLDER = "D:\\SERVIR\\Data\\Raster\\TRMM"
+EXTRACT_FOLDER = "D:\\SERVIR\\Scratch\\TRMM\\Extract"
+
+
+# Config for TRMM_ETL_ (it reads it on import) with the log in 'logFolder', written synchronously and not echoed
+def write_Config(outPath, logFolder):
+    theTree = ElementTree.parse(os.path.join(REPO_FOLDER, "config_TRMM.xml"))
+    theConfigObject = theTree.getroot().find("ConfigObjectCollection").find("ConfigObject")
+    newValues = {
+        'Logger_Output_Location' : logFolder,
+        'DetailedLogging' : "0",
+        'Logger_Async' : "0",
+        'Logger_Console_Echo' : "0",
+        'Metrics_Enabled' : "0"
+    }
+    for theName, theValue in newValues.items():
+        theConfigObject.find(theName).text = theValue
+    theTree.write(outPath)
+
+
+# What main() carries around after Extract of a 1 year backfill
+def make_TransportObject(TRMM_ETL_, expectedList):
+    theExtractList = []
+    for curr_FilePath_Object in expectedList:
+        downloadedFile_TIF = os.path.join(EXTRACT_FOLDER, curr_FilePath_Object['TIF_3Hr_FileName'])
+        theExtractList.append({
+            'DateString' : curr_FilePath_Object['DateString'],
+            'Downloaded_FilePath' : downloadedFile_TIF,
+            'ExtractedFilesList' : [downloadedFile_TIF],
+            'downloadURL' : curr_FilePath_Object['FTP_PathTo_TIF'],
+            'FTP_DataObj' : curr_FilePath_Object
+        })
+    return {
+        "SettingsObj": TRMM_ETL_.g_ConfigSettings,
+        "Pre_ETL_Object" : {"ResultsObject":None,"OtherItems":None},
+        "Extract_Object" : {"ResultsObject":{'ExtractResult': {'ExtractList': theExtractList}, 'IsError': False, 'ErrorMessage': ""},"OtherItems":None},
+        "Transform_Object" : {"ResultsObject":None,"OtherItems":None},
+        "Load_Object" : {"ResultsObject":None,"OtherItems":None},
+        "Post_ETL_Object" : {"ResultsObject":None,"OtherItems":None},
+    }
+
+
+# The detailed calls as they were, every message is put together before addToLog decides to drop it
+def replay_Eager(addToLog, expectedList, theTransportObject, isDetailed):
+    for i in range(5):
+        addToLog("main: Current State of ETL_TransportObject (Before Extract method call): " + str(theTransportObject), True)
+    if isDetailed == True:
+        addToLog("Extract_Do_Extract_FTP: expected_FilePath_Objects_To_Extract_WithinRange (list to process) " + str(expectedList) , True)
+    for curr_FilePath_Object in expectedList:
+        currDateString = curr_FilePath_Object['DateString']
+        rasterName = curr_FilePath_Object['TIF_3Hr_FileName']
+        existing_TIF = os.path.join(EXTRACT_FOLDER, rasterName)
+        out_raster = os.path.join(RASTER_FOLDER, rasterName)
+        addToLog("Extract_Do_Extract_FTP: Manifest says " + currDateString + " was already downloaded, reusing " + existing_TIF, True)
+        logMessages = [
+            ("Transform_Do_Transform_CopyRaster: Wrote "+ os.path.basename(existing_TIF)+" to "+str(out_raster)+" with coordinate system: "+str("WGS_1984")+" and color map", True)
+        ]
+        for theMsg, detailedLoggingItem in logMessages:
+            addToLog(theMsg, detailedLoggingItem)
+        addToLog("Transform_Do_Transform_CopyRaster: Wrote " + str(13824000) + " bytes for " + str(currDateString), True)
+        addToLog("load_TransformItems_Batch: Added " + str(1) + " rasters to mosaic dataset " + str("TRMM"), True)
+        addToLog("load_TransformItems_Batch: Calculated attributes for " + str(1) + " rasters", True)
+        addToLog("load_TransformItems_Batch: Calculated statistics on mosaic dataset " + str("TRMM"), True)
+    addToLog("main: Current State of ETL_TransportObject (After PostETL method call): " + str(theTransportObject), True)
+
+
+# The same calls with the message built by addToLog, only when it is logged
+def replay_Lazy(addToLog, expectedList, theTransportObject, isDetailed):
+    for i in range(5):
+        addToLog("main: Current State of ETL_TransportObject (Before Extract method call): %s", True, theTransportObject)
+    addToLog("Extract_Do_Extract_FTP: expected_FilePath_Objects_To_Extract_WithinRange (list to process) %s", True, expectedList)
+    for curr_FilePath_Object in expectedList:
+        currDateString = curr_FilePath_Object['DateString']
+        rasterName = curr_FilePath_Object['TIF_3Hr_FileName']
+        existing_TIF = os.path.join(EXTRACT_FOLDER, rasterName)
+        out_raster = os.path.join(RASTER_FOLDER, rasterName)
+        addToLog("Extract_Do_Extract_FTP: Manifest says %s was already downloaded, reusing %s", True, currDateString, existing_TIF)
+        logMessages = [
+            ("Transform_Do_Transform_CopyRaster: Wrote %s to %s with coordinate system: %s%s", True, (rasterName, out_raster, "WGS_1984", " and color map"))
+        ]
+        for theMsg, detailedLoggingItem, msgArgs in logMessages:
+            addToLog(theMsg, detailedLoggingItem, *msgArgs)
+        addToLog("Transform_Do_Transform_CopyRaster: Wrote %d bytes for %s", True, 13824000, currDateString)
+        addToLog("load_TransformItems_Batch: Added %d rasters to mosaic dataset %s", True, 1, "TRMM")
+        addToLog("load_TransformItems_Batch: Calculated attributes for %d rasters", True, 1)
+        addToLog("load_TransformItems_Batch: Calculated statistics on mosaic dataset %s", True, "TRMM")
+    addToLog("main: Current State of ETL_TransportObject (After PostETL method call): %s", True, theTransportObject)
+
+
+def time_Replay(replayFunction, addToLog, expectedList, theTransportObject, isDetailed, numOfRepeats):
+    bestSeconds = None
+    for i in range(numOfRepeats):
+        t0 = time.time()
+        replayFunction(addToLog, expectedList, theTransportObject, isDetailed)
+        theSeconds = time.time() - t0
+        if bestSeconds == None or theSeconds < bestSeconds:
+            bestSeconds = theSeconds
+    return bestSeconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--granules", type=int, default=2920)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    workFolder = tempfile.mkdtemp(prefix="bench_detailed_logging_")
+    try:
+        configPath = os.path.join(workFolder, "config_TRMM.xml")
+        write_Config(configPath, workFolder)
+        os.environ['TRMM_ETL_CONFIG'] = configPath
+        import TRMM_ETL_
+
+        startDateTime = datetime.datetime(2015, 1, 1, 0)
+        endDateTime = startDateTime + datetime.timedelta(hours=3 * args.granules)
+        expectedList = TRMM_ETL_.Extract_Support_Get_Expected_FTP_Paths_From_DateRange(startDateTime, endDateTime, "/pub/gis", "/pub/gis")
+        theTransportObject = make_TransportObject(TRMM_ETL_, expectedList)
+
+        # Message text the old calls build (every one of them is dropped with detailed logging off)
+        builtMessages = []
+        replay_Eager(lambda theMsg, detailedLoggingItem=False: builtMessages.append(theMsg), expectedList, theTransportObject, False)
+        print("granules: %d" % len(expectedList))
+        print("old calls build %d messages, %.1f MB of text" % (len(builtMessages), sum(len(theMsg) for theMsg in builtMessages) / (1024.0 * 1024.0)))
+        builtMessages = None
+
+        TRMM_ETL_.g_DetailedLogging_Setting = False
+        eagerSeconds = time_Replay(replay_Eager, TRMM_ETL_.addToLog, expectedList, theTransportObject, False, args.repeats)
+        lazySeconds = time_Replay(replay_Lazy, TRMM_ETL_.addToLog, expectedList, theTransportObject, False, args.repeats)
+        print("detailed logging off: old %7.3f s, lazy %7.3f s" % (eagerSeconds, lazySeconds))
+
+        # Nothing may reach the log with detailed logging off, and the same lines have to with it on
+        theLogger = TRMM_ETL_.g_theLogger
+        loggedLines = {}
+        for isDetailed in [False, True]:
+            for replayFunction in [replay_Eager, replay_Lazy]:
+                theLines = []
+                TRMM_ETL_.g_theLogger = type("LineCollector", (object,), {'updateDebugLog': lambda self, theMsg: theLines.append(theMsg)})()
+                TRMM_ETL_.g_DetailedLogging_Setting = isDetailed
+                try:
+                    replayFunction(TRMM_ETL_.addToLog, expectedList, theTransportObject, isDetailed)
+                finally:
+                    TRMM_ETL_.g_theLogger = theLogger
+                loggedLines[(isDetailed, replayFunction.__name__)] = theLines
+        print("nothing logged with detailed logging off: %s" % (loggedLines[(False, "replay_Eager")] == [] and loggedLines[(False, "replay_Lazy")] == []))
+        print("same lines with detailed logging on: %s" % (loggedLines[(True, "replay_Eager")] == loggedLines[(True, "replay_Lazy")]))
+        TRMM_ETL_.g_theLogger.close()
+    finally:
+        shutil.rmtree(workFolder, True)
+
+
+if __name__ == '__main__':
+    main()
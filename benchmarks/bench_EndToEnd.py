@@ -0,0 +1,462 @@
+#-------------------------------------------------------------------------------
+# Name:        bench_EndToEnd.py
+# Purpose:     End to end benchmark of TRMM_ETL_.main().  Synthetic 3B42RT
+#               granules ('3B42RT.YYYYMMDDHH.7.03hr.tif' + '.tfw') are served
+#               from a local FTP server and a local S3 stand-in, and main() runs
+#               against them with the 'local' geoprocessing backend for windows
+#               of 1 day, 30 days and 1 year.  Throughput, peak RSS and the per
+#               stage times (from the run metrics file) are written to a JSON
+#               results file, which can be compared against an earlier one.
+#
+# Author:      SERVIR ETL
+#
+# Created:     10/18/2026 (mm/dd/yyyy)
+# Copyright:   (c) SERVIR 2026
+# Licence:     <your licence>
+#
+# Usage:       python bench_EndToEnd.py [--windows 1,30,365] [--sources ftp,s3] [--rows 480] [--cols 1440]
+#                                       [--output bench_EndToEnd_results.json] [--baseline old_results.json] [--tolerance 0.25]
+#
+#              Every run is a separate python process (main() reads its config when TRMM_ETL_ is imported,
+#              and the peak RSS is per process).  A 1 year window at the full 1440x480 grid needs about 10 GB of disk.
+#              Needs pyftpdlib (FTP server) and boto (S3 listing, pointed at the stand-in with a BOTO_CONFIG file).
+#-------------------------------------------------------------------------------
+
+import argparse
+import BaseHTTPServer
+import datetime
+import gzip
+import json
+import logging
+import os
+import platform
+import shutil
+import SocketServer
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urlparse
+import xml.etree.cElementTree as ElementTree
+from xml.sax.saxutils import escape
+
+import numpy
+
+REPO_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_FOLDER)
+import ks_GeoTIFF
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+
+S3_BUCKET_NAME = "bench.trmm"
+S3_PATH_TO_FILES = "/global/data/eodata/trmm/"
+FTP_GIS_SUBFOLDER = "pub/gis"
+MOSAIC_NAME = "TRMM"
+
+# Distinct rain fields written in rotation (generating a fresh random field for every granule of a year takes longer than the run)
+NUM_OF_DISTINCT_FIELDS = 16
+
+
+def get_Floor_3_Hour(theDateTime):
+    return theDateTime.replace(hour=theDateTime.hour - theDateTime.hour % 3, minute=0, second=0, microsecond=0)
+
+
+# 3 hour rain in 0.01 mm as int16, mostly dry
+def make_Rain_Fields(rows, cols):
+    randomState = numpy.random.RandomState(42)
+    theFields = []
+    for i in range(NUM_OF_DISTINCT_FIELDS):
+        theFields.append((randomState.gamma(0.3, 80.0, (rows, cols)) * (randomState.rand(rows, cols) < 0.2)).astype(numpy.int16))
+    return theFields
+
+
+# Writes the granules with dates in (startDateTime, endDateTime] as,
+#   <ftpRoot>/pub/gis/yyyymm/3B42RT.YYYYMMDDHH.7.03hr.tif + .tfw     (what the FTP extract expects)
+#   <s3Root>/<key>.tif.gz                                           (what the S3 extract expects, keys under S3_PATH_TO_FILES)
+# Returns the number of granules and the number of tif bytes.
+def make_Granules(ftpRoot, s3Root, startDateTime, endDateTime, theFields):
+    numOfGranules = 0
+    numOfBytes = 0
+    s3Folder = os.path.join(s3Root, S3_PATH_TO_FILES.strip("/"))
+    if not os.path.isdir(s3Folder):
+        os.makedirs(s3Folder)
+    currentDateTime = startDateTime + datetime.timedelta(hours=3)
+    while currentDateTime <= endDateTime:
+        ftpFolder = os.path.join(ftpRoot, FTP_GIS_SUBFOLDER, currentDateTime.strftime("%Y%m"))
+        if not os.path.isdir(ftpFolder):
+            os.makedirs(ftpFolder)
+        tifPath = os.path.join(ftpFolder, "3B42RT." + currentDateTime.strftime("%Y%m%d%H") + ".7.03hr.tif")
+        ks_GeoTIFF.write_GeoTIFF(tifPath, theFields[numOfGranules % len(theFields)], (0.25, 0.0, 0.0, -0.25, -179.875, 59.875))
+        with open(tifPath, "rb") as fIn:
+            gzFile = gzip.open(os.path.join(s3Folder, os.path.basename(tifPath) + ".gz"), "wb", 6)
+            shutil.copyfileobj(fIn, gzFile)
+            gzFile.close()
+        numOfBytes += os.path.getsize(tifPath)
+        numOfGranules += 1
+        currentDateTime += datetime.timedelta(hours=3)
+    return numOfGranules, numOfBytes
+
+
+# FTP stand-in
+def start_FTP_Server(ftpRoot):
+    from pyftpdlib.authorizers import DummyAuthorizer
+    from pyftpdlib.handlers import FTPHandler
+    from pyftpdlib.log import config_logging
+    from pyftpdlib.servers import ThreadedFTPServer
+    config_logging(level=logging.WARNING)
+    authorizer = DummyAuthorizer()
+    authorizer.add_anonymous(ftpRoot)
+    handler = FTPHandler
+    handler.authorizer = authorizer
+    server = ThreadedFTPServer(("127.0.0.1", 0), handler)
+    server.max_cons = 256
+    theThread = threading.Thread(target=server.serve_forever, kwargs={"timeout":0.1})
+    theThread.daemon = True
+    theThread.start()
+    return server, server.socket.getsockname()[1]
+
+
+# S3 stand-in.  Path style requests only (the BOTO_CONFIG written below selects OrdinaryCallingFormat),
+#   GET /<bucket>/?prefix=&marker=&max-keys=     ListBucketResult (lexical order, paged like S3)
+#   GET /data/<key>                              the object (s3_BucketRootPath is http://host:port/data/)
+# Authentication headers are ignored.
+class FakeS3Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    s3Root = None
+    keys = []
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, contentType="application/xml"):
+        self.send_response(status)
+        self.send_header("Content-Type", contentType)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        theURL = urlparse.urlparse(self.path)
+        if theURL.path.rstrip("/") == "/" + S3_BUCKET_NAME:
+            self._send_Listing(urlparse.parse_qs(theURL.query, keep_blank_values=True))
+            return
+        if theURL.path.startswith("/data/"):
+            objectPath = os.path.join(self.s3Root, theURL.path[len("/data/"):].strip("/"))
+            if os.path.isfile(objectPath):
+                with open(objectPath, "rb") as f:
+                    self._send(200, f.read(), "application/octet-stream")
+                return
+        self._send(404, "<Error><Code>NoSuchKey</Code></Error>")
+
+    def _send_Listing(self, theQuery):
+        prefix = theQuery.get("prefix", [""])[0]
+        marker = theQuery.get("marker", [""])[0]
+        maxKeys = int(theQuery.get("max-keys", ["1000"])[0])
+        matchingKeys = [k for k in self.keys if k.startswith(prefix) and k > marker]
+        pageKeys = matchingKeys[:maxKeys]
+        theParts = ['<?xml version="1.0" encoding="UTF-8"?>',
+                    '<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">',
+                    '<Name>%s</Name><Prefix>%s</Prefix><Marker>%s</Marker><MaxKeys>%d</MaxKeys><IsTruncated>%s</IsTruncated>' % (S3_BUCKET_NAME, escape(prefix), escape(marker), maxKeys, "true" if len(matchingKeys) > len(pageKeys) else "false")]
+        for theKey in pageKeys:
+            theParts.append('<Contents><Key>%s</Key><LastModified>2015-01-01T00:00:00.000Z</LastModified><ETag>"0"</ETag><Size>%d</Size><StorageClass>STANDARD</StorageClass></Contents>' % (escape(theKey), os.path.getsize(os.path.join(self.s3Root, theKey.strip("/")))))
+        theParts.append('</ListBucketResult>')
+        self._send(200, "".join(theParts))
+
+
+class ThreadedHTTPServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+def start_S3_Server(s3Root):
+    FakeS3Handler.s3Root = s3Root
+    FakeS3Handler.keys = []
+    server = ThreadedHTTPServer(("127.0.0.1", 0), FakeS3Handler)
+    theThread = threading.Thread(target=server.serve_forever)
+    theThread.daemon = True
+    theThread.start()
+    return server, server.server_address[1]
+
+
+def refresh_S3_Keys(s3Root):
+    s3Folder = os.path.join(s3Root, S3_PATH_TO_FILES.strip("/"))
+    FakeS3Handler.keys = sorted([S3_PATH_TO_FILES + f for f in os.listdir(s3Folder)])
+
+
+def write_Boto_Config(outPath, s3Port):
+    with open(outPath, "w") as f:
+        f.write("[Credentials]\n")
+        f.write("aws_access_key_id = bench\n")
+        f.write("aws_secret_access_key = bench\n")
+        f.write("s3_host = 127.0.0.1\n")
+        f.write("s3_port = %d\n" % s3Port)
+        f.write("[s3]\n")
+        f.write("calling_format = boto.s3.connection.OrdinaryCallingFormat\n")
+        f.write("[Boto]\n")
+        f.write("is_secure = False\n")
+        f.write("num_retries = 0\n")
+
+
+def write_ColorMap(outPath):
+    with open(outPath, "w") as f:
+        for value, rgb in [(0, "255 255 255"), (100, "170 220 255"), (500, "60 130 255"), (1000, "0 60 200"), (5000, "120 0 160")]:
+            f.write("%d %s\n" % (value, rgb))
+
+
+# Copies config_TRMM.xml with every path pointing into the run folder and the servers set to the stand-ins
+def write_Config(outPath, runFolder, source, windowDays, ftpPort, s3Port, colorMapPath, args):
+    theTree = ElementTree.parse(os.path.join(REPO_FOLDER, "config_TRMM.xml"))
+    theConfigObject = theTree.getroot().find("ConfigObjectCollection").find("ConfigObject")
+    newValues = {
+        'ScratchFolder' : os.path.join(runFolder, "scratch"),
+        'GeoDB_Location' : os.path.join(runFolder, "geodb"),
+        'GeoDB_FileName' : "TRMM.sqlite",
+        'Geoprocessing_Backend' : "local",
+        'Raster_Final_Output_Location' : os.path.join(runFolder, "rasters"),
+        'Logger_Output_Location' : os.path.join(runFolder, "logs"),
+        'DetailedLogging' : "0",
+        'Metrics_Enabled' : "1",
+        'ETL_Pipeline_Mode' : args.pipeline,
+        'Transform_Workers' : args.transform_workers,
+        'Transform_Single_Pass_Write' : args.single_pass_write,
+        'Extract_Source' : source,
+        'FTP_Host' : "127.0.0.1",
+        'FTP_Port' : str(ftpPort),
+        'FTP_GIS_SubFolderPath' : FTP_GIS_SUBFOLDER,
+        'FTP_MaxRequestsPerSecond' : args.ftp_rps,
+        's3_UseLocal_IAM_Role' : "1",
+        's3_BucketName' : S3_BUCKET_NAME,
+        's3_BucketRootPath' : "http://127.0.0.1:%d/data/" % s3Port,
+        's3_PathTo_TRMM_Files' : S3_PATH_TO_FILES,
+        'TRMM_RasterArchiveDays' : "%d days" % max(90, windowDays + 1),
+        'TRMM_Short_Composites_Source' : "local",
+        'TRMM30Day_Use_Rolling_Accumulator' : "1",
+        'TRMM_ColorMapFile_3_Hour' : colorMapPath,
+        'trmm1Day_ColorMapLocation' : colorMapPath,
+        'trmm3Day_ColorMapLocation' : colorMapPath,
+        'trmm7Day_ColorMapLocation' : colorMapPath,
+        'trmm30Day_ColorMapLocation' : colorMapPath,
+        'trmm3Hour_ColorMapLocation' : colorMapPath
+    }
+    for theName, theValue in newValues.items():
+        theElement = theConfigObject.find(theName)
+        if theElement == None:
+            theElement = ElementTree.SubElement(theConfigObject, theName)
+        theElement.text = theValue
+    theTree.write(outPath)
+
+
+# The newest granule already in the mosaic dataset decides where main() starts extracting,
+#   so one granule at the start of the window is loaded before the run.
+def seed_Mosaic(runFolder, seedDateTime, theField):
+    import ks_GeoprocessingBackend
+    import ks_MosaicLoad
+    rasterFolder = os.path.join(runFolder, "rasters")
+    os.makedirs(rasterFolder)
+    os.makedirs(os.path.join(runFolder, "geodb"))
+    seedRaster = os.path.join(rasterFolder, "3B42RT." + seedDateTime.strftime("%Y%m%d%H") + ".7.03hr.tif")
+    ks_GeoTIFF.write_GeoTIFF(seedRaster, theField, (0.25, 0.0, 0.0, -0.25, -179.875, 59.875))
+    theBackend = ks_GeoprocessingBackend.get_Backend("local")
+    theBackend.create_Mosaic_Dataset(os.path.join(runFolder, "geodb", "TRMM.sqlite", MOSAIC_NAME))
+    ks_MosaicLoad.load_TransformItems_Batch(theBackend, [{
+        'date_string' : seedDateTime.strftime("%Y%m%d%H"),
+        'Transformed_File_List' : [{"out_raster_file_location" : seedRaster, "mosaic_ds_name" : MOSAIC_NAME, "primary_date_field" : "timestamp"}]
+    }], lambda rasterName: seedDateTime, os.path.join(runFolder, "geodb", "TRMM.sqlite"), "WGS 1984")
+    theBackend.close()
+
+
+# Reads the metrics file (see ks_Metrics) written by the run, it can be in a day folder of the log folder
+def read_Run_Metrics(logFolder):
+    spans = {}
+    counters = {}
+    metricsFilePaths = []
+    for dirPath, dirNames, fileNames in os.walk(logFolder):
+        metricsFilePaths += [os.path.join(dirPath, fileName) for fileName in fileNames if fileName.endswith(".jsonl")]
+    for metricsFilePath in metricsFilePaths:
+        with open(metricsFilePath, "r") as f:
+            for theLine in f:
+                theRecord = json.loads(theLine)
+                if theRecord['type'] == "span_total":
+                    spans[theRecord['name']] = {'count': theRecord['count'], 'seconds': theRecord['seconds'], 'max_seconds': theRecord['max_seconds'], 'failed': theRecord['failed']}
+                elif theRecord['type'] == "counter":
+                    counters[theRecord['name']] = counters.get(theRecord['name'], 0) + theRecord['value']
+    return spans, counters
+
+
+# Child process: runs main() with the config named by TRMM_ETL_CONFIG, writes wall time and peak RSS to 'resultPath'
+def run_Child(resultPath):
+    sys.path.insert(0, REPO_FOLDER)
+    timeStart = time.time()
+    import TRMM_ETL_
+    TRMM_ETL_.main(TRMM_ETL_.g_ConfigSettings)
+    theResult = {'Elapsed_Seconds': time.time() - timeStart, 'Peak_RSS_KB': None}
+    if resource != None:
+        # kilobytes on Linux, bytes on Mac OS
+        peakRSS = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        theResult['Peak_RSS_KB'] = peakRSS // 1024 if sys.platform == "darwin" else peakRSS
+    with open(resultPath, "w") as f:
+        json.dump(theResult, f)
+
+
+def run_Scenario(workFolder, source, windowDays, seedDateTime, numOfGranules, numOfBytes, theFields, ftpPort, s3Port, args):
+    runFolder = os.path.join(workFolder, "%s_%dday" % (source, windowDays))
+    os.makedirs(runFolder)
+    seed_Mosaic(runFolder, seedDateTime, theFields[0])
+
+    colorMapPath = os.path.join(runFolder, "trmm.clr")
+    write_ColorMap(colorMapPath)
+    configPath = os.path.join(runFolder, "config_TRMM.xml")
+    write_Config(configPath, runFolder, source, windowDays, ftpPort, s3Port, colorMapPath, args)
+    shutil.copy(os.path.join(REPO_FOLDER, "config.pkl"), os.path.join(runFolder, "config.pkl"))
+    botoConfigPath = os.path.join(workFolder, "boto.cfg")
+    write_Boto_Config(botoConfigPath, s3Port)
+
+    childEnv = dict(os.environ)
+    childEnv['TRMM_ETL_CONFIG'] = configPath
+    childEnv['BOTO_CONFIG'] = botoConfigPath
+    childResultPath = os.path.join(runFolder, "child_result.json")
+    with open(os.path.join(runFolder, "stdout.txt"), "w") as childOut:
+        returnCode = subprocess.call([sys.executable, os.path.abspath(__file__), "--child", childResultPath], cwd=runFolder, env=childEnv, stdout=childOut, stderr=subprocess.STDOUT)
+    if returnCode != 0 or not os.path.isfile(childResultPath):
+        print("  %s %d day: main() failed (exit code %d), see %s" % (source, windowDays, returnCode, os.path.join(runFolder, "stdout.txt")))
+        return None
+    with open(childResultPath, "r") as f:
+        childResult = json.load(f)
+
+    spans, counters = read_Run_Metrics(os.path.join(runFolder, "logs"))
+    theStages = dict([(name[len("stage."):], theSpan['seconds']) for name, theSpan in spans.items() if name.startswith("stage.")])
+    elapsed = childResult['Elapsed_Seconds']
+    return {
+        'Source' : source,
+        'Window_Days' : windowDays,
+        'Granules' : numOfGranules,
+        'Granule_Bytes' : numOfBytes,
+        'Files_Loaded' : counters.get("files_loaded", 0),
+        'Elapsed_Seconds' : round(elapsed, 3),
+        'Granules_Per_Second' : round(numOfGranules / elapsed, 3) if elapsed > 0 else None,
+        'MB_Per_Second' : round(numOfBytes / elapsed / 1e6, 3) if elapsed > 0 else None,
+        'Peak_RSS_KB' : childResult['Peak_RSS_KB'],
+        'Stage_Seconds' : theStages,
+        'Spans' : spans,
+        'Counters' : counters
+    }
+
+
+# Compares the stage and span times of two result files, returns the list of regressions (slower by more than 'tolerance')
+def compare_Results(theResults, baselineResults, tolerance, minSeconds):
+    regressions = []
+    baselineRuns = dict([((r['Source'], r['Window_Days']), r) for r in baselineResults['Runs']])
+    for currRun in theResults['Runs']:
+        baseRun = baselineRuns.get((currRun['Source'], currRun['Window_Days']))
+        if baseRun == None:
+            continue
+        theItems = [("stage." + k, v, baseRun['Stage_Seconds'].get(k)) for k, v in currRun['Stage_Seconds'].items()]
+        theItems += [(k, v['seconds'], baseRun['Spans'].get(k, {}).get('seconds')) for k, v in currRun['Spans'].items() if not k.startswith("stage.")]
+        for theName, currSeconds, baseSeconds in theItems:
+            if baseSeconds == None or max(currSeconds, baseSeconds) < minSeconds:
+                continue
+            if currSeconds > baseSeconds * (1.0 + tolerance):
+                regressions.append("%s %d day %s: %.3f s -> %.3f s (+%.0f%%)" % (currRun['Source'], currRun['Window_Days'], theName, baseSeconds, currSeconds, 100.0 * (currSeconds / max(baseSeconds, 1e-9) - 1.0)))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--windows", default="1,30,365", help="window lengths in days")
+    parser.add_argument("--sources", default="ftp,s3")
+    parser.add_argument("--rows", type=int, default=480)
+    parser.add_argument("--cols", type=int, default=1440)
+    parser.add_argument("--pipeline", default="0", help="ETL_Pipeline_Mode for the runs")
+    parser.add_argument("--ftp_rps", default="0", help="FTP_MaxRequestsPerSecond for the runs")
+    parser.add_argument("--transform_workers", default="1", help="Transform_Workers for the runs")
+    parser.add_argument("--single_pass_write", default="1", help="Transform_Single_Pass_Write for the runs")
+    parser.add_argument("--output", default="bench_EndToEnd_results.json")
+    parser.add_argument("--baseline", default=None, help="results file from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="slowdown (fraction) reported as a regression")
+    parser.add_argument("--min_seconds", type=float, default=0.5, help="spans shorter than this are not compared")
+    parser.add_argument("--keep", action="store_true", help="keep the work folder")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child != None:
+        run_Child(args.child)
+        return
+
+    windowDaysList = [int(w) for w in args.windows.split(",")]
+    sourceList = [s.strip().lower() for s in args.sources.split(",")]
+    outputPath = os.path.abspath(args.output)
+    startFolder = os.getcwd()
+    theFields = make_Rain_Fields(args.rows, args.cols)
+    workFolder = tempfile.mkdtemp(prefix="bench_e2e_")
+    print("grid: %dx%d, windows: %s days, sources: %s, work folder: %s" % (args.rows, args.cols, windowDaysList, sourceList, workFolder))
+
+    theResults = {
+        'Created' : datetime.datetime.utcnow().isoformat() + "Z",
+        'Python' : sys.version.split()[0],
+        'Platform' : platform.platform(),
+        'Grid' : [args.rows, args.cols],
+        'Pipeline_Mode' : args.pipeline,
+        'Runs' : []
+    }
+    try:
+        for windowDays in windowDaysList:
+            # The window ends at the last 3 hour slot before now (main() extracts up to utcnow)
+            endDateTime = get_Floor_3_Hour(datetime.datetime.utcnow())
+            seedDateTime = endDateTime - datetime.timedelta(days=windowDays)
+            granuleFolder = os.path.join(workFolder, "granules_%dday" % windowDays)
+            ftpRoot = os.path.join(granuleFolder, "ftp")
+            s3Root = os.path.join(granuleFolder, "s3")
+            os.makedirs(ftpRoot)
+            numOfGranules, numOfBytes = make_Granules(ftpRoot, s3Root, seedDateTime, endDateTime, theFields)
+
+            # New servers for each window (the threaded FTP server changes the working directory of this process)
+            ftpServer, ftpPort = start_FTP_Server(ftpRoot)
+            s3Server, s3Port = start_S3_Server(s3Root)
+            refresh_S3_Keys(s3Root)
+            try:
+                for source in sourceList:
+                    currRun = run_Scenario(workFolder, source, windowDays, seedDateTime, numOfGranules, numOfBytes, theFields, ftpPort, s3Port, args)
+                    if currRun == None:
+                        continue
+                    theResults['Runs'].append(currRun)
+                    print("%-4s %4d day: %5d granules, %8.2f s, %7.2f granules/s, %7.2f MB/s, peak RSS %s KB, loaded %d" % (source, windowDays, currRun['Granules'], currRun['Elapsed_Seconds'], currRun['Granules_Per_Second'], currRun['MB_Per_Second'], currRun['Peak_RSS_KB'], currRun['Files_Loaded']))
+                    print("           stages: " + ", ".join(["%s %.2f s" % (k, v) for k, v in sorted(currRun['Stage_Seconds'].items())]))
+            finally:
+                ftpServer.close_all()
+                s3Server.shutdown()
+                s3Server.server_close()
+                os.chdir(startFolder)
+            if not args.keep:
+                shutil.rmtree(granuleFolder, True)
+    finally:
+        os.chdir(startFolder)
+        if not args.keep:
+            shutil.rmtree(workFolder, True)
+
+    with open(outputPath, "w") as f:
+        json.dump(theResults, f, indent=2, sort_keys=True)
+    print("results written to " + outputPath)
+
+    if args.baseline != None:
+        with open(args.baseline, "r") as f:
+            baselineResults = json.load(f)
+        regressions = compare_Results(theResults, baselineResults, args.tolerance, args.min_seconds)
+        for theRegression in regressions:
+            print("REGRESSION: " + theRegression)
+        if len(regressions) > 0:
+            sys.exit(1)
+        print("no regressions against " + args.baseline)
+
+
+if __name__ == '__main__':
+    main()
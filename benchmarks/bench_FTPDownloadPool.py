@@ -0,0 +1,150 @@
+#-------------------------------------------------------------------------------
+# Name:        bench_FTPDownloadPool.py
+# Purpose:     Benchmark for ks_FTPDownloadPool against a local pyftpdlib
+#               stand-in for trmmopen.gsfc.nasa.gov
+#
+# Author:      SERVIR ETL
+#
+# Created:     10/18/2026 (mm/dd/yyyy)
+# Copyright:   (c) SERVIR 2026
+# Licence:     <your licence>
+#
+# Usage:       python bench_FTPDownloadPool.py [--granules 80] [--workers 1,4,8] [--rate 0] [--latency_ms 50] [--legacy_sleep 0]
+#               Requires pyftpdlib (pip install pyftpdlib)
+#-------------------------------------------------------------------------------
+
+import argparse
+import datetime
+import ftplib
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ks_FTPDownloadPool
+
+from pyftpdlib.authorizers import DummyAuthorizer
+from pyftpdlib.handlers import FTPHandler
+from pyftpdlib.log import config_logging
+from pyftpdlib.servers import ThreadedFTPServer
+
+
+# Builds '3B42RT.YYYYMMDDHH.7.03hr.tif/tfw' pairs inside 'pub/gis/yyyymm' folders.
+def make_Fake_Granules(ftpRoot, startDateTime, numOfGranules, tifSizeBytes):
+    filePath_Objects = []
+    tifPayload = os.urandom(tifSizeBytes)
+    currentDateTime = startDateTime
+    for i in range(numOfGranules):
+        yyyymm = currentDateTime.strftime("%Y%m")
+        folder = os.path.join(ftpRoot, "pub", "gis", yyyymm)
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        baseName = "3B42RT." + currentDateTime.strftime("%Y%m%d%H") + ".7.03hr"
+        with open(os.path.join(folder, baseName + ".tif"), "wb") as f:
+            f.write(tifPayload)
+        with open(os.path.join(folder, baseName + ".tfw"), "wb") as f:
+            f.write("0.25\n0.0\n0.0\n-0.25\n-179.875\n59.875\n")
+        filePath_Objects.append({
+            "FTPSubFolderPath" : "pub/gis/" + yyyymm,
+            "BaseRasterName" : baseName,
+            "TIF_3Hr_FileName" : baseName + ".tif",
+            "TWF_3Hr_FileName" : baseName + ".tfw",
+            "DateString" : currentDateTime.strftime("%Y%m%d%H")
+        })
+        currentDateTime = currentDateTime + datetime.timedelta(hours=3)
+    return filePath_Objects
+
+
+# Adds a fixed delay to every RETR to stand in for the round-trip to the real server.
+class LatencyFTPHandler(FTPHandler):
+    retr_latency = 0.0
+
+    def ftp_RETR(self, theFile):
+        time.sleep(self.retr_latency)
+        return FTPHandler.ftp_RETR(self, theFile)
+
+
+def start_Server(ftpRoot, retrLatency):
+    config_logging(level=logging.WARNING)
+    authorizer = DummyAuthorizer()
+    authorizer.add_anonymous(ftpRoot)
+    handler = LatencyFTPHandler
+    handler.authorizer = authorizer
+    handler.retr_latency = retrLatency
+    server = ThreadedFTPServer(("127.0.0.1", 0), handler)
+    server.max_cons = 256
+    theThread = threading.Thread(target=server.serve_forever, kwargs={"timeout":0.1})
+    theThread.daemon = True
+    theThread.start()
+    return server, server.socket.getsockname()[1]
+
+
+# The pre-pool behaviour: one connection, every granule in sequence, sleeps around cwd/retr.
+def run_Legacy(ftpParams, filePath_Objects, workspace, sleepSeconds):
+    ftp = ftplib.FTP()
+    ftp.connect(ftpParams['ftpHost'], ftpParams['ftpPort'])
+    ftp.login(ftpParams['ftpUserName'], ftpParams['ftpUserPass'])
+    time.sleep(sleepSeconds)
+    lastFolder = ""
+    for o in filePath_Objects:
+        if o['FTPSubFolderPath'] != lastFolder:
+            time.sleep(sleepSeconds)
+            ftp.cwd("/" + o['FTPSubFolderPath'])
+            time.sleep(sleepSeconds)
+        lastFolder = o['FTPSubFolderPath']
+        for name in (o['TIF_3Hr_FileName'], o['TWF_3Hr_FileName']):
+            with open(os.path.join(workspace, name), "wb") as f:
+                ftp.retrbinary("RETR %s" % name, f.write)
+            time.sleep(sleepSeconds)
+    ftp.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--granules", type=int, default=80)
+    parser.add_argument("--tif_kb", type=int, default=256)
+    parser.add_argument("--workers", default="1,4,8")
+    parser.add_argument("--rate", type=float, default=0, help="FTP_MaxRequestsPerSecond, 0 for no limit")
+    parser.add_argument("--latency_ms", type=float, default=50, help="Simulated server latency added to every RETR")
+    parser.add_argument("--legacy_sleep", type=float, default=0, help="Also time the old sequential loop with this sleep (the old code used 1)")
+    args = parser.parse_args()
+
+    tempRoot = tempfile.mkdtemp(prefix="bench_ftp_")
+    try:
+        ftpRoot = os.path.join(tempRoot, "ftproot")
+        filePath_Objects = make_Fake_Granules(ftpRoot, datetime.datetime(2014, 5, 1, 0), args.granules, args.tif_kb * 1024)
+        server, port = start_Server(ftpRoot, args.latency_ms / 1000.0)
+        ftpParams = {"ftpHost":"127.0.0.1", "ftpPort":port, "ftpUserName":"anonymous", "ftpUserPass":"anonymous"}
+
+        print("granules: %d, tif size: %d KB, RETR latency: %d ms, rate limit: %s req/s" % (args.granules, args.tif_kb, args.latency_ms, args.rate or "none"))
+
+        if args.legacy_sleep > 0:
+            workspace = tempfile.mkdtemp(dir=tempRoot)
+            t0 = time.time()
+            run_Legacy(ftpParams, filePath_Objects, workspace, args.legacy_sleep)
+            print("legacy sequential (sleep %.2fs): %.2f s" % (args.legacy_sleep, time.time() - t0))
+
+        for numWorkers in [int(w) for w in args.workers.split(",")]:
+            workspace = tempfile.mkdtemp(dir=tempRoot)
+            ks_FTPDownloadPool.g_HostRateLimiters.clear()
+            pool = ks_FTPDownloadPool.FTPDownloadPool(ftpParams, numWorkers, args.rate)
+            t0 = time.time()
+            results = pool.download_Granules(filePath_Objects, workspace)
+            elapsed = time.time() - t0
+            pool.close()
+            numOk = len([r for r in results if r['IsDownloaded']])
+            inOrder = [r['FilePath_Object']['DateString'] for r in results] == [o['DateString'] for o in filePath_Objects]
+            totalMB = sum([r['Bytes'] for r in results]) / (1024.0 * 1024.0)
+            print("workers %2d: %6.2f s, %d/%d granules, %.1f MB/s, date order kept: %s" % (numWorkers, elapsed, numOk, len(results), totalMB / max(elapsed, 1e-9), inOrder))
+
+        server.close_all()
+    finally:
+        shutil.rmtree(tempRoot, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
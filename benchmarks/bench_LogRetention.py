@@ -0,0 +1,129 @@
+#-------------------------------------------------------------------------------
+# Name:        bench_LogRetention.py
+# Purpose:     Benchmark for the debug log retention sweep
+#               (ETLDebugLogger.deleteOutdatedDebugLogs) over a log folder
+#               holding years of output (8 runs a day, a log, records and
+#               metrics file per day).  The flat folder with the sweep as it
+#               was (every file name parsed with strptime, on every start) is
+#               compared with the day folders: the first sweep which removes
+#               the expired days, the sweep of every start after that, and the
+#               time a start waits with the background sweep.
+#
+# Author:      SERVIR ETL
+#
+# Created:     10/18/2026 (mm/dd/yyyy)
+# Copyright:   (c) SERVIR 2026
+# Licence:     <your licence>
+#
+# Usage:       python bench_LogRetention.py [--days 1095] [--archive_days 30] [--max_total_mb 0]
+#-------------------------------------------------------------------------------
+
+import argparse
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ks_AdpatedLogger
+
+LOG_DATETIME_FORMAT = "%Y-%m-%d"
+BASENAMES = ["TRMM_log", "TRMM_log_records", "TRMM_metrics"]
+EXTENSIONS = ["log", "jsonl", "jsonl"]
+
+
+# The sweep as it was, kept here to compare against (it stops at the first name which is not a date)
+def old_Delete_Outdated_Debug_Logs(debug_log_dir, debug_log_archive_days, log_file_extn):
+    current_datetime = datetime.datetime.now()
+    isOutsideArchiveRange = lambda d:(current_datetime - d).days > int(debug_log_archive_days)
+    getDebugLogDatetime = lambda d:datetime.datetime.strptime(os.path.basename(d).split("_")[-1].split(".")[0], LOG_DATETIME_FORMAT)
+    current_debug_logs = [d for d in os.listdir(debug_log_dir) if d.endswith(log_file_extn)]
+    for debug_log in current_debug_logs:
+        if isOutsideArchiveRange(getDebugLogDatetime(debug_log)):
+            os.remove(os.path.join(debug_log_dir, debug_log))
+
+
+# One day of log files in 'dayFolder', about 'bytesPerFile' each
+def write_Day(dayFolder, dateString, bytesPerFile):
+    if not os.path.isdir(dayFolder):
+        os.makedirs(dayFolder)
+    theText = "x" * bytesPerFile
+    for basename, extension in zip(BASENAMES, EXTENSIONS):
+        with open(os.path.join(dayFolder, "%s_%s.%s" % (basename, dateString, extension)), "w") as f:
+            f.write(theText)
+
+
+def make_Log_Folder(logFolder, numOfDays, isPartitioned, bytesPerFile):
+    today = datetime.datetime.now()
+    for dayIndex in range(numOfDays):
+        dateString = (today - datetime.timedelta(days=dayIndex)).strftime(LOG_DATETIME_FORMAT)
+        write_Day(os.path.join(logFolder, dateString) if isPartitioned else logFolder, dateString, bytesPerFile)
+
+
+def count_Files(logFolder):
+    return sum([len(fileNames) for dirPath, dirNames, fileNames in os.walk(logFolder)])
+
+
+def time_Sweep(logFolder, theOptions):
+    theLogger = ks_AdpatedLogger.ETLDebugLogger(logFolder, "bench", theOptions)
+    t0 = time.time()
+    theLogger.deleteOutdatedDebugLogs()
+    returnSeconds = time.time() - t0
+    if theLogger._sweep_thread != None:
+        theLogger._sweep_thread.join()
+    return returnSeconds, theLogger.last_sweep_result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=1095, help="days of logs in the folder")
+    parser.add_argument("--archive_days", type=int, default=30)
+    parser.add_argument("--max_total_mb", type=int, default=0)
+    parser.add_argument("--bytes_per_file", type=int, default=64)
+    args = parser.parse_args()
+
+    workFolder = tempfile.mkdtemp(prefix="bench_log_retention_")
+    try:
+        print("days of logs: %d, files: %d, archive days: %d, size limit: %d MB" % (args.days, args.days * len(BASENAMES), args.archive_days, args.max_total_mb))
+        theOptions = {'debug_log_archive_days': args.archive_days, 'max_total_log_bytes': args.max_total_mb * 1024 * 1024, 'is_console_echo': False}
+
+        # Flat folder, the sweep as it was
+        flatFolder = os.path.join(workFolder, "flat")
+        make_Log_Folder(flatFolder, args.days, False, args.bytes_per_file)
+        t0 = time.time()
+        old_Delete_Outdated_Debug_Logs(flatFolder, args.archive_days, "log")
+        firstSeconds = time.time() - t0
+        t0 = time.time()
+        old_Delete_Outdated_Debug_Logs(flatFolder, args.archive_days, "log")
+        print("flat, old sweep     : first %7.3f s, every start after %7.3f s, files left %d (only '.log' files are removed)" % (firstSeconds, time.time() - t0, count_Files(flatFolder)))
+        with open(os.path.join(flatFolder, "notes.log"), "w") as f:
+            f.write("not a dated log")
+        try:
+            old_Delete_Outdated_Debug_Logs(flatFolder, args.archive_days, "log")
+            print("flat, old sweep     : a log named notes.log is skipped")
+        except ValueError:
+            print("flat, old sweep     : a log named notes.log stops the sweep with ValueError")
+
+        # Day folders
+        partitionedOptions = dict(theOptions, is_date_partitioned=True)
+        partitionedFolder = os.path.join(workFolder, "partitioned")
+        make_Log_Folder(partitionedFolder, args.days, True, args.bytes_per_file)
+        with open(os.path.join(partitionedFolder, "notes.log"), "w") as f:
+            f.write("not a dated log")
+        firstSeconds, firstResult = time_Sweep(partitionedFolder, partitionedOptions)
+        afterSeconds, afterResult = time_Sweep(partitionedFolder, partitionedOptions)
+        print("day folders         : first %7.3f s (%d folders removed), every start after %7.3f s, files left %d" % (firstSeconds, firstResult['Partitions_Removed'], afterSeconds, count_Files(partitionedFolder)))
+
+        # Background sweep, what a start waits for
+        backgroundFolder = os.path.join(workFolder, "background")
+        make_Log_Folder(backgroundFolder, args.days, True, args.bytes_per_file)
+        returnSeconds, backgroundResult = time_Sweep(backgroundFolder, dict(partitionedOptions, is_background_sweep=True))
+        print("day folders, thread : start waits %7.3f s, sweep took %7.3f s in the background (%d folders removed)" % (returnSeconds, backgroundResult['Seconds'], backgroundResult['Partitions_Removed']))
+    finally:
+        shutil.rmtree(workFolder, True)
+
+
+if __name__ == '__main__':
+    main()
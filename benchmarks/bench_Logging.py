@@ -0,0 +1,93 @@
+#-------------------------------------------------------------------------------
+# Name:        bench_Logging.py
+# Purpose:     Benchmark for the debug logger (ks_AdpatedLogger) over the log
+#               volume of a 1 year backfill (2920 granules, a few messages per
+#               granule in each stage), synchronous against queued (async)
+#               writes, with and without the console echo.  The time the ETL
+#               spends in updateDebugLog is compared against building the same
+#               messages without logging them.
+#
+# Author:      SERVIR ETL
+#
+# Created:     10/18/2026 (mm/dd/yyyy)
+# Copyright:   (c) SERVIR 2026
+# Licence:     <your licence>
+#
+# Usage:       python bench_Logging.py [--granules 2920] [--messages_per_granule 12]
+#
+#              The console echo goes to os.devnull, so terminal speed is not part of the numbers.
+#              On a single core the writer thread runs in between the messages, 'async_deferred' keeps it
+#              idle until close() to show what queueing alone costs the ETL.
+#-------------------------------------------------------------------------------
+
+import argparse
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ks_AdpatedLogger
+
+
+def make_Message(dateSTR, i):
+    return "Transform_Do_Transform_CopyRaster: Copied 3B42RT." + dateSTR + ".7.03hr.tif to D:\\SERVIR\\Data\\Raster\\3B42RT." + dateSTR + ".7.03hr.tif (" + str(i) + ")"
+
+
+def run_Mode(logFolder, modeName, theOptions, dateStrings, messagesPerGranule):
+    theLogger = None
+    if theOptions != None:
+        theLogger = ks_AdpatedLogger.ETLDebugLogger(logFolder, "bench_" + modeName, theOptions)
+    t0 = time.time()
+    for dateSTR in dateStrings:
+        for i in range(messagesPerGranule):
+            theMsg = make_Message(dateSTR, i)
+            if theLogger != None:
+                theLogger.updateDebugLog(theMsg)
+    callerSeconds = time.time() - t0
+    if theLogger != None:
+        theLogger.close()
+    return callerSeconds, time.time() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--granules", type=int, default=2920)
+    parser.add_argument("--messages_per_granule", type=int, default=12)
+    args = parser.parse_args()
+
+    startDateTime = datetime.datetime(2015, 1, 1, 0)
+    dateStrings = [(startDateTime + datetime.timedelta(hours=3 * i)).strftime("%Y%m%d%H") for i in range(args.granules)]
+    print("granules: %d, messages: %d" % (args.granules, args.granules * args.messages_per_granule))
+
+    theModes = [
+        ("no_logging", None),
+        ("sync_echo", {'is_async': False, 'is_console_echo': True}),
+        ("sync", {'is_async': False, 'is_console_echo': False}),
+        ("async_echo", {'is_async': True, 'is_console_echo': True}),
+        ("async", {'is_async': True, 'is_console_echo': False}),
+        ("async_deferred", {'is_async': True, 'is_console_echo': False, 'max_batch_size': 10 ** 9, 'flush_interval_seconds': 3600}),
+    ]
+    logFolder = tempfile.mkdtemp(prefix="bench_logging_")
+    realStdout = sys.stdout
+    try:
+        theResults = []
+        with open(os.devnull, "w") as devNull:
+            for modeName, theOptions in theModes:
+                sys.stdout = devNull
+                try:
+                    theResults.append((modeName, run_Mode(logFolder, modeName, theOptions, dateStrings, args.messages_per_granule)))
+                finally:
+                    sys.stdout = realStdout
+        baseSeconds = theResults[0][1][0]
+        for modeName, (callerSeconds, totalSeconds) in theResults:
+            print("%-14s: in the ETL %7.3f s (logging %7.3f s), until written %7.3f s" % (modeName, callerSeconds, callerSeconds - baseSeconds, totalSeconds))
+    finally:
+        sys.stdout = realStdout
+        shutil.rmtree(logFolder, True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#-------------------------------------------------------------------------------
+# Name:        bench_MappedRaster.py
+# Purpose:     Benchmark for the memory mapped raster access (ks_MappedRaster)
+#               against reading every raster of a window into memory, over a
+#               30 day window of synthetic 3 hour granules (240 rasters).  Each
+#               mode runs in its own python process.  Mapped pages that were
+#               touched count in the RSS but can be dropped by the OS, so the
+#               anonymous (not file backed) memory held at the end of the sum
+#               is reported as well (linux only, from /proc/self/status).
+#
+# Author:      SERVIR ETL
+#
+# Created:     10/18/2026 (mm/dd/yyyy)
+# Copyright:   (c) SERVIR 2026
+# Licence:     <your licence>
+#
+# Usage:       python bench_MappedRaster.py [--rows 480] [--cols 1440] [--granules 240] [--rows_per_block 60] [--cache_mb 256]
+#-------------------------------------------------------------------------------
+
+import argparse
+import datetime
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ks_GeoTIFF
+import ks_MappedRaster
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_RollingAccumulator import write_Granule
+
+
+# Anonymous resident memory of this process in KB, None if it can not be read
+def get_RssAnon_KB():
+    try:
+        with open("/proc/self/status", "r") as f:
+            for theLine in f:
+                if theLine.startswith("RssAnon:"):
+                    return int(theLine.split()[1])
+    except IOError:
+        pass
+    return None
+
+
+# Returns (sum, anonymous RSS in KB while everything the sum needed was still held)
+def sum_Window(mode, rasterPaths, rowsPerBlock, cacheMB):
+    if mode == "read":
+        # Every raster read in whole and kept until the sum is done
+        theArrays = [ks_GeoTIFF.read_GeoTIFF(rasterPath)['array'] for rasterPath in rasterPaths]
+        theSum = numpy.zeros(theArrays[0].shape, dtype=numpy.float64)
+        for theArray in theArrays:
+            theSum += theArray
+        return theSum, get_RssAnon_KB()
+
+    theCache = ks_MappedRaster.RasterHandleCache(ks_MappedRaster.DEFAULT_MAX_HANDLES, cacheMB * 1024 * 1024)
+    numOfRows, numOfCols = theCache.get(rasterPaths[0]).shape
+    theSum = numpy.zeros((numOfRows, numOfCols), dtype=numpy.float64)
+    for row0 in range(0, numOfRows, rowsPerBlock):
+        for rasterPath in rasterPaths:
+            theSum[row0:row0 + rowsPerBlock] += theCache.get(rasterPath).read_Rows(row0, row0 + rowsPerBlock)
+    return theSum, get_RssAnon_KB()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=480)
+    parser.add_argument("--cols", type=int, default=1440)
+    parser.add_argument("--granules", type=int, default=240)
+    parser.add_argument("--rows_per_block", type=int, default=60)
+    parser.add_argument("--cache_mb", type=int, default=256, help="Raster_Cache_Max_MB of the mapped mode")
+    parser.add_argument("--child", nargs=2, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child != None:
+        mode, granuleFolder = args.child
+        rasterPaths = sorted([os.path.join(granuleFolder, n) for n in os.listdir(granuleFolder) if n.endswith(".tif")])
+        t0 = time.time()
+        theSum, rssAnon = sum_Window(mode, rasterPaths, args.rows_per_block, args.cache_mb)
+        seconds = time.time() - t0
+        numpy.save(os.path.join(granuleFolder, mode + ".npy"), theSum)
+        print("%-7s: %8.3f s, peak RSS %8d KB, anonymous RSS %s KB" % (mode, seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, rssAnon))
+        return
+
+    workFolder = tempfile.mkdtemp(prefix="bench_mapped_")
+    try:
+        randomState = numpy.random.RandomState(42)
+        currentDateTime = datetime.datetime(2015, 3, 1, 0)
+        for i in range(args.granules):
+            write_Granule(workFolder, currentDateTime, args.rows, args.cols, randomState)
+            currentDateTime += datetime.timedelta(hours=3)
+        print("grid: %dx%d, granules: %d, rows per block: %d, cache: %d MB" % (args.rows, args.cols, args.granules, args.rows_per_block, args.cache_mb))
+        for mode in ["read", "mapped"]:
+            sys.stdout.flush()
+            subprocess.call([sys.executable, os.path.abspath(__file__), "--rows_per_block", str(args.rows_per_block), "--cache_mb", str(args.cache_mb), "--child", mode, workFolder])
+        print("same sum: %s" % numpy.array_equal(numpy.load(os.path.join(workFolder, "read.npy")), numpy.load(os.path.join(workFolder, "mapped.npy"))))
+    finally:
+        shutil.rmtree(workFolder, True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#-------------------------------------------------------------------------------
+# Name:        bench_MosaicLoad.py
+# Purpose:     Benchmark for the batched Load step (ks_MosaicLoad) against the
+#               one-raster-at-a-time load, using a fake geoprocessing backend
+#               that counts calls and charges a fixed cost per call plus a
+#               statistics cost that grows with the size of the mosaic.
+#
+# Author:      SERVIR ETL
+#
+# Created:     10/18/2026 (mm/dd/yyyy)
+# Copyright:   (c) SERVIR 2026
+# Licence:     <your licence>
+#
+# Usage:       python bench_MosaicLoad.py [--granules 240] [--call_ms 20] [--stats_ms_per_1000 50]
+#-------------------------------------------------------------------------------
+
+import argparse
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ks_GeoprocessingBackend
+import ks_MosaicLoad
+
+
+# Keeps the mosaic datasets as {mosaicDS: {rasterName: {field: value}}}
+class FakeBackend(ks_GeoprocessingBackend.GeoprocessingBackend):
+    def __init__(self, mosaicDS_List, call_latency, stats_latency_per_1000, initial_rows=0):
+        self.mosaics = {}
+        for mosaicDS in mosaicDS_List:
+            self.mosaics[mosaicDS] = dict([("existing_%d" % i, {}) for i in range(initial_rows)])
+        self.call_latency = call_latency
+        self.stats_latency_per_1000 = stats_latency_per_1000
+        self.calls = {'add': 0, 'stats': 0, 'update': 0}
+
+    def exists(self, thePath):
+        return thePath in self.mosaics
+
+    def add_Rasters_To_Mosaic(self, mosaicDS, rasterFileList, coor_system):
+        self.calls['add'] += 1
+        time.sleep(self.call_latency)
+        for rasterFile in rasterFileList:
+            self.mosaics[mosaicDS].setdefault(ks_MosaicLoad.get_RasterName(rasterFile), {})
+
+    def calculate_Mosaic_Statistics(self, mosaicDS):
+        self.calls['stats'] += 1
+        time.sleep(self.call_latency + self.stats_latency_per_1000 * len(self.mosaics[mosaicDS]) / 1000.0)
+
+    def update_Mosaic_Attributes(self, mosaicDS, attrNameList, valuesByName):
+        self.calls['update'] += 1
+        time.sleep(self.call_latency)
+        updatedNames = []
+        for theName, theValues in valuesByName.items():
+            if theName in self.mosaics[mosaicDS]:
+                self.mosaics[mosaicDS][theName].update(dict(zip(attrNameList, theValues)))
+                updatedNames.append(theName)
+        return updatedNames
+
+
+def make_TransformItems(numOfGranules, endDateTime):
+    transformItemList = []
+    currentDateTime = endDateTime - datetime.timedelta(hours=3 * (numOfGranules - 1))
+    for i in range(numOfGranules):
+        dateString = currentDateTime.strftime("%Y%m%d%H")
+        transformItemList.append({
+            'date_string': dateString,
+            'Transformed_File_List': [{
+                "out_raster_file_location": "/data/TRMM/TRMM-3B42RT-V7-Rain_" + dateString + "Z.tif",
+                "mosaic_ds_name": "TRMM",
+                "primary_date_field": "timestamp"
+            }]
+        })
+        currentDateTime = currentDateTime + datetime.timedelta(hours=3)
+    return transformItemList
+
+
+def get_DateTime_From_RasterName(rasterName):
+    return datetime.datetime.strptime(rasterName.split("_")[-1][:10], "%Y%m%d%H")
+
+
+# The pre-change approach: add, calculate statistics and update attributes once per raster.
+def legacy_Load(theBackend, transformItemList, workspace):
+    for currentTransformItem in transformItemList:
+        ks_MosaicLoad.load_TransformItems_Batch(theBackend, [currentTransformItem], get_DateTime_From_RasterName, workspace, "WGS 1984")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--granules", type=int, default=240)
+    parser.add_argument("--initial_rows", type=int, default=5000)
+    parser.add_argument("--call_ms", type=float, default=20)
+    parser.add_argument("--stats_ms_per_1000", type=float, default=50)
+    args = parser.parse_args()
+
+    workspace = "/gdb"
+    mosaicDS = os.path.join(workspace, "TRMM")
+    transformItemList = make_TransformItems(args.granules, datetime.datetime(2015, 4, 15, 0))
+    print("granules: %d, rows already in mosaic: %d, call: %d ms, statistics: %d ms per 1000 rows" % (args.granules, args.initial_rows, args.call_ms, args.stats_ms_per_1000))
+
+    results = {}
+    for label, loadFunc in [("per raster", lambda b: legacy_Load(b, transformItemList, workspace)),
+                            ("batched   ", lambda b: ks_MosaicLoad.load_TransformItems_Batch(b, transformItemList, get_DateTime_From_RasterName, workspace, "WGS 1984"))]:
+        theBackend = FakeBackend([mosaicDS], args.call_ms / 1000.0, args.stats_ms_per_1000 / 1000.0, args.initial_rows)
+        t0 = time.time()
+        loadFunc(theBackend)
+        print("%s: %8.3f s, calls: %s" % (label, time.time() - t0, theBackend.calls))
+        results[label.strip()] = theBackend.mosaics
+    print("same attributes: %s" % (results["per raster"] == results["batched"]))
+
+
+if __name__ == '__main__':
+    main()
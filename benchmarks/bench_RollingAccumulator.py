@@ -0,0 +1,130 @@
+#-------------------------------------------------------------------------------
+# Name:        bench_RollingAccumulator.py
+# Purpose:     Benchmark for the rolling accumulation engine (ks_RollingAccumulator)
+#               against summing the whole window every run, on synthetic 3 hour
+#               granules written as GeoTIFF + .tfw.  Also checks that a build in
+#               row blocks (memory limit) gives the same sums, bit for bit, as a
+#               build of the whole grid at once.
+#
+# Author:      SERVIR ETL
+#
+# Created:     10/18/2026 (mm/dd/yyyy)
+# Copyright:   (c) SERVIR 2026
+# Licence:     <your licence>
+#
+# Usage:       python bench_RollingAccumulator.py [--rows 480] [--cols 1440] [--runs 8] [--new_per_run 1] [--block_memory_mb 24]
+#-------------------------------------------------------------------------------
+
+import argparse
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ks_GeoTIFF
+import ks_RollingAccumulator
+
+
+WINDOWS = [1, 3, 7, 30]
+
+
+def write_Granule(folder, theDateTime, rows, cols, randomState):
+    # 3 hour rain in 0.01 mm as int16, mostly dry, with some negative (missing) cells
+    theArray = (randomState.gamma(0.3, 80.0, (rows, cols)) * (randomState.rand(rows, cols) < 0.2)).astype(numpy.int16)
+    theArray[randomState.rand(rows, cols) < 0.001] = -9999
+    rasterPath = os.path.join(folder, "3B42RT." + theDateTime.strftime("%Y%m%d%H") + ".7.03hr.tif")
+    ks_GeoTIFF.write_GeoTIFF(rasterPath, theArray, (0.25, 0.0, 0.0, -0.25, -179.875, 59.875))
+    return rasterPath
+
+
+# The pre-change approach: read and sum every granule in each window
+def full_Recompute(granulePathsByDateString, windowEndDateTime):
+    results = {}
+    for windowDays in WINDOWS:
+        theWindow = ks_RollingAccumulator.RollingWindow("", windowDays)
+        theSum = None
+        for ds in sorted(theWindow.get_Window_DateStrings(granulePathsByDateString, windowEndDateTime)):
+            theArray, theWorldFile = ks_RollingAccumulator.read_Granule(granulePathsByDateString[ds])
+            theSum = theArray if theSum is None else theSum + theArray
+        results[windowDays] = ks_RollingAccumulator.get_UInt16_Composite(theSum)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=480)
+    parser.add_argument("--cols", type=int, default=1440)
+    parser.add_argument("--runs", type=int, default=8)
+    parser.add_argument("--new_per_run", type=int, default=1)
+    parser.add_argument("--block_memory_mb", type=int, default=24, help="memory limit of the build in row blocks")
+    args = parser.parse_args()
+
+    workFolder = tempfile.mkdtemp(prefix="bench_rolling_")
+    try:
+        granuleFolder = os.path.join(workFolder, "rasters")
+        os.makedirs(granuleFolder)
+        randomState = numpy.random.RandomState(42)
+        currentDateTime = datetime.datetime(2015, 3, 1, 0)
+        granulePathsByDateString = {}
+        # 30 days of history
+        for i in range(30 * 8):
+            granulePathsByDateString[currentDateTime.strftime("%Y%m%d%H")] = write_Granule(granuleFolder, currentDateTime, args.rows, args.cols, randomState)
+            currentDateTime += datetime.timedelta(hours=3)
+        print("grid: %dx%d, windows: %s days, runs: %d, new granules per run: %d" % (args.rows, args.cols, WINDOWS, args.runs, args.new_per_run))
+
+        theEngine = ks_RollingAccumulator.AccumulationEngine(os.path.join(workFolder, "state"), WINDOWS)
+        t0 = time.time()
+        theEngine.update(granulePathsByDateString, currentDateTime - datetime.timedelta(hours=3))
+        print("initial build      : %8.3f s" % (time.time() - t0))
+
+        blockEngine = ks_RollingAccumulator.AccumulationEngine(os.path.join(workFolder, "state_blocks"), WINDOWS, maxMemoryBytes=args.block_memory_mb * 1024 * 1024)
+        t0 = time.time()
+        blockEngine.update(granulePathsByDateString, currentDateTime - datetime.timedelta(hours=3))
+        seconds = time.time() - t0
+        rowsPerBlock = blockEngine._get_Rows_Per_Block((args.rows, args.cols))
+        isSameBits = True
+        for theWindow, blockWindow in zip(theEngine.windows, blockEngine.windows):
+            isSameBits = isSameBits and theWindow.sum.dtype == blockWindow.sum.dtype and theWindow.sum.tobytes() == blockWindow.sum.tobytes()
+        print("build in row blocks: %8.3f s, %d rows per block (%d MB limit), same sums bit for bit: %s" % (seconds, rowsPerBlock, args.block_memory_mb, isSameBits))
+        if not isSameBits:
+            sys.exit(1)
+
+        time_Full = 0.0
+        time_Rolling = 0.0
+        reads_Rolling = 0
+        isSame = True
+        for run in range(args.runs):
+            for i in range(args.new_per_run):
+                granulePathsByDateString[currentDateTime.strftime("%Y%m%d%H")] = write_Granule(granuleFolder, currentDateTime, args.rows, args.cols, randomState)
+                currentDateTime += datetime.timedelta(hours=3)
+            windowEndDateTime = currentDateTime - datetime.timedelta(hours=3)
+
+            t0 = time.time()
+            fullResults = full_Recompute(granulePathsByDateString, windowEndDateTime)
+            time_Full += time.time() - t0
+
+            t0 = time.time()
+            rollingResults = theEngine.update(granulePathsByDateString, windowEndDateTime)
+            time_Rolling += time.time() - t0
+            reads_Rolling += theEngine.num_Of_Granule_Reads
+
+            for windowDays in WINDOWS:
+                isSame = isSame and numpy.array_equal(fullResults[windowDays], rollingResults[windowDays]['Composite'])
+
+        reads_Full = args.runs * sum([windowDays * 8 for windowDays in WINDOWS])
+        print("full recompute     : %8.3f s per run, %5d granule reads per run" % (time_Full / args.runs, reads_Full // args.runs))
+        print("rolling accumulator: %8.3f s per run, %5d granule reads per run" % (time_Rolling / args.runs, reads_Rolling // args.runs))
+        print("same composites: %s" % isSame)
+        if not isSame:
+            sys.exit(1)
+    finally:
+        shutil.rmtree(workFolder, True)
+
+
+if __name__ == '__main__':
+    main()
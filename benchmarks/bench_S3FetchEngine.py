@@ -0,0 +1,205 @@
+#-------------------------------------------------------------------------------
+# Name:        bench_S3FetchEngine.py
+# Purpose:     Benchmark for ks_S3Extract.S3FetchEngine against a local
+#               S3-compatible stand-in (plain HTTP GET with Range support)
+#               which can cut transfers off part way to exercise resume, and
+#               answer some resumes with a range that starts too early.
+#               A .gz cut short is also checked to be refused by the
+#               StreamWriter (gzip trailer check), not written out as good.
+#
+# Author:      SERVIR ETL
+#
+# Created:     10/18/2026 (mm/dd/yyyy)
+# Copyright:   (c) SERVIR 2026
+# Licence:     <your licence>
+#
+# Usage:       python bench_S3FetchEngine.py [--objects 60] [--workers 1,4,8] [--latency_ms 30] [--drop_fraction 0.2]
+#-------------------------------------------------------------------------------
+
+import argparse
+import BaseHTTPServer
+import gzip
+import hashlib
+import os
+import random
+import shutil
+import SocketServer
+import StringIO
+import sys
+import tempfile
+import threading
+import time
+import urllib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ks_S3Extract
+import ks_StreamingDownload
+
+
+# Serves objects out of a dict {path: bytes}.  Honors 'Range: bytes=N-', keeps connections alive,
+# adds a fixed latency to each request and cuts the first transfer of some objects off half way.
+# The first resume of the objects in 'misaligned_paths' gets a range starting 1000 bytes before the one asked for.
+class FakeS3Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    objects = {}
+    latency = 0.0
+    drop_paths = set()
+    misaligned_paths = set()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        body = self.objects.get(self.path)
+        if body == None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        start = 0
+        theRange = self.headers.getheader("Range")
+        if theRange and theRange.startswith("bytes="):
+            start = int(theRange[6:].split("-")[0])
+            if self.path in self.misaligned_paths:
+                self.misaligned_paths.discard(self.path)
+                start = max(0, start - 1000)
+            self.send_response(206)
+            self.send_header("Content-Range", "bytes %d-%d/%d" % (start, len(body) - 1, len(body)))
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body) - start))
+        self.end_headers()
+        if self.path in self.drop_paths:
+            self.drop_paths.discard(self.path)
+            self.wfile.write(body[start:start + (len(body) - start) // 2])
+            self.wfile.flush()
+            self.close_connection = 1
+            return
+        self.wfile.write(body[start:])
+
+
+class ThreadedHTTPServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+    # The engine hangs up on a transfer it gives up on, that is expected here
+    def handle_error(self, request, client_address):
+        pass
+
+
+def make_Objects(numOfObjects, rawSizeBytes):
+    objects = {}
+    rawChecksums = {}
+    for i in range(numOfObjects):
+        key = "/global/data/eodata/trmm/3B42RT.%010d.7.03hr.tif.gz" % (2015010100 + i)
+        raw = os.urandom(rawSizeBytes // 4) + "\0" * (rawSizeBytes - rawSizeBytes // 4)
+        b = StringIO.StringIO()
+        g = gzip.GzipFile(fileobj=b, mode="wb")
+        g.write(raw)
+        g.close()
+        objects["/" + key] = b.getvalue()
+        rawChecksums[key] = hashlib.sha256(raw).hexdigest()
+    return objects, rawChecksums
+
+
+# The pre-engine behaviour: urllib.urlopen per object, one at a time, no retry.
+# Returns (objects without an error, objects whose content is actually correct)
+def run_Legacy(rootPath, keys, workspace, rawChecksums):
+    numOk = 0
+    numCorrect = 0
+    for key in keys:
+        outFile = os.path.join(workspace, os.path.basename(key)[:-3])
+        theWriter = ks_StreamingDownload.StreamWriter(outFile, True, True)
+        try:
+            r = urllib.urlopen(rootPath + key)
+            while True:
+                chunk = r.read(ks_StreamingDownload.DEFAULT_BUFFER_SIZE)
+                if not chunk:
+                    break
+                theWriter.write(chunk)
+            r.close()
+            checksum = theWriter.finish()
+            numOk += 1
+            if checksum == rawChecksums[key]:
+                numCorrect += 1
+        except:
+            theWriter.abort()
+    return numOk, numCorrect
+
+
+# Feeds gzip data cut short at a few places through a StreamWriter, returns the number of cut points that were NOT refused.
+def check_Truncated_GZip(gzBytes, workspace):
+    outFile = os.path.join(workspace, "truncated.tif")
+    cutPoints = [len(gzBytes) - 1, len(gzBytes) - 4, len(gzBytes) - 8, len(gzBytes) - 9, len(gzBytes) // 2, 20]
+    numAccepted = 0
+    for cutPoint in cutPoints:
+        theWriter = ks_StreamingDownload.StreamWriter(outFile, True, True)
+        try:
+            theWriter.write(gzBytes[:cutPoint])
+            theWriter.finish()
+            numAccepted += 1
+        except IOError:
+            pass
+    # And the whole thing must still be accepted
+    theWriter = ks_StreamingDownload.StreamWriter(outFile, True, True)
+    theWriter.write(gzBytes)
+    theWriter.finish()
+    return numAccepted
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--objects", type=int, default=60)
+    parser.add_argument("--raw_kb", type=int, default=1024)
+    parser.add_argument("--workers", default="1,4,8")
+    parser.add_argument("--latency_ms", type=float, default=30)
+    parser.add_argument("--drop_fraction", type=float, default=0.2, help="Fraction of objects whose first transfer is cut off half way")
+    args = parser.parse_args()
+
+    objects, rawChecksums = make_Objects(args.objects, args.raw_kb * 1024)
+    FakeS3Handler.objects = objects
+    FakeS3Handler.latency = args.latency_ms / 1000.0
+    server = ThreadedHTTPServer(("127.0.0.1", 0), FakeS3Handler)
+    serverThread = threading.Thread(target=server.serve_forever)
+    serverThread.daemon = True
+    serverThread.start()
+    rootPath = "http://127.0.0.1:%d/" % server.server_address[1]
+    keys = sorted(rawChecksums.keys())
+    print("objects: %d, raw size: %d KB, request latency: %d ms, dropped first transfers: %d%%" % (args.objects, args.raw_kb, args.latency_ms, args.drop_fraction * 100))
+
+    tempRoot = tempfile.mkdtemp(prefix="bench_s3_")
+    try:
+        numAccepted = check_Truncated_GZip(objects["/" + keys[0]], tempRoot)
+        print("truncated .gz accepted by StreamWriter: %d (should be 0)" % numAccepted)
+        if numAccepted > 0:
+            sys.exit(1)
+
+        random.seed(1)
+        FakeS3Handler.drop_paths = set(random.sample(objects.keys(), int(len(objects) * args.drop_fraction)))
+        workspace = tempfile.mkdtemp(dir=tempRoot)
+        t0 = time.time()
+        numOk, numCorrect = run_Legacy(rootPath, keys, workspace, rawChecksums)
+        print("legacy urllib    : %6.2f s, %d/%d objects without error, only %d intact" % (time.time() - t0, numOk, len(keys), numCorrect))
+
+        for numWorkers in [int(w) for w in args.workers.split(",")]:
+            random.seed(1)
+            FakeS3Handler.drop_paths = set(random.sample(objects.keys(), int(len(objects) * args.drop_fraction)))
+            FakeS3Handler.misaligned_paths = set(list(FakeS3Handler.drop_paths)[::2])
+            workspace = tempfile.mkdtemp(dir=tempRoot)
+            engine = ks_S3Extract.S3FetchEngine(rootPath, numWorkers, 4, 0.05)
+            keyAndOut = [(k, os.path.join(workspace, os.path.basename(k)[:-3])) for k in keys]
+            t0 = time.time()
+            results = list(engine.imap_Objects(keyAndOut, True, True))
+            elapsed = time.time() - t0
+            stats = ks_S3Extract.get_Download_Stats(results)
+            checksumsOk = all([r['Checksum'] == rawChecksums[r['Key']] for r in results if r['IsDownloaded']])
+            print("engine workers %2d: %6.2f s, %d/%d objects, %d retried, latency p50 %.3f s, checksums ok: %s" % (numWorkers, elapsed, stats['Objects_Downloaded'], len(keys), stats['Objects_Retried'], stats['Latency_Seconds_p50'] or 0, checksumsOk))
+            if not checksumsOk or stats['Objects_Downloaded'] != len(keys):
+                sys.exit(1)
+    finally:
+        shutil.rmtree(tempRoot, ignore_errors=True)
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
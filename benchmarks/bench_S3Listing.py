@@ -0,0 +1,116 @@
+#-------------------------------------------------------------------------------
+# Name:        bench_S3Listing.py
+# Purpose:     Benchmark for the date pruned S3 listing (ks_S3Extract) against
+#               the old list-everything-then-filter approach, using an in
+#               memory stand-in for a boto bucket.
+#
+# Author:      SERVIR ETL
+#
+# Created:     10/18/2026 (mm/dd/yyyy)
+# Copyright:   (c) SERVIR 2026
+# Licence:     <your licence>
+#
+# Usage:       python bench_S3Listing.py [--keys 500000] [--window_days 2] [--page_latency_ms 20]
+#-------------------------------------------------------------------------------
+
+import argparse
+import bisect
+import datetime
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ks_S3Extract
+
+
+class FakeKey(object):
+    def __init__(self, key):
+        self.key = key
+
+
+# Behaves like boto's Bucket for list() and get_all_keys(): keys are sorted, pages
+# hold up to 1000 keys and each page costs 'page_latency' seconds.
+class FakeBucket(object):
+    def __init__(self, keys, page_latency):
+        self.keys = sorted(keys)
+        self.page_latency = page_latency
+        self.pages_fetched = 0
+
+    def get_all_keys(self, prefix="", marker="", max_keys=1000):
+        self.pages_fetched += 1
+        time.sleep(self.page_latency)
+        i = bisect.bisect_right(self.keys, marker) if marker else bisect.bisect_left(self.keys, prefix)
+        page = []
+        while i < len(self.keys) and len(page) < max_keys and self.keys[i].startswith(prefix):
+            page.append(FakeKey(self.keys[i]))
+            i += 1
+        return page
+
+    def list(self, prefix="", marker=""):
+        while True:
+            page = self.get_all_keys(prefix, marker)
+            for k in page:
+                yield k
+            if len(page) < 1000:
+                return
+            marker = page[-1].key
+
+
+# 3 hour granules plus the 1/3/7 day composites for each time step, ending at 'endDateTime'.
+def make_Keys(prefix, numOfKeys, endDateTime):
+    products = [".7.03hr.tif.gz", ".7.1day.tif.gz", ".7.3day.tif.gz", ".7.7day.tif.gz"]
+    numOfSteps = (numOfKeys + len(products) - 1) // len(products)
+    keys = []
+    currentDateTime = endDateTime - datetime.timedelta(hours=3 * (numOfSteps - 1))
+    for i in range(numOfSteps):
+        for product in products:
+            keys.append(prefix + "3B42RT." + currentDateTime.strftime("%Y%m%d%H") + product)
+        currentDateTime = currentDateTime + datetime.timedelta(hours=3)
+    return keys[-numOfKeys:]
+
+
+# The pre-change approach: list the whole prefix, then regex + strptime every key.
+def legacy_List(s3_Bucket, prefix, start, end, regExp_Pattern, date_Format):
+    allKeys = [k.key for k in list(s3_Bucket.list(prefix))]
+    retList = []
+    for k in allKeys:
+        found = re.findall(regExp_Pattern, k)
+        if len(found) == 0:
+            continue
+        d = datetime.datetime.strptime(found[0], date_Format)
+        if d > start and d <= end:
+            retList.append(k)
+    return retList
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=500000)
+    parser.add_argument("--window_days", type=int, default=2)
+    parser.add_argument("--page_latency_ms", type=float, default=20)
+    args = parser.parse_args()
+
+    prefix = "/global/data/eodata/trmm/"
+    regExp_Pattern = r"\d{4}[01]\d[0-3]\d[0-2]\d"
+    date_Format = "%Y%m%d%H"
+    endDateTime = datetime.datetime(2015, 4, 15, 0)
+    startDateTime = endDateTime - datetime.timedelta(days=args.window_days)
+    keys = make_Keys(prefix, args.keys, endDateTime)
+    print("keys: %d, window: %d days, page latency: %d ms" % (len(keys), args.window_days, args.page_latency_ms))
+
+    bucket = FakeBucket(keys, args.page_latency_ms / 1000.0)
+    t0 = time.time()
+    legacyResult = legacy_List(bucket, prefix, startDateTime, endDateTime, regExp_Pattern, date_Format)
+    print("full list + filter : %8.3f s, %5d pages, %d keys in window" % (time.time() - t0, bucket.pages_fetched, len(legacyResult)))
+
+    bucket = FakeBucket(keys, args.page_latency_ms / 1000.0)
+    t0 = time.time()
+    prunedResult = list(ks_S3Extract.iter_Keys_Within_DateRange(bucket, prefix, startDateTime, endDateTime, regExp_Pattern, date_Format))
+    print("date pruned listing: %8.3f s, %5d pages, %d keys in window" % (time.time() - t0, bucket.pages_fetched, len(prunedResult)))
+    print("same result: %s" % (prunedResult == legacyResult))
+
+
+if __name__ == '__main__':
+    main()
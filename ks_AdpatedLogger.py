@@ -15,7 +15,15 @@
 
 
 # And the logger needs these..
+import atexit
+import json
 import os
+import re
+import shutil
+import sys
+import threading
+import time
+from collections import deque
 
 from datetime import datetime, timedelta
 
@@ -23,6 +31,39 @@ import logging
 from logging.handlers import RotatingFileHandler
 
 
+# Extension of the structured records file, written next to the debug log as <basename>_records_<date>.jsonl
+RECORDS_FILE_EXTN = "jsonl"
+
+# Stage of a log message, from the prefix of the function name it starts with ("Extract_Do_Extract_FTP: ...")
+STAGE_BY_FUNCTION_PREFIX = [("PreETL_", "PreETL"), ("Extract_", "Extract"), ("Transform_", "Transform"), ("Load_", "Load"), ("load_", "Load"), ("Pipeline_", "Pipeline"), ("PostETL_", "PostETL"), ("main", "main")]
+
+# Text of a value for a record.  Byte strings are decoded as UTF-8 with replacement characters, the arcpy, ftplib
+#   and OS messages on Windows are cp1252 and must not stop the logging.
+def _getRecordText(theValue):
+    if isinstance(theValue, unicode):
+        return theValue
+    if not isinstance(theValue, str):
+        try:
+            theValue = str(theValue)
+        except:
+            theValue = repr(theValue)
+    return theValue.decode("utf-8", "replace")
+
+# A record with every byte string (and dict key) made text, so json.dumps can not fail on it
+def _getRecordValue(theValue):
+    if isinstance(theValue, basestring):
+        return _getRecordText(theValue)
+    if isinstance(theValue, dict):
+        return dict([(_getRecordText(theKey), _getRecordValue(theItem)) for theKey, theItem in theValue.items()])
+    if isinstance(theValue, (list, tuple)):
+        return [_getRecordValue(theItem) for theItem in theValue]
+    return theValue
+
+# flush() and close() check this often that the writer thread is still running while they wait for it
+WRITER_WAIT_SECONDS = 1.0
+
+_FUNCTION_NAME_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_.]*$")
+
 
 
 
@@ -40,6 +81,20 @@ class ETLDebugLogger(object):
                 'log_datetime_format' <str>: datetime format for debug logs
                 'log_file_extn' <str>: extension of debug logs
                 'debug_log_archive_days' <int>: number of days to keep debug logs
+                'is_date_partitioned' <bool>: True writes the files of each day into a subfolder of debug_log_dir named
+                    by the date (log_datetime_format), so old days are removed a folder at a time, default False
+                'max_total_log_bytes' <int>: the oldest day folders are removed until the ones left add up to no more
+                    than this (the folder of the current day is always kept), 0 means no size limit, default 0
+                'is_background_sweep' <bool>: True makes deleteOutdatedDebugLogs do its work in a background thread, default False
+                'is_async' <bool>: True queues each message and a writer thread writes them in batches (python 2 has
+                    no QueueHandler / QueueListener), False writes each message before returning, default False
+                'is_console_echo' <bool>: False only writes to the log file (no print), default True
+                'max_batch_size' <int>: max messages per file write in the async mode, default 512
+                'flush_interval_seconds' <float>: the writer thread wakes up at least this often, or as soon as
+                    max_batch_size messages are waiting, default 0.2
+                'is_structured' <bool>: True also writes a JSON lines file of records next to the debug log, one per
+                    message ('type' "message" with its 'function' and 'stage') and one per updateDebugRecord call, default False
+                'run_id' <str>: id written on every record, defaults to the time the logger was made
 
         fields:
 
@@ -48,16 +103,35 @@ class ETLDebugLogger(object):
             debug_log_archive_days: see above
             debug_log_name <str>: the full name of the debug logs
             debug_log_dir: see above
+            partition_dir <str>: folder the files of this logger are written to (debug_log_dir, or its subfolder for
+                today when is_date_partitioned), other per day output (like the metrics) can go there too
+            last_sweep_result <dict>: {'Partitions_Removed', 'Files_Removed', 'Bytes_Removed', 'Seconds'} of the last
+                finished deleteOutdatedDebugLogs, None until one finished
             debug_logger <object>: logging object reference
+            is_async, is_console_echo, is_structured, run_id: see above
+            records_file_path <str>: the full path of the JSON lines file of records
 
         public interface:
 
             updateDebugLog(*args) <void>: accepts variable arguments and both prints to the screen and logs them to a file
-            deleteOutdatedDebugLogs() <void>: deletes all debug logs outside a given archive datetime range
+            updateDebugRecord(theRecord) <void>: writes a {str: value} dict as one JSON line of the records file, with
+                'ts' (UTC ISO time) and 'run' added (does nothing unless is_structured)
+            flush() <void>: waits until every queued message is written (async mode)
+            close() <void>: writes what is queued and stops the writer thread, later messages are written directly
+                (called at exit in the async mode)
+            deleteOutdatedDebugLogs() <void>: deletes the day folders (and debug logs from before the folders were used)
+                outside the archive range, then the oldest day folders over max_total_log_bytes.  Only the names in
+                debug_log_dir are read (names which are not dates are left alone), and the sizes of the day folders
+                that are kept, so the time it takes depends on the days kept, not on how many logs were ever written.
 
         private methods:
 
             _getDebugLogger(logger_name) <logger>: retrieves or creates a logging object from the given logger_name
+            _writeQueuedLogs() <void>: the writer thread of the async mode
+            _formatRecordLine(created, theRecord) <str>: JSON line of a record
+            _getMessageRecord(args) <dict>: record of a message
+            _writeRecordLinesSafely(getRecordLines) <void>: writes records in the synchronous mode, never raises
+            _sweepOutdatedDebugLogs() <void>: does the work of deleteOutdatedDebugLogs
     """
 
     def __init__(self, debug_log_dir, debug_log_basename, debug_log_options):
@@ -65,41 +139,306 @@ class ETLDebugLogger(object):
         self.log_datetime_format = debug_log_options.get('log_datetime_format','%Y-%m-%d')
         self.log_file_extn = debug_log_options.get('log_file_extn','log')
         self.debug_log_archive_days = debug_log_options.get('debug_log_archive_days', 0)
+        self.is_date_partitioned = debug_log_options.get('is_date_partitioned', False)
+        self.max_total_log_bytes = debug_log_options.get('max_total_log_bytes', 0)
+        self.is_background_sweep = debug_log_options.get('is_background_sweep', False)
+        self.is_async = debug_log_options.get('is_async', False)
+        self.is_console_echo = debug_log_options.get('is_console_echo', True)
+        self.max_batch_size = debug_log_options.get('max_batch_size', 512)
+        self.flush_interval_seconds = debug_log_options.get('flush_interval_seconds', 0.2)
+        self.is_structured = debug_log_options.get('is_structured', False)
+        self.run_id = debug_log_options.get('run_id', datetime.strftime(datetime.now(), '%Y%m%dT%H%M%S'))
 
         log_datetime_string = datetime.strftime(datetime.now(), self.log_datetime_format)
         self.debug_log_name =  "%s_%s.%s" % (debug_log_basename, log_datetime_string, self.log_file_extn)
         self.debug_log_dir = debug_log_dir
+        self.partition_dir = debug_log_dir
+        if self.is_date_partitioned:
+            self.partition_dir = os.path.join(debug_log_dir, log_datetime_string)
+        self.records_file_path = os.path.join(self.partition_dir, "%s_records_%s.%s" % (debug_log_basename, log_datetime_string, RECORDS_FILE_EXTN))
+        self.last_sweep_result = None
+        self._sweep_thread = None
 
-        if not os.path.isdir(debug_log_dir):
-            os.makedirs(debug_log_dir)
+        if not os.path.isdir(self.partition_dir):
+            os.makedirs(self.partition_dir)
 
         self.debug_logger = self._getDebugLogger(debug_log_basename)
 
+        # Records file, the lock is only taken by the synchronous mode (the writer thread is the only writer in the async mode)
+        self._records_file = None
+        self._records_lock = threading.Lock()
+        if self.is_structured:
+            self._records_file = open(self.records_file_path, "a")
+
+        # Async mode, a deque append is atomic so queueing a message takes no lock
+        self._queue = None
+        self._wake_writer = threading.Event()
+        self._writer_thread = None
+        # asctime text of the last second formatted by the writer thread, (int seconds, text)
+        self._asctime = (None, "")
+        if self.is_async:
+            self._queue = deque()
+            self._writer_thread = threading.Thread(target=self._writeQueuedLogs, name="ETLDebugLogger")
+            self._writer_thread.daemon = True
+            self._writer_thread.start()
+            atexit.register(self.close)
+
     def _getDebugLogger(self, logger_name):
 
-        txt_handler = RotatingFileHandler(os.path.join(self.debug_log_dir, self.debug_log_name))
+        txt_handler = RotatingFileHandler(os.path.join(self.partition_dir, self.debug_log_name))
         txt_handler.setFormatter(logging.Formatter("%(asctime)s: %(message)s"))
         logger = logging.getLogger(logger_name)
         logger.setLevel(logging.DEBUG)
         logger.addHandler(txt_handler)
+        self._txt_handler = txt_handler
 
         return logger
 
     def updateDebugLog(self, *args):
 
-        print args
+        # The caller only pays for the append, the text is built (and printed) by the writer thread
+        theQueue = self._queue
+        if theQueue != None:
+            theQueue.append((time.time(), args))
+            if len(theQueue) >= self.max_batch_size:
+                self._wake_writer.set()
+            return
+
+        if self.is_console_echo:
+            print args
         self.debug_logger.debug(str(args))
+        if self.is_structured:
+            self._writeRecordLinesSafely(lambda: [self._formatRecordLine(time.time(), self._getMessageRecord(args))])
+
+    def updateDebugRecord(self, theRecord):
+
+        if not self.is_structured:
+            return
+        theQueue = self._queue
+        if theQueue != None:
+            theQueue.append((time.time(), theRecord))
+            if len(theQueue) >= self.max_batch_size:
+                self._wake_writer.set()
+            return
+        self._writeRecordLinesSafely(lambda: [self._formatRecordLine(time.time(), theRecord)])
+
+    # {'type': "message", 'function', 'stage', 'msg'}, the function is the name the message starts with (if it does)
+    def _getMessageRecord(self, args):
+
+        theMsg = u" ".join([_getRecordText(arg) for arg in args])
+        functionName = None
+        stageName = None
+        msgParts = theMsg.split(":", 1)
+        if len(msgParts) == 2 and _FUNCTION_NAME_PATTERN.match(msgParts[0]):
+            functionName = msgParts[0]
+            for functionPrefix, prefixStage in STAGE_BY_FUNCTION_PREFIX:
+                if functionName.startswith(functionPrefix):
+                    stageName = prefixStage
+                    break
+        return {'type': "message", 'function': functionName, 'stage': stageName, 'msg': theMsg}
+
+    def _formatRecordLine(self, created, theRecord):
+
+        theRecord = _getRecordValue(theRecord)
+        theRecord['ts'] = datetime.utcfromtimestamp(created).isoformat() + "Z"
+        theRecord['run'] = self.run_id
+        return json.dumps(theRecord, sort_keys=True, default=_getRecordText)
+
+    def _writeRecordLines(self, recordLines):
+
+        with self._records_lock:
+            if self._records_file != None:
+                self._records_file.write("\n".join(recordLines) + "\n")
+                self._records_file.flush()
+
+    # The synchronous mode, a record which can not be written is reported on the console and does not reach the caller
+    def _writeRecordLinesSafely(self, getRecordLines):
+
+        try:
+            self._writeRecordLines(getRecordLines())
+        except:
+            e = sys.exc_info()[1]
+            print "ETLDebugLogger: ERROR, a log record could not be written, ERROR MESSAGE: " + repr(e)
+
+    # Same text as the "%(asctime)s: %(message)s" formatter, the date part is only formatted once per second
+    def _formatLogLine(self, created, theMsg):
+
+        seconds = int(created)
+        if self._asctime[0] != seconds:
+            self._asctime = (seconds, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created)))
+        return "%s,%03d: %s" % (self._asctime[1], (created - seconds) * 1000, theMsg)
+
+    def _writeQueuedLogs(self):
+
+        theQueue = self._queue
+        isStopping = False
+        while not isStopping:
+            if len(theQueue) == 0:
+                self._wake_writer.wait(self.flush_interval_seconds)
+                self._wake_writer.clear()
+
+            theLines = []
+            recordLines = []
+            theFlushEvents = []
+            while len(theLines) + len(recordLines) < self.max_batch_size and len(theQueue) > 0:
+                theItem = theQueue.popleft()
+                if theItem == None:
+                    isStopping = True
+                    break
+                if isinstance(theItem, threading._Event):
+                    theFlushEvents.append(theItem)
+                    continue
+                # An item which can not be formatted is dropped (with a line saying so), the thread has to keep going
+                #   or every later message would stay queued and flush() would wait for ever
+                try:
+                    created, args = theItem
+                    if isinstance(args, dict):
+                        recordLines.append(self._formatRecordLine(created, args))
+                        continue
+                    if self.is_console_echo:
+                        print args
+                    theLines.append(self._formatLogLine(created, str(args)))
+                    if self.is_structured:
+                        recordLines.append(self._formatRecordLine(created, self._getMessageRecord(args)))
+                except:
+                    e = sys.exc_info()[1]
+                    theLines.append(self._formatLogLine(time.time(), "ETLDebugLogger: ERROR, a queued log item could not be written and was dropped, ERROR MESSAGE: " + repr(e)))
+
+            # One write and one flush for the whole batch
+            try:
+                if len(theLines) > 0:
+                    self._txt_handler.acquire()
+                    try:
+                        if self._txt_handler.stream == None:
+                            self._txt_handler.stream = self._txt_handler._open()
+                        self._txt_handler.stream.write("\n".join(theLines) + "\n")
+                        self._txt_handler.flush()
+                    finally:
+                        self._txt_handler.release()
+                if len(recordLines) > 0:
+                    self._writeRecordLines(recordLines)
+            except:
+                e = sys.exc_info()[1]
+                print "ETLDebugLogger: ERROR, a batch of " + str(len(theLines) + len(recordLines)) + " log lines could not be written and was dropped, ERROR MESSAGE: " + repr(e)
+            for theFlushEvent in theFlushEvents:
+                theFlushEvent.set()
+
+    def flush(self):
+
+        theQueue = self._queue
+        if theQueue == None:
+            return
+        # Set by the writer thread once everything queued before it is written (no waiting on a writer thread which is gone)
+        theFlushEvent = threading.Event()
+        theQueue.append(theFlushEvent)
+        self._wake_writer.set()
+        while not theFlushEvent.is_set() and self._writer_thread.is_alive():
+            theFlushEvent.wait(WRITER_WAIT_SECONDS)
+
+    def close(self):
+
+        theQueue = self._queue
+        if theQueue == None:
+            return
+        theQueue.append(None)
+        self._wake_writer.set()
+        self._writer_thread.join()
+        self._queue = None
 
     def deleteOutdatedDebugLogs(self):
 
-        debug_log_archive_days = self.debug_log_archive_days
+        if not self.is_background_sweep:
+            self._sweepOutdatedDebugLogs()
+            return
+        if self._sweep_thread != None and self._sweep_thread.is_alive():
+            return
+        self._sweep_thread = threading.Thread(target=self._sweepOutdatedDebugLogs, name="ETLDebugLogger_Sweep")
+        self._sweep_thread.daemon = True
+        self._sweep_thread.start()
+
+    # Date of a day folder (the whole name is the date) or of a log file (the last '_' part of its name), None if it is not one
+    def _getDebugLogDatetime(self, theName, isPartition):
+
+        if not isPartition:
+            theName = theName.split("_")[-1].split(".")[0]
+        try:
+            return datetime.strptime(theName, self.log_datetime_format)
+        except ValueError:
+            return None
+
+    def _sweepOutdatedDebugLogs(self):
+
+        timeStart = time.time()
+        theResult = {'Partitions_Removed': 0, 'Files_Removed': 0, 'Bytes_Removed': 0, 'Seconds': 0.0}
+        debug_log_archive_days = int(self.debug_log_archive_days)
         current_datetime = datetime.now()
-        isOutsideArchiveRange = lambda d:(current_datetime - d).days > int(debug_log_archive_days)
-        getDebugLogDatetime = lambda d:datetime.strptime(os.path.basename(d).split("_")[-1].split(".")[0], self.log_datetime_format)
-        hasArchiveRangeAndDirectory = debug_log_archive_days > 0 and os.path.isdir(self.debug_log_dir)
-
-        if hasArchiveRangeAndDirectory:
-            current_debug_logs = [d for d in os.listdir(self.debug_log_dir) if d.endswith(self.log_file_extn)]
-            for debug_log in current_debug_logs:
-                if isOutsideArchiveRange(getDebugLogDatetime(debug_log)):
-                    os.remove(os.path.join(self.debug_log_dir, debug_log))
\ No newline at end of file
+        isOutsideArchiveRange = lambda d:debug_log_archive_days > 0 and (current_datetime - d).days > debug_log_archive_days
+
+        try:
+            theNames = os.listdir(self.debug_log_dir)
+        except OSError:
+            theNames = []
+
+        # [(datetime, path)] of the day folders which are kept
+        keptPartitions = []
+        for theName in theNames:
+            thePath = os.path.join(self.debug_log_dir, theName)
+            isPartition = os.path.isdir(thePath)
+            if isPartition:
+                if not self.is_date_partitioned or thePath == self.partition_dir:
+                    continue
+            elif not (theName.endswith(self.log_file_extn) or theName.endswith(RECORDS_FILE_EXTN)):
+                continue
+            theDatetime = self._getDebugLogDatetime(theName, isPartition)
+            if theDatetime == None:
+                continue
+            if isPartition:
+                if isOutsideArchiveRange(theDatetime):
+                    theResult['Bytes_Removed'] += self._removePartition(thePath)
+                    theResult['Partitions_Removed'] += 1
+                else:
+                    keptPartitions.append((theDatetime, thePath))
+            elif isOutsideArchiveRange(theDatetime):
+                # A debug log written before the day folders were used
+                try:
+                    theSize = os.path.getsize(thePath)
+                    os.remove(thePath)
+                    theResult['Files_Removed'] += 1
+                    theResult['Bytes_Removed'] += theSize
+                except OSError:
+                    pass
+
+        # Newest first, everything past the size limit goes
+        if self.max_total_log_bytes > 0:
+            totalBytes = self._getPartitionSize(self.partition_dir)
+            for theDatetime, thePath in sorted(keptPartitions, reverse=True):
+                partitionBytes = self._getPartitionSize(thePath)
+                totalBytes += partitionBytes
+                if totalBytes > self.max_total_log_bytes:
+                    self._removePartition(thePath)
+                    theResult['Partitions_Removed'] += 1
+                    theResult['Bytes_Removed'] += partitionBytes
+                    totalBytes -= partitionBytes
+
+        theResult['Seconds'] = time.time() - timeStart
+        self.last_sweep_result = theResult
+        if theResult['Partitions_Removed'] > 0 or theResult['Files_Removed'] > 0:
+            self.updateDebugLog("ETLDebugLogger: Removed %d old log folders and %d old log files (%d bytes)" % (theResult['Partitions_Removed'], theResult['Files_Removed'], theResult['Bytes_Removed']))
+
+    def _getPartitionSize(self, partitionPath):
+
+        theSize = 0
+        for dirPath, dirNames, fileNames in os.walk(partitionPath):
+            for fileName in fileNames:
+                try:
+                    theSize += os.path.getsize(os.path.join(dirPath, fileName))
+                except OSError:
+                    pass
+        return theSize
+
+    # Removes a day folder, returns its size
+    def _removePartition(self, partitionPath):
+
+        theSize = self._getPartitionSize(partitionPath)
+        shutil.rmtree(partitionPath, True)
+        return theSize
\ No newline at end of file
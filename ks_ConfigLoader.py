@@ -15,6 +15,16 @@
 #import xml.etree.cElementTree as et
 
 
+import datetime
+import difflib
+import hashlib
+import os
+import sys
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
 # http://code.activestate.com/recipes/410469-xml-as-dictionary/  # START
 import xml.etree.cElementTree as ElementTree
 
@@ -123,4 +133,301 @@ class ks_ConfigLoader(object):
 
     def get_ETL_Settings(self):
         GlobalSettings = self.get_GlobalSettings()
-        return GlobalSettings['ETL_Settings']
\ No newline at end of file
+        return GlobalSettings['ETL_Settings']
+
+
+#-------------------------------------------------------------------------------
+# Typed settings
+#   Every setting a script reads is declared once (Setting), the XML is checked
+#   against those declarations and each value converted to its type when the
+#   file is loaded.  A setting which is not declared (a typo), a missing required
+#   setting or a value which does not convert stops the load with a
+#   ConfigSchemaError listing all of them, before the script does anything else.
+#   The converted values are kept in a pickle next to the config file, keyed on
+#   its modified time and size, so a start with an unchanged file does not parse
+#   the XML again.
+#-------------------------------------------------------------------------------
+
+# Bump when the converted values change shape, so older cache files are not used
+COMPILED_CACHE_VERSION = 1
+
+# Suffix of the cache file, '<config file name without extension>_compiled.pkl'
+COMPILED_CACHE_SUFFIX = "_compiled.pkl"
+
+# Element holding the settings, below the root element of the config file
+SETTINGS_ELEMENT_PATH = "ConfigObjectCollection/ConfigObject"
+
+# Units an interval ("90 days") can be in, singular or plural
+INTERVAL_UNITS = ["weeks", "days", "hours", "minutes", "seconds"]
+
+# Compiled values already loaded by this process, by cache key
+g_CompiledSettings = {}
+
+# (schema, settings class, schema hash) of the schemas loaded by this process, by id of the schema list
+g_SchemaInfo = {}
+
+
+class ConfigSchemaError(Exception):
+    '''
+        Raised when a config file does not match its schema.
+        ConfigSchemaError.errors    list of the problems found (one string each)
+    '''
+    def __init__(self, pathToConfigFile, theErrors):
+        self.errors = list(theErrors)
+        Exception.__init__(self, "Config file " + str(pathToConfigFile) + " has " + str(len(self.errors)) + " error(s):\n    " + "\n    ".join(self.errors))
+
+
+class Setting(object):
+    '''
+        Declares one setting of a config file.
+        name        element name in the config file (and the attribute name on the settings object)
+        kind        "str", "int", "float", "bool" ("0"/"1"), "interval" ("90 days", a datetime.timedelta),
+                    "path" (environment variables and ~ expanded) or "item_list" (see fields)
+        default     value (already of the kind) when the element is missing or empty
+        isRequired  True if the element has to be in the config file with a value
+        choices     for "str", the values allowed (compared and returned in lower case)
+        fields      for "item_list", {field name: None for a text field, or a tuple of the field names of a
+                    nested list}.  Each child element is an item, returned as a dict of its fields, nested
+                    lists as lists of dicts even when they have only one entry.
+    '''
+    __slots__ = ("name", "kind", "default", "isRequired", "choices", "fields")
+
+    def __init__(self, name, kind="str", default=None, isRequired=False, choices=None, fields=None):
+        if not kind in SETTING_CONVERTERS:
+            raise ValueError("Unknown setting kind '" + str(kind) + "' for setting " + str(name))
+        self.name = name
+        self.kind = kind
+        self.default = default
+        self.isRequired = isRequired
+        self.choices = choices
+        self.fields = fields
+
+    def __repr__(self):
+        return "Setting(%r, %r, %r, %r, %r, %r)" % (self.name, self.kind, self.default, self.isRequired, self.choices, sorted((self.fields or {}).items()))
+
+
+class TypedSettings(object):
+    '''
+        Read only settings object, one attribute per Setting of the schema (the classes are made by
+        make_Settings_Class).  Reading a setting which is not declared raises AttributeError, and so does
+        setting any attribute.
+    '''
+    __slots__ = ()
+
+    def __init__(self, theValues):
+        for theName in self.__slots__:
+            object.__setattr__(self, theName, theValues[theName])
+
+    def __setattr__(self, theName, theValue):
+        raise AttributeError("Settings are read only, can not set '" + str(theName) + "'")
+
+    def __delattr__(self, theName):
+        raise AttributeError("Settings are read only, can not delete '" + str(theName) + "'")
+
+    # All the settings in a new dict
+    def as_Dict(self):
+        return dict([(theName, getattr(self, theName)) for theName in self.__slots__])
+
+    def __repr__(self):
+        return repr(self.as_Dict())
+
+
+# Settings class (a TypedSettings with __slots__ of the setting names) for a schema
+def make_Settings_Class(theSchema, className="Settings"):
+    return type(className, (TypedSettings,), {'__slots__': tuple([theSetting.name for theSetting in theSchema])})
+
+
+# Text of an element, None when it is missing or only whitespace
+def _get_Text(theElement):
+    if theElement == None or theElement.text == None:
+        return None
+    theText = theElement.text.strip()
+    if theText == "":
+        return None
+    return theText
+
+def _convert_Str(theElement, theSetting):
+    theText = _get_Text(theElement)
+    if theSetting.choices != None:
+        theText = theText.lower()
+        if not theText in theSetting.choices:
+            raise ValueError("'" + theText + "' is not one of " + ", ".join(theSetting.choices))
+    return theText
+
+def _convert_Int(theElement, theSetting):
+    return int(_get_Text(theElement))
+
+def _convert_Float(theElement, theSetting):
+    return float(_get_Text(theElement))
+
+def _convert_Bool(theElement, theSetting):
+    theText = _get_Text(theElement)
+    if not theText in ("0", "1"):
+        raise ValueError("'" + theText + "' is not 0 or 1")
+    return theText == "1"
+
+def _convert_Interval(theElement, theSetting):
+    theText = _get_Text(theElement)
+    theParts = theText.split()
+    if len(theParts) != 2:
+        raise ValueError("'" + theText + "' is not a number and a unit, like '90 days'")
+    theUnit = theParts[1].lower()
+    if not theUnit.endswith("s"):
+        theUnit += "s"
+    if not theUnit in INTERVAL_UNITS:
+        raise ValueError("'" + theParts[1] + "' is not one of " + ", ".join(INTERVAL_UNITS))
+    return datetime.timedelta(**{theUnit: int(theParts[0])})
+
+def _convert_Path(theElement, theSetting):
+    return os.path.expanduser(os.path.expandvars(_get_Text(theElement)))
+
+def _convert_Item_List(theElement, theSetting):
+    theItems = []
+    for itemElement in theElement:
+        theItem = {}
+        for fieldElement in itemElement:
+            fieldName = fieldElement.tag
+            if not fieldName in theSetting.fields:
+                raise ValueError(_get_Unknown_Name_Message(fieldName, theSetting.fields.keys(), itemElement.tag + " field"))
+            subFieldNames = theSetting.fields[fieldName]
+            if subFieldNames == None:
+                theItem[fieldName] = fieldElement.text
+                continue
+            theSubItem = {}
+            for subFieldElement in fieldElement:
+                if not subFieldElement.tag in subFieldNames:
+                    raise ValueError(_get_Unknown_Name_Message(subFieldElement.tag, subFieldNames, fieldName + " field"))
+                theSubItem[subFieldElement.tag] = subFieldElement.text
+            theItem.setdefault(fieldName, []).append(theSubItem)
+        missingFields = [fieldName for fieldName in sorted(theSetting.fields.keys()) if not fieldName in theItem]
+        if len(missingFields) > 0:
+            raise ValueError(itemElement.tag + " " + str(len(theItems) + 1) + " is missing " + ", ".join(missingFields))
+        theItems.append(theItem)
+    if len(theItems) == 0:
+        return None
+    return theItems
+
+SETTING_CONVERTERS = {
+    "str": _convert_Str,
+    "int": _convert_Int,
+    "float": _convert_Float,
+    "bool": _convert_Bool,
+    "interval": _convert_Interval,
+    "path": _convert_Path,
+    "item_list": _convert_Item_List
+}
+
+
+def _get_Unknown_Name_Message(theName, knownNames, whatItIs="setting"):
+    closeNames = difflib.get_close_matches(theName, list(knownNames), 3)
+    if len(closeNames) > 0:
+        return "unknown " + whatItIs + " '" + theName + "' (did you mean " + " or ".join(["'" + closeName + "'" for closeName in closeNames]) + "?)"
+    return "unknown " + whatItIs + " '" + theName + "'"
+
+
+# Converts the children of 'settingsElement' by the schema, returns {name: value} or raises ConfigSchemaError with every problem found
+def compile_Settings(settingsElement, theSchema, pathToConfigFile):
+    settingsByName = dict([(theSetting.name, theSetting) for theSetting in theSchema])
+    theErrors = []
+    elementsByName = {}
+    for theElement in settingsElement:
+        if not theElement.tag in settingsByName:
+            theErrors.append(_get_Unknown_Name_Message(theElement.tag, settingsByName.keys()))
+        elif theElement.tag in elementsByName:
+            theErrors.append("setting '" + theElement.tag + "' is set more than once")
+        else:
+            elementsByName[theElement.tag] = theElement
+
+    theValues = {}
+    for theSetting in theSchema:
+        theElement = elementsByName.get(theSetting.name)
+        theValue = None
+        if theElement != None and (len(theElement) > 0 or _get_Text(theElement) != None):
+            try:
+                theValue = SETTING_CONVERTERS[theSetting.kind](theElement, theSetting)
+            except:
+                e = sys.exc_info()[1]
+                theErrors.append("setting '" + theSetting.name + "': " + str(e))
+                continue
+        if theValue == None:
+            if theSetting.isRequired:
+                theErrors.append("setting '" + theSetting.name + "' is required")
+                continue
+            theValue = theSetting.default
+        theValues[theSetting.name] = theValue
+
+    if len(theErrors) > 0:
+        raise ConfigSchemaError(pathToConfigFile, theErrors)
+    return theValues
+
+
+# Settings class and hash of a schema, made once per schema list
+def _get_Schema_Info(theSchema):
+    schemaInfo = g_SchemaInfo.get(id(theSchema))
+    if schemaInfo == None or not schemaInfo[0] is theSchema:
+        schemaInfo = (theSchema, make_Settings_Class(theSchema), hashlib.md5(repr(list(theSchema)).encode("utf-8")).hexdigest())
+        g_SchemaInfo[id(theSchema)] = schemaInfo
+    return schemaInfo
+
+# Key of the compiled values of a config file, changes with the file (modified time, size) and the schema
+def get_Compiled_Cache_Key(pathToConfigFile, theSchema):
+    theStat = os.stat(pathToConfigFile)
+    return (COMPILED_CACHE_VERSION, os.path.abspath(pathToConfigFile), theStat.st_mtime, theStat.st_size, _get_Schema_Info(theSchema)[2])
+
+def get_Compiled_Cache_Path(pathToConfigFile):
+    return os.path.splitext(pathToConfigFile)[0] + COMPILED_CACHE_SUFFIX
+
+def _read_Compiled_Cache(cacheFilePath, cacheKey):
+    try:
+        with open(cacheFilePath, "rb") as f:
+            theCache = pickle.load(f)
+        if theCache.get('Key') == cacheKey:
+            return theCache['Values']
+    except:
+        pass
+    return None
+
+# The cache is only a shortcut, a folder which can not be written to just means the XML is parsed on every start
+def _write_Compiled_Cache(cacheFilePath, cacheKey, theValues):
+    tempFilePath = cacheFilePath + "." + str(os.getpid()) + ".tmp"
+    try:
+        with open(tempFilePath, "wb") as f:
+            pickle.dump({'Key': cacheKey, 'Values': theValues}, f, pickle.HIGHEST_PROTOCOL)
+        try:
+            os.rename(tempFilePath, cacheFilePath)
+        except OSError:
+            if os.path.exists(cacheFilePath):
+                os.remove(cacheFilePath)
+            os.rename(tempFilePath, cacheFilePath)
+    except:
+        try:
+            os.remove(tempFilePath)
+        except:
+            pass
+
+
+def load_Typed_Settings(pathToConfigFile, theSchema, isUseCache=True):
+    '''
+        pathToConfigFile <str>: config xml file, the settings are the children of SETTINGS_ELEMENT_PATH
+        theSchema <list>: Setting objects, one for every element the settings may have
+        isUseCache <bool>: use (and write) the compiled values cached next to the config file
+
+        Returns a read only settings object (see make_Settings_Class) with one attribute per Setting.
+        Raises ConfigSchemaError if the file does not match the schema, IOError if it can not be read
+        and SyntaxError if it is not well formed XML.
+    '''
+    settingsClass = _get_Schema_Info(theSchema)[1]
+    cacheKey = get_Compiled_Cache_Key(pathToConfigFile, theSchema)
+    theValues = g_CompiledSettings.get(cacheKey)
+    cacheFilePath = get_Compiled_Cache_Path(pathToConfigFile)
+    if theValues == None and isUseCache:
+        theValues = _read_Compiled_Cache(cacheFilePath, cacheKey)
+    if theValues == None:
+        settingsElement = ElementTree.parse(pathToConfigFile).getroot().find(SETTINGS_ELEMENT_PATH)
+        if settingsElement == None:
+            raise ConfigSchemaError(pathToConfigFile, ["no " + SETTINGS_ELEMENT_PATH + " element"])
+        theValues = compile_Settings(settingsElement, theSchema, pathToConfigFile)
+        if isUseCache:
+            _write_Compiled_Cache(cacheFilePath, cacheKey, theValues)
+    g_CompiledSettings[cacheKey] = theValues
+    return settingsClass(theValues)
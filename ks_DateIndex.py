@@ -0,0 +1,180 @@
+#-------------------------------------------------------------------------------
+# Name:        ks_DateIndex.py
+# Purpose:     Dates parsed from file names (granules, rasters, S3 keys).  The
+#               RegEx_DateFilterString pattern is compiled once, '%Y%m%d%H'
+#               dates are parsed by slicing instead of strptime, and results
+#               are kept in a bounded cache (least recently used names go
+#               first) shared by every ETL stage (the same names are parsed
+#               during Extract, Load and the cleanup).
+#               Listings (a folder, an S3 prefix) can be sorted by date once
+#               and then queried for a date range with binary searches.
+#
+# Author:      SERVIR ETL
+#
+# Created:     10/18/2026 (mm/dd/yyyy)
+# Copyright:   (c) SERVIR 2026
+# Licence:     <your licence>
+#
+#-------------------------------------------------------------------------------
+
+import bisect
+import datetime
+import re
+import threading
+
+
+# Default number of names kept in each index
+DEFAULT_MAX_ENTRIES = 65536
+
+# The only format with a fast parser, anything else goes through strptime
+FIXED_WIDTH_FORMAT = "%Y%m%d%H"
+
+
+# '%Y%m%d%H' DateString to datetime without strptime.  Raises ValueError for a bad date, like strptime does.
+def parse_Fixed_Width_DateString(dateString):
+    if len(dateString) != 10 or not dateString.isdigit():
+        raise ValueError("time data " + repr(dateString) + " does not match format '" + FIXED_WIDTH_FORMAT + "'")
+    return datetime.datetime(int(dateString[0:4]), int(dateString[4:6]), int(dateString[6:8]), int(dateString[8:10]))
+
+# Returns a function which turns a DateString in 'date_Format' into a datetime
+def get_DateString_Parser(date_Format):
+    if date_Format == FIXED_WIDTH_FORMAT:
+        return parse_Fixed_Width_DateString
+    return lambda dateString: datetime.datetime.strptime(dateString, date_Format)
+
+
+class FilenameDateIndex(object):
+    '''
+        FilenameDateIndex(regExp_Pattern, date_Format, maxEntries)
+
+        FilenameDateIndex.get_DateString(name)          First match of the pattern in 'name', or None
+        FilenameDateIndex.get_DateTime(name)            That match as a datetime (date_Format), or None if there is no match or it is not a valid date
+        FilenameDateIndex.parse_DateTime(name)          Same as get_DateTime but nothing is cached (for long listings where each name is seen once)
+        FilenameDateIndex.get_Stats()                   {'Hits', 'Misses', 'Entries'}
+
+        date_Format can be None when only DateStrings are needed.
+        At most maxEntries names are kept, in two generations of plain dicts (an OrderedDict is pure python, and slower than
+        parsing, on python 2).  A name used again moves to the newest generation, when the newest generation is full the
+        oldest one (names not used since) is dropped.  Safe to call from more than one thread.
+    '''
+    def __init__(self, regExp_Pattern, date_Format=None, maxEntries=DEFAULT_MAX_ENTRIES):
+        self.regExp_Pattern = regExp_Pattern
+        self.date_Format = date_Format
+        self.maxEntries = maxEntries
+        self._compiled_RegExp = re.compile(regExp_Pattern)
+        # Same string re.findall() gave back, the group when the pattern has one
+        self._matchGroup = 1 if self._compiled_RegExp.groups == 1 else 0
+        self._parse_DateString = get_DateString_Parser(date_Format)
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._oldEntries = {}
+        self._generationSize = max(1, maxEntries // 2)
+        # Many names share a date (one granule, several products), {DateString: datetime}
+        self._dateTimes = {}
+        self._hits = 0
+        self._misses = 0
+
+    # Returns (DateString, datetime), either can be None
+    def _parse(self, theName):
+        theMatch = self._compiled_RegExp.search(theName)
+        if theMatch == None:
+            return (None, None)
+        dateString = theMatch.group(self._matchGroup)
+        if self.date_Format == None:
+            return (dateString, None)
+        theDateTime = self._dateTimes.get(dateString)
+        if theDateTime == None:
+            try:
+                theDateTime = self._parse_DateString(dateString)
+            except ValueError:
+                return (dateString, None)
+            if len(self._dateTimes) >= self.maxEntries:
+                self._dateTimes.clear()
+            self._dateTimes[dateString] = theDateTime
+        return (dateString, theDateTime)
+
+    def _get_Entry(self, theName):
+        # A single dict lookup is atomic, the newest generation is read without the lock
+        theEntry = self._entries.get(theName)
+        if theEntry != None:
+            self._hits += 1
+            return theEntry
+        with self._lock:
+            theEntry = self._oldEntries.pop(theName, None)
+            if theEntry != None:
+                self._hits += 1
+            else:
+                theEntry = self._parse(theName)
+                self._misses += 1
+            if len(self._entries) >= self._generationSize:
+                self._oldEntries = self._entries
+                self._entries = {}
+            self._entries[theName] = theEntry
+        return theEntry
+
+    def get_DateString(self, theName):
+        return self._get_Entry(theName)[0]
+
+    def get_DateTime(self, theName):
+        return self._get_Entry(theName)[1]
+
+    def parse_DateTime(self, theName):
+        return self._parse(theName)[1]
+
+    def get_Stats(self):
+        with self._lock:
+            return {'Hits': self._hits, 'Misses': self._misses, 'Entries': len(self._entries) + len(self._oldEntries)}
+
+
+class DateSortedListing(object):
+    '''
+        DateSortedListing(names, dateIndex, isCached)  Sorts a listing by the date in each name (parsed with 'dateIndex', a FilenameDateIndex,
+                                                        isCached=False for long listings where each name is seen once)
+
+        DateSortedListing.iter_Within(start, end)       Names dated after 'start', up to and including 'end', in date order
+        DateSortedListing.iter_Before(cutoff)           Names dated before 'cutoff', in date order
+        DateSortedListing.names_Without_Date            Names with no (valid) date in them, in listing order
+        len(DateSortedListing)                          Number of dated names
+
+        Names with the same date keep their listing order.  Queries are two binary searches, the names are yielded lazily.
+    '''
+    def __init__(self, theNames, dateIndex, isCached=True):
+        get_DateTime = dateIndex.get_DateTime if isCached else dateIndex.parse_DateTime
+        datedNames = []
+        self.names_Without_Date = []
+        for theName in theNames:
+            theDateTime = get_DateTime(theName)
+            if theDateTime == None:
+                self.names_Without_Date.append(theName)
+            else:
+                datedNames.append((theDateTime, len(datedNames), theName))
+        datedNames.sort()
+        self._dateTimes = [d[0] for d in datedNames]
+        self._names = [d[2] for d in datedNames]
+
+    def __len__(self):
+        return len(self._names)
+
+    def _iter_Slice(self, startIdx, endIdx):
+        for i in xrange(startIdx, endIdx):
+            yield self._names[i]
+
+    def iter_Within(self, startDateTime, endDateTime):
+        return self._iter_Slice(bisect.bisect_right(self._dateTimes, startDateTime), bisect.bisect_right(self._dateTimes, endDateTime))
+
+    def iter_Before(self, cutoffDateTime):
+        return self._iter_Slice(0, bisect.bisect_left(self._dateTimes, cutoffDateTime))
+
+
+_g_Indexes = {}
+_g_Indexes_Lock = threading.Lock()
+
+# Returns the index for a pattern and date format, created on first use and shared from then on
+def get_Shared_Index(regExp_Pattern, date_Format=None):
+    theKey = (regExp_Pattern, date_Format)
+    with _g_Indexes_Lock:
+        theIndex = _g_Indexes.get(theKey)
+        if theIndex == None:
+            theIndex = FilenameDateIndex(regExp_Pattern, date_Format)
+            _g_Indexes[theKey] = theIndex
+        return theIndex
@@ -0,0 +1,177 @@
+#-------------------------------------------------------------------------------
+# Name:        ks_ExtractManifest.py
+# Purpose:     Persistent (SQLite) manifest of granules handled by the ETL,
+#               keyed by the granule DateString, so a rerun after a crash only
+#               processes granules that have not made it through the Load step.
+#
+# Author:      SERVIR ETL
+#
+# Created:     10/18/2026 (mm/dd/yyyy)
+# Copyright:   (c) SERVIR 2026
+# Licence:     <your licence>
+#
+#-------------------------------------------------------------------------------
+
+import datetime
+import hashlib
+import os
+import sqlite3
+import threading
+
+
+# Granule states, in the order a granule moves through them.
+STATE_EXTRACT = "Extract"
+STATE_TRANSFORM = "Transform"
+STATE_LOAD = "Load"
+
+
+# Returns the SHA-256 (hex string) of a file, reading it in blocks.
+def get_File_Checksum(theFilePath, blockSize=1048576):
+    theHash = hashlib.sha256()
+    with open(theFilePath, "rb") as f:
+        while True:
+            theBlock = f.read(blockSize)
+            if not theBlock:
+                break
+            theHash.update(theBlock)
+    return theHash.hexdigest()
+
+
+class ExtractManifest(object):
+    '''
+        ExtractManifest.path                              Path to the SQLite file
+        ExtractManifest.get_Granule(ds)                   Row for a DateString as a dict, or None
+        ExtractManifest.is_Loaded(ds)                     True if the granule has reached the Load state
+        ExtractManifest.is_Extracted_File_Reusable(ds,p)  True if 'p' exists and matches the recorded checksum
+        ExtractManifest.is_Remote_File_Unchanged(ds,p,s,m)
+                                                          True if 'p' exists, is 's' bytes and the granule was downloaded when the
+                                                          server listed it with size 's' and modify time 'm' (no checksum needed)
+        ExtractManifest.record_Extract(ds, p, checksum)   Marks a granule as downloaded (remoteSize and remoteModify as listed by the server, if known)
+        ExtractManifest.record_Transform(ds)              Marks a granule as transformed
+        ExtractManifest.record_Load(ds)                   Marks a granule as loaded
+        ExtractManifest.remove_Older_Than(ds)             Drops rows for granules older than a DateString
+        ExtractManifest.demote_Loaded_After(ds)           Moves loaded granules newer than a DateString (all of them for None) back to the
+                                                          Transform state, so they are extracted again, returns how many
+        ExtractManifest.get_High_Water_Mark(name)         DateString of the newest granule loaded into 'name' (a mosaic dataset), or None
+        ExtractManifest.record_High_Water_Mark(name, ds)  Moves the high water mark of 'name' forward to 'ds' (isForced=True also moves it back)
+        ExtractManifest.close()                           Closes the database
+
+        DateStrings are in the '%Y%m%d%H' format so they sort the same way as the dates they represent.
+        All methods are safe to call from more than one thread.
+    '''
+    def __init__(self, pathToManifestFile):
+        self.path = pathToManifestFile
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS granules ("
+                                 "DateString TEXT PRIMARY KEY, "
+                                 "State TEXT NOT NULL, "
+                                 "Checksum TEXT, "
+                                 "Downloaded_FilePath TEXT, "
+                                 "Updated TEXT)")
+        # Columns added after the first manifests were written
+        existingColumns = [row[1] for row in self._connection.execute("PRAGMA table_info(granules)")]
+        for columnName, columnType in [("Remote_Size", "INTEGER"), ("Remote_Modify", "TEXT")]:
+            if not columnName in existingColumns:
+                self._connection.execute("ALTER TABLE granules ADD COLUMN " + columnName + " " + columnType)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS high_water_marks ("
+                                 "Name TEXT PRIMARY KEY, "
+                                 "DateString TEXT NOT NULL, "
+                                 "Updated TEXT)")
+        self._connection.commit()
+
+    def _execute(self, theSql, theParams=()):
+        with self._lock:
+            theCursor = self._connection.execute(theSql, theParams)
+            rows = theCursor.fetchall()
+            self._connection.commit()
+            return rows
+
+    def get_Granule(self, dateString):
+        rows = self._execute("SELECT DateString, State, Checksum, Downloaded_FilePath, Updated, Remote_Size, Remote_Modify FROM granules WHERE DateString = ?", (dateString,))
+        if len(rows) == 0:
+            return None
+        return {
+            'DateString' : rows[0][0],
+            'State' : rows[0][1],
+            'Checksum' : rows[0][2],
+            'Downloaded_FilePath' : rows[0][3],
+            'Updated' : rows[0][4],
+            'Remote_Size' : rows[0][5],
+            'Remote_Modify' : rows[0][6]
+        }
+
+    def get_State(self, dateString):
+        theGranule = self.get_Granule(dateString)
+        if theGranule == None:
+            return None
+        return theGranule['State']
+
+    def is_Loaded(self, dateString):
+        return self.get_State(dateString) == STATE_LOAD
+
+    def is_Extracted_File_Reusable(self, dateString, theFilePath):
+        theGranule = self.get_Granule(dateString)
+        if theGranule == None or theGranule['State'] == None or not theGranule['Checksum']:
+            return False
+        if not os.path.isfile(theFilePath):
+            return False
+        return get_File_Checksum(theFilePath) == theGranule['Checksum']
+
+    def is_Remote_File_Unchanged(self, dateString, theFilePath, remoteSize, remoteModify):
+        if remoteSize == None or remoteModify == None:
+            return False
+        theGranule = self.get_Granule(dateString)
+        if theGranule == None or theGranule['State'] == None:
+            return False
+        if theGranule['Remote_Size'] != remoteSize or theGranule['Remote_Modify'] != remoteModify:
+            return False
+        return os.path.isfile(theFilePath) and os.path.getsize(theFilePath) == remoteSize
+
+    def _set_State(self, dateString, theState):
+        self._execute("UPDATE granules SET State = ?, Updated = ? WHERE DateString = ?", (theState, datetime.datetime.utcnow().isoformat(), dateString))
+
+    def record_Extract(self, dateString, downloadedFilePath, checksum, remoteSize=None, remoteModify=None):
+        self._execute("INSERT OR REPLACE INTO granules (DateString, State, Checksum, Downloaded_FilePath, Updated, Remote_Size, Remote_Modify) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                      (dateString, STATE_EXTRACT, checksum, downloadedFilePath, datetime.datetime.utcnow().isoformat(), remoteSize, remoteModify))
+
+    def record_Transform(self, dateString):
+        self._set_State(dateString, STATE_TRANSFORM)
+
+    def record_Load(self, dateString):
+        self._set_State(dateString, STATE_LOAD)
+
+    def remove_Older_Than(self, dateString):
+        with self._lock:
+            theCursor = self._connection.execute("DELETE FROM granules WHERE DateString < ?", (dateString,))
+            self._connection.commit()
+            return theCursor.rowcount
+
+    def demote_Loaded_After(self, dateString):
+        theParams = (STATE_TRANSFORM, datetime.datetime.utcnow().isoformat(), STATE_LOAD)
+        theSql = "UPDATE granules SET State = ?, Updated = ? WHERE State = ?"
+        if dateString != None:
+            theSql += " AND DateString > ?"
+            theParams += (dateString,)
+        with self._lock:
+            theCursor = self._connection.execute(theSql, theParams)
+            self._connection.commit()
+            return theCursor.rowcount
+
+    def get_High_Water_Mark(self, theName):
+        rows = self._execute("SELECT DateString FROM high_water_marks WHERE Name = ?", (theName,))
+        if len(rows) == 0:
+            return None
+        return rows[0][0]
+
+    def record_High_Water_Mark(self, theName, dateString, isForced=False):
+        with self._lock:
+            rows = self._connection.execute("SELECT DateString FROM high_water_marks WHERE Name = ?", (theName,)).fetchall()
+            if isForced or len(rows) == 0 or dateString > rows[0][0]:
+                self._connection.execute("INSERT OR REPLACE INTO high_water_marks (Name, DateString, Updated) VALUES (?, ?, ?)",
+                                         (theName, dateString, datetime.datetime.utcnow().isoformat()))
+                self._connection.commit()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
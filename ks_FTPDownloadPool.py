@@ -0,0 +1,365 @@
+#-------------------------------------------------------------------------------
+# Name:        ks_FTPDownloadPool.py
+# Purpose:     Bounded pool of reusable FTP connections used to download
+#               TRMM granules (tif + tfw pairs) in parallel, throttled by a
+#               per host rate limit instead of fixed sleeps.  Folder listings
+#               (MLSD, or NLST when the server has no MLSD) are cached for the
+#               run so only files that are on the server get requested.
+#
+# Author:      SERVIR ETL
+#
+# Created:     10/18/2026 (mm/dd/yyyy)
+# Copyright:   (c) SERVIR 2026
+# Licence:     <your licence>
+#
+#-------------------------------------------------------------------------------
+
+import ftplib
+import hashlib
+import os
+import posixpath
+import socket
+import sys
+import threading
+import time
+import Queue
+from multiprocessing.pool import ThreadPool
+
+
+# Errors which mean the connection itself is no longer usable (as opposed to a
+# missing file, which is reported by the server as ftplib.error_perm)
+CONNECTION_ERRORS = (socket.error, EOFError, IOError, ftplib.error_temp, ftplib.error_reply, ftplib.error_proto)
+
+
+# Spaces out the commands sent to a single host.  Every thread talking to the
+# same host shares one limiter, so the limit holds for the whole pool.
+class HostRateLimiter(object):
+    '''
+        HostRateLimiter.max_requests_per_second   Maximum number of commands started per second (0 or None means unlimited)
+        HostRateLimiter.wait()                    Blocks the calling thread until it is allowed to send the next command
+    '''
+    def __init__(self, max_requests_per_second):
+        self.max_requests_per_second = max_requests_per_second
+        self.min_interval = 0.0
+        if max_requests_per_second and float(max_requests_per_second) > 0:
+            self.min_interval = 1.0 / float(max_requests_per_second)
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        if self.min_interval <= 0:
+            return
+        with self._lock:
+            now = time.time()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+# One limiter per host for the life of the process.
+g_HostRateLimiters = {}
+g_HostRateLimiters_Lock = threading.Lock()
+
+def get_HostRateLimiter(hostName, max_requests_per_second):
+    with g_HostRateLimiters_Lock:
+        limiter = g_HostRateLimiters.get(hostName)
+        if limiter == None or limiter.max_requests_per_second != max_requests_per_second:
+            limiter = HostRateLimiter(max_requests_per_second)
+            g_HostRateLimiters[hostName] = limiter
+        return limiter
+
+
+# Splits one MLSD line ('type=file;size=1234;modify=20150415030000; 3B42RT.2015041503.7.03hr.tif')
+# into the name and a {fact: value} dict (fact names in lower case).  Returns (None, {}) for a line it can not read.
+def parse_MLSD_Line(theLine):
+    factsPart, separator, theName = theLine.partition(" ")
+    if separator == "" or theName == "":
+        return (None, {})
+    theFacts = {}
+    for theFact in factsPart.split(";"):
+        if "=" in theFact:
+            factName, factValue = theFact.split("=", 1)
+            theFacts[factName.lower()] = factValue
+    return (theName, theFacts)
+
+
+# Lists the folder 'ftp' is in.  Returns ({name: {'Size', 'Modify'}}, "MLSD" or "NLST"),
+# NLST only gives names so 'Size' and 'Modify' are None for every file.
+def list_Current_Folder(ftp, rate_limiter=None):
+    theFiles = {}
+    theLines = []
+    try:
+        if rate_limiter != None:
+            rate_limiter.wait()
+        ftp.retrlines("MLSD", theLines.append)
+        for theLine in theLines:
+            theName, theFacts = parse_MLSD_Line(theLine)
+            if theName == None or theFacts.get('type', "file").lower() != "file":
+                continue
+            theSize = theFacts.get('size')
+            theFiles[theName] = {'Size': int(theSize) if theSize and theSize.isdigit() else None, 'Modify': theFacts.get('modify')}
+        return (theFiles, "MLSD")
+    except ftplib.error_perm:
+        # 500/502, MLSD is not supported
+        pass
+    try:
+        if rate_limiter != None:
+            rate_limiter.wait()
+        for theName in ftp.nlst():
+            theFiles[posixpath.basename(theName)] = {'Size': None, 'Modify': None}
+    except ftplib.error_perm:
+        # Some servers answer NLST on an empty folder with 550
+        pass
+    return (theFiles, "NLST")
+
+
+# Folder listings, one per host and folder for the life of the process.
+g_FolderListings = {}
+g_FolderListings_Lock = threading.Lock()
+
+def _get_FolderListing_Key(hostName, theFolder):
+    return (hostName, "/" + theFolder.strip("/"))
+
+# Returns the cached listing for a folder, or None if it was not listed yet
+def get_Cached_Folder_Listing(hostName, theFolder):
+    with g_FolderListings_Lock:
+        return g_FolderListings.get(_get_FolderListing_Key(hostName, theFolder))
+
+# Returns the listing for the folder 'ftp' is in ('theFolder'), from the cache if it was listed before.
+# A listing is {'Folder', 'Files' {name: {'Size', 'Modify'}}, 'Method' ("MLSD", "NLST" or "CWD" when the folder is not there)}
+def get_Folder_Listing(ftp, hostName, theFolder, rate_limiter=None):
+    theListing = get_Cached_Folder_Listing(hostName, theFolder)
+    if theListing != None:
+        return theListing
+    theFiles, theMethod = list_Current_Folder(ftp, rate_limiter)
+    return _store_Folder_Listing(hostName, theFolder, theFiles, theMethod)
+
+def _store_Folder_Listing(hostName, theFolder, theFiles, theMethod):
+    theKey = _get_FolderListing_Key(hostName, theFolder)
+    theListing = {'Folder': theKey[1], 'Files': theFiles, 'Method': theMethod}
+    with g_FolderListings_Lock:
+        g_FolderListings[theKey] = theListing
+    return theListing
+
+def clear_Folder_Listings():
+    with g_FolderListings_Lock:
+        g_FolderListings.clear()
+
+
+# Wraps an ftplib.FTP object and remembers which folder it is currently in so
+# the 'cwd' can be skipped when consecutive granules share a folder.
+class PooledFTPConnection(object):
+    def __init__(self, ftp):
+        self.ftp = ftp
+        self.current_folder = None
+
+    def change_Folder(self, theFolder, rate_limiter):
+        if self.current_folder == theFolder:
+            return
+        rate_limiter.wait()
+        self.ftp.cwd(theFolder)
+        self.current_folder = theFolder
+
+    def close(self):
+        try:
+            self.ftp.quit()
+        except:
+            try:
+                self.ftp.close()
+            except:
+                pass
+
+
+class FTPConnectionPool(object):
+    '''
+        FTPConnectionPool.ftpParams        {"ftpHost", "ftpUserName", "ftpUserPass"} and optionally "ftpPort", "ftpTimeout"
+        FTPConnectionPool.max_connections  Upper bound on the number of open connections
+        FTPConnectionPool.acquire()        Returns an idle connection, opening a new one if the pool is not full yet
+        FTPConnectionPool.release(c, b)    Returns a connection to the pool, or closes it if 'b' (is_broken) is True
+        FTPConnectionPool.close_All()      Closes every idle connection
+    '''
+    def __init__(self, ftpParams, max_connections, rate_limiter):
+        self.ftpParams = ftpParams
+        self.max_connections = max(1, int(max_connections))
+        self.rate_limiter = rate_limiter
+        self._idle = Queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.max_connections)
+
+    def _connect(self):
+        self.rate_limiter.wait()
+        ftp = ftplib.FTP()
+        ftp.connect(self.ftpParams['ftpHost'], int(self.ftpParams.get('ftpPort', 21)), float(self.ftpParams.get('ftpTimeout', 60)))
+        self.rate_limiter.wait()
+        ftp.login(self.ftpParams['ftpUserName'], self.ftpParams['ftpUserPass'])
+        return PooledFTPConnection(ftp)
+
+    def acquire(self):
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except Queue.Empty:
+            pass
+        try:
+            return self._connect()
+        except:
+            self._slots.release()
+            raise
+
+    def release(self, theConnection, is_broken=False):
+        if is_broken:
+            theConnection.close()
+        else:
+            self._idle.put(theConnection)
+        self._slots.release()
+
+    def close_All(self):
+        while True:
+            try:
+                theConnection = self._idle.get_nowait()
+            except Queue.Empty:
+                break
+            theConnection.close()
+
+
+# Remove a partially downloaded file so a failed RETR does not leave an empty
+# or truncated raster in the extract workspace.
+def _remove_Partial_File(theFilePath):
+    try:
+        if os.path.exists(theFilePath):
+            os.remove(theFilePath)
+    except:
+        pass
+
+
+class FTPDownloadPool(object):
+    '''
+        Downloads the TIF and TFW files for a list of expected FTP path objects
+        (see Extract_Support_Get_Expected_FTP_Paths_From_DateRange) using
+        'num_workers' threads which share a bounded FTPConnectionPool.
+
+        FTPDownloadPool.imap_Granules(list, ws)     Iterator of result objects, in the same order as the input list
+        FTPDownloadPool.download_Granules(list, ws) Same as above, but returns a list
+        FTPDownloadPool.get_Folder_Listing(folder)  Listing of a folder (see get_Folder_Listing), listed once per run
+        FTPDownloadPool.close()                     Closes all pooled connections
+
+        Each result object has these,
+            'FilePath_Object'   The input object
+            'IsDownloaded'      True if both the TIF and TFW were downloaded
+            'Downloaded_TIF'    Local path to the TIF
+            'Downloaded_TFW'    Local path to the TFW
+            'Bytes'             Number of bytes downloaded for the pair
+            'TIF_Checksum'      SHA-256 of the TIF, computed while it was downloaded
+            'ErrorMessage'      Reason the download failed ("" on success)
+    '''
+    def __init__(self, ftpParams, num_workers, max_requests_per_second, debug_logger=None, max_retries=1):
+        self.ftpParams = ftpParams
+        self.num_workers = max(1, int(num_workers))
+        self.rate_limiter = get_HostRateLimiter(ftpParams['ftpHost'], max_requests_per_second)
+        self.connection_pool = FTPConnectionPool(ftpParams, self.num_workers, self.rate_limiter)
+        self.debug_logger = debug_logger
+        self.max_retries = max_retries
+
+    def _log(self, theMsg, detailedLoggingItem=False):
+        if self.debug_logger != None:
+            self.debug_logger(theMsg, detailedLoggingItem)
+
+    def _retrieve_File(self, theConnection, remoteFileName, localFilePath, theHash=None):
+        self.rate_limiter.wait()
+        byteCounter = [0]
+        with open(localFilePath, "wb") as f:
+            def write_Block(theBlock):
+                f.write(theBlock)
+                byteCounter[0] += len(theBlock)
+                if theHash != None:
+                    theHash.update(theBlock)
+            theConnection.ftp.retrbinary("RETR %s" % remoteFileName, write_Block)
+        return byteCounter[0]
+
+    def download_Granule(self, curr_FilePath_Object, theExtractWorkspace):
+        downloadedFile_TIF = os.path.join(theExtractWorkspace, curr_FilePath_Object['TIF_3Hr_FileName'])
+        downloadedFile_TFW = os.path.join(theExtractWorkspace, curr_FilePath_Object['TWF_3Hr_FileName'])
+        retObj = {
+            'FilePath_Object' : curr_FilePath_Object,
+            'IsDownloaded' : False,
+            'Downloaded_TIF' : downloadedFile_TIF,
+            'Downloaded_TFW' : downloadedFile_TFW,
+            'Bytes' : 0,
+            'TIF_Checksum' : None,
+            'ErrorMessage' : "",
+            'Elapsed_Seconds' : 0.0
+        }
+        timeStart = time.time()
+
+        attempt = 0
+        while attempt <= self.max_retries:
+            attempt += 1
+            theConnection = None
+            is_broken = False
+            try:
+                theConnection = self.connection_pool.acquire()
+                theConnection.change_Folder("/" + curr_FilePath_Object['FTPSubFolderPath'], self.rate_limiter)
+                tifHash = hashlib.sha256()
+                numBytes = self._retrieve_File(theConnection, curr_FilePath_Object['TIF_3Hr_FileName'], downloadedFile_TIF, tifHash)
+                numBytes += self._retrieve_File(theConnection, curr_FilePath_Object['TWF_3Hr_FileName'], downloadedFile_TFW)
+                retObj['IsDownloaded'] = True
+                retObj['Bytes'] = numBytes
+                retObj['TIF_Checksum'] = tifHash.hexdigest()
+                retObj['ErrorMessage'] = ""
+                retObj['Elapsed_Seconds'] = time.time() - timeStart
+                return retObj
+            except ftplib.error_perm:
+                # The server answered, the file just is not there (not published yet).  No point retrying.
+                retObj['ErrorMessage'] = "File not available on server: " + str(sys.exc_info()[1])
+                attempt = self.max_retries + 1
+            except CONNECTION_ERRORS:
+                is_broken = True
+                retObj['ErrorMessage'] = "Connection error: " + str(sys.exc_info()[1])
+                self._log("FTPDownloadPool.download_Granule: Connection problem on attempt " + str(attempt) + " for " + str(curr_FilePath_Object['BaseRasterName']) + ", " + retObj['ErrorMessage'], True)
+            except:
+                is_broken = True
+                retObj['ErrorMessage'] = "Unexpected error: " + str(sys.exc_info()[0])
+                attempt = self.max_retries + 1
+            finally:
+                if theConnection != None:
+                    self.connection_pool.release(theConnection, is_broken)
+
+        _remove_Partial_File(downloadedFile_TIF)
+        _remove_Partial_File(downloadedFile_TFW)
+        retObj['Elapsed_Seconds'] = time.time() - timeStart
+        return retObj
+
+    def get_Folder_Listing(self, theFolder):
+        theListing = get_Cached_Folder_Listing(self.ftpParams['ftpHost'], theFolder)
+        if theListing != None:
+            return theListing
+        theConnection = self.connection_pool.acquire()
+        is_broken = False
+        try:
+            try:
+                theConnection.change_Folder("/" + theFolder.strip("/"), self.rate_limiter)
+            except ftplib.error_perm:
+                # Nothing published for that month yet
+                return _store_Folder_Listing(self.ftpParams['ftpHost'], theFolder, {}, "CWD")
+            return get_Folder_Listing(theConnection.ftp, self.ftpParams['ftpHost'], theFolder, self.rate_limiter)
+        except:
+            is_broken = True
+            raise
+        finally:
+            self.connection_pool.release(theConnection, is_broken)
+
+    def imap_Granules(self, filePath_Objects, theExtractWorkspace):
+        workerPool = ThreadPool(self.num_workers)
+        try:
+            for currResult in workerPool.imap(lambda o: self.download_Granule(o, theExtractWorkspace), filePath_Objects):
+                yield currResult
+        finally:
+            workerPool.close()
+            workerPool.join()
+
+    def download_Granules(self, filePath_Objects, theExtractWorkspace):
+        return list(self.imap_Granules(filePath_Objects, theExtractWorkspace))
+
+    def close(self):
+        self.connection_pool.close_All()
@@ -0,0 +1,404 @@
+#-------------------------------------------------------------------------------
+# Name:        ks_GeoTIFF.py
+# Purpose:     Minimal single band GeoTIFF reader / writer on top of NumPy,
+#               with the georeferencing kept in a '.tfw' world file (the same
+#               way the TRMM GIS files are published).  Used by the local
+#               geoprocessing backend so the ETL can run without ArcGIS/GDAL.
+#
+#               Reads: strips or tiles, no compression, Deflate or LZW
+#                      (with or without the horizontal predictor), 8 to 64 bit
+#                      int, uint and float samples, one sample per pixel.
+#               Writes: uncompressed strips, little endian.
+#
+# Author:      SERVIR ETL
+#
+# Created:     10/18/2026 (mm/dd/yyyy)
+# Copyright:   (c) SERVIR 2026
+# Licence:     <your licence>
+#
+#-------------------------------------------------------------------------------
+
+import os
+import struct
+import zlib
+
+import numpy
+
+
+# Tags used by this module
+TAG_IMAGE_WIDTH = 256
+TAG_IMAGE_LENGTH = 257
+TAG_BITS_PER_SAMPLE = 258
+TAG_COMPRESSION = 259
+TAG_PHOTOMETRIC = 262
+TAG_STRIP_OFFSETS = 273
+TAG_SAMPLES_PER_PIXEL = 277
+TAG_ROWS_PER_STRIP = 278
+TAG_STRIP_BYTE_COUNTS = 279
+TAG_PLANAR_CONFIG = 284
+TAG_PREDICTOR = 317
+TAG_TILE_WIDTH = 322
+TAG_TILE_LENGTH = 323
+TAG_TILE_OFFSETS = 324
+TAG_TILE_BYTE_COUNTS = 325
+TAG_SAMPLE_FORMAT = 339
+TAG_MODEL_PIXEL_SCALE = 33550
+TAG_MODEL_TIEPOINT = 33922
+TAG_GDAL_NODATA = 42113
+
+COMPRESSION_NONE = 1
+COMPRESSION_LZW = 5
+COMPRESSION_DEFLATE = 8
+COMPRESSION_DEFLATE_OLD = 32946
+
+# TIFF field type: (struct code, size in bytes)
+FIELD_TYPES = {
+    1: ('B', 1),    # BYTE
+    2: ('c', 1),    # ASCII
+    3: ('H', 2),    # SHORT
+    4: ('I', 4),    # LONG
+    5: ('II', 8),   # RATIONAL
+    6: ('b', 1),    # SBYTE
+    7: ('B', 1),    # UNDEFINED
+    8: ('h', 2),    # SSHORT
+    9: ('i', 4),    # SLONG
+    10: ('ii', 8),  # SRATIONAL
+    11: ('f', 4),   # FLOAT
+    12: ('d', 8),   # DOUBLE
+}
+
+# SampleFormat (1 uint, 2 int, 3 float) -> numpy kind
+SAMPLE_FORMAT_KINDS = {1: 'u', 2: 'i', 3: 'f'}
+
+
+class GeoTIFFError(Exception):
+    pass
+
+
+#--------------------------------------------------------------------------
+# World files
+#--------------------------------------------------------------------------
+
+# The world file that goes with a raster, "x.tif" -> "x.tfw"
+def get_WorldFile_Path(rasterPath):
+    return os.path.splitext(rasterPath)[0] + ".tfw"
+
+# Returns the 6 world file values (A, D, B, E, C, F) or None if there is no world file
+def read_WorldFile(worldFilePath):
+    if not os.path.isfile(worldFilePath):
+        return None
+    with open(worldFilePath, "r") as f:
+        values = [float(line.strip()) for line in f.readlines() if line.strip() != ""]
+    if len(values) != 6:
+        raise GeoTIFFError("World file " + str(worldFilePath) + " should have 6 values, found " + str(len(values)))
+    return tuple(values)
+
+def write_WorldFile(worldFilePath, worldFileValues):
+    with open(worldFilePath, "w") as f:
+        for value in worldFileValues:
+            f.write(repr(float(value)) + "\n")
+
+
+#--------------------------------------------------------------------------
+# Reading
+#--------------------------------------------------------------------------
+
+def _read_IFD(f, byteOrder, ifdOffset):
+    f.seek(ifdOffset)
+    numOfEntries = struct.unpack(byteOrder + "H", f.read(2))[0]
+    entries = f.read(12 * numOfEntries)
+    tags = {}
+    for i in range(numOfEntries):
+        tag, fieldType, count = struct.unpack(byteOrder + "HHI", entries[i * 12:i * 12 + 8])
+        valueBytes = entries[i * 12 + 8:i * 12 + 12]
+        if not fieldType in FIELD_TYPES:
+            continue
+        structCode, size = FIELD_TYPES[fieldType]
+        totalSize = size * count
+        if totalSize > 4:
+            offset = struct.unpack(byteOrder + "I", valueBytes)[0]
+            currentPosition = f.tell()
+            f.seek(offset)
+            valueBytes = f.read(totalSize)
+            f.seek(currentPosition)
+        else:
+            valueBytes = valueBytes[:totalSize]
+        if fieldType == 2:
+            tags[tag] = valueBytes.rstrip(b"\x00").decode("ascii", "replace")
+        elif fieldType in (5, 10):
+            raw = struct.unpack(byteOrder + structCode[0] * (2 * count), valueBytes)
+            tags[tag] = [float(raw[j]) / raw[j + 1] if raw[j + 1] else 0.0 for j in range(0, len(raw), 2)]
+        else:
+            tags[tag] = list(struct.unpack(byteOrder + structCode * count, valueBytes))
+    return tags
+
+# TIFF LZW (MSB first, 'early change' code widths)
+def _decode_LZW(data):
+    CLEAR_CODE = 256
+    EOI_CODE = 257
+    result = bytearray()
+    table = [bytes(bytearray([i])) for i in range(256)] + [b"", b""]
+    codeWidth = 9
+    bitBuffer = 0
+    bitCount = 0
+    previous = None
+    for byte in bytearray(data):
+        bitBuffer = (bitBuffer << 8) | byte
+        bitCount += 8
+        while bitCount >= codeWidth:
+            bitCount -= codeWidth
+            code = (bitBuffer >> bitCount) & ((1 << codeWidth) - 1)
+            if code == CLEAR_CODE:
+                table = table[:258]
+                codeWidth = 9
+                previous = None
+                continue
+            if code == EOI_CODE:
+                return bytes(result)
+            if previous == None:
+                entry = table[code]
+            elif code < len(table):
+                entry = table[code]
+                table.append(previous + entry[:1])
+            else:
+                entry = previous + previous[:1]
+                table.append(entry)
+            result.extend(entry)
+            previous = entry
+            if len(table) + 1 >= (1 << codeWidth) and codeWidth < 12:
+                codeWidth += 1
+    return bytes(result)
+
+def _decompress_Block(data, compression):
+    if compression == COMPRESSION_NONE:
+        return data
+    if compression in (COMPRESSION_DEFLATE, COMPRESSION_DEFLATE_OLD):
+        return zlib.decompress(data)
+    if compression == COMPRESSION_LZW:
+        return _decode_LZW(data)
+    raise GeoTIFFError("Unsupported TIFF compression: " + str(compression))
+
+def _get_Block_Array(data, dtype, numOfRows, numOfCols, predictor):
+    expectedSize = numOfRows * numOfCols * dtype.itemsize
+    if len(data) < expectedSize:
+        data = data + b"\x00" * (expectedSize - len(data))
+    block = numpy.frombuffer(data[:expectedSize], dtype=dtype).reshape((numOfRows, numOfCols))
+    if predictor == 2:
+        block = numpy.cumsum(block, axis=1, dtype=dtype)
+    return block
+
+
+# True if the image data is one uncompressed, contiguous run of rows (what write_GeoTIFF produces),
+# so the file can be memory mapped instead of read strip by strip.
+def _is_Contiguous_Image(tags, numOfRows, numOfCols, dtype):
+    if tags.get(TAG_COMPRESSION, [COMPRESSION_NONE])[0] != COMPRESSION_NONE or tags.get(TAG_PREDICTOR, [1])[0] != 1:
+        return False
+    if TAG_TILE_OFFSETS in tags or not TAG_STRIP_OFFSETS in tags:
+        return False
+    stripOffsets = tags[TAG_STRIP_OFFSETS]
+    stripByteCounts = tags[TAG_STRIP_BYTE_COUNTS]
+    for i in range(1, len(stripOffsets)):
+        if stripOffsets[i] != stripOffsets[i - 1] + stripByteCounts[i - 1]:
+            return False
+    return sum(stripByteCounts) >= numOfRows * numOfCols * dtype.itemsize
+
+
+# Reads the TIFF header and first IFD from an open file,
+# returns {'tags', 'numOfRows', 'numOfCols', 'dtype' (file byte order), 'compression', 'predictor'}
+def _read_Header(f, rasterPath):
+    header = f.read(8)
+    if header[:2] == b"II":
+        byteOrder = "<"
+    elif header[:2] == b"MM":
+        byteOrder = ">"
+    else:
+        raise GeoTIFFError("Not a TIFF file: " + str(rasterPath))
+    magic, ifdOffset = struct.unpack(byteOrder + "HI", header[2:8])
+    if magic != 42:
+        raise GeoTIFFError("Unsupported TIFF (BigTIFF?) " + str(rasterPath))
+    tags = _read_IFD(f, byteOrder, ifdOffset)
+
+    if tags.get(TAG_SAMPLES_PER_PIXEL, [1])[0] != 1:
+        raise GeoTIFFError("Only single band rasters are supported: " + str(rasterPath))
+    bitsPerSample = tags.get(TAG_BITS_PER_SAMPLE, [1])[0]
+    kind = SAMPLE_FORMAT_KINDS.get(tags.get(TAG_SAMPLE_FORMAT, [1])[0])
+    if kind == None or bitsPerSample % 8 != 0:
+        raise GeoTIFFError("Unsupported sample type in " + str(rasterPath))
+    return {
+        'tags' : tags,
+        'numOfRows' : tags[TAG_IMAGE_LENGTH][0],
+        'numOfCols' : tags[TAG_IMAGE_WIDTH][0],
+        'dtype' : numpy.dtype(byteOrder + kind + str(bitsPerSample // 8)),
+        'compression' : tags.get(TAG_COMPRESSION, [COMPRESSION_NONE])[0],
+        'predictor' : tags.get(TAG_PREDICTOR, [1])[0]
+    }
+
+# Returns (nodata, worldFile) of a raster, see read_GeoTIFF
+def _get_Georeferencing(rasterPath, tags):
+    nodata = None
+    if TAG_GDAL_NODATA in tags:
+        try:
+            nodata = float(tags[TAG_GDAL_NODATA])
+        except ValueError:
+            nodata = None
+
+    worldFile = read_WorldFile(get_WorldFile_Path(rasterPath))
+    if worldFile == None and TAG_MODEL_PIXEL_SCALE in tags and TAG_MODEL_TIEPOINT in tags:
+        scaleX, scaleY = tags[TAG_MODEL_PIXEL_SCALE][0], tags[TAG_MODEL_PIXEL_SCALE][1]
+        tieI, tieJ, tieK, tieX, tieY = tags[TAG_MODEL_TIEPOINT][:5]
+        # World files reference the center of the upper left pixel
+        worldFile = (scaleX, 0.0, 0.0, -scaleY, tieX - tieI * scaleX + scaleX / 2.0, tieY + tieJ * scaleY - scaleY / 2.0)
+    return nodata, worldFile
+
+# Everything about a raster except its pixels, the _read_Header dict plus 'nodata' and 'worldFile' (see read_GeoTIFF)
+def read_GeoTIFF_Header(rasterPath):
+    with open(rasterPath, "rb") as f:
+        theHeader = _read_Header(f, rasterPath)
+    theHeader['nodata'], theHeader['worldFile'] = _get_Georeferencing(rasterPath, theHeader['tags'])
+    return theHeader
+
+# Returns {'array', 'nodata', 'worldFile', 'isMemmap'}.  'worldFile' comes from the .tfw next to the raster,
+# or from the GeoTIFF tags if there is no .tfw (None if neither is there).
+# With useMemmap, an uncompressed contiguous image is returned as a read only numpy.memmap (pages are read
+# from the OS cache as they are touched) and other layouts are read normally.
+def read_GeoTIFF(rasterPath, useMemmap=False):
+    with open(rasterPath, "rb") as f:
+        theHeader = _read_Header(f, rasterPath)
+        tags = theHeader['tags']
+        numOfRows = theHeader['numOfRows']
+        numOfCols = theHeader['numOfCols']
+        dtype = theHeader['dtype']
+        compression = theHeader['compression']
+        predictor = theHeader['predictor']
+
+        isMemmap = useMemmap and _is_Contiguous_Image(tags, numOfRows, numOfCols, dtype)
+        if isMemmap:
+            theArray = numpy.memmap(rasterPath, dtype=dtype, mode='r', offset=tags[TAG_STRIP_OFFSETS][0], shape=(numOfRows, numOfCols))
+        elif TAG_TILE_OFFSETS in tags:
+            theArray = numpy.zeros((numOfRows, numOfCols), dtype=dtype)
+            tileWidth = tags[TAG_TILE_WIDTH][0]
+            tileLength = tags[TAG_TILE_LENGTH][0]
+            tilesAcross = (numOfCols + tileWidth - 1) // tileWidth
+            for tileIndex in range(len(tags[TAG_TILE_OFFSETS])):
+                f.seek(tags[TAG_TILE_OFFSETS][tileIndex])
+                data = _decompress_Block(f.read(tags[TAG_TILE_BYTE_COUNTS][tileIndex]), compression)
+                block = _get_Block_Array(data, dtype, tileLength, tileWidth, predictor)
+                row0 = (tileIndex // tilesAcross) * tileLength
+                col0 = (tileIndex % tilesAcross) * tileWidth
+                rows = min(tileLength, numOfRows - row0)
+                cols = min(tileWidth, numOfCols - col0)
+                theArray[row0:row0 + rows, col0:col0 + cols] = block[:rows, :cols]
+        else:
+            theArray = numpy.zeros((numOfRows, numOfCols), dtype=dtype)
+            rowsPerStrip = min(tags.get(TAG_ROWS_PER_STRIP, [numOfRows])[0], numOfRows)
+            for stripIndex in range(len(tags[TAG_STRIP_OFFSETS])):
+                row0 = stripIndex * rowsPerStrip
+                rows = min(rowsPerStrip, numOfRows - row0)
+                if rows <= 0:
+                    break
+                f.seek(tags[TAG_STRIP_OFFSETS][stripIndex])
+                data = _decompress_Block(f.read(tags[TAG_STRIP_BYTE_COUNTS][stripIndex]), compression)
+                theArray[row0:row0 + rows, :] = _get_Block_Array(data, dtype, rows, numOfCols, predictor)
+
+    nodata, worldFile = _get_Georeferencing(rasterPath, tags)
+
+    if not theArray.dtype.isnative:
+        theArray = theArray.astype(theArray.dtype.newbyteorder('='))
+        isMemmap = False
+    return {
+        'array' : theArray,
+        'nodata' : nodata,
+        'worldFile' : worldFile,
+        'isMemmap' : isMemmap
+    }
+
+
+#--------------------------------------------------------------------------
+# Writing
+#--------------------------------------------------------------------------
+
+def _pack_Entry(tag, fieldType, values, dataOffset):
+    # Returns (12 byte entry, extra data to place at dataOffset or b"")
+    structCode, size = FIELD_TYPES[fieldType]
+    if fieldType == 2:
+        payload = values.encode("ascii") + b"\x00"
+        count = len(payload)
+    else:
+        payload = struct.pack("<" + structCode * len(values), *values)
+        count = len(values)
+    if len(payload) <= 4:
+        return struct.pack("<HHI", tag, fieldType, count) + payload + b"\x00" * (4 - len(payload)), b""
+    return struct.pack("<HHII", tag, fieldType, count, dataOffset), payload
+
+
+# Writes 'theArray' (2D numpy array) as an uncompressed GeoTIFF, and the '.tfw' if worldFile (A, D, B, E, C, F) is given.
+def write_GeoTIFF(rasterPath, theArray, worldFile=None, nodata=None, rowsPerStrip=None):
+    theArray = numpy.asarray(theArray)
+    if theArray.ndim != 2:
+        raise GeoTIFFError("Only 2D arrays can be written")
+    dtype = theArray.dtype.newbyteorder('<')
+    if dtype.kind == 'b':
+        dtype = numpy.dtype('u1')
+    sampleFormat = dict([(v, k) for k, v in SAMPLE_FORMAT_KINDS.items()]).get(dtype.kind)
+    if sampleFormat == None:
+        raise GeoTIFFError("Unsupported array type: " + str(theArray.dtype))
+    numOfRows, numOfCols = theArray.shape
+    rowBytes = numOfCols * dtype.itemsize
+    if rowsPerStrip == None:
+        rowsPerStrip = max(1, 65536 // max(1, rowBytes))
+    rowsPerStrip = min(rowsPerStrip, max(1, numOfRows))
+    numOfStrips = max(1, (numOfRows + rowsPerStrip - 1) // rowsPerStrip)
+
+    imageData = numpy.ascontiguousarray(theArray, dtype=dtype).tobytes()
+    stripByteCounts = [min(rowsPerStrip, numOfRows - i * rowsPerStrip) * rowBytes for i in range(numOfStrips)]
+    imageOffset = 8
+    stripOffsets = [imageOffset + i * rowsPerStrip * rowBytes for i in range(numOfStrips)]
+
+    entries = [
+        (TAG_IMAGE_WIDTH, 4, [numOfCols]),
+        (TAG_IMAGE_LENGTH, 4, [numOfRows]),
+        (TAG_BITS_PER_SAMPLE, 3, [dtype.itemsize * 8]),
+        (TAG_COMPRESSION, 3, [COMPRESSION_NONE]),
+        (TAG_PHOTOMETRIC, 3, [1]),
+        (TAG_STRIP_OFFSETS, 4, stripOffsets),
+        (TAG_SAMPLES_PER_PIXEL, 3, [1]),
+        (TAG_ROWS_PER_STRIP, 4, [rowsPerStrip]),
+        (TAG_STRIP_BYTE_COUNTS, 4, stripByteCounts),
+        (TAG_PLANAR_CONFIG, 3, [1]),
+        (TAG_SAMPLE_FORMAT, 3, [sampleFormat]),
+    ]
+    if worldFile != None:
+        a, d, b, e, c, f = worldFile
+        # GeoTIFF tie point is the corner of the upper left pixel
+        entries.append((TAG_MODEL_PIXEL_SCALE, 12, [a, -e, 0.0]))
+        entries.append((TAG_MODEL_TIEPOINT, 12, [0.0, 0.0, 0.0, c - a / 2.0, f - e / 2.0, 0.0]))
+    if nodata != None:
+        entries.append((TAG_GDAL_NODATA, 2, repr(nodata)))
+
+    # Layout: header, image data, IFD, data for values which do not fit in an entry
+    ifdOffset = imageOffset + len(imageData)
+    ifdOffset += ifdOffset % 2
+    extraOffset = ifdOffset + 2 + 12 * len(entries) + 4
+    ifdBytes = [struct.pack("<H", len(entries))]
+    extraBytes = []
+    for tag, fieldType, values in entries:
+        entry, extra = _pack_Entry(tag, fieldType, values, extraOffset)
+        ifdBytes.append(entry)
+        if extra:
+            extraBytes.append(extra)
+            extraOffset += len(extra)
+            if extraOffset % 2:
+                extraBytes.append(b"\x00")
+                extraOffset += 1
+    ifdBytes.append(struct.pack("<I", 0))
+
+    with open(rasterPath, "wb") as out:
+        out.write(b"II" + struct.pack("<HI", 42, ifdOffset))
+        out.write(imageData)
+        if (imageOffset + len(imageData)) % 2:
+            out.write(b"\x00")
+        out.write(b"".join(ifdBytes))
+        out.write(b"".join(extraBytes))
+
+    if worldFile != None:
+        write_WorldFile(get_WorldFile_Path(rasterPath), worldFile)
@@ -0,0 +1,606 @@
+#-------------------------------------------------------------------------------
+# Name:        ks_GeoprocessingBackend.py
+# Purpose:     The geoprocessing operations the ETL needs, behind a small
+#               interface, so the code that calls them does not talk to arcpy
+#               directly.  Two implementations,
+#                   "arcpy" : ArcGIS (production)
+#                   "local" : NumPy GeoTIFF + '.tfw' files, with a SQLite
+#                             table standing in for each mosaic dataset, so
+#                             the whole ETL can run (and be profiled) on a
+#                             machine without ArcGIS.
+#
+# Author:      SERVIR ETL
+#
+# Created:     10/18/2026 (mm/dd/yyyy)
+# Copyright:   (c) SERVIR 2026
+# Licence:     <your licence>
+#
+#-------------------------------------------------------------------------------
+
+import datetime
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+
+
+# Moves src over dst.  os.rename does this in one step everywhere except Windows, where it fails if dst exists.
+def replace_File(srcPath, dstPath):
+    try:
+        os.rename(srcPath, dstPath)
+    except OSError:
+        if os.path.exists(dstPath):
+            os.remove(dstPath)
+        os.rename(srcPath, dstPath)
+
+
+# Reads an ESRI '.clr' color map, returns a list of (value, red, green, blue).  Blank lines and '#' comments are skipped.
+def read_ColorMap(colorMapFile):
+    theEntries = []
+    with open(colorMapFile, "r") as f:
+        for theLine in f:
+            theParts = theLine.split("#")[0].split()
+            if len(theParts) < 4:
+                continue
+            theEntries.append(tuple([int(float(p)) for p in theParts[:4]]))
+    return theEntries
+
+# Text of a '.clr' file for a list of (value, red, green, blue)
+def format_ColorMap(colorMap):
+    return "".join(["%d %d %d %d\n" % theEntry for theEntry in colorMap])
+
+# Parsed color maps, by path, for the life of the process (read again only if the file changes)
+g_ColorMaps = {}
+g_ColorMaps_Lock = threading.Lock()
+
+def get_ColorMap(colorMapFile):
+    theStat = os.stat(colorMapFile)
+    theKey = (theStat.st_mtime, theStat.st_size)
+    with g_ColorMaps_Lock:
+        theCached = g_ColorMaps.get(colorMapFile)
+        if theCached != None and theCached[0] == theKey:
+            return theCached[1]
+    theColorMap = read_ColorMap(colorMapFile)
+    with g_ColorMaps_Lock:
+        g_ColorMaps[colorMapFile] = (theKey, theColorMap)
+    return theColorMap
+
+
+class GeoprocessingBackend(object):
+    '''
+        Interface used by the ETL steps.  Implementations override every method.
+
+        Datasets
+        GeoprocessingBackend.exists(path)                                          True if the dataset (workspace, raster, mosaic dataset) exists
+        GeoprocessingBackend.describe_DataType(path)                               Data type of a dataset ("Workspace", "RasterDataset", "MosaicDataset", ...)
+        GeoprocessingBackend.delete(path)                                          Deletes a dataset
+        GeoprocessingBackend.list_Rasters(folder)                                  Names of the rasters in a folder
+        GeoprocessingBackend.change_Privileges(path, role, view, edit)             Grants/revokes privileges on an enterprise dataset
+        GeoprocessingBackend.set_Scratch_Workspace(folder)                         Folder for the temporary files of later calls (one per worker process)
+
+        Rasters
+        GeoprocessingBackend.copy_Raster(inRaster, outRaster)                      Copies a raster (to a file or into a workspace)
+        GeoprocessingBackend.replace_Raster(newRaster, targetRaster)               Puts a finished raster in place of another one (the old one is removed)
+        GeoprocessingBackend.add_Colormap(raster, colorMapFile)                    Applies a '.clr' color map to a raster
+        GeoprocessingBackend.define_Projection(raster, coor_system)                Sets the coordinate system of a raster, returns the coordinate system name
+        GeoprocessingBackend.write_Raster(inRaster, outRaster, coor_system, cmap)  copy_Raster + add_Colormap + define_Projection (the local backend writes the output once),
+                                                                                   'cmap' is a parsed color map (see get_ColorMap) or None.  Returns the coordinate system name
+
+        Mosaic datasets
+        GeoprocessingBackend.get_Field_Values(mosaicDS, field)                     Every value of a field (SearchCursor)
+        GeoprocessingBackend.get_Max_Field_Value(mosaicDS, field)                  Largest non null value of a field (single row, newest first), None if the mosaic is empty
+        GeoprocessingBackend.add_Rasters_To_Mosaic(mosaicDS, rasterFiles, crs)     Adds a list of rasters to a mosaic dataset in one call
+        GeoprocessingBackend.calculate_Mosaic_Statistics(mosaicDS)                 Calculates statistics on the whole mosaic dataset
+        GeoprocessingBackend.update_Mosaic_Attributes(mosaicDS, fields, values)    One pass over the mosaic rows, 'values' is {name: [value per field]}
+                                                                                   Returns the list of names which were updated
+        GeoprocessingBackend.remove_Mosaic_Rasters_Before(mosaicDS, f, d, fmt)     Removes the rasters whose date field 'f' is before 'd', returns how many were removed
+
+        GeoprocessingBackend.get_Messages(severity)                                Messages from the last call (for the log)
+    '''
+    name = None
+
+    def exists(self, thePath):
+        raise NotImplementedError()
+
+    def describe_DataType(self, thePath):
+        raise NotImplementedError()
+
+    def delete(self, thePath):
+        raise NotImplementedError()
+
+    def list_Rasters(self, theFolder):
+        raise NotImplementedError()
+
+    def change_Privileges(self, thePath, theRole, viewPrivilege, editPrivilege):
+        raise NotImplementedError()
+
+    def set_Scratch_Workspace(self, theFolder):
+        raise NotImplementedError()
+
+    def copy_Raster(self, inRaster, outRaster):
+        raise NotImplementedError()
+
+    def replace_Raster(self, newRaster, targetRaster):
+        raise NotImplementedError()
+
+    def add_Colormap(self, theRaster, colorMapFile):
+        raise NotImplementedError()
+
+    def define_Projection(self, theRaster, coor_system):
+        raise NotImplementedError()
+
+    def write_Raster(self, inRaster, outRaster, coor_system, colorMap):
+        raise NotImplementedError()
+
+    def get_Field_Values(self, mosaicDS, theField):
+        raise NotImplementedError()
+
+    def get_Max_Field_Value(self, mosaicDS, theField):
+        raise NotImplementedError()
+
+    def add_Rasters_To_Mosaic(self, mosaicDS, rasterFileList, coor_system):
+        raise NotImplementedError()
+
+    def calculate_Mosaic_Statistics(self, mosaicDS):
+        raise NotImplementedError()
+
+    def update_Mosaic_Attributes(self, mosaicDS, attrNameList, valuesByName):
+        raise NotImplementedError()
+
+    def remove_Mosaic_Rasters_Before(self, mosaicDS, dateField, oldDate, qryDateFmt):
+        raise NotImplementedError()
+
+    def get_Messages(self, severity=None):
+        return ""
+
+
+class ArcpyBackend(GeoprocessingBackend):
+    '''
+        arcpy (ArcGIS) implementation.  arcpy is imported when the backend is created
+        so this module can be imported on machines without ArcGIS.
+    '''
+    name = "arcpy"
+
+    def __init__(self):
+        import arcpy
+        self.arcpy = arcpy
+        self._spatialReferences = {}
+
+    def exists(self, thePath):
+        return self.arcpy.Exists(thePath)
+
+    def describe_DataType(self, thePath):
+        return self.arcpy.Describe(thePath).dataType
+
+    def delete(self, thePath):
+        return self.arcpy.Delete_management(thePath)
+
+    def list_Rasters(self, theFolder):
+        self.arcpy.env.workspace = theFolder
+        return self.arcpy.ListRasters("*", "All")
+
+    def change_Privileges(self, thePath, theRole, viewPrivilege, editPrivilege):
+        self.arcpy.ChangePrivileges_management(thePath, theRole, viewPrivilege, editPrivilege)
+
+    def set_Scratch_Workspace(self, theFolder):
+        self.arcpy.env.scratchWorkspace = theFolder
+
+    def copy_Raster(self, inRaster, outRaster):
+        self.arcpy.CopyRaster_management(inRaster, outRaster)
+
+    def replace_Raster(self, newRaster, targetRaster):
+        # A geodatabase can not rename over an existing dataset.  The old one is renamed aside, the new one takes its
+        # name and only then is the old one deleted (it is put back if the new one could not be renamed).
+        oldRaster = targetRaster + "_old"
+        if self.arcpy.Exists(oldRaster):
+            self.arcpy.Delete_management(oldRaster)
+        isTargetExists = self.arcpy.Exists(targetRaster)
+        if isTargetExists:
+            self.arcpy.Rename_management(targetRaster, oldRaster)
+        try:
+            self.arcpy.Rename_management(newRaster, targetRaster)
+        except:
+            if isTargetExists:
+                self.arcpy.Rename_management(oldRaster, targetRaster)
+            raise
+        if isTargetExists:
+            self.arcpy.Delete_management(oldRaster)
+
+    def add_Colormap(self, theRaster, colorMapFile):
+        self.arcpy.AddColormap_management(theRaster, "#", colorMapFile)
+
+    def define_Projection(self, theRaster, coor_system):
+        sr = self.arcpy.SpatialReference(coor_system)
+        self.arcpy.DefineProjection_management(theRaster, sr)
+        return sr.name
+
+    def write_Raster(self, inRaster, outRaster, coor_system, colorMap):
+        # Same geoprocessing as the separate steps, run on the output (nothing is written next to the input),
+        # only the SpatialReference is built once per coordinate system.
+        sr = self._spatialReferences.get(coor_system)
+        if sr == None:
+            sr = self.arcpy.SpatialReference(coor_system)
+            self._spatialReferences[coor_system] = sr
+        self.arcpy.CopyRaster_management(inRaster, outRaster)
+        if colorMap != None:
+            # AddColormap wants a '.clr' file, the parsed color map is written to a temporary one
+            theHandle, colorMapFile = tempfile.mkstemp(suffix=".clr")
+            try:
+                try:
+                    os.write(theHandle, format_ColorMap(colorMap))
+                finally:
+                    os.close(theHandle)
+                self.arcpy.AddColormap_management(outRaster, "#", colorMapFile)
+            finally:
+                os.remove(colorMapFile)
+        self.arcpy.DefineProjection_management(outRaster, sr)
+        return sr.name
+
+    def get_Field_Values(self, mosaicDS, theField):
+        return [row[0] for row in self.arcpy.da.SearchCursor(mosaicDS, theField)]
+
+    def get_Max_Field_Value(self, mosaicDS, theField):
+        # Sorted by the database (uses the attribute index on the field), only the first row is read
+        theFieldName = self.arcpy.AddFieldDelimiters(mosaicDS, theField)
+        with self.arcpy.da.SearchCursor(mosaicDS, theField, theFieldName + " IS NOT NULL", sql_clause=(None, "ORDER BY " + theFieldName + " DESC")) as cursor:
+            for row in cursor:
+                return row[0]
+        return None
+
+    def add_Rasters_To_Mosaic(self, mosaicDS, rasterFileList, coor_system):
+        # Same options the single raster load used, the input path accepts a ';' separated list of rasters.
+        self.arcpy.AddRastersToMosaicDataset_management(mosaicDS, "Raster Dataset", ";".join(rasterFileList),\
+                                                        "UPDATE_CELL_SIZES", "UPDATE_BOUNDARY", "NO_OVERVIEWS",\
+                                                        "2", "#", "#", "#", "#", "NO_SUBFOLDERS",\
+                                                        "EXCLUDE_DUPLICATES", "BUILD_PYRAMIDS", "CALCULATE_STATISTICS",\
+                                                        "NO_THUMBNAILS", "Add Raster Datasets","#")
+
+    def calculate_Mosaic_Statistics(self, mosaicDS):
+        self.arcpy.CalculateStatistics_management(mosaicDS,1,1,"#","SKIP_EXISTING","#")
+
+    def update_Mosaic_Attributes(self, mosaicDS, attrNameList, valuesByName):
+        updatedNames = []
+        if len(valuesByName) == 0:
+            return updatedNames
+        nameField = self.arcpy.AddFieldDelimiters(mosaicDS,"name")
+        wClause = nameField + " IN (" + ",".join(["'" + str(theName) + "'" for theName in valuesByName.keys()]) + ")"
+        with self.arcpy.da.UpdateCursor(mosaicDS, ["name"] + attrNameList, wClause) as cursor:
+            for row in cursor:
+                theValues = valuesByName.get(row[0])
+                if theValues == None:
+                    continue
+                for idx in range(len(attrNameList)):
+                    row[idx + 1] = theValues[idx]
+                cursor.updateRow(row)
+                updatedNames.append(row[0])
+        return updatedNames
+
+    def remove_Mosaic_Rasters_Before(self, mosaicDS, dateField, oldDate, qryDateFmt):
+        query = dateField + " < date '" + oldDate.strftime(qryDateFmt) + "'"
+        startCount = int(self.arcpy.GetCount_management(mosaicDS).getOutput(0))
+        self.arcpy.RemoveRastersFromMosaicDataset_management(mosaicDS, str(query), "NO_BOUNDARY", "NO_MARK_OVERVIEW_ITEMS", \
+                                                             "NO_DELETE_OVERVIEW_IMAGES", "NO_DELETE_ITEM_CACHE", \
+                                                             "REMOVE_MOSAICDATASET_ITEMS", "NO_CELL_SIZES")
+        endCount = int(self.arcpy.GetCount_management(mosaicDS).getOutput(0))
+        return startCount - endCount
+
+    def get_Messages(self, severity=None):
+        if severity == None:
+            return self.arcpy.GetMessages()
+        return self.arcpy.GetMessages(severity)
+
+
+#--------------------------------------------------------------------------
+# Local backend
+#--------------------------------------------------------------------------
+
+# A workspace file with one of these extensions is a SQLite catalog, "Workspace.sqlite\TRMM" is the mosaic dataset "TRMM" inside it.
+CATALOG_EXTENSIONS = (".sqlite", ".db")
+
+# Files that travel with a raster
+RASTER_EXTENSIONS = (".tif", ".tiff")
+RASTER_SIDECAR_EXTENSIONS = (".tfw", ".prj", ".clr", ".tif.aux.xml", ".tif.ovr")
+
+# Only plain names are used as table/field names
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+def _check_Identifier(theName):
+    if not _IDENTIFIER_RE.match(str(theName)):
+        raise ValueError("Invalid catalog table or field name: " + str(theName))
+    return theName
+
+# Paths in the config use '\' (Windows), accept either separator.
+def _split_Path(thePath):
+    thePath = str(thePath).rstrip("\\/")
+    idx = max(thePath.rfind("\\"), thePath.rfind("/"))
+    if idx < 0:
+        return "", thePath
+    return thePath[:idx], thePath[idx + 1:]
+
+
+class LocalBackend(GeoprocessingBackend):
+    '''
+        Local implementation.  Rasters are single band GeoTIFF files with a '.tfw' world file (see ks_GeoTIFF).
+        A workspace is a folder or a SQLite file ('.sqlite' or '.db').  Inside a SQLite workspace,
+            - a mosaic dataset is a table with one row per raster
+              (name, raster_path, timestamp, start_datetime, end_datetime, statistics)
+            - a raster dataset (like the TRMM1Day composite) is stored as "<workspace>_rasters/<name>.tif"
+        The coordinate system is kept in a '.prj' file and the color map in a '.clr' file next to the raster.
+
+        constructor arguments:
+
+            autoCreateMosaics <bool>: create SQLite workspaces and mosaic dataset tables the first time they are used
+                (so a fresh local run does not need a setup step)
+    '''
+    name = "local"
+
+    DATE_FIELDS = ["timestamp", "start_datetime", "end_datetime"]
+
+    def __init__(self, autoCreateMosaics=True):
+        import ks_GeoTIFF
+        self.geotiff = ks_GeoTIFF
+        self.autoCreateMosaics = autoCreateMosaics
+        self._connections = {}
+        self._lock = threading.RLock()
+        self._messages = ""
+
+    # Path helpers
+
+    def _is_Catalog_File(self, thePath):
+        return str(thePath).lower().endswith(CATALOG_EXTENSIONS)
+
+    def _get_Catalog_Path(self, thePath):
+        # Returns (workspace, name) if thePath is a dataset inside a SQLite workspace, otherwise None
+        workspace, theName = _split_Path(thePath)
+        if self._is_Catalog_File(workspace):
+            return workspace, theName
+        return None
+
+    def _get_Catalog_Raster_File(self, workspace, theName):
+        return os.path.join(workspace + "_rasters", theName + ".tif")
+
+    def _get_Raster_File(self, thePath):
+        catalogPath = self._get_Catalog_Path(thePath)
+        if catalogPath != None:
+            return self._get_Catalog_Raster_File(catalogPath[0], catalogPath[1])
+        return thePath
+
+    def _get_Connection(self, workspace):
+        with self._lock:
+            theConnection = self._connections.get(workspace)
+            if theConnection == None:
+                theConnection = sqlite3.connect(workspace, check_same_thread=False, detect_types=sqlite3.PARSE_DECLTYPES)
+                self._connections[workspace] = theConnection
+            return theConnection
+
+    def _table_Exists(self, workspace, tableName):
+        if not os.path.isfile(workspace):
+            return False
+        rows = self._get_Connection(workspace).execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (tableName,)).fetchall()
+        return len(rows) > 0
+
+    def create_Mosaic_Dataset(self, mosaicDS):
+        workspace, tableName = self._get_Catalog_Path(mosaicDS)
+        _check_Identifier(tableName)
+        with self._lock:
+            theConnection = self._get_Connection(workspace)
+            theConnection.execute('CREATE TABLE IF NOT EXISTS "' + tableName + '" ('
+                                  'name TEXT PRIMARY KEY, raster_path TEXT NOT NULL, '
+                                  'timestamp timestamp, start_datetime timestamp, end_datetime timestamp, '
+                                  'stats_min REAL, stats_max REAL, stats_mean REAL, stats_std REAL)')
+            theConnection.execute('CREATE INDEX IF NOT EXISTS "' + tableName + '_timestamp" ON "' + tableName + '" (timestamp)')
+            theConnection.commit()
+
+    def _get_Mosaic_Table(self, mosaicDS):
+        catalogPath = self._get_Catalog_Path(mosaicDS)
+        if catalogPath == None:
+            raise ValueError("Not a mosaic dataset in a SQLite workspace: " + str(mosaicDS))
+        workspace, tableName = catalogPath
+        _check_Identifier(tableName)
+        if not self._table_Exists(workspace, tableName):
+            if not self.autoCreateMosaics:
+                raise ValueError("Mosaic dataset does not exist: " + str(mosaicDS))
+            self.create_Mosaic_Dataset(mosaicDS)
+        return self._get_Connection(workspace), '"' + tableName + '"'
+
+    # Datasets
+
+    def exists(self, thePath):
+        if self._is_Catalog_File(thePath):
+            if not os.path.isfile(thePath) and self.autoCreateMosaics and os.path.isdir(os.path.dirname(thePath) or "."):
+                self._get_Connection(thePath)
+            return os.path.isfile(thePath)
+        catalogPath = self._get_Catalog_Path(thePath)
+        if catalogPath != None:
+            workspace, theName = catalogPath
+            if os.path.isfile(self._get_Catalog_Raster_File(workspace, theName)):
+                return True
+            if self._table_Exists(workspace, theName):
+                return True
+            if self.autoCreateMosaics and os.path.isfile(workspace) and _IDENTIFIER_RE.match(theName):
+                self.create_Mosaic_Dataset(thePath)
+                return True
+            return False
+        return os.path.exists(thePath)
+
+    def describe_DataType(self, thePath):
+        if self._is_Catalog_File(thePath) or os.path.isdir(thePath):
+            return "Workspace"
+        catalogPath = self._get_Catalog_Path(thePath)
+        if catalogPath != None and self._table_Exists(catalogPath[0], catalogPath[1]):
+            return "MosaicDataset"
+        return "RasterDataset"
+
+    def delete(self, thePath):
+        catalogPath = self._get_Catalog_Path(thePath)
+        if catalogPath != None and self._table_Exists(catalogPath[0], catalogPath[1]):
+            with self._lock:
+                theConnection = self._get_Connection(catalogPath[0])
+                theConnection.execute('DROP TABLE "' + _check_Identifier(catalogPath[1]) + '"')
+                theConnection.commit()
+            return
+        rasterFile = self._get_Raster_File(thePath)
+        basePath = os.path.splitext(rasterFile)[0]
+        for thePathToRemove in [rasterFile] + [basePath + ext for ext in RASTER_SIDECAR_EXTENSIONS]:
+            if os.path.isfile(thePathToRemove):
+                os.remove(thePathToRemove)
+
+    def list_Rasters(self, theFolder):
+        if not os.path.isdir(theFolder):
+            return []
+        return sorted([f for f in os.listdir(theFolder) if f.lower().endswith(RASTER_EXTENSIONS)])
+
+    def change_Privileges(self, thePath, theRole, viewPrivilege, editPrivilege):
+        # There are no users or roles in a local catalog.
+        pass
+
+    # Rasters
+
+    def set_Scratch_Workspace(self, theFolder):
+        # Nothing here writes temporary files, every call writes its output directly
+        self.scratch_Workspace = theFolder
+
+    def copy_Raster(self, inRaster, outRaster):
+        inRasterFile = self._get_Raster_File(inRaster)
+        outRasterFile = self._get_Raster_File(outRaster)
+        outFolder = os.path.dirname(outRasterFile)
+        if outFolder and not os.path.isdir(outFolder):
+            os.makedirs(outFolder)
+        theRaster = self.geotiff.read_GeoTIFF(inRasterFile)
+        self.geotiff.write_GeoTIFF(outRasterFile, theRaster['array'], theRaster['worldFile'], theRaster['nodata'])
+        # Keep the coordinate system and color map with the copy
+        for ext in (".prj", ".clr"):
+            inSidecar = os.path.splitext(inRasterFile)[0] + ext
+            if os.path.isfile(inSidecar):
+                shutil.copyfile(inSidecar, os.path.splitext(outRasterFile)[0] + ext)
+
+    def replace_Raster(self, newRaster, targetRaster):
+        # Each file is renamed over the old one (a single rename), the raster itself last.
+        newBasePath = os.path.splitext(self._get_Raster_File(newRaster))[0]
+        targetRasterFile = self._get_Raster_File(targetRaster)
+        targetBasePath = os.path.splitext(targetRasterFile)[0]
+        for ext in RASTER_SIDECAR_EXTENSIONS:
+            if os.path.isfile(newBasePath + ext):
+                replace_File(newBasePath + ext, targetBasePath + ext)
+            elif os.path.isfile(targetBasePath + ext):
+                os.remove(targetBasePath + ext)
+        replace_File(self._get_Raster_File(newRaster), targetRasterFile)
+
+    def add_Colormap(self, theRaster, colorMapFile):
+        # ArcGIS (and GDAL) pick up a '.clr' file with the same base name as the raster.
+        shutil.copyfile(colorMapFile, os.path.splitext(self._get_Raster_File(theRaster))[0] + ".clr")
+
+    def define_Projection(self, theRaster, coor_system):
+        with open(os.path.splitext(self._get_Raster_File(theRaster))[0] + ".prj", "w") as f:
+            f.write(str(coor_system))
+        return str(coor_system)
+
+    def write_Raster(self, inRaster, outRaster, coor_system, colorMap):
+        outRasterFile = self._get_Raster_File(outRaster)
+        outFolder = os.path.dirname(outRasterFile)
+        if outFolder and not os.path.isdir(outFolder):
+            os.makedirs(outFolder)
+        theRaster = self.geotiff.read_GeoTIFF(self._get_Raster_File(inRaster), True)
+        self.geotiff.write_GeoTIFF(outRasterFile, theRaster['array'], theRaster['worldFile'], theRaster['nodata'])
+        outBasePath = os.path.splitext(outRasterFile)[0]
+        with open(outBasePath + ".prj", "w") as f:
+            f.write(str(coor_system))
+        if colorMap != None:
+            with open(outBasePath + ".clr", "w") as f:
+                f.write(format_ColorMap(colorMap))
+        return str(coor_system)
+
+    # Mosaic datasets
+
+    def get_Field_Values(self, mosaicDS, theField):
+        theConnection, tableName = self._get_Mosaic_Table(mosaicDS)
+        with self._lock:
+            return [row[0] for row in theConnection.execute("SELECT " + _check_Identifier(theField) + " FROM " + tableName)]
+
+    def get_Max_Field_Value(self, mosaicDS, theField):
+        theConnection, tableName = self._get_Mosaic_Table(mosaicDS)
+        theField = _check_Identifier(theField)
+        # Not MAX(), sqlite drops the declared column type on aggregates (the timestamp would come back as a string)
+        with self._lock:
+            row = theConnection.execute("SELECT " + theField + " FROM " + tableName + " WHERE " + theField + " IS NOT NULL ORDER BY " + theField + " DESC LIMIT 1").fetchone()
+        if row == None:
+            return None
+        return row[0]
+
+    def add_Rasters_To_Mosaic(self, mosaicDS, rasterFileList, coor_system):
+        theConnection, tableName = self._get_Mosaic_Table(mosaicDS)
+        theRows = []
+        for rasterFile in rasterFileList:
+            if not os.path.isfile(rasterFile):
+                self._messages = "Raster does not exist: " + str(rasterFile)
+                raise IOError(self._messages)
+            theRows.append((os.path.splitext(os.path.basename(rasterFile))[0], os.path.abspath(rasterFile)))
+        with self._lock:
+            # EXCLUDE_DUPLICATES
+            theConnection.executemany("INSERT OR IGNORE INTO " + tableName + " (name, raster_path) VALUES (?, ?)", theRows)
+            theConnection.commit()
+
+    def calculate_Mosaic_Statistics(self, mosaicDS):
+        import numpy
+        theConnection, tableName = self._get_Mosaic_Table(mosaicDS)
+        # SKIP_EXISTING, only rasters without statistics
+        with self._lock:
+            theRows = theConnection.execute("SELECT name, raster_path FROM " + tableName + " WHERE stats_min IS NULL").fetchall()
+        theStats = []
+        for theName, rasterPath in theRows:
+            try:
+                theRaster = self.geotiff.read_GeoTIFF(rasterPath)
+            except:
+                self._messages = "Could not read " + str(rasterPath) + ", " + str(sys.exc_info()[1])
+                continue
+            theValues = theRaster['array']
+            if theRaster['nodata'] != None:
+                theValues = theValues[theValues != theRaster['nodata']]
+            if theValues.size == 0:
+                continue
+            theValues = theValues.astype(numpy.float64)
+            theStats.append((float(theValues.min()), float(theValues.max()), float(theValues.mean()), float(theValues.std()), theName))
+        with self._lock:
+            theConnection.executemany("UPDATE " + tableName + " SET stats_min = ?, stats_max = ?, stats_mean = ?, stats_std = ? WHERE name = ?", theStats)
+            theConnection.commit()
+
+    def update_Mosaic_Attributes(self, mosaicDS, attrNameList, valuesByName):
+        theConnection, tableName = self._get_Mosaic_Table(mosaicDS)
+        setClause = ", ".join([_check_Identifier(attrName) + " = ?" for attrName in attrNameList])
+        with self._lock:
+            existingNames = set([row[0] for row in theConnection.execute("SELECT name FROM " + tableName)])
+            updatedNames = [theName for theName in valuesByName.keys() if theName in existingNames]
+            theConnection.executemany("UPDATE " + tableName + " SET " + setClause + " WHERE name = ?", [list(valuesByName[theName]) + [theName] for theName in updatedNames])
+            theConnection.commit()
+        return updatedNames
+
+    def remove_Mosaic_Rasters_Before(self, mosaicDS, dateField, oldDate, qryDateFmt):
+        theConnection, tableName = self._get_Mosaic_Table(mosaicDS)
+        # Same cut off the arcpy query uses ("field < date 'oldDate formatted with qryDateFmt'")
+        cutOffDate = datetime.datetime.strptime(oldDate.strftime(qryDateFmt), qryDateFmt)
+        with self._lock:
+            theCursor = theConnection.execute("DELETE FROM " + tableName + " WHERE " + _check_Identifier(dateField) + " < ?", (cutOffDate,))
+            theConnection.commit()
+            return theCursor.rowcount
+
+    def get_Messages(self, severity=None):
+        return self._messages
+
+    def close(self):
+        with self._lock:
+            for theConnection in self._connections.values():
+                theConnection.close()
+            self._connections = {}
+
+
+# Returns the backend for a 'Geoprocessing_Backend' setting ("arcpy" or "local")
+def get_Backend(backendName):
+    backendName = str(backendName).strip().lower()
+    if backendName == "local":
+        return LocalBackend()
+    if backendName == "arcpy":
+        return ArcpyBackend()
+    raise ValueError("Unknown geoprocessing backend: " + str(backendName))
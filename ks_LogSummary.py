@@ -0,0 +1,136 @@
+#-------------------------------------------------------------------------------
+# Name:        ks_LogSummary.py
+# Purpose:     Summarises the structured log records of the ETL (the
+#               <prefix>_log_records_<date>.jsonl files written by
+#               ks_AdpatedLogger when Logger_Structured_Records is on).  The
+#               granule records are grouped by stage, and by correlation id for
+#               the time each granule spent in all the stages together.
+#
+# Author:      SERVIR ETL
+#
+# Created:     10/18/2026 (mm/dd/yyyy)
+# Copyright:   (c) SERVIR 2026
+# Licence:     <your licence>
+#
+# Usage:       python ks_LogSummary.py <records file> [<records file> ...] [--run <run id>]
+#-------------------------------------------------------------------------------
+
+import argparse
+import json
+import sys
+
+
+# Stages in the order they run, any other stage found in the records is listed after these
+STAGE_ORDER = ["Extract", "Transform", "Load", "PostETL"]
+
+# Percentiles printed for each stage
+PERCENTILES = [50, 95, 99]
+
+
+# Percentile of a sorted list (linear between the two closest ranks), None for an empty list
+def get_Percentile(sortedValues, percent):
+    if len(sortedValues) == 0:
+        return None
+    thePosition = (len(sortedValues) - 1) * percent / 100.0
+    lowerIndex = int(thePosition)
+    upperIndex = min(lowerIndex + 1, len(sortedValues) - 1)
+    return sortedValues[lowerIndex] + (sortedValues[upperIndex] - sortedValues[lowerIndex]) * (thePosition - lowerIndex)
+
+
+# Granule records from JSON lines files (lines which are not JSON, and records of other types or runs, are skipped)
+def read_Granule_Records(recordsFilePaths, runID=None):
+    theRecords = []
+    for recordsFilePath in recordsFilePaths:
+        with open(recordsFilePath, "r") as f:
+            for theLine in f:
+                try:
+                    theRecord = json.loads(theLine)
+                except ValueError:
+                    continue
+                if not isinstance(theRecord, dict) or theRecord.get('type') != "granule":
+                    continue
+                if runID != None and theRecord.get('run') != runID:
+                    continue
+                theRecords.append(theRecord)
+    return theRecords
+
+
+def summarise_Granule_Records(theRecords):
+    '''
+        theRecords <list>: granule records ({'stage', 'granule', 'cid', 'seconds', 'bytes', 'outcome', ...})
+
+        Returns {'Stages': [(stageName, stageSummary), ...] in STAGE_ORDER, then the other stages by name,
+                 'Granules': stageSummary of the seconds of each correlation id added up over its stages}
+        stageSummary is {'Count', 'Timed', 'Percentiles' ({percent: seconds}), 'Max_Seconds', 'Bytes' (None when no record has bytes),
+            'Outcomes' ({outcome: count})}
+    '''
+    secondsByStage = {}
+    summaryByStage = {}
+    secondsByCorrelationID = {}
+    for theRecord in theRecords:
+        stageName = theRecord.get('stage') or "(none)"
+        stageSummary = summaryByStage.setdefault(stageName, {'Count': 0, 'Bytes': None, 'Outcomes': {}})
+        stageSummary['Count'] += 1
+        if theRecord.get('bytes') != None:
+            stageSummary['Bytes'] = (stageSummary['Bytes'] or 0) + theRecord['bytes']
+        theOutcome = theRecord.get('outcome')
+        stageSummary['Outcomes'][theOutcome] = stageSummary['Outcomes'].get(theOutcome, 0) + 1
+        if theRecord.get('seconds') != None:
+            secondsByStage.setdefault(stageName, []).append(theRecord['seconds'])
+            correlationID = theRecord.get('cid') or theRecord.get('granule')
+            secondsByCorrelationID[correlationID] = secondsByCorrelationID.get(correlationID, 0.0) + theRecord['seconds']
+
+    for stageName, stageSummary in summaryByStage.items():
+        _add_Percentiles(stageSummary, secondsByStage.get(stageName, []))
+    granuleSummary = {'Count': len(secondsByCorrelationID), 'Bytes': None, 'Outcomes': {}}
+    _add_Percentiles(granuleSummary, list(secondsByCorrelationID.values()))
+
+    stageNames = [stageName for stageName in STAGE_ORDER if stageName in summaryByStage]
+    stageNames += sorted([stageName for stageName in summaryByStage.keys() if not stageName in STAGE_ORDER])
+    return {
+        'Stages': [(stageName, summaryByStage[stageName]) for stageName in stageNames],
+        'Granules': granuleSummary
+    }
+
+def _add_Percentiles(theSummary, theSeconds):
+    theSeconds = sorted(theSeconds)
+    theSummary['Timed'] = len(theSeconds)
+    theSummary['Percentiles'] = dict([(percent, get_Percentile(theSeconds, percent)) for percent in PERCENTILES])
+    theSummary['Max_Seconds'] = theSeconds[-1] if len(theSeconds) > 0 else None
+
+
+def _format_Seconds(theSeconds):
+    if theSeconds == None:
+        return "%9s" % "-"
+    return "%9.3f" % theSeconds
+
+def _format_Summary_Line(theName, theSummary):
+    theColumns = ["%-10s" % theName, "%8d" % theSummary['Count'], "%8d" % theSummary['Timed']]
+    theColumns += [_format_Seconds(theSummary['Percentiles'][percent]) for percent in PERCENTILES]
+    theColumns.append(_format_Seconds(theSummary['Max_Seconds']))
+    theColumns.append("%12s" % ("-" if theSummary['Bytes'] == None else str(theSummary['Bytes'])))
+    theColumns.append(", ".join(["%s %d" % (theOutcome, theCount) for theOutcome, theCount in sorted(theSummary['Outcomes'].items())]))
+    return "  ".join(theColumns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per stage p50/p95/p99 (seconds) of the granule records in ETL log records files")
+    parser.add_argument("records_files", nargs="+", help="<prefix>_log_records_<date>.jsonl file(s)")
+    parser.add_argument("--run", default=None, help="only the records of this run id")
+    args = parser.parse_args()
+
+    theRecords = read_Granule_Records(args.records_files, args.run)
+    if len(theRecords) == 0:
+        print("No granule records found")
+        return 1
+    theSummary = summarise_Granule_Records(theRecords)
+    print("  ".join(["%-10s" % "stage", "%8s" % "records", "%8s" % "timed"] + ["%9s" % ("p%d s" % percent) for percent in PERCENTILES] + ["%9s" % "max s", "%12s" % "bytes", "outcomes"]))
+    for stageName, stageSummary in theSummary['Stages']:
+        print(_format_Summary_Line(stageName, stageSummary))
+    # Time each granule spent in all the stages, granules in a batch (Load, PostETL) count the whole batch time
+    print(_format_Summary_Line("granule", theSummary['Granules']))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,218 @@
+#-------------------------------------------------------------------------------
+# Name:        ks_MappedRaster.py
+# Purpose:     Zero copy access to the 3 hour rasters.  The pixels of an
+#               uncompressed GeoTIFF (strips or tiles) are memory mapped and
+#               handed out as NumPy views, so only the pages that are touched
+#               are read (from the OS cache).  Georeferencing comes from the
+#               '.tfw' next to the raster (see ks_GeoTIFF).  Open rasters are
+#               kept in a least recently used cache with a size limit, so a
+#               long window (240 rasters for 30 days) is never all in RAM.
+#
+# Author:      SERVIR ETL
+#
+# Created:     10/18/2026 (mm/dd/yyyy)
+# Copyright:   (c) SERVIR 2026
+# Licence:     <your licence>
+#
+#-------------------------------------------------------------------------------
+
+import bisect
+import os
+import threading
+from collections import OrderedDict
+
+import numpy
+
+import ks_GeoTIFF
+
+
+# Default limits of a RasterHandleCache
+DEFAULT_MAX_HANDLES = 256
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class MappedRaster(object):
+    '''
+        MappedRaster(rasterPath)
+
+        MappedRaster.read_Rows(row0, row1)      Rows row0 up to (not including) row1 as a 2D array.  A view into the mapped
+                                                file when the rows are in one strip (or one contiguous run of strips), otherwise
+                                                only the strips / tiles holding those rows are copied into a new array.
+        MappedRaster.get_Array()                The whole raster (a view for contiguous strips, what write_GeoTIFF produces)
+        MappedRaster.shape, .dtype, .nodata, .worldFile
+        MappedRaster.isMapped                   False when the raster could not be mapped (compressed, or strips / tiles
+                                                cut short), it is then read in whole with ks_GeoTIFF.read_GeoTIFF
+        MappedRaster.nbytes                     Size of the pixels
+
+        Mapped samples are in the byte order of the file (numpy converts them on arithmetic), views are read only.
+    '''
+    def __init__(self, rasterPath):
+        self.rasterPath = rasterPath
+        theHeader = ks_GeoTIFF.read_GeoTIFF_Header(rasterPath)
+        self.shape = (theHeader['numOfRows'], theHeader['numOfCols'])
+        self.dtype = theHeader['dtype']
+        self.nodata = theHeader['nodata']
+        self.worldFile = theHeader['worldFile']
+        self.nbytes = self.shape[0] * self.shape[1] * self.dtype.itemsize
+
+        # Row bands, [(row0, rows, [(col0, cols, 2D view), ...]), ...], one block per band for strips
+        self._bands = None
+        if theHeader['compression'] == ks_GeoTIFF.COMPRESSION_NONE and theHeader['predictor'] == 1:
+            self._bands = self._get_Mapped_Bands(theHeader)
+        self.isMapped = self._bands != None
+        if not self.isMapped:
+            theRaster = ks_GeoTIFF.read_GeoTIFF(rasterPath)
+            self.dtype = theRaster['array'].dtype
+            self._bands = [(0, self.shape[0], [(0, self.shape[1], theRaster['array'])])]
+        self._bandRowStarts = [theBand[0] for theBand in self._bands]
+
+    # Views of every strip or tile in the mapped file, or None if one of them is not all there
+    def _get_Mapped_Bands(self, theHeader):
+        tags = theHeader['tags']
+        numOfRows, numOfCols = self.shape
+        if numOfRows == 0 or numOfCols == 0:
+            return None
+        fileSize = os.path.getsize(self.rasterPath)
+        if ks_GeoTIFF.TAG_TILE_OFFSETS in tags:
+            blockRows = tags[ks_GeoTIFF.TAG_TILE_LENGTH][0]
+            blockCols = tags[ks_GeoTIFF.TAG_TILE_WIDTH][0]
+            offsets = tags[ks_GeoTIFF.TAG_TILE_OFFSETS]
+            byteCounts = tags.get(ks_GeoTIFF.TAG_TILE_BYTE_COUNTS, [])
+        elif ks_GeoTIFF.TAG_STRIP_OFFSETS in tags:
+            blockRows = min(tags.get(ks_GeoTIFF.TAG_ROWS_PER_STRIP, [numOfRows])[0], numOfRows)
+            blockCols = numOfCols
+            offsets = tags[ks_GeoTIFF.TAG_STRIP_OFFSETS]
+            byteCounts = tags.get(ks_GeoTIFF.TAG_STRIP_BYTE_COUNTS, [])
+        else:
+            return None
+        blocksAcross = (numOfCols + blockCols - 1) // blockCols
+        blocksDown = (numOfRows + blockRows - 1) // blockRows
+        if len(offsets) < blocksAcross * blocksDown or len(byteCounts) < len(offsets):
+            return None
+
+        # Plain ndarray over the whole file (the mapping stays open as long as a view of it is alive)
+        theBytes = numpy.memmap(self.rasterPath, dtype=numpy.uint8, mode='r').view(numpy.ndarray)
+        itemSize = self.dtype.itemsize
+        theBands = []
+        for bandIndex in range(blocksDown):
+            row0 = bandIndex * blockRows
+            rows = min(blockRows, numOfRows - row0)
+            # The last strip only holds the rows that are left, a tile is always whole
+            storedRows = blockRows if blocksAcross > 1 or ks_GeoTIFF.TAG_TILE_OFFSETS in tags else rows
+            blockSize = storedRows * blockCols * itemSize
+            theBlocks = []
+            for colIndex in range(blocksAcross):
+                blockIndex = bandIndex * blocksAcross + colIndex
+                offset = offsets[blockIndex]
+                if byteCounts[blockIndex] < blockSize or offset + blockSize > fileSize:
+                    return None
+                col0 = colIndex * blockCols
+                theView = theBytes[offset:offset + blockSize].view(self.dtype).reshape((storedRows, blockCols))
+                theBlocks.append((col0, min(blockCols, numOfCols - col0), theView[:rows, :numOfCols - col0]))
+            theBands.append((row0, rows, theBlocks))
+
+        # Strips that follow each other in the file are one view
+        if blocksAcross == 1 and len(theBands) > 1:
+            expectedOffset = offsets[0]
+            for bandIndex in range(blocksDown):
+                if offsets[bandIndex] != expectedOffset:
+                    break
+                expectedOffset += theBands[bandIndex][1] * numOfCols * itemSize
+            else:
+                theView = theBytes[offsets[0]:offsets[0] + self.nbytes].view(self.dtype).reshape(self.shape)
+                theBands = [(0, numOfRows, [(0, numOfCols, theView)])]
+        return theBands
+
+    def read_Rows(self, row0, row1):
+        row0 = max(0, row0)
+        row1 = min(self.shape[0], row1)
+        if row1 <= row0:
+            return numpy.empty((0, self.shape[1]), dtype=self.dtype)
+        bandIndex = bisect.bisect_right(self._bandRowStarts, row0) - 1
+        bandRow0, bandRows, theBlocks = self._bands[bandIndex]
+        if row1 <= bandRow0 + bandRows and len(theBlocks) == 1:
+            return theBlocks[0][2][row0 - bandRow0:row1 - bandRow0]
+
+        theRows = numpy.empty((row1 - row0, self.shape[1]), dtype=self.dtype)
+        while bandIndex < len(self._bands) and self._bands[bandIndex][0] < row1:
+            bandRow0, bandRows, theBlocks = self._bands[bandIndex]
+            r0 = max(row0, bandRow0)
+            r1 = min(row1, bandRow0 + bandRows)
+            for col0, cols, theView in theBlocks:
+                theRows[r0 - row0:r1 - row0, col0:col0 + cols] = theView[r0 - bandRow0:r1 - bandRow0]
+            bandIndex += 1
+        return theRows
+
+    def get_Array(self):
+        return self.read_Rows(0, self.shape[0])
+
+
+class RasterHandleCache(object):
+    '''
+        RasterHandleCache(maxHandles, maxBytes)
+
+        RasterHandleCache.get(rasterPath)           MappedRaster for the file, opened on first use and opened again if the file
+                                                    changed (size or modification time)
+        RasterHandleCache.invalidate(rasterPath)    Drops the handle of one file (call it after replacing or deleting the file)
+        RasterHandleCache.clear()                   Drops every handle
+        RasterHandleCache.get_Stats()               {'Hits', 'Misses', 'Evictions', 'Handles', 'Bytes'}
+
+        Least recently used handles are dropped when there are more than maxHandles of them, or when their pixels add up
+        to more than maxBytes.  Mapped pixels count too, the pages that were touched stay resident in this process (the OS
+        can drop them, but they show in its RSS) until the mapping is closed.  A dropped mapping is closed once the views
+        handed out of it are gone.  Safe to call from more than one thread.
+    '''
+    def __init__(self, maxHandles=DEFAULT_MAX_HANDLES, maxBytes=DEFAULT_MAX_BYTES):
+        self.maxHandles = max(1, int(maxHandles))
+        self.maxBytes = max(0, int(maxBytes))
+        self._lock = threading.Lock()
+        # {rasterPath: ((size, mtime), MappedRaster)}, least recently used first
+        self._handles = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _drop(self, rasterPath):
+        theKey, theRaster = self._handles.pop(rasterPath)
+        self._bytes -= theRaster.nbytes
+
+    def get(self, rasterPath):
+        theStat = os.stat(rasterPath)
+        theKey = (theStat.st_size, theStat.st_mtime)
+        with self._lock:
+            theEntry = self._handles.get(rasterPath)
+            if theEntry != None:
+                if theEntry[0] == theKey:
+                    self._hits += 1
+                    del self._handles[rasterPath]
+                    self._handles[rasterPath] = theEntry
+                    return theEntry[1]
+                self._drop(rasterPath)
+
+        # Opened outside the lock, a compressed raster can take a while to read
+        theRaster = MappedRaster(rasterPath)
+        with self._lock:
+            self._misses += 1
+            if rasterPath in self._handles:
+                self._drop(rasterPath)
+            self._handles[rasterPath] = (theKey, theRaster)
+            self._bytes += theRaster.nbytes
+            while len(self._handles) > 1 and (len(self._handles) > self.maxHandles or self._bytes > self.maxBytes):
+                self._drop(next(iter(self._handles)))
+                self._evictions += 1
+        return theRaster
+
+    def invalidate(self, rasterPath):
+        with self._lock:
+            if rasterPath in self._handles:
+                self._drop(rasterPath)
+
+    def clear(self):
+        with self._lock:
+            self._handles.clear()
+            self._bytes = 0
+
+    def get_Stats(self):
+        with self._lock:
+            return {'Hits': self._hits, 'Misses': self._misses, 'Evictions': self._evictions, 'Handles': len(self._handles), 'Bytes': self._bytes}
@@ -0,0 +1,201 @@
+#-------------------------------------------------------------------------------
+# Name:        ks_Metrics.py
+# Purpose:     Run metrics for the ETL.  Timed spans (per stage, per granule and
+#               per geoprocessing call) and counters (bytes transferred, files
+#               processed) are written as JSON lines next to the debug log, with
+#               an optional Prometheus text format dump at the end of the run.
+#
+# Author:      SERVIR ETL
+#
+# Created:     10/18/2026 (mm/dd/yyyy)
+# Copyright:   (c) SERVIR 2026
+# Licence:     <your licence>
+#
+#-------------------------------------------------------------------------------
+
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from ks_GeoprocessingBackend import replace_File
+
+
+# Prefix of every metric in the Prometheus dump
+PROMETHEUS_PREFIX = "trmm_etl_"
+
+
+def _get_Prometheus_Name(theName):
+    return PROMETHEUS_PREFIX + re.sub(r"[^a-zA-Z0-9_]", "_", theName)
+
+def _get_Prometheus_Labels(labelItems):
+    if len(labelItems) == 0:
+        return ""
+    return "{" + ",".join(['%s="%s"' % (re.sub(r"[^a-zA-Z0-9_]", "_", k), str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in labelItems]) + "}"
+
+
+class ETLMetrics(object):
+
+    """
+        constructor arguments:
+
+            metrics_dir <str>: output directory for the metrics files (normally the debug log directory)
+            metrics_basename <str>: name of the metrics file
+            metrics_options <dict>:
+
+                'log_datetime_format' <str>: datetime format in the file name (same as the debug log)
+                'is_enabled' <bool>: False records nothing (every call is a no-op), default True
+                'run_id' <str>: id written on every record, defaults to the run start time
+
+        fields:
+
+            metrics_file_path <str>: the full path of the JSON lines file
+            run_id: see above
+
+        public interface:
+
+            span(name, labels=None) <context manager>: times the 'with' block as one span
+            record_Span(name, seconds, labels=None, isOK=True) <void>: records a span that was timed elsewhere
+            increment(name, value=1, labels=None) <void>: adds to a counter
+            get_Summary() <dict>: {'Spans': {name: {'Count','Total_Seconds','Max_Seconds','Num_Failed'}}, 'Counters': {name: value}}
+            close() <void>: writes the counter and span totals for the run to the JSON lines file
+            write_Prometheus(outFilePath) <void>: writes the totals in the Prometheus text format (replaces the file atomically)
+
+        Each line in the file is one JSON object, 'type' is "span", "span_total" or "counter".
+        Labels are a flat {str: str} dict, spans are totalled by name only (not by labels) and counters by name and labels.
+    """
+
+    def __init__(self, metrics_dir, metrics_basename, metrics_options):
+
+        self.log_datetime_format = metrics_options.get('log_datetime_format', '%Y-%m-%d')
+        self.is_enabled = metrics_options.get('is_enabled', True)
+        self.run_id = metrics_options.get('run_id', datetime.strftime(datetime.now(), '%Y%m%dT%H%M%S'))
+
+        log_datetime_string = datetime.strftime(datetime.now(), self.log_datetime_format)
+        self.metrics_file_path = os.path.join(metrics_dir, "%s_%s.%s" % (metrics_basename, log_datetime_string, "jsonl"))
+
+        self._lock = threading.Lock()
+        self._span_totals = {}
+        self._counters = {}
+        self._file = None
+        if self.is_enabled:
+            if not os.path.isdir(metrics_dir):
+                os.makedirs(metrics_dir)
+            self._file = open(self.metrics_file_path, "a")
+
+    def _write_Record(self, theRecord):
+        theRecord['run'] = self.run_id
+        theRecord['ts'] = datetime.utcnow().isoformat() + "Z"
+        theLine = json.dumps(theRecord, sort_keys=True)
+        # Called with self._lock held
+        if self._file != None:
+            self._file.write(theLine + "\n")
+            self._file.flush()
+
+    @contextmanager
+    def span(self, name, labels=None):
+        timeStart = time.time()
+        isOK = False
+        try:
+            yield
+            isOK = True
+        finally:
+            self.record_Span(name, time.time() - timeStart, labels, isOK)
+
+    def record_Span(self, name, seconds, labels=None, isOK=True):
+        if not self.is_enabled:
+            return
+        with self._lock:
+            theTotal = self._span_totals.setdefault(name, {'Count': 0, 'Total_Seconds': 0.0, 'Max_Seconds': 0.0, 'Num_Failed': 0})
+            theTotal['Count'] += 1
+            theTotal['Total_Seconds'] += seconds
+            theTotal['Max_Seconds'] = max(theTotal['Max_Seconds'], seconds)
+            if not isOK:
+                theTotal['Num_Failed'] += 1
+            self._write_Record({'type': "span", 'name': name, 'seconds': round(seconds, 6), 'ok': isOK, 'labels': labels or {}})
+
+    def increment(self, name, value=1, labels=None):
+        if not self.is_enabled:
+            return
+        theKey = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            self._counters[theKey] = self._counters.get(theKey, 0) + value
+
+    def get_Summary(self):
+        with self._lock:
+            theCounters = {}
+            for (name, labelItems), value in self._counters.items():
+                theCounters[name] = theCounters.get(name, 0) + value
+            return {
+                'Spans': dict([(name, dict(theTotal)) for name, theTotal in self._span_totals.items()]),
+                'Counters': theCounters
+            }
+
+    def close(self):
+        with self._lock:
+            if self._file == None:
+                return
+            for name in sorted(self._span_totals.keys()):
+                theTotal = self._span_totals[name]
+                self._write_Record({'type': "span_total", 'name': name, 'count': theTotal['Count'], 'seconds': round(theTotal['Total_Seconds'], 6), 'max_seconds': round(theTotal['Max_Seconds'], 6), 'failed': theTotal['Num_Failed']})
+            for (name, labelItems) in sorted(self._counters.keys()):
+                self._write_Record({'type': "counter", 'name': name, 'value': self._counters[(name, labelItems)], 'labels': dict(labelItems)})
+            self._file.close()
+            self._file = None
+
+    def write_Prometheus(self, outFilePath):
+        if not self.is_enabled:
+            return
+        theLines = []
+        with self._lock:
+            spanNames = sorted(self._span_totals.keys())
+            for metricName, metricType, totalKey in [("span_seconds_total", "counter", 'Total_Seconds'),
+                                                     ("span_count_total", "counter", 'Count'),
+                                                     ("span_failed_total", "counter", 'Num_Failed'),
+                                                     ("span_seconds_max", "gauge", 'Max_Seconds')]:
+                theLines.append("# TYPE %s %s" % (_get_Prometheus_Name(metricName), metricType))
+                for name in spanNames:
+                    theLines.append("%s%s %s" % (_get_Prometheus_Name(metricName), _get_Prometheus_Labels([("span", name)]), repr(float(self._span_totals[name][totalKey]))))
+            typedNames = set()
+            for (name, labelItems) in sorted(self._counters.keys()):
+                if not name in typedNames:
+                    theLines.append("# TYPE %s counter" % _get_Prometheus_Name(name + "_total"))
+                    typedNames.add(name)
+                theLines.append("%s%s %s" % (_get_Prometheus_Name(name + "_total"), _get_Prometheus_Labels(list(labelItems)), repr(float(self._counters[(name, labelItems)]))))
+            theLines.append("# TYPE %s gauge" % _get_Prometheus_Name("last_run_timestamp_seconds"))
+            theLines.append("%s %s" % (_get_Prometheus_Name("last_run_timestamp_seconds"), repr(time.time())))
+
+        # Prometheus' textfile collector may read the file at any time, so it is swapped in whole
+        tempPath = outFilePath + ".tmp"
+        with open(tempPath, "w") as f:
+            f.write("\n".join(theLines) + "\n")
+        replace_File(tempPath, outFilePath)
+
+
+class InstrumentedBackend(object):
+    '''
+        Wraps a geoprocessing backend (see ks_GeoprocessingBackend) so every call is recorded as a
+        "gp.<method>" span, labelled with the name of the dataset it was called on.
+        Everything else (like the 'name' attribute) passes straight through.
+    '''
+    NOT_TIMED = ("get_Messages", "close")
+
+    def __init__(self, theBackend, theMetrics):
+        self._backend = theBackend
+        self._metrics = theMetrics
+
+    def __getattr__(self, attrName):
+        theAttr = getattr(self._backend, attrName)
+        if attrName.startswith("_") or attrName in InstrumentedBackend.NOT_TIMED or not callable(theAttr):
+            return theAttr
+        theMetrics = self._metrics
+        def timed_Call(*args, **kwargs):
+            labels = {}
+            if len(args) > 0 and isinstance(args[0], basestring):
+                labels['target'] = os.path.basename(args[0].replace("\\", "/"))
+            with theMetrics.span("gp." + attrName, labels):
+                return theAttr(*args, **kwargs)
+        return timed_Call
@@ -0,0 +1,117 @@
+#-------------------------------------------------------------------------------
+# Name:        ks_MosaicLoad.py
+# Purpose:     Batched Load step.  All the rasters from a run are added to
+#               their mosaic dataset in one call, the time attributes are set
+#               in one cursor pass and the mosaic statistics are calculated
+#               once at the end (instead of once per raster).
+#
+# Author:      SERVIR ETL
+#
+# Created:     10/18/2026 (mm/dd/yyyy)
+# Copyright:   (c) SERVIR 2026
+# Licence:     <your licence>
+#
+#-------------------------------------------------------------------------------
+
+import datetime
+import os
+import sys
+
+
+# Name of the raster inside the mosaic dataset, same rule the single raster load uses.
+def get_RasterName(rasterFile):
+    return os.path.basename(rasterFile).replace(".tif","")
+
+
+# Values for the 'timestamp', 'start_datetime' and 'end_datetime' fields of a 3 hour raster.
+TIME_ATTRIBUTE_NAMES = ["timestamp", "start_datetime", "end_datetime"]
+
+def get_Time_Attribute_Values(currentDateTime):
+    return [currentDateTime, currentDateTime - datetime.timedelta(hours=1.5), currentDateTime + datetime.timedelta(hours=1.5)]
+
+
+def load_TransformItems_Batch(theBackend, transformItemList, get_DateTime_From_RasterName, geoDB_MosaicDataset_Workspace, coor_system, debug_logger=None):
+    '''
+        theBackend <GeoprocessingBackend>: does the actual geoprocessing
+        transformItemList <list>: transform items, each has a 'Transformed_File_List'
+            (list of {"out_raster_file_location", "mosaic_ds_name", ...})
+        get_DateTime_From_RasterName <function>: returns the datetime of a raster from its name
+        geoDB_MosaicDataset_Workspace <str>: workspace holding the mosaic datasets
+        coor_system: passed on to theBackend.add_Rasters_To_Mosaic
+        debug_logger <function>: called as debug_logger(msg, detailedLoggingItem, *msgArgs), msg % msgArgs is only built if it is logged
+
+        Returns a list with one {'NumberLoaded': n} per transform item, in the same order.  n only counts the rasters found in
+        the mosaic dataset once they were added (by theBackend.update_Mosaic_Attributes).
+    '''
+    def _log(theMsg, detailedLoggingItem=False, *msgArgs):
+        if debug_logger != None:
+            debug_logger(theMsg, detailedLoggingItem, *msgArgs)
+
+    # Group the rasters by mosaic dataset, remembering which transform item each one came from.
+    mosaicDS_List = []
+    rastersByMosaicDS = {}
+    for itemIndex in range(len(transformItemList)):
+        for fileDict in transformItemList[itemIndex]['Transformed_File_List']:
+            mosaicDS = os.path.join(geoDB_MosaicDataset_Workspace, fileDict["mosaic_ds_name"])
+            if not mosaicDS in rastersByMosaicDS:
+                rastersByMosaicDS[mosaicDS] = []
+                mosaicDS_List.append(mosaicDS)
+            rastersByMosaicDS[mosaicDS].append((itemIndex, fileDict["out_raster_file_location"]))
+
+    numLoadedByItem = [0] * len(transformItemList)
+    for mosaicDS in mosaicDS_List:
+        currentRasters = rastersByMosaicDS[mosaicDS]
+
+        # For now, skip the files if the mosaic dataset doesn't exist.
+        if not theBackend.exists(mosaicDS):
+            _log("load_TransformItems_Batch: Mosaic dataset " + str(mosaicDS) + " does not exist.  Skipping " + str(len(currentRasters)) + " rasters")
+            continue
+
+        # Add every raster in one call
+        rasterFileList = [rasterFile for itemIndex, rasterFile in currentRasters]
+        try:
+            theBackend.add_Rasters_To_Mosaic(mosaicDS, rasterFileList, coor_system)
+            _log("load_TransformItems_Batch: Added %d rasters to mosaic dataset %s", True, len(rasterFileList), mosaicDS)
+        except:
+            e = sys.exc_info()[0]
+            _log("load_TransformItems_Batch: ERROR: Something went wrong when adding the rasters to the mosaic dataset " + str(mosaicDS) + ". Error Message: " + str(e) + " Backend Messages: " + str(theBackend.get_Messages()))
+            continue
+
+        # Set the time attributes in one pass
+        valuesByName = {}
+        for itemIndex, rasterFile in currentRasters:
+            rasterName = get_RasterName(rasterFile)
+            try:
+                valuesByName[rasterName] = get_Time_Attribute_Values(get_DateTime_From_RasterName(rasterName))
+            except:
+                _log("load_TransformItems_Batch: ERROR: Could not get the date of raster " + str(rasterName) + ", attributes will not be set.  Error Message: " + str(sys.exc_info()[0]))
+        updatedNames = []
+        isAttributeError = False
+        try:
+            updatedNames = theBackend.update_Mosaic_Attributes(mosaicDS, TIME_ATTRIBUTE_NAMES, valuesByName)
+            _log("load_TransformItems_Batch: Calculated attributes for %d rasters", True, len(updatedNames))
+        except:
+            e = sys.exc_info()[0]
+            isAttributeError = True
+            _log("load_TransformItems_Batch: ERROR: Error calculating attributes for mosaic dataset " + str(mosaicDS) + ", none of its " + str(len(currentRasters)) + " rasters are counted as loaded.  Error Message: " + str(e))
+
+        # Only the rasters found in the mosaic dataset count as loaded (the add call skips bad inputs with a warning, not an error)
+        updatedNames = set(updatedNames)
+        missingNames = []
+        for itemIndex, rasterFile in currentRasters:
+            if get_RasterName(rasterFile) in updatedNames:
+                numLoadedByItem[itemIndex] += 1
+            else:
+                missingNames.append(get_RasterName(rasterFile))
+        if len(missingNames) > 0 and not isAttributeError:
+            _log("load_TransformItems_Batch: ERROR: " + str(len(missingNames)) + " rasters are not in mosaic dataset " + str(mosaicDS) + " after the add, they are not counted as loaded: " + ", ".join(missingNames) + " Backend Messages: " + str(theBackend.get_Messages()))
+
+        # Statistics once, after everything is in
+        try:
+            theBackend.calculate_Mosaic_Statistics(mosaicDS)
+            _log("load_TransformItems_Batch: Calculated statistics on mosaic dataset %s", True, mosaicDS)
+        except:
+            e = sys.exc_info()[0]
+            _log("load_TransformItems_Batch: ERROR: Error calculating statistics on mosaic dataset " + str(mosaicDS) + "  Error Message: " + str(e) + " Backend Messages: " + str(theBackend.get_Messages()))
+
+    return [{'NumberLoaded': numLoaded} for numLoaded in numLoadedByItem]
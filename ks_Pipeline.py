@@ -0,0 +1,102 @@
+#-------------------------------------------------------------------------------
+# Name:        ks_Pipeline.py
+# Purpose:     Connects ETL stages with bounded queues so each item moves to
+#               the next stage as soon as the previous stage is done with it
+#               (instead of each stage waiting for the whole batch).
+#
+# Author:      SERVIR ETL
+#
+# Created:     10/18/2026 (mm/dd/yyyy)
+# Copyright:   (c) SERVIR 2026
+# Licence:     <your licence>
+#
+#-------------------------------------------------------------------------------
+
+import sys
+import threading
+import traceback
+import Queue
+
+
+# Marks the end of the input on a queue.
+_END_OF_INPUT = object()
+
+
+class StagePipeline(object):
+    '''
+        Runs one thread per stage.  Stage 'n' reads from a bounded queue, calls its function on each
+        item and puts the return value on the queue of stage 'n+1' (a return value of None is dropped).
+        Items go through every stage in the order they were put in.
+
+        constructor arguments:
+
+            stageList <list>: [(stageName, stageFunction, stageLock), ...]
+                stageLock may be None, or a lock which is held while the stage function runs
+                (give stages that must not run at the same time the same lock)
+            maxQueueSize <int>: capacity of each queue, put() blocks when the first stage falls this far behind
+            debug_logger <function>: called as debug_logger(msg) when a stage function raises
+
+        public interface:
+
+            start() <void>: starts the stage threads
+            put(item) <void>: hands an item to the first stage
+            finish() <dict>: signals the end of the input, waits for every stage to drain, and returns
+                {stageName: [return values, in order], stageName+"_Errors": [(item, error message), ...]}
+    '''
+    def __init__(self, stageList, maxQueueSize=8, debug_logger=None):
+        self.stageList = stageList
+        self.debug_logger = debug_logger
+        self._queues = [Queue.Queue(max(1, int(maxQueueSize))) for i in range(len(stageList))]
+        self._results = {}
+        self._threads = []
+        for stageName, stageFunction, stageLock in stageList:
+            self._results[stageName] = []
+            self._results[stageName + "_Errors"] = []
+
+    def _run_Stage(self, stageIndex):
+        stageName, stageFunction, stageLock = self.stageList[stageIndex]
+        inQueue = self._queues[stageIndex]
+        outQueue = None
+        if stageIndex + 1 < len(self._queues):
+            outQueue = self._queues[stageIndex + 1]
+
+        while True:
+            item = inQueue.get()
+            if item is _END_OF_INPUT:
+                if outQueue != None:
+                    outQueue.put(_END_OF_INPUT)
+                return
+            try:
+                if stageLock != None:
+                    with stageLock:
+                        result = stageFunction(item)
+                else:
+                    result = stageFunction(item)
+            except:
+                errMsg = str(sys.exc_info()[0]) + ": " + str(sys.exc_info()[1])
+                self._results[stageName + "_Errors"].append((item, errMsg))
+                if self.debug_logger != None:
+                    self.debug_logger("StagePipeline: ERROR in stage " + str(stageName) + ", " + errMsg + " " + traceback.format_exc())
+                continue
+            if result == None:
+                continue
+            self._results[stageName].append(result)
+            if outQueue != None:
+                outQueue.put(result)
+
+    def start(self):
+        for stageIndex in range(len(self.stageList)):
+            theThread = threading.Thread(target=self._run_Stage, args=(stageIndex,), name="StagePipeline_" + str(self.stageList[stageIndex][0]))
+            theThread.daemon = True
+            theThread.start()
+            self._threads.append(theThread)
+
+    def put(self, item):
+        self._queues[0].put(item)
+
+    def finish(self):
+        if len(self._queues) > 0:
+            self._queues[0].put(_END_OF_INPUT)
+        for theThread in self._threads:
+            theThread.join()
+        return self._results
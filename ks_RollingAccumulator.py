@@ -0,0 +1,326 @@
+#-------------------------------------------------------------------------------
+# Name:        ks_RollingAccumulator.py
+# Purpose:     Rolling N day accumulation (1, 3, 7, 30 day composites) of the
+#               3 hour TRMM rasters.  A running sum is kept on disk for each
+#               window, so each run only adds the granules that entered the
+#               window and subtracts the ones that left it, instead of summing
+#               every raster in the window again.
+#
+# Author:      SERVIR ETL
+#
+# Created:     10/18/2026 (mm/dd/yyyy)
+# Copyright:   (c) SERVIR 2026
+# Licence:     <your licence>
+#
+#-------------------------------------------------------------------------------
+
+import datetime
+import json
+import os
+import sys
+
+import numpy
+
+import ks_GeoTIFF
+import ks_MappedRaster
+from ks_GeoprocessingBackend import replace_File
+
+
+# DateStrings are stored in this format (sorts like the dates it represents)
+STATE_DATE_FORMAT = "%Y%m%d%H"
+
+# Composites are written as 16 bit unsigned integers (same as the arcpy custom raster factory)
+UINT16_MAX = 65535
+
+# Working memory per grid cell of a row block, on top of the running sums (the float64 values, a copy of the
+# source rows when they are not a view, and the nodata / negative value masks)
+BLOCK_BYTES_PER_CELL = 24
+
+
+# Granule values as float64, with nodata and negative (missing) values counted as 0 rain.
+# 'out' is a float64 array of the same shape to put them in (instead of a new array).
+def get_Granule_Values(theValues, nodata, out=None):
+    if out is None:
+        theArray = numpy.array(theValues, dtype=numpy.float64)
+    else:
+        theArray = out
+        theArray[...] = theValues
+    if nodata != None:
+        theArray[theValues == nodata] = 0
+    theArray[theArray < 0] = 0
+    return theArray
+
+# Reads a 3 hour granule as float64 (see get_Granule_Values), opened through 'rasterCache' (a ks_MappedRaster.RasterHandleCache)
+# when there is one.  The file is memory mapped when its layout allows it, so the only copy made is the float64 one.
+def read_Granule(rasterPath, rasterCache=None):
+    if rasterCache != None:
+        theRaster = rasterCache.get(rasterPath)
+    else:
+        theRaster = ks_MappedRaster.MappedRaster(rasterPath)
+    return get_Granule_Values(theRaster.get_Array(), theRaster.nodata), theRaster.worldFile
+
+
+# Converts a running sum to the 16 bit unsigned composite
+def get_UInt16_Composite(theSum):
+    return numpy.clip(numpy.rint(theSum), 0, UINT16_MAX).astype(numpy.uint16)
+
+
+class RollingWindow(object):
+    '''
+        Running sum for one window ('windowDays' days ending at the window end date, end date included).
+
+        The state is kept in 'stateFolder' as,
+            window_<N>day.json          DateStrings in the sum, world file, shape, update counter, name of the sum file
+            window_<N>day_<g>.npy       The float64 sum ('g' goes up by one on every save)
+        The json is written (atomically) after the new sum file, so a crash leaves the previous state in place.
+    '''
+    def __init__(self, stateFolder, windowDays):
+        self.stateFolder = stateFolder
+        self.windowDays = int(windowDays)
+        self.statePath = os.path.join(stateFolder, "window_" + str(self.windowDays) + "day.json")
+        self.sum = None
+        self.dateStrings = set()
+        self.worldFile = None
+        self.numOfIncrementalUpdates = 0
+        self.generation = 0
+
+    def load(self):
+        if not os.path.isfile(self.statePath):
+            return False
+        try:
+            with open(self.statePath, "r") as f:
+                theState = json.load(f)
+            theSum = numpy.load(os.path.join(self.stateFolder, theState['Sum_FileName']))
+            if list(theSum.shape) != list(theState['Shape']):
+                return False
+            self.sum = theSum
+            self.dateStrings = set(theState['DateStrings'])
+            self.worldFile = theState['WorldFile']
+            self.numOfIncrementalUpdates = theState['NumOfIncrementalUpdates']
+            self.generation = theState['Generation']
+            return True
+        except:
+            self.sum = None
+            self.dateStrings = set()
+            return False
+
+    def save(self):
+        oldSumFileName = None
+        if os.path.isfile(self.statePath):
+            try:
+                with open(self.statePath, "r") as f:
+                    oldSumFileName = json.load(f).get('Sum_FileName')
+            except:
+                pass
+        self.generation += 1
+        sumFileName = "window_" + str(self.windowDays) + "day_" + str(self.generation) + ".npy"
+        numpy.save(os.path.join(self.stateFolder, sumFileName), self.sum)
+        theState = {
+            'WindowDays' : self.windowDays,
+            'DateStrings' : sorted(self.dateStrings),
+            'WorldFile' : self.worldFile,
+            'Shape' : list(self.sum.shape),
+            'NumOfIncrementalUpdates' : self.numOfIncrementalUpdates,
+            'Generation' : self.generation,
+            'Sum_FileName' : sumFileName
+        }
+        tempPath = self.statePath + ".tmp"
+        with open(tempPath, "w") as f:
+            json.dump(theState, f)
+        replace_File(tempPath, self.statePath)
+        if oldSumFileName and oldSumFileName != sumFileName:
+            try:
+                os.remove(os.path.join(self.stateFolder, oldSumFileName))
+            except:
+                pass
+
+    def get_Window_DateStrings(self, granulePathsByDateString, windowEndDateTime):
+        windowStart = (windowEndDateTime - datetime.timedelta(days=self.windowDays)).strftime(STATE_DATE_FORMAT)
+        windowEnd = windowEndDateTime.strftime(STATE_DATE_FORMAT)
+        return set([ds for ds in granulePathsByDateString.keys() if ds > windowStart and ds <= windowEnd])
+
+
+class AccumulationEngine(object):
+    '''
+        Keeps one RollingWindow per window length and brings them all up to date in one pass.
+
+        constructor arguments:
+
+            stateFolder <str>: folder where the running sums are kept between runs (created if missing)
+            windowDaysList <list>: window lengths in days, like [1, 3, 7, 30]
+            maxIncrementalUpdates <int>: after this many incremental updates a window is recomputed from scratch
+                (keeps floating point error from building up)
+            debug_logger <function>: called as debug_logger(msg, detailedLoggingItem)
+            rasterCache <RasterHandleCache>: granules are opened through this cache (see ks_MappedRaster), a default one if None
+            maxMemoryBytes <int>: limit for the running sums plus the working memory of a full recompute, which sums the
+                grid in row blocks small enough to fit (None sums the whole grid at once).  Open granules are limited by rasterCache.
+
+        public interface:
+
+            update(granulePathsByDateString, windowEndDateTime) <dict>: brings every window up to date.
+                granulePathsByDateString is {'%Y%m%d%H' DateString: path to 3 hour raster} for the granules available on disk.
+                Returns {windowDays: {'Composite' (uint16 array), 'WorldFile', 'NumOfGranules', 'NumAdded', 'NumRemoved',
+                                      'Is_Full_Recompute', 'NumOfGranuleReads'}}
+            write_Composite(outRasterPath, result) <void>: writes a composite (GeoTIFF + .tfw)
+    '''
+    def __init__(self, stateFolder, windowDaysList, maxIncrementalUpdates=240, debug_logger=None, rasterCache=None, maxMemoryBytes=None):
+        self.stateFolder = stateFolder
+        self.windows = [RollingWindow(stateFolder, windowDays) for windowDays in windowDaysList]
+        self.maxIncrementalUpdates = maxIncrementalUpdates
+        self.debug_logger = debug_logger
+        self.rasterCache = rasterCache if rasterCache != None else ks_MappedRaster.RasterHandleCache()
+        self.maxMemoryBytes = maxMemoryBytes
+        self.num_Of_Granule_Reads = 0
+        self._cache = {}
+
+    def _log(self, theMsg, detailedLoggingItem=False):
+        if self.debug_logger != None:
+            self.debug_logger(theMsg, detailedLoggingItem)
+
+    # Granules added or removed incrementally are read at most once per update() call, no matter how many windows need them.
+    # A full recompute streams through the window without caching (a 30 day window is 240 full size grids), each granule
+    # is mapped, summed and closed again.
+    def _get_Granule(self, granulePath, useCache=True):
+        if granulePath in self._cache:
+            return self._cache[granulePath]
+        theGranule = read_Granule(granulePath, self.rasterCache if useCache else None)
+        self.num_Of_Granule_Reads += 1
+        if useCache:
+            self._cache[granulePath] = theGranule
+        return theGranule
+
+    # Rows of the grid summed at a time, so every window's running sum plus the working memory of one block fit in maxMemoryBytes
+    def _get_Rows_Per_Block(self, theShape):
+        numOfRows, numOfCols = theShape
+        if self.maxMemoryBytes == None:
+            return numOfRows
+        sumBytes = len(self.windows) * numOfRows * numOfCols * 8
+        rowsPerBlock = (self.maxMemoryBytes - sumBytes) // max(1, numOfCols * BLOCK_BYTES_PER_CELL)
+        if rowsPerBlock < 1:
+            self._log("AccumulationEngine: WARNING, the running sums alone (" + str(sumBytes // (1024 * 1024)) + " MB) do not fit in the memory limit (" + str(self.maxMemoryBytes // (1024 * 1024)) + " MB), summing one row at a time")
+            rowsPerBlock = 1
+        return int(min(numOfRows, rowsPerBlock))
+
+    # Sums the window again from its granules, one row block at a time (see _get_Rows_Per_Block).  Each block goes through
+    # the granules in date order, so every cell is summed in the same order as a whole grid sum (the result is the same bit
+    # for bit) and the only full size array is the sum itself.  Granules which can not be read, or have another shape than
+    # the first one, are left out (found while summing the first block).
+    def _recompute(self, theWindow, windowDateStrings, granulePathsByDateString):
+        theWindow.sum = None
+        theWindow.dateStrings = set()
+        theWindow.worldFile = None
+        theWindow.numOfIncrementalUpdates = 0
+
+        windowDateStrings = sorted(windowDateStrings)
+        rowsPerBlock = None
+        theBuffer = None
+        row0 = 0
+        while True:
+            isFirstBlock = (row0 == 0)
+            # Between blocks the granules stay open in the raster cache, a single block needs each of them once
+            useCache = rowsPerBlock != None and rowsPerBlock < theWindow.sum.shape[0]
+            row1 = row0
+            for ds in list(windowDateStrings):
+                granulePath = granulePathsByDateString[ds]
+                try:
+                    theRaster = self.rasterCache.get(granulePath) if useCache else ks_MappedRaster.MappedRaster(granulePath)
+                except:
+                    if not isFirstBlock:
+                        self._log("AccumulationEngine: ERROR, could not read granule " + str(granulePath) + " (rows from " + str(row0) + "), the " + str(theWindow.windowDays) + " day window can not be summed.  Error Message: " + str(sys.exc_info()[1]))
+                        raise
+                    self._log("AccumulationEngine: ERROR, could not read granule " + str(granulePath) + ", it is left out of the " + str(theWindow.windowDays) + " day window.  Error Message: " + str(sys.exc_info()[1]))
+                    windowDateStrings.remove(ds)
+                    continue
+                if theWindow.sum is None:
+                    theWindow.sum = numpy.zeros(theRaster.shape, dtype=numpy.float64)
+                    theWindow.worldFile = list(theRaster.worldFile) if theRaster.worldFile != None else None
+                    rowsPerBlock = self._get_Rows_Per_Block(theRaster.shape)
+                    theBuffer = numpy.empty((rowsPerBlock, theRaster.shape[1]), dtype=numpy.float64)
+                if theRaster.shape != theWindow.sum.shape:
+                    self._log("AccumulationEngine: ERROR, granule " + str(granulePath) + " has shape " + str(theRaster.shape) + ", expected " + str(theWindow.sum.shape) + ", it is left out of the " + str(theWindow.windowDays) + " day window.")
+                    windowDateStrings.remove(ds)
+                    continue
+                row1 = min(theWindow.sum.shape[0], row0 + rowsPerBlock)
+                theWindow.sum[row0:row1] += get_Granule_Values(theRaster.read_Rows(row0, row1), theRaster.nodata, theBuffer[:row1 - row0])
+                if isFirstBlock:
+                    self.num_Of_Granule_Reads += 1
+                    theWindow.dateStrings.add(ds)
+            if theWindow.sum is None or row1 >= theWindow.sum.shape[0]:
+                break
+            row0 = row1
+        if theWindow.sum is not None and rowsPerBlock < theWindow.sum.shape[0]:
+            self._log("AccumulationEngine: " + str(theWindow.windowDays) + " day window summed in blocks of " + str(rowsPerBlock) + " rows", True)
+
+    def _add(self, theWindow, ds, granulePath, sign=1, useCache=True):
+        try:
+            theArray, theWorldFile = self._get_Granule(granulePath, useCache)
+        except:
+            self._log("AccumulationEngine: ERROR, could not read granule " + str(granulePath) + ", it is left out of the " + str(theWindow.windowDays) + " day window.  Error Message: " + str(sys.exc_info()[1]))
+            return False
+        if theWindow.sum is None:
+            theWindow.sum = numpy.zeros(theArray.shape, dtype=numpy.float64)
+            theWindow.worldFile = list(theWorldFile) if theWorldFile != None else None
+        if theArray.shape != theWindow.sum.shape:
+            self._log("AccumulationEngine: ERROR, granule " + str(granulePath) + " has shape " + str(theArray.shape) + ", expected " + str(theWindow.sum.shape) + ", it is left out of the " + str(theWindow.windowDays) + " day window.")
+            return False
+        if sign > 0:
+            theWindow.sum += theArray
+            theWindow.dateStrings.add(ds)
+        else:
+            theWindow.sum -= theArray
+            theWindow.dateStrings.discard(ds)
+        return True
+
+    def update(self, granulePathsByDateString, windowEndDateTime):
+        if not os.path.isdir(self.stateFolder):
+            os.makedirs(self.stateFolder)
+        self._cache = {}
+        self.num_Of_Granule_Reads = 0
+
+        results = {}
+        for theWindow in self.windows:
+            readsBefore = self.num_Of_Granule_Reads
+            windowDateStrings = theWindow.get_Window_DateStrings(granulePathsByDateString, windowEndDateTime)
+            theWindow.load()
+            toAdd = sorted(windowDateStrings - theWindow.dateStrings)
+            toRemove = sorted(theWindow.dateStrings - windowDateStrings)
+
+            # Subtracting needs the granules that left the window, they may have been cleaned up already.
+            isFullRecompute = (theWindow.sum is None or
+                               len(toAdd) + len(toRemove) >= len(windowDateStrings) or
+                               theWindow.numOfIncrementalUpdates >= self.maxIncrementalUpdates or
+                               len([ds for ds in toRemove if not ds in granulePathsByDateString]) > 0)
+            if isFullRecompute:
+                self._recompute(theWindow, windowDateStrings, granulePathsByDateString)
+            else:
+                for ds in toRemove:
+                    if not self._add(theWindow, ds, granulePathsByDateString[ds], -1):
+                        # Can not take it back out, start over
+                        isFullRecompute = True
+                        self._recompute(theWindow, windowDateStrings, granulePathsByDateString)
+                        break
+                if not isFullRecompute:
+                    for ds in toAdd:
+                        self._add(theWindow, ds, granulePathsByDateString[ds])
+                    if len(toAdd) + len(toRemove) > 0:
+                        theWindow.numOfIncrementalUpdates += 1
+
+            if theWindow.sum is None:
+                self._log("AccumulationEngine: No granules in the " + str(theWindow.windowDays) + " day window ending " + str(windowEndDateTime))
+                continue
+            theWindow.save()
+            self._log("AccumulationEngine: " + str(theWindow.windowDays) + " day window, " + str(len(theWindow.dateStrings)) + " granules, added " + str(len(toAdd)) + ", removed " + str(len(toRemove)) + ", full recompute: " + str(isFullRecompute), True)
+            results[theWindow.windowDays] = {
+                'Composite' : get_UInt16_Composite(theWindow.sum),
+                'WorldFile' : theWindow.worldFile,
+                'NumOfGranules' : len(theWindow.dateStrings),
+                'NumAdded' : len(toAdd),
+                'NumRemoved' : len(toRemove),
+                'Is_Full_Recompute' : isFullRecompute,
+                'NumOfGranuleReads' : self.num_Of_Granule_Reads - readsBefore
+            }
+        self._cache = {}
+        return results
+
+    def write_Composite(self, outRasterPath, result):
+        ks_GeoTIFF.write_GeoTIFF(outRasterPath, result['Composite'], result['WorldFile'])
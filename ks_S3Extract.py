@@ -0,0 +1,341 @@
+#-------------------------------------------------------------------------------
+# Name:        ks_S3Extract.py
+# Purpose:     Amazon S3 support for the extract step.  Lists only the part of
+#               a date ordered prefix that falls inside the requested window,
+#               and downloads objects on a pool of keep-alive connections with
+#               retries and HTTP Range resume.
+#
+# Author:      SERVIR ETL
+#
+# Created:     10/18/2026 (mm/dd/yyyy)
+# Copyright:   (c) SERVIR 2026
+# Licence:     <your licence>
+#
+#-------------------------------------------------------------------------------
+
+import datetime
+import httplib
+import os
+import random
+import re
+import socket
+import sys
+import threading
+import time
+import urlparse
+from multiprocessing.pool import ThreadPool
+
+import ks_DateIndex
+import ks_StreamingDownload
+
+
+# Builds the S3 'marker' (list everything after this key) for a start date.
+#   The key template is learned from 'sampleKey', everything in front of the date is kept and the date is replaced by the start date.
+#   Returns "" (list from the beginning) if no date is found in the sample key.
+def get_StartAfter_Marker(sampleKey, compiled_RegExp, startDateTime, date_Format):
+    theMatch = compiled_RegExp.search(sampleKey)
+    if theMatch == None:
+        return ""
+    return sampleKey[:theMatch.start()] + startDateTime.strftime(date_Format)
+
+
+# Returns the first key under the prefix, or None if the prefix is empty.
+def get_First_Key(s3_Bucket, s3_PathToFiles):
+    firstPage = s3_Bucket.get_all_keys(prefix=s3_PathToFiles, max_keys=1)
+    for s3_Item in firstPage:
+        return s3_Item.key
+    return None
+
+
+# Generator, yields the keys under 's3_PathToFiles' whose embedded date is in (startDateTime, endDateTime].
+#
+#   Keys in a prefix come back from S3 in lexical order.  When the keys share one naming scheme with a
+#   sortable date (like '%Y%m%d%H'), lexical order is date order, so,
+#       - listing starts after a marker built from the start date (earlier keys are never listed), and
+#       - listing stops at the first key of the same naming scheme that is past the end date.
+#   Pages are fetched lazily by boto's bucket.list(), filtering happens as each page arrives.
+#   Set 'is_Date_Ordered_Prefix' to False when the prefix mixes naming schemes, every key is then listed and filtered.
+def iter_Keys_Within_DateRange(s3_Bucket, s3_PathToFiles, startDateTime, endDateTime, regExp_Pattern, date_Format, is_Date_Ordered_Prefix=True):
+    compiled_RegExp = re.compile(regExp_Pattern)
+    parse_DateString = ks_DateIndex.get_DateString_Parser(date_Format)
+
+    theMarker = ""
+    leadingText = None
+    if is_Date_Ordered_Prefix:
+        sampleKey = get_First_Key(s3_Bucket, s3_PathToFiles)
+        if sampleKey == None:
+            return
+        theMarker = get_StartAfter_Marker(sampleKey, compiled_RegExp, startDateTime, date_Format)
+        sampleMatch = compiled_RegExp.search(sampleKey)
+        if sampleMatch != None:
+            leadingText = sampleKey[:sampleMatch.start()]
+
+    for s3_Item in s3_Bucket.list(prefix=s3_PathToFiles, marker=theMarker):
+        currKey = s3_Item.key
+        theMatch = compiled_RegExp.search(currKey)
+        if theMatch == None:
+            continue
+        try:
+            currDateTime = parse_DateString(theMatch.group(0))
+        except ValueError:
+            continue
+        if currDateTime > endDateTime:
+            if leadingText != None and currKey[:theMatch.start()] == leadingText:
+                # Same naming scheme, so every key after this one is later still.
+                break
+            continue
+        if currDateTime > startDateTime:
+            yield currKey
+
+
+# Errors that mean the transfer was interrupted and can be retried (resuming with a Range request)
+TRANSIENT_ERRORS = (socket.error, httplib.HTTPException, IOError)
+
+# HTTP statuses worth retrying, anything else that is not 200/206 fails straight away.
+RETRY_STATUSES = (408, 429, 500, 502, 503, 504)
+
+
+# Raised for an HTTP status which should not be retried (404, 403, ...)
+class S3FetchError(Exception):
+    pass
+
+
+# Raised when a transfer stops before all the bytes arrive.
+class S3IncompleteTransfer(Exception):
+    pass
+
+
+# Returns the total object size from a 'Content-Range: bytes 100-199/200' header, or None.
+def get_Total_From_ContentRange(contentRange):
+    try:
+        return int(contentRange.split("/")[-1])
+    except:
+        return None
+
+# Returns the first byte from a 'Content-Range: bytes 100-199/200' header, or None.
+def get_Start_From_ContentRange(contentRange):
+    try:
+        return int(contentRange.split(" ")[-1].split("-")[0])
+    except:
+        return None
+
+
+class S3FetchEngine(object):
+    '''
+        Downloads S3 objects (by key) on a pool of worker threads.  Each worker keeps one
+        keep-alive HTTP(S) connection to the bucket host and reuses it for every object it fetches.
+
+        S3FetchEngine.fetch_Object(key, outPath, isGZip, computeHash)    Download (and gunzip) one object, returns a result object
+        S3FetchEngine.imap_Objects(list, isGZip, computeHash)            Iterator of result objects for [(key, outPath), ...], in the input order
+        S3FetchEngine.close()                                             Closes every connection the engine opened (imap_Objects does this when it is done)
+
+        A transfer that is cut off part way is retried with exponential backoff, and the retry
+        asks for the rest of the object with a Range header (the gzip decoder and hash carry on
+        from where they stopped).  If the server ignores the Range header, or answers with a range
+        that does not start where the transfer stopped, the object starts over.
+
+        Each result object has these,
+            'Key', 'OutFilePath', 'IsDownloaded', 'ErrorMessage', 'Attempts',
+            'Bytes_Downloaded'  Bytes received on the wire
+            'Bytes_Written'     Bytes written to disk (after gunzip)
+            'Checksum'          SHA-256 of the written file (None unless computeHash)
+            'Latency_Seconds'   Time from the first request to the first response header
+            'Elapsed_Seconds'   Total time spent on the object
+            'Bytes_Per_Second'  Bytes_Downloaded / Elapsed_Seconds
+    '''
+    def __init__(self, s3BucketRootPath, num_workers=4, max_retries=4, backoff_base_seconds=1.0, timeout=60, bufferSize=ks_StreamingDownload.DEFAULT_BUFFER_SIZE, debug_logger=None):
+        theURL = urlparse.urlsplit(s3BucketRootPath)
+        self.scheme = theURL.scheme
+        self.host = theURL.netloc
+        self.root_path = theURL.path
+        self.num_workers = max(1, int(num_workers))
+        self.max_retries = int(max_retries)
+        self.backoff_base_seconds = float(backoff_base_seconds)
+        self.timeout = float(timeout)
+        self.buffer_size = bufferSize
+        self.debug_logger = debug_logger
+        self._local = threading.local()
+        # Every connection opened by any worker thread, so close() can reach them all
+        self._connections = []
+        self._connections_Lock = threading.Lock()
+
+    def _log(self, theMsg, detailedLoggingItem=False):
+        if self.debug_logger != None:
+            self.debug_logger(theMsg, detailedLoggingItem)
+
+    def _get_Connection(self):
+        theConnection = getattr(self._local, 'connection', None)
+        if theConnection == None:
+            if self.scheme == "https":
+                theConnection = httplib.HTTPSConnection(self.host, timeout=self.timeout)
+            else:
+                theConnection = httplib.HTTPConnection(self.host, timeout=self.timeout)
+            self._local.connection = theConnection
+            with self._connections_Lock:
+                self._connections.append(theConnection)
+        return theConnection
+
+    # Closes the connection of the calling thread (after an error, the next request opens a new one)
+    def _drop_Connection(self):
+        theConnection = getattr(self._local, 'connection', None)
+        if theConnection != None:
+            theConnection.close()
+            self._local.connection = None
+            with self._connections_Lock:
+                if theConnection in self._connections:
+                    self._connections.remove(theConnection)
+
+    def close(self):
+        with self._connections_Lock:
+            theConnections = self._connections
+            self._connections = []
+        for theConnection in theConnections:
+            theConnection.close()
+
+    # Same as Extract_Support_s3_Make_URL_From_Key, but only the path part of the URL.
+    def get_Path_For_Key(self, s3Key):
+        return self.root_path + s3Key
+
+    def _sleep_Before_Retry(self, attempt):
+        time.sleep(self.backoff_base_seconds * (2 ** (attempt - 1)) * (0.5 + random.random()))
+
+    def fetch_Object(self, s3Key, outFilePath, isGZip=True, computeHash=False):
+        retObj = {
+            'Key' : s3Key,
+            'OutFilePath' : outFilePath,
+            'IsDownloaded' : False,
+            'ErrorMessage' : "",
+            'Attempts' : 0,
+            'Bytes_Downloaded' : 0,
+            'Bytes_Written' : 0,
+            'Checksum' : None,
+            'Latency_Seconds' : None,
+            'Elapsed_Seconds' : 0.0,
+            'Bytes_Per_Second' : 0.0
+        }
+        thePath = self.get_Path_For_Key(s3Key)
+        theWriter = ks_StreamingDownload.StreamWriter(outFilePath, isGZip, computeHash, self.buffer_size)
+        timeStart = time.time()
+        expectedTotal = None
+
+        while retObj['Attempts'] <= self.max_retries:
+            retObj['Attempts'] += 1
+            try:
+                headers = {"Connection" : "keep-alive"}
+                if theWriter.bytes_In > 0:
+                    headers["Range"] = "bytes=%d-" % theWriter.bytes_In
+                theConnection = self._get_Connection()
+                theConnection.request("GET", thePath, headers=headers)
+                theResponse = theConnection.getresponse()
+                if retObj['Latency_Seconds'] == None:
+                    retObj['Latency_Seconds'] = time.time() - timeStart
+
+                if theResponse.status == 206:
+                    contentRange = theResponse.getheader("content-range", "")
+                    rangeStart = get_Start_From_ContentRange(contentRange)
+                    if rangeStart != theWriter.bytes_In:
+                        # Not the rest of the object, the next attempt starts over without a Range header.
+                        rangeMessage = "Content-Range '" + str(contentRange) + "' does not start at byte " + str(theWriter.bytes_In) + ", starting over"
+                        theWriter.abort()
+                        theWriter = ks_StreamingDownload.StreamWriter(outFilePath, isGZip, computeHash, self.buffer_size)
+                        raise S3IncompleteTransfer(rangeMessage)
+                    expectedTotal = get_Total_From_ContentRange(contentRange)
+                elif theResponse.status == 200:
+                    if theWriter.bytes_In > 0:
+                        # The server sent the whole object again, start over.
+                        theWriter.abort()
+                        theWriter = ks_StreamingDownload.StreamWriter(outFilePath, isGZip, computeHash, self.buffer_size)
+                    contentLength = theResponse.getheader("content-length")
+                    expectedTotal = None
+                    if contentLength != None:
+                        expectedTotal = int(contentLength)
+                else:
+                    theResponse.read()
+                    if theResponse.status in RETRY_STATUSES:
+                        raise S3IncompleteTransfer("HTTP " + str(theResponse.status))
+                    raise S3FetchError("HTTP " + str(theResponse.status) + " " + str(theResponse.reason))
+
+                while True:
+                    chunk = theResponse.read(self.buffer_size)
+                    if not chunk:
+                        break
+                    theWriter.write(chunk)
+
+                if expectedTotal != None and theWriter.bytes_In < expectedTotal:
+                    raise S3IncompleteTransfer("Received " + str(theWriter.bytes_In) + " of " + str(expectedTotal) + " bytes")
+
+                try:
+                    retObj['Checksum'] = theWriter.finish()
+                except IOError:
+                    # All the bytes the server has arrived, so the object itself is bad, fetching it again will not help.
+                    raise S3FetchError(str(sys.exc_info()[1]))
+                retObj['IsDownloaded'] = True
+                retObj['ErrorMessage'] = ""
+                break
+
+            except S3FetchError:
+                retObj['ErrorMessage'] = str(sys.exc_info()[1])
+                self._drop_Connection()
+                break
+            except (S3IncompleteTransfer,) + TRANSIENT_ERRORS:
+                retObj['ErrorMessage'] = str(sys.exc_info()[0].__name__) + ": " + str(sys.exc_info()[1])
+                self._drop_Connection()
+                if retObj['Attempts'] <= self.max_retries:
+                    self._log("S3FetchEngine.fetch_Object: Attempt " + str(retObj['Attempts']) + " for " + str(s3Key) + " stopped at byte " + str(theWriter.bytes_In) + " (" + retObj['ErrorMessage'] + "), retrying", True)
+                    self._sleep_Before_Retry(retObj['Attempts'])
+            except:
+                retObj['ErrorMessage'] = "Unexpected error: " + str(sys.exc_info()[0])
+                self._drop_Connection()
+                break
+
+        if not retObj['IsDownloaded']:
+            theWriter.abort()
+            try:
+                os.remove(outFilePath)
+            except:
+                pass
+
+        retObj['Bytes_Downloaded'] = theWriter.bytes_In
+        retObj['Bytes_Written'] = theWriter.bytes_Out
+        retObj['Elapsed_Seconds'] = time.time() - timeStart
+        if retObj['Elapsed_Seconds'] > 0:
+            retObj['Bytes_Per_Second'] = retObj['Bytes_Downloaded'] / retObj['Elapsed_Seconds']
+        return retObj
+
+    def imap_Objects(self, keyAndOutPath_List, isGZip=True, computeHash=False):
+        workerPool = ThreadPool(self.num_workers)
+        try:
+            for currResult in workerPool.imap(lambda ko: self.fetch_Object(ko[0], ko[1], isGZip, computeHash), keyAndOutPath_List):
+                yield currResult
+        finally:
+            workerPool.close()
+            workerPool.join()
+            # The worker threads are gone, their keep-alive connections are not
+            self.close()
+
+
+# Returns the p-th percentile (0-100) of a list of numbers (nearest rank), or None for an empty list.
+def get_Percentile(theValues, p):
+    if len(theValues) == 0:
+        return None
+    sortedValues = sorted(theValues)
+    rank = int(round((p / 100.0) * (len(sortedValues) - 1)))
+    return sortedValues[rank]
+
+
+# Summarize a list of fetch_Object results for the final log report.
+def get_Download_Stats(fetchResults_List):
+    downloaded = [r for r in fetchResults_List if r['IsDownloaded']]
+    latencies = [r['Latency_Seconds'] for r in downloaded if r['Latency_Seconds'] != None]
+    rates = [r['Bytes_Per_Second'] for r in downloaded]
+    totalBytes = sum([r['Bytes_Downloaded'] for r in downloaded])
+    return {
+        'Objects_Requested' : len(fetchResults_List),
+        'Objects_Downloaded' : len(downloaded),
+        'Objects_Retried' : len([r for r in fetchResults_List if r['Attempts'] > 1]),
+        'Bytes_Downloaded' : totalBytes,
+        'Latency_Seconds_p50' : get_Percentile(latencies, 50),
+        'Latency_Seconds_p95' : get_Percentile(latencies, 95),
+        'Bytes_Per_Second_p50' : get_Percentile(rates, 50),
+        'Bytes_Per_Second_Per_Object_Mean' : (sum(rates) / len(rates)) if len(rates) > 0 else 0.0
+    }
@@ -0,0 +1,106 @@
+#-------------------------------------------------------------------------------
+# Name:        ks_StreamingDownload.py
+# Purpose:     Chunked download and gzip decompression helpers.  Data moves
+#               from the network (or a .gz file) to disk one buffer at a time,
+#               so peak memory depends on the buffer size, not the file size.
+#
+# Author:      SERVIR ETL
+#
+# Created:     10/18/2026 (mm/dd/yyyy)
+# Copyright:   (c) SERVIR 2026
+# Licence:     <your licence>
+#
+#-------------------------------------------------------------------------------
+
+import gzip
+import hashlib
+import shutil
+import struct
+import zlib
+
+
+DEFAULT_BUFFER_SIZE = 65536
+
+
+# Decompress a single member .gz file to outFilePath without holding the whole file in memory.
+def decompress_GZip_File(inFilePath, outFilePath, bufferSize=DEFAULT_BUFFER_SIZE):
+    inF = gzip.open(inFilePath, 'rb')
+    try:
+        with open(outFilePath, 'wb') as outF:
+            shutil.copyfileobj(inF, outF, bufferSize)
+    finally:
+        inF.close()
+
+
+class StreamWriter(object):
+    '''
+        Writes chunks to a file as they arrive, optionally passing them through a
+        streaming gzip decoder first and hashing the (decompressed) output.
+
+        StreamWriter.write(chunk)     Decode (if gzip) and write a chunk of the input stream
+        StreamWriter.finish()         Flush the decoder, close the file, return the SHA-256 hex string (or None)
+                                       For gzip, raises IOError if the CRC32 or size in the gzip trailer
+                                       (the last 8 bytes of the input) do not match what was written,
+                                       which is what a truncated .gz looks like.
+        StreamWriter.abort()          Close the file without flushing
+        StreamWriter.bytes_In         Number of (compressed) bytes received
+        StreamWriter.bytes_Out        Number of bytes written to disk
+    '''
+    def __init__(self, outFilePath, isGZip=True, computeHash=False, bufferSize=DEFAULT_BUFFER_SIZE):
+        self.outFilePath = outFilePath
+        self.buffer_size = bufferSize
+        self.bytes_In = 0
+        self.bytes_Out = 0
+        self._decompressor = None
+        self._crc = 0
+        self._tail = ""
+        if isGZip:
+            # 16 + MAX_WBITS tells zlib to expect a gzip header.  A stream that stops early just
+            # stops producing output though, so finish() checks the trailer itself.
+            self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self._hash = None
+        if computeHash:
+            self._hash = hashlib.sha256()
+        self._outF = open(outFilePath, 'wb')
+
+    def _write_Out(self, data):
+        if not data:
+            return
+        self._outF.write(data)
+        self.bytes_Out += len(data)
+        if self._decompressor != None:
+            self._crc = zlib.crc32(data, self._crc)
+        if self._hash != None:
+            self._hash.update(data)
+
+    def write(self, chunk):
+        self.bytes_In += len(chunk)
+        if self._decompressor == None:
+            self._write_Out(chunk)
+            return
+        # The gzip trailer is the last 8 bytes of the stream (CRC32 and size of the output, little endian)
+        self._tail = (self._tail + chunk[-8:])[-8:]
+        # Limit each decompress call to one buffer of output, so a highly compressed chunk can not blow up memory.
+        self._write_Out(self._decompressor.decompress(chunk, self.buffer_size))
+        while self._decompressor.unconsumed_tail:
+            self._write_Out(self._decompressor.decompress(self._decompressor.unconsumed_tail, self.buffer_size))
+
+    def finish(self):
+        if self._decompressor != None:
+            self._write_Out(self._decompressor.flush())
+        self._outF.close()
+        if self._decompressor != None:
+            self._check_GZip_Trailer()
+        if self._hash == None:
+            return None
+        return self._hash.hexdigest()
+
+    def abort(self):
+        self._outF.close()
+
+    def _check_GZip_Trailer(self):
+        if len(self._tail) < 8:
+            raise IOError("Truncated gzip stream: " + str(self.bytes_In) + " bytes received, no trailer (" + str(self.outFilePath) + ")")
+        trailerCRC, trailerSize = struct.unpack("<II", self._tail)
+        if trailerCRC != (self._crc & 0xffffffff) or trailerSize != (self.bytes_Out & 0xffffffff):
+            raise IOError("Truncated or corrupt gzip stream: " + str(self.bytes_In) + " bytes received, " + str(self.bytes_Out) + " bytes written, trailer does not match (" + str(self.outFilePath) + ")")
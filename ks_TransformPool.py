@@ -0,0 +1,183 @@
+#-------------------------------------------------------------------------------
+# Name:        ks_TransformPool.py
+# Purpose:     Transform step (copy raster, color map, coordinate system) for
+#               one granule, and a process pool which transforms several
+#               granules at once.  Each worker process has its own
+#               geoprocessing backend and its own scratch subfolder, results
+#               come back in the same order the granules went in.
+#               New rasters can be written in a single pass (pixels,
+#               coordinate system and color map together, see
+#               GeoprocessingBackend.write_Raster) instead of being rewritten
+#               by each of the three steps (local backend).
+#
+# Author:      SERVIR ETL
+#
+# Created:     10/18/2026 (mm/dd/yyyy)
+# Copyright:   (c) SERVIR 2026
+# Licence:     <your licence>
+#
+#-------------------------------------------------------------------------------
+
+import multiprocessing
+import os
+import sys
+import time
+
+import ks_GeoprocessingBackend
+
+
+# {path: (size, mtime)} of a raster file and the sidecar files next to it (only the ones that exist)
+def _get_Raster_File_Stats(rasterPath):
+    theStats = {}
+    basePath = os.path.splitext(rasterPath)[0]
+    for thePath in [rasterPath] + [basePath + theExtension for theExtension in ks_GeoprocessingBackend.RASTER_SIDECAR_EXTENSIONS]:
+        try:
+            theStat = os.stat(thePath)
+        except OSError:
+            continue
+        theStats[thePath] = (theStat.st_size, theStat.st_mtime)
+    return theStats
+
+# Size of the files which are new or changed between two _get_Raster_File_Stats
+def _get_Bytes_Written(statsBefore, statsAfter):
+    bytesWritten = 0
+    for thePath, theStat in statsAfter.items():
+        if statsBefore.get(thePath) != theStat:
+            bytesWritten += theStat[0]
+    return bytesWritten
+
+
+def transform_Granule(theBackend, coor_system, varList, dateSTR, extFileList, rasterOutputLocation, colorMapLocation, isSinglePassWrite=False):
+    '''
+        theBackend <GeoprocessingBackend>: does the actual geoprocessing
+        varList <list>: variable dictionaries ("variable_name", "file_prefix", "file_suffix", "mosaic_name", "primary_date_field")
+        dateSTR <str>: DateString of the granule
+        extFileList <list>: files extracted for the granule
+        rasterOutputLocation <str>: folder the transformed rasters are written to
+        colorMapLocation <str>: '.clr' file applied to every raster
+        isSinglePassWrite <bool>: True writes each new raster with GeoprocessingBackend.write_Raster (the color map is parsed
+                                  once per process, the local backend writes the raster once), False copies it and then applies the color map and coordinate system.
+                                  A raster which is already at the output location always goes through the separate steps.
+
+        Returns {'Transformed_File_List' (list of {"out_raster_file_location", "mosaic_ds_name", "primary_date_field"}),
+                 'Log_Messages' (list of (msg, detailedLoggingItem, msgArgs), msg is a format string filled in with msgArgs
+                 only if the message is logged), 'ErrorMessage' ("" when every variable went through),
+                 'Bytes_Written' (size of the raster and sidecar files written for the granule, when they are files on disk)}
+        Nothing is logged here (this may run in a worker process), the caller logs 'Log_Messages'.
+    '''
+    outputVarFileList = []
+    logMessages = []
+    errorMessages = []
+    bytesWritten = 0
+
+    colorMap = None
+    if isSinglePassWrite:
+        try:
+            colorMap = ks_GeoprocessingBackend.get_ColorMap(colorMapLocation)
+        except:
+            logMessages.append(("Transform_Do_Transform_CopyRaster: Error reading color map : %s Error Message: %s, rasters are written without a color map", False, (colorMapLocation, str(sys.exc_info()[1]))))
+
+    # Extracted files by name, so each variable is one lookup instead of a scan of the list
+    extFilesByBaseName = {}
+    for aName in extFileList:
+        extFilesByBaseName[os.path.basename(aName)] = aName
+
+    # The way this is set up is if a single zip contains multiple files.. for TRMM, there is only a single file in the zip..
+    # Keeping the code as it is, so it can be flexible to handle other cases in the future.
+    for varDict in varList:
+        raster_name = varDict["file_prefix"] + dateSTR + varDict["file_suffix"]
+        raster_file = extFilesByBaseName.get(raster_name)
+        if raster_file == None:
+            logMessages.append(("Transform_Do_Transform_CopyRaster No file found for expected raster_base_name, %s...skipping...", True, (raster_name,)))
+            continue
+
+        # One variable failing does not stop the others
+        try:
+            out_raster = os.path.join(rasterOutputLocation, raster_name)
+            statsBefore = _get_Raster_File_Stats(out_raster)
+            # Perform the actual conversion (If the file already exists, this process breaks.)
+            if not theBackend.exists(out_raster):
+                if isSinglePassWrite:
+                    srName = theBackend.write_Raster(raster_file, out_raster, coor_system, colorMap)
+                    logMessages.append(("Transform_Do_Transform_CopyRaster: Wrote %s to %s with coordinate system: %s%s", True, (raster_name, out_raster, srName, " and color map" if colorMap != None else "")))
+                else:
+                    theBackend.copy_Raster(raster_file, out_raster)
+                    logMessages.append(("Transform_Do_Transform_CopyRaster: Copied %s to %s", True, (raster_name, out_raster)))
+                isWritten = isSinglePassWrite
+            else:
+                logMessages.append(("Transform_Do_Transform_CopyRaster: Raster, %s already exists at output location of: %s", True, (raster_name, out_raster)))
+                isWritten = False
+
+            if not isWritten:
+                # Apply a color map
+                try:
+                    theBackend.add_Colormap(out_raster, colorMapLocation)
+                    logMessages.append(("Transform_Do_Transform_CopyRaster: Color Map has been applied to %s", True, (out_raster,)))
+                except:
+                    logMessages.append(("Transform_Do_Transform_CopyRaster: Error Applying color map to raster : %s ArcPy Error Message: %s", False, (out_raster, theBackend.get_Messages())))
+
+                # Define the coordinate system
+                srName = theBackend.define_Projection(out_raster, coor_system)
+                logMessages.append(("Transform_Do_Transform_CopyRaster: Defined coordinate system: %s", True, (srName,)))
+            bytesWritten += _get_Bytes_Written(statsBefore, _get_Raster_File_Stats(out_raster))
+
+            outputVarFileList.append({
+                "out_raster_file_location":out_raster,
+                "mosaic_ds_name":varDict["mosaic_name"],
+                "primary_date_field":varDict["primary_date_field"]
+            })
+        except:
+            errorMessages.append(str(raster_name) + ": " + str(sys.exc_info()[0]) + " " + str(sys.exc_info()[1]) + " " + str(theBackend.get_Messages()))
+
+    return {
+        'Transformed_File_List' : outputVarFileList,
+        'Log_Messages' : logMessages,
+        'ErrorMessage' : "|  ".join(errorMessages),
+        'Bytes_Written' : bytesWritten
+    }
+
+
+# Set in each worker process by _init_Worker
+_g_Worker_Backend = None
+
+def _init_Worker(backendName, scratchFolder):
+    global _g_Worker_Backend
+    workerScratchFolder = os.path.join(scratchFolder, "worker_" + str(os.getpid()))
+    if not os.path.isdir(workerScratchFolder):
+        os.makedirs(workerScratchFolder)
+    _g_Worker_Backend = ks_GeoprocessingBackend.get_Backend(backendName)
+    _g_Worker_Backend.set_Scratch_Workspace(workerScratchFolder)
+
+def _transform_In_Worker(granuleArgs):
+    timeStart = time.time()
+    try:
+        theResult = transform_Granule(_g_Worker_Backend, *granuleArgs)
+    except:
+        theResult = {'Transformed_File_List': [], 'Log_Messages': [], 'ErrorMessage': "Unexpected error: " + str(sys.exc_info()[0]) + " " + str(sys.exc_info()[1]), 'Bytes_Written': 0}
+    theResult['Elapsed_Seconds'] = time.time() - timeStart
+    theResult['Worker'] = os.getpid()
+    return theResult
+
+
+class TransformPool(object):
+    '''
+        TransformPool(backendName, numOfWorkers, scratchFolder)
+
+        TransformPool.imap_Granules(granuleArgsList)   Iterator of transform_Granule results (plus 'Elapsed_Seconds' and 'Worker'),
+                                                       in the same order as granuleArgsList.  Each item of granuleArgsList is the
+                                                       transform_Granule arguments after theBackend, as a tuple.
+        TransformPool.close()                          Waits for the workers to finish and stops them
+
+        Workers are processes, each makes its own backend (by name, see ks_GeoprocessingBackend.get_Backend) and
+        uses 'scratchFolder'/worker_<pid> as its scratch workspace.  An error in one granule only fails that granule.
+    '''
+    def __init__(self, backendName, numOfWorkers, scratchFolder):
+        self.numOfWorkers = max(1, int(numOfWorkers))
+        self._pool = multiprocessing.Pool(self.numOfWorkers, _init_Worker, (backendName, scratchFolder))
+
+    def imap_Granules(self, granuleArgsList):
+        return self._pool.imap(_transform_In_Worker, granuleArgsList)
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()